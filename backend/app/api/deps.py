@@ -0,0 +1,67 @@
+"""
+Shared API dependencies for database-backed services
+"""
+import functools
+from typing import Any, AsyncIterator, Optional
+
+from fastapi import Depends
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import get_db, get_async_session_factory
+from app.services.async_content_service import AsyncContentService
+from app.services.async_template_service import AsyncTemplateService
+from app.services.content_service import ContentService
+from app.services.template_service import TemplateService
+
+
+class ThreadedService:
+    """
+    Wrap a sync service so its methods are awaitable
+
+    Each call runs in the threadpool, so blocking queries never run on the
+    event loop. Calls are awaited one at a time, so the wrapped Session is
+    never used from two threads at once.
+    """
+
+    def __init__(self, service: Any):
+        self._service = service
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._service, name)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def call(*args, **kwargs):
+            return await run_in_threadpool(attribute, *args, **kwargs)
+
+        return call
+
+
+async def _no_sync_session() -> None:
+    """Stands in for get_db in async mode so no sync Session is opened"""
+    return None
+
+
+# Resolved once at import, so get_db (and its test overrides) is only used by the sync layer
+_sync_session = _no_sync_session if settings.DATABASE_ASYNC_ENABLED else get_db
+
+
+async def get_content_service(db: Optional[Session] = Depends(_sync_session)) -> AsyncIterator[Any]:
+    """Get the content service for the configured database layer (methods are awaitable)"""
+    if settings.DATABASE_ASYNC_ENABLED:
+        async with get_async_session_factory()() as session:
+            yield AsyncContentService(session)
+    else:
+        yield ThreadedService(ContentService(db))
+
+
+async def get_template_service(db: Optional[Session] = Depends(_sync_session)) -> AsyncIterator[Any]:
+    """Get the template service for the configured database layer (methods are awaitable)"""
+    if settings.DATABASE_ASYNC_ENABLED:
+        async with get_async_session_factory()() as session:
+            yield AsyncTemplateService(session)
+    else:
+        yield ThreadedService(TemplateService(db))
@@ -2,8 +2,11 @@
 API v1 router
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from app.api.v1.endpoints import template, content
+from app.core.auth_middleware import get_current_user
+from app.core.database import get_pool_stats
+from app.models.user import User
 
 # Create main API router
 api_router = APIRouter()
@@ -21,4 +24,11 @@ async def health_check():
         "status": "healthy",
         "service": "ai-blog-assistant-api",
         "version": "1.0.0"
-    }
\ No newline at end of file
+    }
+
+# Connection pool metrics for sizing workers against the database
+@api_router.get("/metrics/database")
+async def database_metrics(current_user: User = Depends(get_current_user)):
+    return {
+        "pools": get_pool_stats()
+    }
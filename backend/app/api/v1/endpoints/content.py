@@ -2,23 +2,37 @@
 Content Management API Endpoints - CRUD operations for blog posts
 """
 
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional, Dict, Any, List
+import json
 import logging
 import math
 
-from app.services.content_generation_service import ContentGenerationService
-from app.services.content_service import ContentService
+from app.services.completion_cache import completion_cache
+from app.services.content_generation_service import get_content_generation_service
+from app.services.llm_router import get_llm_router
+from app.services.llm_scheduler import llm_scheduler
 from app.services.seo_service import SEOAnalysisService
+from app.services.single_flight import llm_single_flight
+from app.services.token_budget import prompt_budget
+from app.services.analysis_executor import AnalysisQueueFullError, seo_analysis_executor
 from app.services.autosave_service import AutoSaveService
+from app.services.openai_service import (
+    ContentGenerationRequest as GenerationParameters, ContentTone, ContentType, OpenAIServiceError, get_openai_service
+)
 from app.core.auth_middleware import get_current_user
-from app.core.database import get_db
+from app.core.config import settings
+from app.api.deps import get_content_service
+from app.utils.event_stream import STREAM_FORMATS, STREAM_HEADERS, encode_events
+from app.utils.pagination import InvalidCursorError
 from app.schemas.content import (
     BlogPostCreate, BlogPostUpdate, BlogPostResponse, BlogPostListResponse,
     BlogPostSearchRequest, PostVersionResponse, PostVersionListResponse,
-    PostVersionCreate, SEOAnalysisRequest, SEOAnalysisResponse
+    PostVersionCreate, SEOAnalysisRequest, SEOAnalysisResponse,
+    SEOBatchAnalysisRequest, SEOBatchAnalysisResponse, SEOBatchScore,
+    ContentGenerationRequest as StreamGenerationRequest
 )
-from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 
@@ -56,13 +70,12 @@ class ImprovementRequest(BaseModel):
 @router.post("/posts", response_model=BlogPostResponse)
 async def create_blog_post(
     post_data: BlogPostCreate,
-    db: Session = Depends(get_db),
+    content_service: Any = Depends(get_content_service),
     current_user: dict = Depends(get_current_user)
 ):
     """Create a new blog post"""
     try:
-        content_service = ContentService(db)
-        blog_post = content_service.create_blog_post(post_data, current_user["user_id"])
+        blog_post = await content_service.create_blog_post(post_data, current_user["user_id"])
         
         return BlogPostResponse.from_orm(blog_post)
         
@@ -73,12 +86,11 @@ async def create_blog_post(
 @router.get("/posts/{post_id}", response_model=BlogPostResponse)
 async def get_blog_post(
     post_id: str,
-    db: Session = Depends(get_db),
+    content_service: Any = Depends(get_content_service),
     current_user: dict = Depends(get_current_user)
 ):
     """Get a specific blog post"""
-    content_service = ContentService(db)
-    blog_post = content_service.get_blog_post(post_id, current_user["user_id"])
+    blog_post = await content_service.get_blog_post(post_id, current_user["user_id"])
     
     if not blog_post:
         raise HTTPException(status_code=404, detail="Blog post not found")
@@ -95,9 +107,14 @@ async def get_blog_posts(
     date_to: Optional[str] = Query(None, description="Filter to date (YYYY-MM-DD)"),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(10, ge=1, le=100, description="Items per page"),
-    sort_by: str = Query("created_at", description="Sort field"),
+    sort_by: Optional[str] = Query(
+        None, description="Sort field; defaults to relevance when searching, otherwise created_at"
+    ),
     sort_order: str = Query("desc", regex="^(asc|desc)$", description="Sort order"),
-    db: Session = Depends(get_db),
+    pagination: str = Query("offset", regex="^(offset|cursor)$", description="Pagination mode"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (cursor mode)"),
+    include_total: bool = Query(False, description="Return a (cached) total in cursor mode"),
+    content_service: Any = Depends(get_content_service),
     current_user: dict = Depends(get_current_user)
 ):
     """Get blog posts with search and filtering"""
@@ -115,8 +132,21 @@ async def get_blog_posts(
             sort_order=sort_order
         )
         
-        content_service = ContentService(db)
-        posts, total = content_service.get_blog_posts(current_user["user_id"], search_params)
+        if pagination == "cursor" or cursor:
+            posts, next_cursor, total = await content_service.get_blog_posts_keyset(
+                current_user["user_id"], search_params, cursor, include_total
+            )
+            
+            return BlogPostListResponse(
+                posts=[BlogPostResponse.from_orm(post) for post in posts],
+                total=total,
+                page=None,
+                per_page=per_page,
+                total_pages=math.ceil(total / per_page) if total is not None else None,
+                next_cursor=next_cursor
+            )
+        
+        posts, total = await content_service.get_blog_posts(current_user["user_id"], search_params)
         
         total_pages = math.ceil(total / per_page)
         
@@ -128,6 +158,10 @@ async def get_blog_posts(
             total_pages=total_pages
         )
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching blog posts: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch blog posts")
@@ -137,13 +171,12 @@ async def update_blog_post(
     post_id: str,
     update_data: BlogPostUpdate,
     changes_summary: Optional[str] = Query(None, description="Summary of changes"),
-    db: Session = Depends(get_db),
+    content_service: Any = Depends(get_content_service),
     current_user: dict = Depends(get_current_user)
 ):
     """Update a blog post"""
     try:
-        content_service = ContentService(db)
-        blog_post = content_service.update_blog_post(
+        blog_post = await content_service.update_blog_post(
             post_id, 
             current_user["user_id"], 
             update_data,
@@ -164,13 +197,12 @@ async def update_blog_post(
 @router.delete("/posts/{post_id}")
 async def delete_blog_post(
     post_id: str,
-    db: Session = Depends(get_db),
+    content_service: Any = Depends(get_content_service),
     current_user: dict = Depends(get_current_user)
 ):
     """Delete a blog post"""
     try:
-        content_service = ContentService(db)
-        success = content_service.delete_blog_post(post_id, current_user["user_id"])
+        success = await content_service.delete_blog_post(post_id, current_user["user_id"])
         
         if not success:
             raise HTTPException(status_code=404, detail="Blog post not found")
@@ -188,13 +220,12 @@ async def delete_blog_post(
 @router.get("/posts/{post_id}/versions", response_model=PostVersionListResponse)
 async def get_post_versions(
     post_id: str,
-    db: Session = Depends(get_db),
+    content_service: Any = Depends(get_content_service),
     current_user: dict = Depends(get_current_user)
 ):
     """Get all versions of a blog post"""
     try:
-        content_service = ContentService(db)
-        versions = content_service.get_post_versions(post_id, current_user["user_id"])
+        versions = await content_service.get_post_versions(post_id, current_user["user_id"])
         
         return PostVersionListResponse(
             versions=[PostVersionResponse.from_orm(version) for version in versions],
@@ -209,12 +240,11 @@ async def get_post_versions(
 async def get_post_version(
     post_id: str,
     version_number: int,
-    db: Session = Depends(get_db),
+    content_service: Any = Depends(get_content_service),
     current_user: dict = Depends(get_current_user)
 ):
     """Get a specific version of a blog post"""
-    content_service = ContentService(db)
-    version = content_service.get_post_version(post_id, version_number, current_user["user_id"])
+    version = await content_service.get_post_version(post_id, version_number, current_user["user_id"])
     
     if not version:
         raise HTTPException(status_code=404, detail="Version not found")
@@ -225,13 +255,12 @@ async def get_post_version(
 async def rollback_to_version(
     post_id: str,
     version_number: int,
-    db: Session = Depends(get_db),
+    content_service: Any = Depends(get_content_service),
     current_user: dict = Depends(get_current_user)
 ):
     """Rollback a blog post to a specific version"""
     try:
-        content_service = ContentService(db)
-        blog_post = content_service.rollback_to_version(
+        blog_post = await content_service.rollback_to_version(
             post_id, 
             version_number, 
             current_user["user_id"]
@@ -254,29 +283,32 @@ async def rollback_to_version(
 async def analyze_post_seo(
     post_id: str,
     analysis_request: SEOAnalysisRequest,
-    db: Session = Depends(get_db),
+    content_service: Any = Depends(get_content_service),
     current_user: dict = Depends(get_current_user)
 ):
     """Analyze SEO for a blog post"""
     try:
-        content_service = ContentService(db)
-        blog_post = content_service.get_blog_post(post_id, current_user["user_id"])
+        blog_post = await content_service.get_blog_post(post_id, current_user["user_id"])
         
         if not blog_post:
             raise HTTPException(status_code=404, detail="Blog post not found")
         
         seo_service = SEOAnalysisService()
-        analysis = seo_service.generate_seo_score(
+        analysis = await seo_service.generate_seo_score_async(
             content=analysis_request.content,
             title=blog_post.title,
             meta_description=blog_post.meta_description,
-            target_keywords=analysis_request.target_keywords
+            target_keywords=analysis_request.target_keywords,
+            use_cache=True,
+            incremental=True
         )
         
         return analysis
         
     except HTTPException:
         raise
+    except AnalysisQueueFullError:
+        raise _analysis_busy()
     except Exception as e:
         logger.error(f"Error analyzing SEO: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to analyze SEO")
@@ -294,19 +326,110 @@ async def analyze_content_seo(
         lines = analysis_request.content.split('\n')
         title = lines[0] if lines else "Untitled"
         
-        analysis = seo_service.generate_seo_score(
+        analysis = await seo_service.generate_seo_score_async(
             content=analysis_request.content,
             title=title,
             meta_description=None,
-            target_keywords=analysis_request.target_keywords
+            target_keywords=analysis_request.target_keywords,
+            use_cache=True,
+            incremental=True
         )
         
         return analysis
         
+    except AnalysisQueueFullError:
+        raise _analysis_busy()
     except Exception as e:
         logger.error(f"Error analyzing content SEO: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to analyze content SEO")
 
+@router.post("/seo/batch-analyze", response_model=SEOBatchAnalysisResponse)
+async def batch_analyze_seo(
+    batch_request: SEOBatchAnalysisRequest,
+    content_service: Any = Depends(get_content_service),
+    current_user: dict = Depends(get_current_user)
+):
+    """Score many inline posts and/or stored posts in one call"""
+    if not batch_request.posts and not batch_request.post_ids:
+        raise HTTPException(status_code=400, detail="Provide posts or post_ids to analyze")
+    
+    try:
+        default_keywords = batch_request.target_keywords or []
+        items = [
+            {
+                "id": post.id,
+                "content": post.content,
+                "title": post.title,
+                "meta_description": post.meta_description,
+                "target_keywords": post.target_keywords or default_keywords
+            }
+            for post in batch_request.posts
+        ]
+        
+        stored_posts = await content_service.get_posts_by_ids(current_user["user_id"], batch_request.post_ids)
+        found_ids = set()
+        for blog_post in stored_posts:
+            found_ids.add(blog_post.id)
+            keywords = default_keywords
+            if not keywords and blog_post.keywords:
+                try:
+                    keywords = json.loads(blog_post.keywords) or []
+                except (json.JSONDecodeError, TypeError):
+                    keywords = []
+            items.append({
+                "id": blog_post.id,
+                "content": blog_post.content,
+                "title": blog_post.title,
+                "meta_description": blog_post.meta_description,
+                "target_keywords": keywords
+            })
+        
+        seo_service = SEOAnalysisService()
+        scores = await seo_service.generate_seo_scores_batch_async(items)
+        
+        updated = 0
+        if batch_request.update_scores and stored_posts:
+            stored_scores = {
+                item["id"]: score["seo_score"]
+                for item, score in zip(items[len(batch_request.posts):], scores[len(batch_request.posts):])
+            }
+            updated = await content_service.update_seo_scores(current_user["user_id"], stored_scores)
+        
+        return SEOBatchAnalysisResponse(
+            results=[SEOBatchScore(id=item["id"], **score) for item, score in zip(items, scores)],
+            total=len(scores),
+            missing_post_ids=[post_id for post_id in batch_request.post_ids if post_id not in found_ids],
+            updated=updated
+        )
+        
+    except AnalysisQueueFullError:
+        raise _analysis_busy()
+    except Exception as e:
+        logger.error(f"Error in batch SEO analysis: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to analyze SEO batch")
+
+@router.get("/seo/cache-stats", response_model=Dict[str, Any])
+async def get_seo_cache_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """Get SEO analysis cache hit/miss counters"""
+    return SEOAnalysisService().get_cache_stats()
+
+@router.get("/seo/executor-stats", response_model=Dict[str, Any])
+async def get_seo_executor_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """Get SEO analysis worker pool queue depth and latency"""
+    return seo_analysis_executor.stats()
+
+def _analysis_busy() -> HTTPException:
+    """Backpressure response when the analysis worker pool is saturated"""
+    return HTTPException(
+        status_code=429,
+        detail="SEO analysis is busy. Please retry shortly.",
+        headers={"Retry-After": "1"}
+    )
+
 # Auto-save Endpoints
 
 @router.post("/posts/{post_id}/autosave")
@@ -367,13 +490,12 @@ async def force_save_post(
 async def search_content(
     q: str = Query(..., min_length=2, description="Search query"),
     limit: int = Query(10, ge=1, le=50, description="Maximum results"),
-    db: Session = Depends(get_db),
+    content_service: Any = Depends(get_content_service),
     current_user: dict = Depends(get_current_user)
 ):
-    """Search blog posts by content"""
+    """Search blog posts by content, ranked by relevance"""
     try:
-        content_service = ContentService(db)
-        posts = content_service.search_content(current_user["user_id"], q, limit)
+        posts = await content_service.search_content(current_user["user_id"], q, limit)
         
         return {
             "query": q,
@@ -388,13 +510,12 @@ async def search_content(
 @router.get("/categories/{category}/posts")
 async def get_posts_by_category(
     category: str,
-    db: Session = Depends(get_db),
+    content_service: Any = Depends(get_content_service),
     current_user: dict = Depends(get_current_user)
 ):
     """Get posts by category"""
     try:
-        content_service = ContentService(db)
-        posts = content_service.get_posts_by_category(current_user["user_id"], category)
+        posts = await content_service.get_posts_by_category(current_user["user_id"], category)
         
         return {
             "category": category,
@@ -415,9 +536,9 @@ async def generate_content(
 ):
     """Generate AI-powered content based on user input"""
     try:
-        service = ContentGenerationService()
+        service = get_content_generation_service()
         
-        result = service.generate_content(
+        result = await service.generate_content(
             title=request.title,
             content=request.content,
             tone=request.tone,
@@ -435,6 +556,82 @@ async def generate_content(
         logger.error(f"Content generation error: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error during content generation")
 
+@router.post("/generate/stream")
+async def generate_content_stream(
+    request: StreamGenerationRequest,
+    http_request: Request,
+    stream_format: str = Query("sse", alias="format", description="Response format: sse or ndjson"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream AI generation as it happens.
+    
+    Events: start, token (each delta), progress (periodic token counts),
+    then result (title, content, meta_description, keywords, seo_suggestions,
+    token_usage) or error. Disconnecting cancels the upstream request.
+    """
+    if stream_format not in STREAM_FORMATS:
+        raise HTTPException(status_code=422, detail=f"format must be one of: {', '.join(STREAM_FORMATS)}")
+    
+    try:
+        service = get_openai_service()
+    except OpenAIServiceError as e:
+        logger.error(f"Streaming generation unavailable: {str(e)}")
+        raise HTTPException(status_code=503, detail="Content generation is not configured")
+    
+    events = service.generate_content_events(GenerationParameters(
+        topic=request.topic,
+        content_type=ContentType(request.content_type.value),
+        tone=ContentTone(request.tone.value),
+        keywords=request.keywords,
+        target_length=request.target_length,
+        include_seo=request.include_seo,
+        industry=request.industry,
+        target_audience=request.target_audience
+    ))
+    
+    return StreamingResponse(
+        encode_events(events, stream_format, http_request.is_disconnected),
+        media_type=STREAM_FORMATS[stream_format],
+        headers=STREAM_HEADERS
+    )
+
+@router.get("/generation/cache-stats", response_model=Dict[str, Any])
+async def get_generation_cache_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """Get LLM completion cache hit/miss counters and latency/tokens saved"""
+    return completion_cache.stats()
+
+@router.get("/generation/coalescing-stats", response_model=Dict[str, Any])
+async def get_generation_coalescing_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """Get how many identical in-flight LLM calls and streams were collapsed"""
+    return llm_single_flight.stats()
+
+@router.get("/generation/scheduler-stats", response_model=Dict[str, Any])
+async def get_generation_scheduler_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """Get the upstream LLM concurrency window, queue depth per lane and remaining budgets"""
+    return llm_scheduler.stats()
+
+@router.get("/generation/router-stats", response_model=Dict[str, Any])
+async def get_generation_router_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """Get per-provider latency percentiles, hedges and fallbacks for the LLM router"""
+    if not settings.LLM_ROUTER_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, **get_llm_router().stats()}
+
+@router.get("/generation/budget-stats", response_model=Dict[str, Any])
+async def get_generation_budget_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """Get prompt tokens trimmed from generation requests and max_tokens saved by sizing"""
+    return prompt_budget.stats()
+
 @router.post("/seo-metadata")
 async def generate_seo_metadata(
     request: SEOMetadataRequest,
@@ -442,8 +639,8 @@ async def generate_seo_metadata(
 ):
     """Generate SEO metadata for content"""
     try:
-        service = ContentGenerationService()
-        metadata = service.generate_seo_metadata(request.content, request.title)
+        service = get_content_generation_service()
+        metadata = await service.generate_seo_metadata(request.content, request.title)
         
         return {
             'success': True,
@@ -461,8 +658,8 @@ async def get_content_suggestions(
 ):
     """Get suggestions for improving content"""
     try:
-        service = ContentGenerationService()
-        suggestions = service.suggest_improvements(request.content)
+        service = get_content_generation_service()
+        suggestions = await service.suggest_improvements(request.content)
         
         return suggestions
         
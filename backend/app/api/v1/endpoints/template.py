@@ -5,16 +5,17 @@ import re
 import logging
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
-from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks, Request
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.api.deps import get_template_service
 from app.core.auth_middleware import get_current_user
 from app.models.user import User
-from app.models.content import ContentTemplate
 from app.services.template_service import TemplateService
+from app.services.template_usage_buffer import template_usage_buffer, usage_event
+from app.utils.template_compiler import compiled_template_cache
 from app.schemas.template import (
     TemplateCreateRequest,
     TemplateUpdateRequest,
@@ -22,6 +23,7 @@ from app.schemas.template import (
     TemplateListResponse,
     TemplateUsageRequest,
     TemplateUsageResponse,
+    TemplateBulkRenderRequest,
     TemplateSearchRequest,
     TemplateAnalyticsResponse,
     TemplateStatsResponse,
@@ -32,6 +34,7 @@ from app.schemas.template import (
     TemplateImportResponse
 )
 from app.services.rate_limiter import rate_limiter
+from app.utils.pagination import InvalidCursorError
 
 
 logger = logging.getLogger(__name__)
@@ -41,106 +44,34 @@ router = APIRouter()
 
 
 
-def _build_search_query(db: Session, search_request: TemplateSearchRequest, user: User):
-    """Build search query based on search parameters"""
-    query = db.query(ContentTemplate)
-    
-    # Filter by user's templates or public templates
-    query = query.filter(
-        or_(
-            ContentTemplate.created_by == user.id,
-            ContentTemplate.is_public == True
-        )
-    )
-    
-    # Apply filters
-    if search_request.query:
-        search_term = f"%{search_request.query}%"
-        query = query.filter(
-            or_(
-                ContentTemplate.name.ilike(search_term),
-                ContentTemplate.description.ilike(search_term),
-                ContentTemplate.template_content.ilike(search_term)
-            )
-        )
-    
-    if search_request.category:
-        query = query.filter(ContentTemplate.category == search_request.category)
-    
-    if search_request.template_type:
-        query = query.filter(ContentTemplate.template_type == search_request.template_type)
-    
-    if search_request.industry:
-        query = query.filter(ContentTemplate.industry.ilike(f"%{search_request.industry}%"))
-    
-    if search_request.is_public is not None:
-        query = query.filter(ContentTemplate.is_public == search_request.is_public)
-    
-    if search_request.tags:
-        # Filter by tags (assuming tags are stored as JSON array)
-        for tag in search_request.tags:
-            query = query.filter(ContentTemplate.tags.contains([tag]))
-    
-    # Apply sorting
-    sort_field = getattr(ContentTemplate, search_request.sort_by)
-    if search_request.sort_order == 'desc':
-        query = query.order_by(desc(sort_field))
-    else:
-        query = query.order_by(asc(sort_field))
-    
-    return query
+def _record_usage_batch(events: List[Dict[str, Any]]):
+    """Write usage events with a session of their own (run by BackgroundTasks in the threadpool)"""
+    db = SessionLocal()
+    try:
+        TemplateService(db).record_usage_batch(events)
+    finally:
+        db.close()
 
 
 @router.post("/", response_model=TemplateResponse)
 async def create_template(
     request: TemplateCreateRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    template_service: Any = Depends(get_template_service)
 ):
     """Create a new content template"""
     try:
         # Rate limiting
         await rate_limiter.check_rate_limit(f"template_create:{current_user.id}")
         
-        # Check if template name already exists for this user
-        existing_template = db.query(ContentTemplate).filter(
-            and_(
-                ContentTemplate.name == request.name,
-                ContentTemplate.created_by == current_user.id
-            )
-        ).first()
+        template = await template_service.create_template(request, current_user.id)
         
-        if existing_template:
+        if not template:
             raise HTTPException(
                 status_code=400,
                 detail="Template with this name already exists"
             )
         
-        # Initialize template service
-        template_service = TemplateService(db)
-        
-        # Extract placeholders from template content
-        placeholders = template_service.extract_placeholders(request.template_content)
-        
-        # Create new template
-        template = ContentTemplate(
-            name=request.name,
-            description=request.description,
-            template_content=request.template_content,
-            category=request.category,
-            template_type=request.template_type,
-            industry=request.industry,
-            is_public=request.is_public,
-            tags=request.tags or [],
-            placeholders=placeholders,
-            created_by=current_user.id,
-            usage_count=0
-        )
-        
-        db.add(template)
-        db.commit()
-        db.refresh(template)
-        
         logger.info(f"Template created: {template.id} by user {current_user.id}")
         
         return TemplateResponse(
@@ -159,6 +90,8 @@ async def create_template(
             updated_at=template.updated_at
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Template creation failed: {str(e)}")
         raise HTTPException(status_code=500, detail="Template creation failed")
@@ -171,35 +104,24 @@ async def list_templates(
     category: Optional[str] = Query(None),
     template_type: Optional[str] = Query(None),
     is_public: Optional[bool] = Query(None),
+    pagination: str = Query("offset", regex="^(offset|cursor)$", description="Pagination mode"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (cursor mode)"),
+    include_total: bool = Query(False, description="Return a (cached) total in cursor mode"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    template_service: Any = Depends(get_template_service)
 ):
     """List templates with pagination and filtering"""
     try:
-        # Build base query
-        query = db.query(ContentTemplate).filter(
-            or_(
-                ContentTemplate.created_by == current_user.id,
-                ContentTemplate.is_public == True
-            )
-        )
-        
-        # Apply filters
-        if category:
-            query = query.filter(ContentTemplate.category == category)
-        
-        if template_type:
-            query = query.filter(ContentTemplate.template_type == template_type)
+        filters = {"category": category, "template_type": template_type, "is_public": is_public}
         
-        if is_public is not None:
-            query = query.filter(ContentTemplate.is_public == is_public)
-        
-        # Get total count
-        total = query.count()
-        
-        # Apply pagination
-        offset = (page - 1) * per_page
-        templates = query.offset(offset).limit(per_page).all()
+        next_cursor = None
+        if pagination == "cursor" or cursor:
+            # Newest first, keyed on (created_at, id); no OFFSET and no COUNT unless asked
+            templates, next_cursor, total = await template_service.search_templates_keyset(
+                current_user.id, filters, "created_at", True, cursor, per_page, include_total
+            )
+        else:
+            templates, total = await template_service.search_templates(current_user.id, filters, page, per_page)
         
         # Convert to response format
         template_responses = [
@@ -221,37 +143,104 @@ async def list_templates(
             for template in templates
         ]
         
+        if pagination == "cursor" or cursor:
+            return TemplateListResponse(
+                templates=template_responses,
+                total=total,
+                page=None,
+                per_page=per_page,
+                has_next=next_cursor is not None,
+                has_prev=cursor is not None,
+                next_cursor=next_cursor
+            )
+        
         return TemplateListResponse(
             templates=template_responses,
             total=total,
             page=page,
             per_page=per_page,
-            has_next=offset + per_page < total,
+            has_next=page * per_page < total,
             has_prev=page > 1
         )
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Template listing failed: {str(e)}")
         raise HTTPException(status_code=500, detail="Template listing failed")
 
 
+# Fixed paths are declared before /{template_id}, which would otherwise capture them
+@router.get("/stats", response_model=TemplateStatsResponse)
+async def get_template_stats(
+    current_user: User = Depends(get_current_user),
+    template_service: Any = Depends(get_template_service)
+):
+    """Get overall template statistics"""
+    try:
+        stats_data = await template_service.get_template_stats()
+        
+        return TemplateStatsResponse(**stats_data)
+        
+    except Exception as e:
+        logger.error(f"Template stats failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Template stats failed")
+
+
+@router.get("/popular", response_model=TemplateListResponse)
+async def get_popular_templates(
+    limit: int = Query(10, ge=1, le=50),
+    category: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user),
+    template_service: Any = Depends(get_template_service)
+):
+    """Get popular templates based on usage count"""
+    try:
+        popular_templates = await template_service.get_popular_templates(limit=limit, category=category)
+        
+        # Convert to response format
+        template_responses = [
+            TemplateResponse(
+                id=str(template.id),
+                name=template.name,
+                description=template.description,
+                template_content=template.template_content,
+                category=template.category,
+                template_type=template.template_type,
+                industry=template.industry,
+                is_public=template.is_public,
+                tags=template.tags or [],
+                usage_count=template.usage_count,
+                created_by=str(template.created_by),
+                created_at=template.created_at,
+                updated_at=template.updated_at
+            )
+            for template in popular_templates
+        ]
+        
+        return TemplateListResponse(
+            templates=template_responses,
+            total=len(template_responses),
+            page=1,
+            per_page=limit,
+            has_next=False,
+            has_prev=False
+        )
+        
+    except Exception as e:
+        logger.error(f"Popular templates failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Popular templates failed")
+
+
 @router.get("/{template_id}", response_model=TemplateResponse)
 async def get_template(
     template_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    template_service: Any = Depends(get_template_service)
 ):
     """Get a specific template by ID"""
     try:
-        template = db.query(ContentTemplate).filter(
-            and_(
-                ContentTemplate.id == template_id,
-                or_(
-                    ContentTemplate.created_by == current_user.id,
-                    ContentTemplate.is_public == True
-                )
-            )
-        ).first()
+        template = await template_service.get_accessible_template(template_id, current_user.id)
         
         if not template:
             raise HTTPException(status_code=404, detail="Template not found")
@@ -284,38 +273,21 @@ async def update_template(
     template_id: str,
     request: TemplateUpdateRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    template_service: Any = Depends(get_template_service)
 ):
     """Update a template"""
     try:
         # Rate limiting
         await rate_limiter.check_rate_limit(f"template_update:{current_user.id}")
         
-        template = db.query(ContentTemplate).filter(
-            and_(
-                ContentTemplate.id == template_id,
-                ContentTemplate.created_by == current_user.id
-            )
-        ).first()
+        template = await template_service.update_template(
+            template_id, current_user.id, request.dict(exclude_unset=True)
+        )
         
         if not template:
             raise HTTPException(status_code=404, detail="Template not found or not owned by user")
         
-        # Update fields
-        update_data = request.dict(exclude_unset=True)
-        
-        for field, value in update_data.items():
-            setattr(template, field, value)
-        
-        # Update placeholders if template content changed
-        if 'template_content' in update_data:
-            template_service = TemplateService(db)
-            template.placeholders = template_service.extract_placeholders(template.template_content)
-        
-        template.updated_at = datetime.utcnow()
-        
-        db.commit()
-        db.refresh(template)
+        compiled_template_cache.invalidate(template.id)
         
         logger.info(f"Template updated: {template.id} by user {current_user.id}")
         
@@ -346,22 +318,14 @@ async def update_template(
 async def delete_template(
     template_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    template_service: Any = Depends(get_template_service)
 ):
     """Delete a template"""
     try:
-        template = db.query(ContentTemplate).filter(
-            and_(
-                ContentTemplate.id == template_id,
-                ContentTemplate.created_by == current_user.id
-            )
-        ).first()
-        
-        if not template:
+        if not await template_service.delete_template(template_id, current_user.id):
             raise HTTPException(status_code=404, detail="Template not found or not owned by user")
         
-        db.delete(template)
-        db.commit()
+        compiled_template_cache.invalidate(template_id)
         
         logger.info(f"Template deleted: {template_id} by user {current_user.id}")
         
@@ -378,19 +342,24 @@ async def delete_template(
 async def search_templates(
     request: TemplateSearchRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    template_service: Any = Depends(get_template_service)
 ):
     """Search templates with advanced filtering"""
     try:
-        # Build search query
-        query = _build_search_query(db, request, current_user)
-        
-        # Get total count
-        total = query.count()
-        
-        # Apply pagination
-        offset = (request.page - 1) * request.per_page
-        templates = query.offset(offset).limit(request.per_page).all()
+        cursor_mode = request.pagination == "cursor" or request.cursor
+        filters = request.dict(include={"query", "category", "template_type", "industry", "is_public", "tags"})
+        descending = request.sort_order == 'desc'
+        
+        next_cursor = None
+        if cursor_mode:
+            templates, next_cursor, total = await template_service.search_templates_keyset(
+                current_user.id, filters, request.sort_by, descending, request.cursor,
+                request.per_page, request.include_total
+            )
+        else:
+            templates, total = await template_service.search_templates(
+                current_user.id, filters, request.page, request.per_page, request.sort_by, descending
+            )
         
         # Convert to response format
         template_responses = [
@@ -412,15 +381,28 @@ async def search_templates(
             for template in templates
         ]
         
+        if cursor_mode:
+            return TemplateListResponse(
+                templates=template_responses,
+                total=total,
+                page=None,
+                per_page=request.per_page,
+                has_next=next_cursor is not None,
+                has_prev=request.cursor is not None,
+                next_cursor=next_cursor
+            )
+        
         return TemplateListResponse(
             templates=template_responses,
             total=total,
             page=request.page,
             per_page=request.per_page,
-            has_next=offset + request.per_page < total,
+            has_next=request.page * request.per_page < total,
             has_prev=request.page > 1
         )
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Template search failed: {str(e)}")
         raise HTTPException(status_code=500, detail="Template search failed")
@@ -432,42 +414,33 @@ async def use_template(
     request: TemplateUsageRequest,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    template_service: Any = Depends(get_template_service)
 ):
     """Use a template to generate content"""
     try:
         # Rate limiting
         await rate_limiter.check_rate_limit(f"template_use:{current_user.id}")
         
-        template = db.query(ContentTemplate).filter(
-            and_(
-                ContentTemplate.id == template_id,
-                or_(
-                    ContentTemplate.created_by == current_user.id,
-                    ContentTemplate.is_public == True
-                )
-            )
-        ).first()
+        template = await template_service.get_accessible_template(template_id, current_user.id)
         
         if not template:
             raise HTTPException(status_code=404, detail="Template not found")
         
-        # Initialize template service
-        template_service = TemplateService(db)
-        
         # Replace placeholders
-        generated_content, placeholders_found, placeholders_replaced = template_service.replace_placeholders(
-            template.template_content,
-            request.variables
-        )
-        
-        # Track usage in background
-        background_tasks.add_task(
-            template_service.track_template_usage,
-            template.id,
-            current_user.id,
-            request.variables
-        )
+        generated_content, placeholders_found, placeholders_replaced = TemplateService.compiled_template(
+            template
+        ).render(request.variables)
+        
+        # Track usage: batched with other requests, or in a background task per call
+        if settings.TEMPLATE_USAGE_BUFFER_ENABLED:
+            template_usage_buffer.record(template.id, current_user.id, request.variables)
+        else:
+            background_tasks.add_task(
+                template_service.track_template_usage,
+                template.id,
+                current_user.id,
+                request.variables
+            )
         
         logger.info(f"Template used: {template_id} by user {current_user.id}")
         
@@ -486,16 +459,75 @@ async def use_template(
         raise HTTPException(status_code=500, detail="Template usage failed")
 
 
+@router.post("/{template_id}/render/bulk")
+async def bulk_render_template(
+    template_id: str,
+    http_request: Request,
+    background_tasks: BackgroundTasks,
+    industry_context: Optional[str] = Query(None, max_length=100, description="Industry context for NDJSON uploads"),
+    current_user: User = Depends(get_current_user),
+    template_service: Any = Depends(get_template_service)
+):
+    """Render a template against many variable sets, streaming one NDJSON line per set.
+    
+    The body is either a TemplateBulkRenderRequest JSON object or, with
+    Content-Type application/x-ndjson, one variable map per line. Usage for
+    all sets is recorded as a single batch.
+    """
+    try:
+        await rate_limiter.check_rate_limit(f"template_bulk_render:{current_user.id}")
+        
+        body = await http_request.body()
+        try:
+            if "ndjson" in http_request.headers.get("content-type", ""):
+                render_request = TemplateBulkRenderRequest.from_ndjson(body, industry_context)
+            else:
+                render_request = TemplateBulkRenderRequest.parse_raw(body)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        
+        template = await template_service.get_accessible_template(template_id, current_user.id)
+        
+        if not template:
+            raise HTTPException(status_code=404, detail="Template not found")
+        
+        # One usage row per set, written together
+        created_at = datetime.utcnow()
+        events = [
+            usage_event(template.id, current_user.id, variables, render_request.industry_context,
+                        "bulk_render", created_at)
+            for variables in render_request.variable_sets
+        ]
+        if settings.TEMPLATE_USAGE_BUFFER_ENABLED:
+            template_usage_buffer.record_many(events)
+        else:
+            background_tasks.add_task(_record_usage_batch, events)
+        
+        logger.info(
+            f"Template bulk rendered: {template_id} x{len(events)} by user {current_user.id}"
+        )
+        
+        return StreamingResponse(
+            TemplateService.render_bulk_ndjson(template, render_request.variable_sets),
+            media_type="application/x-ndjson"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Template bulk render failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Template bulk render failed")
+
+
 @router.get("/{template_id}/analytics", response_model=TemplateAnalyticsResponse)
 async def get_template_analytics(
     template_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    template_service: Any = Depends(get_template_service)
 ):
     """Get analytics for a template"""
     try:
-        template_service = TemplateService(db)
-        analytics_data = template_service.get_template_analytics(template_id, current_user.id)
+        analytics_data = await template_service.get_template_analytics(template_id, current_user.id)
         
         if not analytics_data:
             raise HTTPException(status_code=404, detail="Template not found or not owned by user")
@@ -512,12 +544,11 @@ async def get_template_analytics(
 @router.post("/seed-defaults")
 async def seed_default_templates(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    template_service: Any = Depends(get_template_service)
 ):
     """Seed default templates (admin only or for development)"""
     try:
-        template_service = TemplateService(db)
-        created_count = template_service.seed_default_templates(current_user.id)
+        created_count = await template_service.seed_default_templates(current_user.id)
         
         return {"message": f"Created {created_count} default templates"}
         
@@ -526,29 +557,12 @@ async def seed_default_templates(
         raise HTTPException(status_code=500, detail="Default template seeding failed")
 
 
-@router.get("/stats", response_model=TemplateStatsResponse)
-async def get_template_stats(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get overall template statistics"""
-    try:
-        template_service = TemplateService(db)
-        stats_data = template_service.get_template_stats()
-        
-        return TemplateStatsResponse(**stats_data)
-        
-    except Exception as e:
-        logger.error(f"Template stats failed: {str(e)}")
-        raise HTTPException(status_code=500, detail="Template stats failed")
-
-
 @router.post("/{template_id}/rate", response_model=TemplateRatingResponse)
 async def rate_template(
     template_id: str,
     request: TemplateRatingRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    template_service: Any = Depends(get_template_service)
 ):
     """Rate a template"""
     try:
@@ -556,21 +570,12 @@ async def rate_template(
         await rate_limiter.check_rate_limit(f"template_rate:{current_user.id}")
         
         # Check if template exists and is accessible
-        template = db.query(ContentTemplate).filter(
-            and_(
-                ContentTemplate.id == template_id,
-                or_(
-                    ContentTemplate.created_by == current_user.id,
-                    ContentTemplate.is_public == True
-                )
-            )
-        ).first()
+        template = await template_service.get_accessible_template(template_id, current_user.id)
         
         if not template:
             raise HTTPException(status_code=404, detail="Template not found")
         
-        template_service = TemplateService(db)
-        success = template_service.rate_template(
+        success = await template_service.rate_template(
             template_id, 
             current_user.id, 
             request.rating, 
@@ -581,7 +586,7 @@ async def rate_template(
             raise HTTPException(status_code=500, detail="Failed to rate template")
         
         # Get updated analytics to return current rating info
-        analytics_data = template_service.get_template_analytics(template_id, template.created_by)
+        analytics_data = await template_service.get_template_analytics(template_id, template.created_by)
         
         return TemplateRatingResponse(
             template_id=template_id,
@@ -597,49 +602,3 @@ async def rate_template(
     except Exception as e:
         logger.error(f"Template rating failed: {str(e)}")
         raise HTTPException(status_code=500, detail="Template rating failed")
-
-
-@router.get("/popular", response_model=TemplateListResponse)
-async def get_popular_templates(
-    limit: int = Query(10, ge=1, le=50),
-    category: Optional[str] = Query(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get popular templates based on usage count"""
-    try:
-        template_service = TemplateService(db)
-        popular_templates = template_service.get_popular_templates(limit=limit, category=category)
-        
-        # Convert to response format
-        template_responses = [
-            TemplateResponse(
-                id=str(template.id),
-                name=template.name,
-                description=template.description,
-                template_content=template.template_content,
-                category=template.category,
-                template_type=template.template_type,
-                industry=template.industry,
-                is_public=template.is_public,
-                tags=template.tags or [],
-                usage_count=template.usage_count,
-                created_by=str(template.created_by),
-                created_at=template.created_at,
-                updated_at=template.updated_at
-            )
-            for template in popular_templates
-        ]
-        
-        return TemplateListResponse(
-            templates=template_responses,
-            total=len(template_responses),
-            page=1,
-            per_page=limit,
-            has_next=False,
-            has_prev=False
-        )
-        
-    except Exception as e:
-        logger.error(f"Popular templates failed: {str(e)}")
-        raise HTTPException(status_code=500, detail="Popular templates failed")
\ No newline at end of file
@@ -9,7 +9,7 @@ celery_app = Celery(
     "ai_blog_assistant",
     broker=settings.redis_url,
     backend=settings.redis_url,
-    include=["app.tasks"]
+    include=["app.tasks", "app.tasks.template_tasks"]
 )
 
 # Configure Celery
@@ -36,4 +36,8 @@ celery_app.conf.beat_schedule = {
         "task": "app.tasks.cleanup_expired_tokens",
         "schedule": 3600.0,  # Run every hour
     },
+    "refresh-template-rollups": {
+        "task": "app.tasks.refresh_template_rollups",
+        "schedule": settings.TEMPLATE_ROLLUP_REFRESH_SECONDS,
+    },
 }
\ No newline at end of file
@@ -71,6 +71,13 @@ class Settings(BaseSettings):
     DATABASE_USER: str = "blog_user"
     DATABASE_PASSWORD: str = ""
     DATABASE_SSL_MODE: str = "prefer"
+    DATABASE_ASYNC_ENABLED: bool = False  # async engine (aiosqlite / asyncpg) for API routes
+    DATABASE_POOL_SIZE: int = 5  # persistent connections per engine (per worker process)
+    DATABASE_MAX_OVERFLOW: int = 10  # extra connections opened under bursts
+    DATABASE_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    DATABASE_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DATABASE_POOL_PRE_PING: bool = True  # test connections on checkout
+    DATABASE_STATEMENT_TIMEOUT_MS: int = 0  # Postgres statement_timeout; 0 = server default
 
     # -----------------------------
     # Redis
@@ -91,17 +98,63 @@ class Settings(BaseSettings):
     # -----------------------------
     OPENAI_API_KEY: Optional[str] = None
     OPENAI_ORG_ID: Optional[str] = None
+    OPENAI_BASE_URL: Optional[str] = None  # e.g. benchmarks/fake_llm_server.py for load tests; None uses the OpenAI API
     OPENAI_MODEL: str = "gpt-4-turbo-preview"
     OPENAI_MAX_TOKENS: int = 4096
     OPENAI_TEMPERATURE: float = 0.7
     OPENAI_TOP_P: float = 1.0
     OPENAI_FREQUENCY_PENALTY: float = 0.0
     OPENAI_PRESENCE_PENALTY: float = 0.0
+    OPENAI_TIMEOUT_SECONDS: float = 60.0
+    OPENAI_MAX_CONNECTIONS: int = 100  # shared AsyncOpenAI connection pool
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_CACHE_ENABLED: bool = True  # reuse completions for identical prompts
+    LLM_CACHE_MAX_ENTRIES: int = 1000  # in-process tier
+    LLM_CACHE_TTL_SECONDS: int = 3600
+    LLM_CACHE_REDIS_ENABLED: bool = False  # shared tier across workers
+    LLM_SINGLE_FLIGHT_ENABLED: bool = True  # coalesce identical in-flight requests and streams
+    LLM_SCHEDULER_ENABLED: bool = True  # client-side budgets and adaptive concurrency for upstream calls
+    LLM_REQUESTS_PER_MINUTE: int = 500
+    LLM_TOKENS_PER_MINUTE: int = 150000  # prompt estimate + max_tokens per request
+    LLM_MIN_CONCURRENCY: int = 1
+    LLM_MAX_CONCURRENCY: int = 32
+    LLM_INITIAL_CONCURRENCY: int = 8
+    LLM_LATENCY_TARGET_SECONDS: float = 60.0  # slower completions shrink the concurrency window
+    GENERATION_STREAM_PROGRESS_SECONDS: float = 1.0  # progress event interval for streamed generation
+    LLM_ROUTER_ENABLED: bool = False  # route generation across LLM_PROVIDERS instead of OPENAI_MODEL only
+    LLM_PROVIDERS: str = "openai,openai_cheap,deepseek"  # preference order; unconfigured ones are skipped
+    LLM_CHEAP_OPENAI_MODEL: str = "gpt-3.5-turbo"
+    LLM_CHEAP_PROMPT_MAX_TOKENS: int = 1500  # SEO/meta prompts up to this size go cheapest-first
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_PERCENTILE: float = 0.95  # hedge once a provider is slower to first token than this
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS: float = 5.0  # until LLM_HEDGE_MIN_SAMPLES latencies are known
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_TOKEN_BUDGET_ENABLED: bool = True  # size max_tokens from the target length and trim prompt context by tokens
+    LLM_MAX_CONTEXT_TOKENS: int = 3000  # content embedded in analysis prompts (SEO suggestions, improvements)
+    LLM_SECTION_CONTEXT_TOKENS: int = 800  # neighbouring-section context for section regeneration
+    LLM_METADATA_CONTEXT_TOKENS: int = 300  # content excerpt for SEO metadata
+
+    @property
+    def openai_api_key(self) -> Optional[str]:
+        return self.OPENAI_API_KEY
+
+    @property
+    def openai_model(self) -> str:
+        return self.OPENAI_MODEL
+
+    @property
+    def openai_max_tokens(self) -> int:
+        return self.OPENAI_MAX_TOKENS
 
     # DeepSeek
     DEEPSEEK_BASE_URL: Optional[str] = "https://api.deepseek.com/v1"
     # If you have a separate key:
     DEEPSEEK_API_KEY: Optional[str] = None
+    DEEPSEEK_MODEL: str = "deepseek-chat"
+
+    # Anthropic
+    ANTHROPIC_API_KEY: Optional[str] = None
+    ANTHROPIC_MODEL: str = "claude-2.1"
 
     # Seek / Paper2Code
     SEEK_API_KEY: Optional[str] = None
@@ -122,6 +175,29 @@ class Settings(BaseSettings):
     API_RATE_LIMIT_PER_HOUR: int = 500
     API_RATE_LIMIT_PER_DAY: int = 5000
 
+    # -----------------------------
+    # SEO Analysis
+    # -----------------------------
+    SEO_CACHE_ENABLED: bool = True
+    SEO_CACHE_MAX_BYTES: int = 32 * 1024 * 1024  # in-process tier, serialized result size
+    SEO_CACHE_REDIS_ENABLED: bool = False  # shared tier across workers
+    SEO_CACHE_TTL_SECONDS: int = 3600
+    SEO_EXECUTOR_MODE: str = "process"  # process, thread or inline
+    SEO_EXECUTOR_MAX_WORKERS: int = 0  # 0 = one per CPU
+    SEO_EXECUTOR_MAX_PENDING: int = 64  # queued + running pool jobs before 429
+    SEO_EXECUTOR_INLINE_THRESHOLD: int = 20000  # characters; smaller inputs run on the event loop
+
+    # -----------------------------
+    # Template usage rollups
+    # -----------------------------
+    TEMPLATE_ROLLUP_REFRESH_SECONDS: float = 900.0  # Celery beat interval
+    TEMPLATE_ROLLUP_REFRESH_DAYS: int = 2  # trailing days recomputed on each run
+    TEMPLATE_USAGE_BUFFER_ENABLED: bool = True  # batch /use tracking instead of one transaction per call
+    TEMPLATE_USAGE_FLUSH_SIZE: int = 200  # events that trigger an early flush
+    TEMPLATE_USAGE_FLUSH_INTERVAL_SECONDS: float = 2.0
+    TEMPLATE_USAGE_BUFFER_MAX: int = 50000  # oldest events are dropped past this while flushes fail
+    TEMPLATE_USAGE_MAX_ATTEMPTS: int = 3  # an event that fails on its own this often is discarded
+
     # -----------------------------
     # Email / SMTP
     # -----------------------------
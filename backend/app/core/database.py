@@ -3,22 +3,72 @@ Database configuration and setup
 """
 
 import os
+from typing import Any, AsyncIterator, Dict, Optional
 from sqlalchemy import create_engine, MetaData
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from app.core.config import settings
+from app.core.fulltext import ensure_search_index
+from app.core.pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, pool_status
+
 # Database URL from environment or default to SQLite
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./ai_blog_assistant.db")
 
+def get_engine_options(database_url: str, is_async: bool = False) -> Dict[str, Any]:
+    """Pool and connection options from settings for a sync or async engine"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    connect_args: Dict[str, Any] = {}
+    options: Dict[str, Any] = {
+        "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+        "connect_args": connect_args
+    }
+    
+    if backend == "sqlite":
+        if not is_async:
+            connect_args["check_same_thread"] = False
+        if url.database in (None, "", ":memory:"):
+            # In-memory SQLite keeps SQLAlchemy's single-connection pool
+            return options
+    
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT
+    )
+    
+    if backend == "postgresql" and settings.DATABASE_STATEMENT_TIMEOUT_MS:
+        timeout = str(settings.DATABASE_STATEMENT_TIMEOUT_MS)
+        if is_async:
+            connect_args["server_settings"] = {"statement_timeout": timeout}
+        else:
+            connect_args["options"] = f"-c statement_timeout={timeout}"
+    
+    return options
+
 # Create engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+engine = create_engine(DATABASE_URL, **get_engine_options(DATABASE_URL))
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers used when the configured URL names a sync (or no) driver
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+# Async engine and session factory, created on first use so the async
+# drivers are only needed when the async layer is enabled
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
 # Create base class for models
 Base = declarative_base()
 
@@ -29,6 +79,12 @@ def create_tables():
     """Create database tables"""
     try:
         Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            # create_all skips existing tables, so add indexes declared after they were created
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(bind=connection, checkfirst=True)
+            ensure_search_index(connection)
         print("✅ Database tables created successfully")
     except Exception as e:
         print(f"⚠️  Database table creation failed: {e}")
@@ -39,4 +95,50 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_async_database_url(database_url: str = DATABASE_URL) -> str:
+    """Map a database URL to its async driver (aiosqlite / asyncpg)"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend: {backend}")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+def get_async_engine() -> AsyncEngine:
+    """Get the async engine, creating it on first use"""
+    global _async_engine
+    if _async_engine is None:
+        async_url = get_async_database_url()
+        _async_engine = create_async_engine(async_url, **get_engine_options(async_url, is_async=True))
+    return _async_engine
+
+def get_async_session_factory() -> async_sessionmaker:
+    """Get the async session factory"""
+    global _async_session_factory
+    if _async_session_factory is None:
+        # Keep attributes loaded after commit; lazy loads are not possible outside a greenlet
+        _async_session_factory = async_sessionmaker(
+            get_async_engine(), class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+    return _async_session_factory
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Get async database session"""
+    async with get_async_session_factory()() as db:
+        yield db
+
+async def dispose_async_engine():
+    """Close pooled async connections"""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_session_factory = None
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Pool occupancy and checkout metrics for the sync and (if started) async engines"""
+    stats = {"sync": pool_status(engine.pool)}
+    if _async_engine is not None:
+        stats["async"] = pool_status(_async_engine.sync_engine.pool)
+    return stats
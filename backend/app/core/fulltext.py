@@ -0,0 +1,169 @@
+"""
+Full-text search index for blog posts
+
+Postgres uses a generated, weighted ``tsvector`` column with a GIN index
+(migration 0004); SQLite uses an FTS5 table whose rowids map to post ids
+through an indexed table, kept in sync by triggers. Both are also created by ``Base.metadata.create_all`` through
+``search_index_ddl()``.
+"""
+import re
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import DDL, asc, column, desc, func, inspect, literal_column, select, table, text
+from sqlalchemy.engine import Connection
+
+# Text search configuration used for stemming and stop words
+SEARCH_CONFIG = "english"
+
+POST_SEARCH_VECTOR = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(meta_description, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(content, '')), 'C')"
+)
+
+POSTGRES_SEARCH_DDL = [
+    f"ALTER TABLE blog_posts ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({POST_SEARCH_VECTOR}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_blog_posts_search_vector ON blog_posts USING GIN (search_vector)",
+]
+
+FTS_TABLE = "blog_posts_fts"
+# Maps FTS5 rowids to blog_posts.id: blog_posts has a text primary key, so its
+# rowids are not stable across VACUUM, and FTS5 can only seek by rowid
+FTS_IDS_TABLE = "blog_posts_fts_ids"
+# Alias of the ranked matches subquery joined to blog_posts
+FTS_RANK_ALIAS = "post_search_rank"
+
+# bm25 column weights, in FTS5 column order (title, content, meta_description)
+FTS_WEIGHTS = (10.0, 1.0, 4.0)
+
+# The FTS5 table keeps its own copy of the text; every statement reaches an FTS
+# row by rowid through the unique post_id index on the id mapping
+_FTS_ROWID = f"(SELECT fts_rowid FROM {FTS_IDS_TABLE} WHERE post_id = {{}}.id)"
+SQLITE_SEARCH_DDL = [
+    f"CREATE TABLE IF NOT EXISTS {FTS_IDS_TABLE} ("
+    f"fts_rowid INTEGER PRIMARY KEY, post_id VARCHAR(36) NOT NULL UNIQUE)",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"title, content, meta_description, tokenize='porter unicode61')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON blog_posts BEGIN "
+    f"INSERT INTO {FTS_IDS_TABLE}(post_id) VALUES (new.id); "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, content, meta_description) "
+    f"VALUES ({_FTS_ROWID.format('new')}, new.title, new.content, new.meta_description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON blog_posts BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = {_FTS_ROWID.format('old')}; "
+    f"DELETE FROM {FTS_IDS_TABLE} WHERE post_id = old.id; END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF id, title, content, meta_description "
+    f"ON blog_posts BEGIN "
+    f"UPDATE {FTS_IDS_TABLE} SET post_id = new.id WHERE post_id = old.id; "
+    f"UPDATE {FTS_TABLE} SET title = new.title, content = new.content, "
+    f"meta_description = new.meta_description WHERE rowid = {_FTS_ROWID.format('new')}; END",
+]
+
+# Drops an index created by an earlier version (keyed on blog_posts.rowid, or
+# on an UNINDEXED post_id column that every lookup had to scan)
+SQLITE_DROP_SEARCH_DDL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+    f"DROP TABLE IF EXISTS {FTS_IDS_TABLE}",
+]
+
+_SEARCH_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def search_index_ddl() -> List[DDL]:
+    """DDL run after the blog_posts table is created, per dialect"""
+    return (
+        [DDL(statement).execute_if(dialect="postgresql") for statement in POSTGRES_SEARCH_DDL] +
+        [DDL(statement).execute_if(dialect="sqlite") for statement in SQLITE_SEARCH_DDL]
+    )
+
+
+def ensure_search_index(connection: Connection) -> bool:
+    """Create the search index on a database whose blog_posts table predates it.
+
+    A SQLite index from an earlier version, without the id mapping, is replaced.
+    Returns True when the index was created (and backfilled from existing posts).
+    """
+    dialect_name = connection.dialect.name
+    inspector = inspect(connection)
+    if not inspector.has_table("blog_posts"):
+        return False
+
+    if dialect_name == "sqlite":
+        if inspector.has_table(FTS_TABLE):
+            if inspector.has_table(FTS_IDS_TABLE):
+                return False
+            for statement in SQLITE_DROP_SEARCH_DDL:
+                connection.exec_driver_sql(statement)
+        for statement in SQLITE_SEARCH_DDL:
+            connection.exec_driver_sql(statement)
+        rebuild_search_index(connection)
+        return True
+
+    if dialect_name == "postgresql":
+        if any(c["name"] == "search_vector" for c in inspector.get_columns("blog_posts")):
+            return False
+        for statement in POSTGRES_SEARCH_DDL:
+            connection.exec_driver_sql(statement)
+        return True
+
+    return False
+
+
+def rebuild_search_index(connection: Connection):
+    """Re-index every post in the SQLite FTS5 table from blog_posts"""
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        connection.execute(text(f"DELETE FROM {FTS_IDS_TABLE}"))
+        connection.execute(text(f"INSERT INTO {FTS_IDS_TABLE}(post_id) SELECT id FROM blog_posts"))
+        connection.execute(text(
+            f"INSERT INTO {FTS_TABLE}(rowid, title, content, meta_description) "
+            f"SELECT ids.fts_rowid, p.title, p.content, p.meta_description "
+            f"FROM blog_posts AS p JOIN {FTS_IDS_TABLE} AS ids ON ids.post_id = p.id"
+        ))
+
+
+def fts5_query(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every word must match, as a prefix"""
+    terms = _SEARCH_TERM.findall(query)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def post_search_clauses(dialect_name: str, query: str, post_id: Any) -> Optional[Tuple[Any, Any]]:
+    """Get (WHERE condition, ORDER BY relevance) for a full-text post search.
+
+    post_id is the blog_posts.id column the SQLite ranking is joined on.
+    Returns None when the dialect has no full-text index or the query has
+    no searchable terms, so callers can fall back to substring matching.
+    """
+    if dialect_name == "postgresql":
+        search_vector = literal_column("blog_posts.search_vector")
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        return search_vector.op("@@")(ts_query), desc(func.ts_rank_cd(search_vector, ts_query))
+
+    if dialect_name == "sqlite":
+        match = fts5_query(query)
+        if match is None:
+            return None
+
+        fts = table(FTS_TABLE, column("rowid"))
+        ids = table(FTS_IDS_TABLE, column("fts_rowid"), column("post_id"))
+        # bm25() is lower for better matches; it is computed once per match in a
+        # single FTS5 scan, then joined to blog_posts by the WHERE condition
+        ranked = select(
+            ids.c.post_id, func.bm25(literal_column(FTS_TABLE), *FTS_WEIGHTS).label("rank")
+        ).select_from(
+            fts.join(ids, ids.c.fts_rowid == fts.c.rowid)
+        ).where(
+            literal_column(FTS_TABLE).op("MATCH")(match)
+        ).subquery(FTS_RANK_ALIAS)
+
+        condition = post_id == ranked.c.post_id
+        # By name, so a separately built ORDER BY reuses the condition's join
+        return condition, asc(literal_column(f"{FTS_RANK_ALIAS}.rank"))
+
+    return None
@@ -0,0 +1,123 @@
+"""
+Connection pool telemetry for the database engines
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+class PoolMetrics:
+    """Checkout wait times, concurrency and saturation counters for one pool"""
+
+    def __init__(self, sample_size: int = 1000):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=sample_size)
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.max_in_use = 0
+
+    def record_checkout(self, wait_seconds: float, in_use: int, overflowed: bool):
+        with self._lock:
+            self.checkouts += 1
+            self._waits.append(wait_seconds)
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+            self.max_in_use = max(self.max_in_use, in_use)
+            if overflowed:
+                self.overflow_checkouts += 1
+
+    def record_timeout(self, wait_seconds: float):
+        with self._lock:
+            self.timeouts += 1
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get counters plus wait-time percentiles over recent checkouts"""
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "checkouts": self.checkouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "timeouts": self.timeouts,
+                "max_in_use": self.max_in_use,
+                "avg_wait_ms": round(self.total_wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "p50_wait_ms": _percentile_ms(waits, 0.50),
+                "p95_wait_ms": _percentile_ms(waits, 0.95),
+                "p99_wait_ms": _percentile_ms(waits, 0.99),
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3)
+            }
+
+
+def _percentile_ms(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return round(sorted_values[index] * 1000, 3)
+
+
+class _InstrumentedPoolMixin:
+    """Times every checkout and tracks when the pool has to overflow or times out"""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        overflow_before = self._overflow
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - start)
+            raise
+        self.metrics.record_checkout(
+            time.perf_counter() - start,
+            self.checkedout(),
+            overflowed=self._overflow > overflow_before and self._overflow > 0
+        )
+        return record
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """QueuePool that records PoolMetrics"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records PoolMetrics"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+
+def pool_status(pool: Pool) -> Dict[str, Any]:
+    """Current occupancy of a pool plus its recorded metrics"""
+    status: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "pool_size": pool.size(),
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout_seconds": pool.timeout()
+        })
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status.update(metrics.snapshot())
+    return status
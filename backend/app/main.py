@@ -1,11 +1,18 @@
 """
 FastAPI main application entry point
 """
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from .core.config import settings
-from .core.database import create_tables
+from .core.database import create_tables, dispose_async_engine
+from .services.analysis_executor import seo_analysis_executor
+from .services.llm_router import close_llm_router
+from .services.openai_service import close_async_openai_client
+from .services.token_budget import get_encoder
+from .services.template_usage_buffer import template_usage_buffer
 from .api.v1.api import api_router
 
 # Create FastAPI application
@@ -40,6 +47,17 @@ async def startup_event():
     """Initialize application on startup"""
     # Create database tables if they don't exist
     create_tables()
+    # Load the tokenizer off the event loop (the first load may download its encoding)
+    await asyncio.to_thread(get_encoder, settings.OPENAI_MODEL)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release resources on shutdown"""
+    seo_analysis_executor.shutdown(wait=False)
+    template_usage_buffer.close()
+    await close_llm_router()
+    await close_async_openai_client()
+    await dispose_async_engine()
 
 @app.get("/")
 async def root():
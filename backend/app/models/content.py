@@ -1,17 +1,26 @@
 """
 Content management models for blog posts, versions, and templates
 """
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, String, Integer, Boolean, Date, DateTime, Text, ForeignKey, JSON, Index, event
 from sqlalchemy.dialects.postgresql import JSONB, ARRAY
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.core.fulltext import search_index_ddl
 import uuid
 
 
 class BlogPost(Base):
     """Blog post model with SEO and content management features"""
     __tablename__ = "blog_posts"
+    __table_args__ = (
+        # Post listings: a user's posts, optionally filtered, newest first; id last so
+        # cursor pages seek on (created_at, id) without a sort
+        Index("ix_blog_posts_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_blog_posts_user_id_status_created_at_id", "user_id", "status", "created_at", "id"),
+        Index("ix_blog_posts_user_id_post_type_created_at_id", "user_id", "post_type", "created_at", "id"),
+        Index("ix_blog_posts_user_id_template_category_created_at_id", "user_id", "template_category", "created_at", "id"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -56,9 +65,17 @@ class BlogPost(Base):
         return self.word_count
 
 
+# Full-text search index (tsvector/GIN on Postgres, FTS5 on SQLite) created with the table
+for _search_ddl in search_index_ddl():
+    event.listen(BlogPost.__table__, "after_create", _search_ddl)
+
+
 class PostVersion(Base):
     """Post version history for revision tracking"""
     __tablename__ = "post_versions"
+    __table_args__ = (
+        Index("ix_post_versions_post_id_version_number", "post_id", "version_number"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     post_id = Column(String(36), ForeignKey("blog_posts.id", ondelete="CASCADE"), nullable=False)
@@ -112,6 +129,9 @@ class ContentTemplate(Base):
 class TemplateUsage(Base):
     """Template usage tracking for analytics and popularity metrics"""
     __tablename__ = "template_usage"
+    __table_args__ = (
+        Index("ix_template_usage_template_id_created_at", "template_id", "created_at"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     template_id = Column(String(36), ForeignKey("content_templates.id", ondelete="CASCADE"), nullable=False)
@@ -132,6 +152,9 @@ class TemplateUsage(Base):
 class TemplateRating(Base):
     """Template ratings and reviews for quality metrics"""
     __tablename__ = "template_ratings"
+    __table_args__ = (
+        Index("ix_template_ratings_template_id_user_id", "template_id", "user_id"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     template_id = Column(String(36), ForeignKey("content_templates.id", ondelete="CASCADE"), nullable=False)
@@ -146,4 +169,20 @@ class TemplateRating(Base):
     user = relationship("User")
     
     def __repr__(self):
-        return f"<TemplateRating(template_id={self.template_id}, rating={self.rating})>"
\ No newline at end of file
+        return f"<TemplateRating(template_id={self.template_id}, rating={self.rating})>"
+
+
+class TemplateUsageDaily(Base):
+    """Per-template, per-day usage and rating rollup for stats and popularity"""
+    __tablename__ = "template_usage_daily"
+    
+    template_id = Column(String(36), ForeignKey("content_templates.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    usage_count = Column(Integer, nullable=False, default=0)
+    unique_users = Column(Integer, nullable=False, default=0)  # distinct users who used the template that day
+    rating_sum = Column(Integer, nullable=False, default=0)  # ratings bucketed by the day they were first given
+    rating_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<TemplateUsageDaily(template_id={self.template_id}, day={self.day}, usage={self.usage_count})>"
@@ -110,6 +110,52 @@ class SEOAnalysisResponse(BaseModel):
     token_usage: TokenUsageResponse
 
 
+class SEOBatchPost(BaseModel):
+    """A single post in a batch SEO scoring request"""
+    id: Optional[str] = Field(None, description="Client-side identifier echoed back in the result")
+    content: str = Field(..., description="Content to analyze")
+    title: str = Field(default="", description="Post title")
+    meta_description: Optional[str] = Field(None, description="Meta description")
+    target_keywords: Optional[List[str]] = Field(None, max_items=10, description="Per-post keywords")
+
+
+class SEOBatchAnalysisRequest(BaseModel):
+    """Request schema for scoring many posts at once"""
+    posts: List[SEOBatchPost] = Field(default_factory=list, max_items=5000, description="Inline posts to score")
+    post_ids: List[str] = Field(default_factory=list, max_items=5000, description="Stored posts to score")
+    target_keywords: Optional[List[str]] = Field(
+        None, max_items=10, description="Keywords applied to every post without its own keywords"
+    )
+    update_scores: bool = Field(default=False, description="Persist new scores on stored posts")
+    
+    @validator('target_keywords')
+    def validate_keywords(cls, v):
+        if v is not None:
+            for keyword in v:
+                if len(keyword.strip()) < 2:
+                    raise ValueError("Keywords must be at least 2 characters long")
+            return [keyword.strip() for keyword in v]
+        return v
+
+
+class SEOBatchScore(BaseModel):
+    """Per-post result of batch SEO scoring"""
+    id: Optional[str]
+    seo_score: int
+    max_score: int
+    breakdown: dict
+    total_words: int
+    flesch_reading_ease: Optional[float]
+
+
+class SEOBatchAnalysisResponse(BaseModel):
+    """Response schema for batch SEO scoring"""
+    results: List[SEOBatchScore]
+    total: int
+    missing_post_ids: List[str] = Field(default_factory=list)
+    updated: int = 0
+
+
 class ContentValidationError(BaseModel):
     """Content validation error details"""
     field: str
@@ -227,12 +273,13 @@ class BlogPostResponse(BaseModel):
 
 
 class BlogPostListResponse(BaseModel):
-    """Schema for blog post list response"""
+    """Schema for blog post list response (total/page fields are None in cursor mode unless requested)"""
     posts: List[BlogPostResponse]
-    total: int
-    page: int
+    total: Optional[int]
+    page: Optional[int]
     per_page: int
-    total_pages: int
+    total_pages: Optional[int]
+    next_cursor: Optional[str] = None
 
 
 class BlogPostSearchRequest(BaseModel):
@@ -246,7 +293,9 @@ class BlogPostSearchRequest(BaseModel):
     date_to: Optional[str] = Field(None, description="Filter to date (YYYY-MM-DD)")
     page: int = Field(default=1, ge=1, description="Page number")
     per_page: int = Field(default=10, ge=1, le=100, description="Items per page")
-    sort_by: str = Field(default="created_at", description="Sort field")
+    sort_by: Optional[str] = Field(
+        None, description="Sort field; defaults to relevance when searching, otherwise created_at"
+    )
     sort_order: str = Field(default="desc", regex="^(asc|desc)$", description="Sort order")
 
 
@@ -1,6 +1,7 @@
 """
 Content template schemas for API requests and responses
 """
+import json
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
@@ -105,13 +106,14 @@ class TemplateResponse(BaseModel):
 
 
 class TemplateListResponse(BaseModel):
-    """Response schema for template list"""
+    """Response schema for template list (total/page are None in cursor mode unless requested)"""
     templates: List[TemplateResponse]
-    total: int
-    page: int
+    total: Optional[int]
+    page: Optional[int]
     per_page: int
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None
 
 
 class TemplateUsageRequest(BaseModel):
@@ -137,6 +139,37 @@ class TemplateUsageResponse(BaseModel):
     placeholders_replaced: List[str]
 
 
+# Largest number of variable sets accepted by one bulk render request
+MAX_BULK_RENDER_ITEMS = 1000
+
+
+class TemplateBulkRenderRequest(BaseModel):
+    """Request schema for rendering one template against many variable sets"""
+    variable_sets: List[Dict[str, str]] = Field(..., description="One variable map per rendered document")
+    industry_context: Optional[str] = Field(None, max_length=100, description="Industry context recorded with usage")
+    
+    @validator('variable_sets')
+    def validate_variable_sets(cls, v):
+        if not v:
+            raise ValueError("At least one variable set is required")
+        if len(v) > MAX_BULK_RENDER_ITEMS:
+            raise ValueError(f"At most {MAX_BULK_RENDER_ITEMS} variable sets per request")
+        return v
+    
+    @classmethod
+    def from_ndjson(cls, body: bytes, industry_context: Optional[str] = None) -> "TemplateBulkRenderRequest":
+        """Build a request from newline-delimited JSON, one variable map per non-blank line"""
+        variable_sets = []
+        for line_number, line in enumerate(body.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                variable_sets.append(json.loads(line))
+            except ValueError as e:
+                raise ValueError(f"Line {line_number} is not valid JSON") from e
+        return cls(variable_sets=variable_sets, industry_context=industry_context)
+
+
 class TemplateSearchRequest(BaseModel):
     """Request schema for template search"""
     query: Optional[str] = Field(None, description="Search query")
@@ -149,6 +182,15 @@ class TemplateSearchRequest(BaseModel):
     sort_order: Optional[str] = Field(default="desc", description="Sort order (asc/desc)")
     page: int = Field(default=1, ge=1, description="Page number")
     per_page: int = Field(default=20, ge=1, le=100, description="Items per page")
+    pagination: str = Field(default="offset", description="Pagination mode (offset/cursor)")
+    cursor: Optional[str] = Field(None, description="next_cursor from the previous page (cursor mode)")
+    include_total: bool = Field(default=False, description="Return a (cached) total in cursor mode")
+    
+    @validator('pagination')
+    def validate_pagination(cls, v):
+        if v not in ['offset', 'cursor']:
+            raise ValueError("Pagination must be 'offset' or 'cursor'")
+        return v
     
     @validator('sort_by')
     def validate_sort_by(cls, v):
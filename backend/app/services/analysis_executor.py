@@ -0,0 +1,172 @@
+"""
+Executor for CPU-bound analyses called from async endpoints
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_MODES = ("process", "thread", "inline")
+
+
+class AnalysisQueueFullError(Exception):
+    """Exception raised when too many analyses are already queued"""
+    pass
+
+
+class AnalysisExecutor:
+    """
+    Runs small jobs inline and large jobs on a worker pool
+
+    Jobs below inline_threshold (in characters of input) are cheaper to run
+    on the event loop than to pickle to another process. Larger jobs go to
+    the pool; when max_pending pool jobs are already queued or running, new
+    ones are rejected with AnalysisQueueFullError instead of piling up.
+    Jobs that rely on this process's memoized state (in_process=True) use a
+    thread pool even in process mode, since each worker process would keep
+    its own, mostly cold, copy of those caches.
+    """
+
+    def __init__(self, mode: str = settings.SEO_EXECUTOR_MODE,
+                 max_workers: int = settings.SEO_EXECUTOR_MAX_WORKERS,
+                 max_pending: int = settings.SEO_EXECUTOR_MAX_PENDING,
+                 inline_threshold: int = settings.SEO_EXECUTOR_INLINE_THRESHOLD):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode: {mode}")
+
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.inline_threshold = inline_threshold
+
+        self._pool: Optional[Executor] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+
+        self.pending = 0
+        self.max_pending_seen = 0
+        self.inline_runs = 0
+        self.pool_runs = 0
+        self.in_process_runs = 0
+        self.rejected = 0
+        self.failures = 0
+        self.pool_seconds = 0.0
+        self.max_pool_seconds = 0.0
+
+    def _get_pool(self) -> Executor:
+        """Create the worker pool on first use"""
+        if self.mode != "process":
+            return self._get_thread_pool()
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    # Spawned workers do not inherit the event loop or open connections
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._pool
+
+    def _get_thread_pool(self) -> ThreadPoolExecutor:
+        """Create the thread pool on first use (all jobs in thread mode, in-process jobs otherwise)"""
+        if self._thread_pool is None:
+            with self._pool_lock:
+                if self._thread_pool is None:
+                    self._thread_pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="analysis"
+                    )
+        return self._thread_pool
+
+    def _reset_pool(self):
+        """Drop a broken pool so the next job starts a fresh one"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func: Callable[..., Any], *args: Any, size: int = 0, in_process: bool = False) -> Any:
+        """Run func(*args), off the event loop when the input is large enough.
+        
+        in_process keeps the job in this process (on a thread) so it shares
+        the parent's memoized state.
+        """
+        if self.mode == "inline" or size < self.inline_threshold:
+            with self._counter_lock:
+                self.inline_runs += 1
+            return func(*args)
+
+        with self._counter_lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise AnalysisQueueFullError(
+                    f"Analysis queue is full ({self.pending} pending)"
+                )
+            self.pending += 1
+            self.max_pending_seen = max(self.max_pending_seen, self.pending)
+            if in_process:
+                self.in_process_runs += 1
+
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            pool = self._get_thread_pool() if in_process else self._get_pool()
+            return await loop.run_in_executor(pool, func, *args)
+        except BrokenProcessPool:
+            logger.error("Analysis worker pool broke; restarting it")
+            self._reset_pool()
+            with self._counter_lock:
+                self.failures += 1
+            raise
+        except Exception:
+            with self._counter_lock:
+                self.failures += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._counter_lock:
+                self.pending -= 1
+                self.pool_runs += 1
+                self.pool_seconds += elapsed
+                self.max_pool_seconds = max(self.max_pool_seconds, elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, run counters and pool latency"""
+        with self._counter_lock:
+            return {
+                "mode": self.mode,
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "inline_threshold": self.inline_threshold,
+                "pending": self.pending,
+                "max_pending_seen": self.max_pending_seen,
+                "inline_runs": self.inline_runs,
+                "pool_runs": self.pool_runs,
+                "in_process_runs": self.in_process_runs,
+                "rejected": self.rejected,
+                "failures": self.failures,
+                "avg_pool_seconds": round(self.pool_seconds / self.pool_runs, 4) if self.pool_runs else 0.0,
+                "max_pool_seconds": round(self.max_pool_seconds, 4)
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker pools"""
+        with self._pool_lock:
+            pools = {self._pool, self._thread_pool} - {None}
+            self._pool = self._thread_pool = None
+        for pool in pools:
+            pool.shutdown(wait=wait)
+
+
+# Global executor for SEO analyses
+seo_analysis_executor = AnalysisExecutor()
@@ -0,0 +1,285 @@
+"""
+Async content management service for blog posts (DATABASE_ASYNC_ENABLED)
+"""
+import json
+from typing import List, Optional, Dict, Tuple
+from sqlalchemy import select, and_, desc, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.content import BlogPost, PostVersion
+from app.schemas.content import BlogPostCreate, BlogPostUpdate, BlogPostSearchRequest
+from app.services.content_service import ContentService
+from app.utils.pagination import keyset_page, paginate_keyset, total_count_cache
+
+
+class AsyncContentService:
+    """AsyncSession counterpart of ContentService with the same methods as coroutines"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create_blog_post(self, post_data: BlogPostCreate, user_id: str) -> BlogPost:
+        """Create a new blog post"""
+        slug = post_data.slug or ContentService._generate_slug(post_data.title)
+        slug = await self._ensure_unique_slug(slug, user_id)
+        
+        blog_post = BlogPost(
+            user_id=user_id,
+            title=post_data.title,
+            content=post_data.content,
+            meta_description=post_data.meta_description,
+            keywords=json.dumps(post_data.keywords) if post_data.keywords else None,
+            status=post_data.status.value,
+            post_type=post_data.post_type.value,
+            tone=post_data.tone.value,
+            slug=slug,
+            featured_image_url=post_data.featured_image_url,
+            template_category=post_data.template_category
+        )
+        
+        blog_post.update_word_count()
+        blog_post.calculate_reading_time()
+        blog_post.seo_score = ContentService._calculate_seo_score(blog_post)
+        
+        self.db.add(blog_post)
+        await self.db.commit()
+        await self.db.refresh(blog_post)
+        
+        await self._create_version(blog_post, "Initial version")
+        
+        return blog_post
+    
+    async def get_blog_post(self, post_id: str, user_id: str) -> Optional[BlogPost]:
+        """Get a blog post by ID"""
+        result = await self.db.execute(
+            select(BlogPost).where(and_(BlogPost.id == post_id, BlogPost.user_id == user_id))
+        )
+        return result.scalars().first()
+    
+    async def get_blog_posts(self, user_id: str, search_params: BlogPostSearchRequest) -> Tuple[List[BlogPost], int]:
+        """Get blog posts with search and filtering"""
+        dialect_name = self._dialect_name()
+        conditions = ContentService._post_search_conditions(user_id, search_params, dialect_name)
+        
+        total = await self.db.scalar(
+            select(func.count()).select_from(BlogPost).where(*conditions)
+        )
+        
+        offset = (search_params.page - 1) * search_params.per_page
+        result = await self.db.execute(
+            select(BlogPost)
+            .where(*conditions)
+            .order_by(*ContentService._post_order_by(search_params, dialect_name))
+            .offset(offset)
+            .limit(search_params.per_page)
+        )
+        
+        return list(result.scalars().all()), total or 0
+    
+    async def get_blog_posts_keyset(self, user_id: str, search_params: BlogPostSearchRequest,
+                                    cursor: Optional[str] = None,
+                                    include_total: bool = False) -> Tuple[List[BlogPost], Optional[str], Optional[int]]:
+        """Get a page of blog posts after a cursor (no OFFSET; COUNT only on request)"""
+        conditions = ContentService._post_search_conditions(user_id, search_params, self._dialect_name())
+        sort_by, descending = ContentService._keyset_sort(search_params)
+        
+        statement = paginate_keyset(
+            select(BlogPost).where(*conditions),
+            getattr(BlogPost, sort_by), BlogPost.id, sort_by, descending,
+            cursor, search_params.per_page
+        )
+        rows = (await self.db.execute(statement)).scalars().all()
+        posts, next_cursor = keyset_page(rows, sort_by, descending, search_params.per_page)
+        
+        total = None
+        if include_total:
+            cache_key = ContentService._total_cache_key(user_id, search_params)
+            total = total_count_cache.get(cache_key)
+            if total is None:
+                total = await self.db.scalar(
+                    select(func.count()).select_from(BlogPost).where(*conditions)
+                ) or 0
+                total_count_cache.set(cache_key, total)
+        
+        return posts, next_cursor, total
+    
+    async def update_blog_post(self, post_id: str, user_id: str, update_data: BlogPostUpdate,
+                               changes_summary: Optional[str] = None) -> Optional[BlogPost]:
+        """Update a blog post"""
+        blog_post = await self.get_blog_post(post_id, user_id)
+        if not blog_post:
+            return None
+        
+        original_content = blog_post.content
+        original_title = blog_post.title
+        
+        update_dict = update_data.dict(exclude_unset=True)
+        
+        for field, value in update_dict.items():
+            if field == "keywords" and value is not None:
+                setattr(blog_post, field, json.dumps(value))
+            elif field in ["status", "post_type", "tone"] and value is not None:
+                setattr(blog_post, field, value.value)
+            elif value is not None:
+                setattr(blog_post, field, value)
+        
+        if update_data.title and update_data.title != original_title:
+            new_slug = ContentService._generate_slug(update_data.title)
+            blog_post.slug = await self._ensure_unique_slug(new_slug, user_id, exclude_post_id=post_id)
+        
+        if update_data.content and update_data.content != original_content:
+            blog_post.update_word_count()
+            blog_post.calculate_reading_time()
+            blog_post.seo_score = ContentService._calculate_seo_score(blog_post)
+        
+        await self.db.commit()
+        await self.db.refresh(blog_post)
+        
+        if (update_data.content and update_data.content != original_content) or \
+           (update_data.title and update_data.title != original_title):
+            await self._create_version(blog_post, changes_summary or "Content updated")
+        
+        return blog_post
+    
+    async def delete_blog_post(self, post_id: str, user_id: str) -> bool:
+        """Delete a blog post"""
+        blog_post = await self.get_blog_post(post_id, user_id)
+        if not blog_post:
+            return False
+        
+        await self.db.delete(blog_post)
+        await self.db.commit()
+        return True
+    
+    async def get_post_versions(self, post_id: str, user_id: str) -> List[PostVersion]:
+        """Get all versions of a blog post"""
+        if not await self.get_blog_post(post_id, user_id):
+            return []
+        
+        result = await self.db.execute(
+            select(PostVersion)
+            .where(PostVersion.post_id == post_id)
+            .order_by(desc(PostVersion.version_number))
+        )
+        return list(result.scalars().all())
+    
+    async def get_post_version(self, post_id: str, version_number: int, user_id: str) -> Optional[PostVersion]:
+        """Get a specific version of a blog post"""
+        if not await self.get_blog_post(post_id, user_id):
+            return None
+        
+        result = await self.db.execute(
+            select(PostVersion).where(
+                and_(
+                    PostVersion.post_id == post_id,
+                    PostVersion.version_number == version_number
+                )
+            )
+        )
+        return result.scalars().first()
+    
+    async def rollback_to_version(self, post_id: str, version_number: int, user_id: str) -> Optional[BlogPost]:
+        """Rollback a blog post to a specific version"""
+        blog_post = await self.get_blog_post(post_id, user_id)
+        if not blog_post:
+            return None
+        
+        version = await self.get_post_version(post_id, version_number, user_id)
+        if not version:
+            return None
+        
+        if version.title:
+            blog_post.title = version.title
+        if version.content:
+            blog_post.content = version.content
+            blog_post.update_word_count()
+            blog_post.calculate_reading_time()
+            blog_post.seo_score = ContentService._calculate_seo_score(blog_post)
+        
+        await self.db.commit()
+        await self.db.refresh(blog_post)
+        
+        await self._create_version(blog_post, f"Rolled back to version {version_number}")
+        
+        return blog_post
+    
+    async def search_content(self, user_id: str, query: str, limit: int = 10) -> List[BlogPost]:
+        """Search blog posts by content, most relevant first"""
+        condition, relevance = ContentService._text_search_clauses(query, self._dialect_name())
+        
+        statement = select(BlogPost).where(and_(BlogPost.user_id == user_id, condition))
+        if relevance is not None:
+            statement = statement.order_by(relevance)
+        
+        result = await self.db.execute(statement.limit(limit))
+        return list(result.scalars().all())
+    
+    async def get_posts_by_ids(self, user_id: str, post_ids: List[str]) -> List[BlogPost]:
+        """Get a user's blog posts by ID in one query"""
+        if not post_ids:
+            return []
+        
+        result = await self.db.execute(
+            select(BlogPost).where(and_(BlogPost.user_id == user_id, BlogPost.id.in_(post_ids)))
+        )
+        return list(result.scalars().all())
+    
+    async def update_seo_scores(self, user_id: str, scores: Dict[str, int]) -> int:
+        """Persist recomputed SEO scores for a user's posts"""
+        if not scores:
+            return 0
+        
+        posts = await self.get_posts_by_ids(user_id, list(scores.keys()))
+        for post in posts:
+            post.seo_score = scores[post.id]
+        
+        await self.db.commit()
+        return len(posts)
+    
+    async def get_posts_by_category(self, user_id: str, category: str) -> List[BlogPost]:
+        """Get posts by template category"""
+        result = await self.db.execute(
+            select(BlogPost).where(
+                and_(BlogPost.user_id == user_id, BlogPost.template_category == category)
+            )
+        )
+        return list(result.scalars().all())
+    
+    def _dialect_name(self) -> str:
+        """Name of the database dialect behind the session"""
+        return self.db.get_bind().dialect.name
+    
+    async def _ensure_unique_slug(self, slug: str, user_id: str, exclude_post_id: Optional[str] = None) -> str:
+        """Ensure slug is unique for the user"""
+        original_slug = slug
+        counter = 1
+        
+        while True:
+            query = select(BlogPost.id).where(and_(BlogPost.user_id == user_id, BlogPost.slug == slug))
+            if exclude_post_id:
+                query = query.where(BlogPost.id != exclude_post_id)
+            
+            if await self.db.scalar(query.limit(1)) is None:
+                return slug
+            
+            slug = f"{original_slug}-{counter}"
+            counter += 1
+    
+    async def _create_version(self, blog_post: BlogPost, changes_summary: str) -> PostVersion:
+        """Create a new version of a blog post"""
+        last_version_number = await self.db.scalar(
+            select(func.max(PostVersion.version_number)).where(PostVersion.post_id == blog_post.id)
+        )
+        
+        version = PostVersion(
+            post_id=blog_post.id,
+            version_number=(last_version_number or 0) + 1,
+            title=blog_post.title,
+            content=blog_post.content,
+            changes_summary=changes_summary,
+            word_count=blog_post.word_count
+        )
+        
+        self.db.add(version)
+        await self.db.commit()
+        return version
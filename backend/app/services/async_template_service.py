@@ -0,0 +1,342 @@
+"""
+Async template service for template CRUD, analytics, ratings and seeding (DATABASE_ASYNC_ENABLED)
+"""
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import date, datetime, timedelta
+from sqlalchemy import select, and_, or_, desc, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.content import ContentTemplate, TemplateUsage, TemplateRating
+from app.schemas.template import TemplateCreateRequest
+from app.services.template_service import DEFAULT_TEMPLATES, TemplateService
+from app.utils.pagination import keyset_page, paginate_keyset, total_count_cache
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTemplateService:
+    """AsyncSession counterpart of TemplateService's database methods"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def track_template_usage(self, template_id: str, user_id: str, variables_used: Dict[str, str],
+                                   industry_context: Optional[str] = None, usage_context: Optional[str] = None):
+        """Track template usage for analytics"""
+        try:
+            today = datetime.utcnow().date()
+            # Checked before the new row is added (and autoflushed) so it only sees earlier usages
+            first_use_today = (await self.db.execute(
+                select(TemplateUsage.id)
+                .where(TemplateService._used_on_day_condition(template_id, user_id, today))
+                .limit(1)
+            )).first() is None
+            
+            self.db.add(TemplateUsage(
+                template_id=template_id,
+                user_id=user_id,
+                variables_used=variables_used,
+                industry_context=industry_context,
+                usage_context=usage_context
+            ))
+            
+            await self.db.execute(
+                update(ContentTemplate)
+                .where(ContentTemplate.id == template_id)
+                .values(usage_count=ContentTemplate.usage_count + 1)
+            )
+            
+            await self._increment_rollup(template_id, today, usage_count=1, unique_users=int(first_use_today))
+            
+            await self.db.commit()
+            logger.info(f"Template usage tracked: {template_id} by user {user_id}")
+        
+        except Exception as e:
+            logger.error(f"Failed to track template usage: {str(e)}")
+            await self.db.rollback()
+    
+    async def _increment_rollup(self, template_id: str, day: date, **increments: int):
+        """Add to a template's daily rollup row inside the caller's transaction"""
+        statement = TemplateService._rollup_upsert_statement(
+            self.db.get_bind().dialect.name, template_id, day, increments
+        )
+        if statement is not None:
+            await self.db.execute(statement)
+            return
+        
+        result = await self.db.execute(TemplateService._rollup_update_statement(template_id, day, increments))
+        if result.rowcount == 0:
+            await self.db.execute(TemplateService._rollup_insert_statement(template_id, day, increments))
+    
+    async def get_accessible_template(self, template_id: str, user_id: str) -> Optional[ContentTemplate]:
+        """Get a template the user owns or that is public"""
+        result = await self.db.execute(
+            select(ContentTemplate).where(
+                and_(
+                    ContentTemplate.id == template_id,
+                    or_(
+                        ContentTemplate.created_by == user_id,
+                        ContentTemplate.is_public == True
+                    )
+                )
+            )
+        )
+        return result.scalars().first()
+    
+    async def get_owned_template(self, template_id: str, user_id: str) -> Optional[ContentTemplate]:
+        """Get a template created by the user"""
+        result = await self.db.execute(
+            select(ContentTemplate).where(
+                and_(
+                    ContentTemplate.id == template_id,
+                    ContentTemplate.created_by == user_id
+                )
+            )
+        )
+        return result.scalars().first()
+    
+    async def create_template(self, template_data: TemplateCreateRequest, user_id: str) -> Optional[ContentTemplate]:
+        """Create a template; None if the user already has one with the same name"""
+        existing_template = (await self.db.execute(
+            select(ContentTemplate.id).where(
+                and_(
+                    ContentTemplate.name == template_data.name,
+                    ContentTemplate.created_by == user_id
+                )
+            ).limit(1)
+        )).first()
+        if existing_template:
+            return None
+        
+        template = TemplateService._new_template(template_data, user_id)
+        self.db.add(template)
+        await self.db.commit()
+        await self.db.refresh(template)
+        return template
+    
+    async def update_template(self, template_id: str, user_id: str,
+                              update_data: Dict[str, Any]) -> Optional[ContentTemplate]:
+        """Update fields of a template the user owns; None if it is not found"""
+        template = await self.get_owned_template(template_id, user_id)
+        if not template:
+            return None
+        
+        TemplateService._apply_template_update(template, update_data)
+        await self.db.commit()
+        await self.db.refresh(template)
+        return template
+    
+    async def delete_template(self, template_id: str, user_id: str) -> bool:
+        """Delete a template the user owns; False if it is not found"""
+        template = await self.get_owned_template(template_id, user_id)
+        if not template:
+            return False
+        
+        await self.db.delete(template)
+        await self.db.commit()
+        return True
+    
+    async def search_templates(self, user_id: str, filters: Dict[str, Any], page: int, per_page: int,
+                               sort_by: Optional[str] = None,
+                               descending: bool = True) -> Tuple[List[ContentTemplate], int]:
+        """Get an offset page of accessible templates matching the filters, with the total"""
+        conditions = TemplateService._template_search_conditions(user_id, filters)
+        total = await self.db.scalar(
+            select(func.count()).select_from(ContentTemplate).where(*conditions)
+        )
+        
+        statement = select(ContentTemplate).where(*conditions)
+        if sort_by:
+            statement = statement.order_by(TemplateService._template_order_by(sort_by, descending))
+        result = await self.db.execute(statement.offset((page - 1) * per_page).limit(per_page))
+        
+        return list(result.scalars().all()), total or 0
+    
+    async def search_templates_keyset(self, user_id: str, filters: Dict[str, Any], sort_by: str, descending: bool,
+                                      cursor: Optional[str], per_page: int,
+                                      include_total: bool = False) -> Tuple[List[ContentTemplate], Optional[str], Optional[int]]:
+        """Get a page of accessible templates after a cursor (no OFFSET; COUNT only on request)"""
+        conditions = TemplateService._template_search_conditions(user_id, filters)
+        statement = paginate_keyset(
+            select(ContentTemplate).where(*conditions),
+            getattr(ContentTemplate, sort_by), ContentTemplate.id, sort_by, descending, cursor, per_page
+        )
+        rows = (await self.db.execute(statement)).scalars().all()
+        templates, next_cursor = keyset_page(rows, sort_by, descending, per_page)
+        
+        total = None
+        if include_total:
+            cache_key = TemplateService._template_total_cache_key(user_id, filters)
+            total = total_count_cache.get(cache_key)
+            if total is None:
+                total = await self.db.scalar(
+                    select(func.count()).select_from(ContentTemplate).where(*conditions)
+                ) or 0
+                total_count_cache.set(cache_key, total)
+        
+        return templates, next_cursor, total
+    
+    async def get_template_analytics(self, template_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get comprehensive analytics for a template"""
+        try:
+            template = (await self.db.execute(
+                select(ContentTemplate).where(
+                    and_(
+                        ContentTemplate.id == template_id,
+                        ContentTemplate.created_by == user_id
+                    )
+                )
+            )).scalars().first()
+            
+            if not template:
+                return None
+            
+            now = datetime.utcnow()
+            summary = (await self.db.execute(
+                TemplateService._usage_summary_statement(template_id, now - timedelta(days=30), now - timedelta(days=7))
+            )).one()
+            
+            usage_by_industry = dict((await self.db.execute(
+                TemplateService._industry_counts_statement(template_id)
+            )).all())
+            
+            variables_statement = TemplateService._variable_counts_statement(
+                template_id, self.db.get_bind().dialect.name
+            )
+            if variables_statement is not None:
+                popular_variables = dict((await self.db.execute(variables_statement)).all())
+            else:
+                rows = await self.db.stream_scalars(
+                    select(TemplateUsage.variables_used)
+                    .where(TemplateUsage.template_id == template_id)
+                    .execution_options(yield_per=1000)
+                )
+                popular_variables = {}
+                async for partition in rows.partitions():
+                    TemplateService._tally_variables(partition, popular_variables)
+            
+            recent_usage = (await self.db.execute(TemplateService._recent_usage_statement(template_id))).all()
+            
+            return TemplateService._analytics_response(
+                template, summary, popular_variables, usage_by_industry, recent_usage
+            )
+        
+        except Exception as e:
+            logger.error(f"Failed to get template analytics: {str(e)}")
+            return None
+    
+    async def get_popular_templates(self, limit: int = 10, category: Optional[str] = None) -> List[ContentTemplate]:
+        """Get most popular templates based on rolled-up usage"""
+        try:
+            query = select(ContentTemplate).where(ContentTemplate.is_public == True)
+            
+            if category:
+                query = query.where(ContentTemplate.category == category)
+            
+            result = await self.db.execute(
+                query.order_by(
+                    desc(TemplateService._rollup_usage_total()), desc(ContentTemplate.created_at)
+                ).limit(limit)
+            )
+            return list(result.scalars().all())
+        
+        except Exception as e:
+            logger.error(f"Failed to get popular templates: {str(e)}")
+            return []
+    
+    async def get_template_stats(self) -> Dict[str, Any]:
+        """Get overall template statistics from the usage rollups"""
+        try:
+            counts = (await self.db.execute(TemplateService._template_counts_statement())).one()
+            total_usage = await self.db.scalar(TemplateService._rollup_usage_sum_statement())
+            category_stats = (await self.db.execute(TemplateService._category_usage_statement())).all()
+            category_top = (await self.db.execute(TemplateService._category_top_templates_statement(3))).all()
+            
+            most_popular = await self.get_popular_templates(limit=5)
+            
+            recent_templates = (await self.db.execute(
+                select(ContentTemplate)
+                .where(ContentTemplate.is_public == True)
+                .order_by(desc(ContentTemplate.created_at))
+                .limit(5)
+            )).scalars().all()
+            
+            return TemplateService._stats_response(
+                counts, total_usage, category_stats, category_top, most_popular, list(recent_templates)
+            )
+        
+        except Exception as e:
+            logger.error(f"Failed to get template stats: {str(e)}")
+            return {}
+    
+    async def seed_default_templates(self, user_id: str) -> int:
+        """Seed default templates for the system"""
+        try:
+            existing_names = set((await self.db.execute(
+                select(ContentTemplate.name).where(
+                    ContentTemplate.name.in_([t["name"] for t in DEFAULT_TEMPLATES])
+                )
+            )).scalars().all())
+            
+            created_count = 0
+            for template_data in DEFAULT_TEMPLATES:
+                if template_data["name"] in existing_names:
+                    continue
+                
+                self.db.add(ContentTemplate(
+                    **template_data,
+                    placeholders=TemplateService.extract_placeholders(template_data["template_content"]),
+                    created_by=user_id,
+                    usage_count=0
+                ))
+                created_count += 1
+            
+            await self.db.commit()
+            logger.info(f"Seeded {created_count} default templates")
+            return created_count
+        
+        except Exception as e:
+            logger.error(f"Failed to seed default templates: {str(e)}")
+            await self.db.rollback()
+            return 0
+    
+    async def rate_template(self, template_id: str, user_id: str, rating: int, comment: Optional[str] = None) -> bool:
+        """Rate a template"""
+        try:
+            existing_rating = (await self.db.execute(
+                select(TemplateRating).where(
+                    and_(
+                        TemplateRating.template_id == template_id,
+                        TemplateRating.user_id == user_id
+                    )
+                )
+            )).scalars().first()
+            
+            now = datetime.utcnow()
+            if existing_rating:
+                rating_delta = rating - (existing_rating.rating or 0)
+                rated_day = (existing_rating.created_at or now).date()
+                existing_rating.rating = rating
+                existing_rating.comment = comment
+                existing_rating.updated_at = now
+                if rating_delta:
+                    await self._increment_rollup(template_id, rated_day, rating_sum=rating_delta)
+            else:
+                self.db.add(TemplateRating(
+                    template_id=template_id,
+                    user_id=user_id,
+                    rating=rating,
+                    comment=comment
+                ))
+                await self._increment_rollup(template_id, now.date(), rating_sum=rating, rating_count=1)
+            
+            await self.db.commit()
+            logger.info(f"Template rated: {template_id} by user {user_id} - {rating} stars")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Failed to rate template: {str(e)}")
+            await self.db.rollback()
+            return False
@@ -0,0 +1,192 @@
+"""
+Response cache for LLM chat completions keyed on the normalized request
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import redis
+import redis.asyncio as aioredis
+from openai.types.chat import ChatCompletion
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Redis client for the shared cache tier (connects on first use)
+redis_client = aioredis.from_url(settings.redis_url, decode_responses=True)
+
+
+class CompletionCache:
+    """
+    Two-tier completion cache: in-process LRU with per-entry TTL, optional shared Redis tier
+
+    Entries store the serialized ChatCompletion together with how long the
+    original call took, so hits can report the latency and tokens they saved.
+    """
+
+    KEY_PREFIX = "llm_completion"
+
+    def __init__(self, max_entries: int = settings.LLM_CACHE_MAX_ENTRIES,
+                 ttl_seconds: int = settings.LLM_CACHE_TTL_SECONDS,
+                 use_redis: bool = settings.LLM_CACHE_REDIS_ENABLED,
+                 client: Optional[aioredis.Redis] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.use_redis = use_redis
+        self.client = client or redis_client
+
+        # key -> (expires_at on the monotonic clock, serialized entry)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.latency_saved = 0.0
+        self.tokens_saved = 0
+
+    @classmethod
+    def make_key(cls, params: Dict[str, Any]) -> str:
+        """
+        Hash the request parameters (model, messages, temperature, response_format, ...)
+
+        Message content is whitespace-normalized so prompts that differ only in
+        indentation or line wrapping share an entry.
+        """
+        normalized = dict(params)
+        normalized["messages"] = [
+            {**message, "content": " ".join(str(message.get("content", "")).split())}
+            for message in params.get("messages", [])
+        ]
+        payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return f"{cls.KEY_PREFIX}:{digest}"
+
+    async def get(self, key: str) -> Optional[ChatCompletion]:
+        """Look up a completion, falling back to Redis and promoting shared hits locally"""
+        serialized = self._get_local(key)
+        if serialized is not None:
+            return self._record_hit(serialized, shared=False)
+
+        if self.use_redis:
+            try:
+                serialized = await self.client.get(key)
+            except redis.RedisError as e:
+                # Shared tier is best-effort; fall back to calling the API
+                logger.warning(f"Completion cache Redis lookup failed: {str(e)}")
+                serialized = None
+
+            if serialized is not None:
+                self._store_local(key, serialized)
+                return self._record_hit(serialized, shared=True)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    async def set(self, key: str, completion: ChatCompletion, latency: float):
+        """Store a completion in both tiers"""
+        serialized = json.dumps({
+            "latency": latency,
+            "completion": completion.model_dump(mode="json")
+        }, ensure_ascii=False, separators=(",", ":"))
+        self._store_local(key, serialized)
+
+        if self.use_redis:
+            try:
+                await self.client.setex(key, self.ttl_seconds, serialized)
+            except redis.RedisError as e:
+                logger.warning(f"Completion cache Redis write failed: {str(e)}")
+
+    async def get_or_create(self, params: Dict[str, Any], create: Callable[[], Awaitable[ChatCompletion]],
+                            use_cache: bool = True) -> ChatCompletion:
+        """
+        Return a cached completion for params, or await create() and cache its result
+
+        use_cache=False (or LLM_CACHE_ENABLED off) always calls the API and
+        leaves the cache untouched.
+        """
+        if not (use_cache and settings.LLM_CACHE_ENABLED):
+            return await create()
+
+        key = self.make_key(params)
+        cached = await self.get(key)
+        if cached is not None:
+            return cached
+
+        started = time.monotonic()
+        completion = await create()
+        if isinstance(completion, ChatCompletion):
+            await self.set(key, completion, time.monotonic() - started)
+        return completion
+
+    def _get_local(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, serialized = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return serialized
+
+    def _store_local(self, key: str, serialized: str):
+        """Insert into the LRU tier, evicting least recently used entries past max_entries"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, serialized)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _record_hit(self, serialized: str, shared: bool) -> ChatCompletion:
+        entry = json.loads(serialized)
+        completion = ChatCompletion.model_validate(entry["completion"])
+        with self._lock:
+            if shared:
+                self.redis_hits += 1
+            else:
+                self.hits += 1
+            self.latency_saved += entry["latency"]
+            if completion.usage is not None:
+                self.tokens_saved += completion.usage.total_tokens
+        return completion
+
+    def clear(self):
+        """Drop local entries (shared Redis entries expire by TTL)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss and savings metrics"""
+        with self._lock:
+            lookups = self.hits + self.redis_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "redis_enabled": self.use_redis,
+                "hit_rate": round((self.hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+                "latency_saved_seconds": round(self.latency_saved, 3),
+                "tokens_saved": self.tokens_saved
+            }
+
+
+# Global cache shared by all LLM callers in this process
+completion_cache = CompletionCache()
@@ -3,20 +3,46 @@ Content Generation Service
 Handles AI-powered content generation using OpenAI GPT
 """
 
-import openai
-import os
+from openai import AsyncOpenAI
 from typing import Dict, Any, Optional
 import json
 import re
 from datetime import datetime
 
+from app.core.config import settings
+from app.services.completion_cache import completion_cache
+from app.services.llm_router import LLMRouter, get_llm_router
+from app.services.llm_scheduler import estimate_request_tokens, llm_scheduler
+from app.services.openai_service import get_async_openai_client
+from app.services.single_flight import llm_single_flight
+from app.services.token_budget import prompt_budget
+
+# Model used by the legacy endpoints
+LEGACY_MODEL = "gpt-3.5-turbo"
+
 class ContentGenerationService:
-    def __init__(self):
-        self.client = openai.OpenAI(
-            api_key=os.getenv('OPENAI_API_KEY')
-        )
+    """Legacy generation endpoints; calls go through the shared AsyncOpenAI client or the LLM router"""
+    
+    def __init__(self, client: Optional[AsyncOpenAI] = None, router: Optional[LLMRouter] = None):
+        self.client = client or get_async_openai_client()
+        self.router = router
+        
+    async def _create(self, task: str = "generation", **params):
+        """One upstream completion: routed across providers if a router is set, else via the shared client"""
+        if self.router is not None:
+            response = await self.router.complete(
+                params["messages"],
+                task=task,
+                max_tokens=params["max_tokens"],
+                temperature=params["temperature"]
+            )
+            return response.to_chat_completion()
         
-    def generate_content(self, 
+        return await llm_scheduler.run(
+            lambda: self.client.chat.completions.create(**params), estimate_request_tokens(params)
+        )
+    
+    async def generate_content(self, 
                         title: str, 
                         content: str, 
                         tone: str = 'professional',
@@ -29,8 +55,8 @@ class ContentGenerationService:
         try:
             prompt = self._build_prompt(title, content, tone, format_type, include_hashtags, include_seo)
             
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
+            response = await self._create(
+                model=LEGACY_MODEL,
                 messages=[
                     {"role": "system", "content": self._get_system_prompt(format_type)},
                     {"role": "user", "content": prompt}
@@ -142,13 +168,17 @@ class ContentGenerationService:
         
         return content
     
-    def generate_seo_metadata(self, content: str, title: str) -> Dict[str, str]:
-        """Generate SEO metadata for the content"""
+    async def generate_seo_metadata(self, content: str, title: str, use_cache: bool = True) -> Dict[str, str]:
+        """Generate SEO metadata for the content; unchanged content reuses the cached completion"""
         try:
+            if prompt_budget.enabled:
+                excerpt = prompt_budget.fit(content, LEGACY_MODEL, prompt_budget.metadata_context_tokens)
+            else:
+                excerpt = content[:500]
             prompt = f"""
             Generate SEO metadata for the following content:
             Title: {title}
-            Content: {content[:500]}...
+            Content: {excerpt}...
             
             Provide:
             1. Meta description (150-160 characters)
@@ -160,14 +190,20 @@ class ContentGenerationService:
             Format as JSON.
             """
             
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
+            params = {
+                "model": LEGACY_MODEL,
+                "messages": [
                     {"role": "system", "content": "You are an SEO expert. Generate accurate, relevant SEO metadata."},
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=500,
-                temperature=0.3
+                "max_tokens": 500,
+                "temperature": 0.3
+            }
+            key = completion_cache.make_key(params)
+            response = await completion_cache.get_or_create(
+                params,
+                lambda: llm_single_flight.do(key, lambda: self._create("meta", **params)),
+                use_cache=use_cache
             )
             
             # Parse JSON response
@@ -193,13 +229,13 @@ class ContentGenerationService:
                 'slug': title.lower().replace(' ', '-')[:50]
             }
     
-    def suggest_improvements(self, content: str) -> Dict[str, Any]:
+    async def suggest_improvements(self, content: str) -> Dict[str, Any]:
         """Suggest improvements for the generated content"""
         try:
             prompt = f"""
             Analyze the following content and suggest improvements:
             
-            {content}
+            {prompt_budget.fit(content, LEGACY_MODEL)}
             
             Provide suggestions for:
             1. Engagement (hooks, CTAs)
@@ -211,8 +247,8 @@ class ContentGenerationService:
             Be specific and actionable.
             """
             
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
+            response = await self._create(
+                model=LEGACY_MODEL,
                 messages=[
                     {"role": "system", "content": "You are a content optimization expert."},
                     {"role": "user", "content": prompt}
@@ -263,6 +299,17 @@ class ContentGenerationService:
             'call_to_actions': len(re.findall(r'(let\'s|connect|share|comment|like|follow)', content, re.IGNORECASE))
         }
 
+# Global service instance - initialized lazily
+content_generation_service = None
+
+def get_content_generation_service() -> ContentGenerationService:
+    """Get or create the global content generation service"""
+    global content_generation_service
+    if content_generation_service is None:
+        router = get_llm_router() if settings.LLM_ROUTER_ENABLED else None
+        content_generation_service = ContentGenerationService(router=router)
+    return content_generation_service
+
 # Example usage and templates
 CONTENT_TEMPLATES = {
     'project_showcase': {
@@ -9,6 +9,8 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, desc, asc, func
 from fastapi import HTTPException
 
+from app.core.fulltext import post_search_clauses
+from app.utils.pagination import keyset_page, paginate_keyset, total_count_cache
 from app.models.content import BlogPost, PostVersion, ContentTemplate
 from app.schemas.content import (
     BlogPostCreate, BlogPostUpdate, BlogPostSearchRequest,
@@ -16,6 +18,10 @@ from app.schemas.content import (
 )
 
 
+# Non-null columns that can key cursor pagination
+KEYSET_SORT_FIELDS = ("created_at", "updated_at", "title")
+
+
 class ContentService:
     """Service for managing blog post content and versions"""
     
@@ -71,58 +77,45 @@ class ContentService:
     
     def get_blog_posts(self, user_id: str, search_params: BlogPostSearchRequest) -> Tuple[List[BlogPost], int]:
         """Get blog posts with search and filtering"""
-        query = self.db.query(BlogPost).filter(BlogPost.user_id == user_id)
-        
-        # Apply filters
-        if search_params.query:
-            search_term = f"%{search_params.query}%"
-            query = query.filter(
-                or_(
-                    BlogPost.title.ilike(search_term),
-                    BlogPost.content.ilike(search_term),
-                    BlogPost.meta_description.ilike(search_term)
-                )
-            )
-        
-        if search_params.status:
-            query = query.filter(BlogPost.status == search_params.status.value)
-        
-        if search_params.post_type:
-            query = query.filter(BlogPost.post_type == search_params.post_type.value)
-        
-        if search_params.category:
-            query = query.filter(BlogPost.template_category == search_params.category)
-        
-        if search_params.date_from:
-            try:
-                date_from = datetime.strptime(search_params.date_from, "%Y-%m-%d")
-                query = query.filter(BlogPost.created_at >= date_from)
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Invalid date_from format. Use YYYY-MM-DD")
-        
-        if search_params.date_to:
-            try:
-                date_to = datetime.strptime(search_params.date_to, "%Y-%m-%d")
-                query = query.filter(BlogPost.created_at <= date_to)
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Invalid date_to format. Use YYYY-MM-DD")
-        
-        # Apply sorting
-        sort_column = getattr(BlogPost, search_params.sort_by, BlogPost.created_at)
-        if search_params.sort_order == "desc":
-            query = query.order_by(desc(sort_column))
-        else:
-            query = query.order_by(asc(sort_column))
+        dialect_name = self._dialect_name()
+        query = self.db.query(BlogPost).filter(
+            *self._post_search_conditions(user_id, search_params, dialect_name)
+        )
         
         # Get total count
         total = query.count()
         
-        # Apply pagination
+        # Apply ordering and pagination
         offset = (search_params.page - 1) * search_params.per_page
-        posts = query.offset(offset).limit(search_params.per_page).all()
+        posts = query.order_by(
+            *self._post_order_by(search_params, dialect_name)
+        ).offset(offset).limit(search_params.per_page).all()
         
         return posts, total
     
+    def get_blog_posts_keyset(self, user_id: str, search_params: BlogPostSearchRequest,
+                              cursor: Optional[str] = None,
+                              include_total: bool = False) -> Tuple[List[BlogPost], Optional[str], Optional[int]]:
+        """Get a page of blog posts after a cursor (no OFFSET; COUNT only on request)"""
+        conditions = self._post_search_conditions(user_id, search_params, self._dialect_name())
+        sort_by, descending = self._keyset_sort(search_params)
+        
+        query = paginate_keyset(
+            self.db.query(BlogPost).filter(*conditions),
+            getattr(BlogPost, sort_by), BlogPost.id, sort_by, descending,
+            cursor, search_params.per_page
+        )
+        posts, next_cursor = keyset_page(query.all(), sort_by, descending, search_params.per_page)
+        
+        total = None
+        if include_total:
+            total = total_count_cache.get_or_count(
+                self._total_cache_key(user_id, search_params),
+                lambda: self.db.query(BlogPost).filter(*conditions).count()
+            )
+        
+        return posts, next_cursor, total
+    
     def update_blog_post(self, post_id: str, user_id: str, update_data: BlogPostUpdate, 
                         changes_summary: Optional[str] = None) -> Optional[BlogPost]:
         """Update a blog post"""
@@ -230,18 +223,43 @@ class ContentService:
         return blog_post
     
     def search_content(self, user_id: str, query: str, limit: int = 10) -> List[BlogPost]:
-        """Search blog posts by content"""
-        search_term = f"%{query}%"
+        """Search blog posts by content, most relevant first"""
+        condition, relevance = self._text_search_clauses(query, self._dialect_name())
+        
+        search_query = self.db.query(BlogPost).filter(
+            and_(
+                BlogPost.user_id == user_id,
+                condition
+            )
+        )
+        if relevance is not None:
+            search_query = search_query.order_by(relevance)
+        
+        return search_query.limit(limit).all()
+    
+    def get_posts_by_ids(self, user_id: str, post_ids: List[str]) -> List[BlogPost]:
+        """Get a user's blog posts by ID in one query"""
+        if not post_ids:
+            return []
+        
         return self.db.query(BlogPost).filter(
             and_(
                 BlogPost.user_id == user_id,
-                or_(
-                    BlogPost.title.ilike(search_term),
-                    BlogPost.content.ilike(search_term),
-                    BlogPost.meta_description.ilike(search_term)
-                )
+                BlogPost.id.in_(post_ids)
             )
-        ).limit(limit).all()
+        ).all()
+    
+    def update_seo_scores(self, user_id: str, scores: Dict[str, int]) -> int:
+        """Persist recomputed SEO scores for a user's posts"""
+        if not scores:
+            return 0
+        
+        posts = self.get_posts_by_ids(user_id, list(scores.keys()))
+        for post in posts:
+            post.seo_score = scores[post.id]
+        
+        self.db.commit()
+        return len(posts)
     
     def get_posts_by_category(self, user_id: str, category: str) -> List[BlogPost]:
         """Get posts by template category"""
@@ -270,7 +288,106 @@ class ContentService:
         unique_posts = list({post.id: post for post in posts}.values())
         return unique_posts
     
-    def _generate_slug(self, title: str) -> str:
+    def _dialect_name(self) -> str:
+        """Name of the database dialect behind the session"""
+        return self.db.get_bind().dialect.name
+    
+    @staticmethod
+    def _text_search_condition(query: str):
+        """Case-insensitive substring match on title, content and meta description"""
+        search_term = f"%{query}%"
+        return or_(
+            BlogPost.title.ilike(search_term),
+            BlogPost.content.ilike(search_term),
+            BlogPost.meta_description.ilike(search_term)
+        )
+    
+    @staticmethod
+    def _text_search_clauses(query: str, dialect_name: Optional[str] = None) -> Tuple[Any, Optional[Any]]:
+        """Get (condition, relevance ORDER BY) for a text search.
+        
+        Uses the full-text index where the dialect has one, otherwise falls
+        back to an unranked substring match.
+        """
+        clauses = post_search_clauses(dialect_name, query, BlogPost.id) if dialect_name else None
+        if clauses is None:
+            return ContentService._text_search_condition(query), None
+        return clauses
+    
+    @staticmethod
+    def _post_search_conditions(user_id: str, search_params: BlogPostSearchRequest,
+                                dialect_name: Optional[str] = None) -> List[Any]:
+        """Build filter conditions for a post search (shared with AsyncContentService)"""
+        conditions = [BlogPost.user_id == user_id]
+        
+        if search_params.query:
+            conditions.append(ContentService._text_search_clauses(search_params.query, dialect_name)[0])
+        
+        if search_params.status:
+            conditions.append(BlogPost.status == search_params.status.value)
+        
+        if search_params.post_type:
+            conditions.append(BlogPost.post_type == search_params.post_type.value)
+        
+        if search_params.category:
+            conditions.append(BlogPost.template_category == search_params.category)
+        
+        if search_params.date_from:
+            try:
+                date_from = datetime.strptime(search_params.date_from, "%Y-%m-%d")
+                conditions.append(BlogPost.created_at >= date_from)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid date_from format. Use YYYY-MM-DD")
+        
+        if search_params.date_to:
+            try:
+                date_to = datetime.strptime(search_params.date_to, "%Y-%m-%d")
+                conditions.append(BlogPost.created_at <= date_to)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid date_to format. Use YYYY-MM-DD")
+        
+        return conditions
+    
+    @staticmethod
+    def _post_sort_clause(search_params: BlogPostSearchRequest):
+        """Get the ORDER BY clause for a post search"""
+        sort_column = getattr(BlogPost, search_params.sort_by or "created_at", BlogPost.created_at)
+        if search_params.sort_order == "desc":
+            return desc(sort_column)
+        return asc(sort_column)
+    
+    @staticmethod
+    def _post_order_by(search_params: BlogPostSearchRequest, dialect_name: Optional[str] = None) -> List[Any]:
+        """Get ORDER BY clauses: relevance for text searches unless a sort field was requested"""
+        if search_params.query and search_params.sort_by in (None, "relevance"):
+            relevance = ContentService._text_search_clauses(search_params.query, dialect_name)[1]
+            if relevance is not None:
+                return [relevance, desc(BlogPost.created_at)]
+        return [ContentService._post_sort_clause(search_params)]
+    
+    @staticmethod
+    def _keyset_sort(search_params: BlogPostSearchRequest) -> Tuple[str, bool]:
+        """Get (sort field, descending) for cursor pagination"""
+        sort_by = search_params.sort_by
+        if sort_by in (None, "relevance"):
+            sort_by = "created_at"
+        if sort_by not in KEYSET_SORT_FIELDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cursor pagination supports sort_by: {', '.join(KEYSET_SORT_FIELDS)}"
+            )
+        return sort_by, search_params.sort_order == "desc"
+    
+    @staticmethod
+    def _total_cache_key(user_id: str, search_params: BlogPostSearchRequest) -> Tuple:
+        """Cache key for the total of a filtered post listing"""
+        return (
+            "blog_posts", user_id, search_params.query, search_params.status, search_params.post_type,
+            search_params.category, search_params.date_from, search_params.date_to
+        )
+    
+    @staticmethod
+    def _generate_slug(title: str) -> str:
         """Generate URL slug from title"""
         slug = title.lower()
         slug = re.sub(r'[^a-z0-9\s-]', '', slug)
@@ -322,7 +439,8 @@ class ContentService:
         self.db.commit()
         return version
     
-    def _calculate_seo_score(self, blog_post: BlogPost) -> int:
+    @staticmethod
+    def _calculate_seo_score(blog_post: BlogPost) -> int:
         """Calculate basic SEO score for a blog post"""
         score = 0
         
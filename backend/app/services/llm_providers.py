@@ -0,0 +1,208 @@
+"""
+LLM provider backends behind one streaming interface
+"""
+import asyncio
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from anthropic import AI_PROMPT, HUMAN_PROMPT, AsyncAnthropic
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion
+
+from app.services.llm_scheduler import LLMScheduler, estimate_request_tokens
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LLMResponse:
+    """A finished completion and where it came from"""
+    text: str
+    provider: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    estimated_cost: float
+    first_token_latency: float
+    total_latency: float
+    hedged: bool = False
+
+    def to_chat_completion(self) -> ChatCompletion:
+        """Same response in the OpenAI shape the services already parse and cache"""
+        return ChatCompletion.model_validate({
+            "id": f"routed-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": self.model,
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": self.text}
+            }],
+            "usage": {
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": self.prompt_tokens + self.completion_tokens
+            }
+        })
+
+
+class LLMProvider(ABC):
+    """
+    One model on one backend
+
+    stream() yields text deltas; the router measures time to the first delta
+    for hedging, so providers should yield as soon as text arrives. Prices
+    are per 1K tokens.
+    """
+
+    def __init__(self, name: str, model: str, input_cost: float, output_cost: float):
+        self.name = name
+        self.model = model
+        self.input_cost = input_cost
+        self.output_cost = output_cost
+
+    @abstractmethod
+    def stream(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float,
+               json_mode: bool = False) -> AsyncIterator[str]:
+        """Yield the completion's text deltas"""
+
+    def estimate_cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return (prompt_tokens / 1000) * self.input_cost + (completion_tokens / 1000) * self.output_cost
+
+    async def close(self):
+        """Release clients owned by this provider"""
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Chat completions over the OpenAI API or a compatible one (e.g. DeepSeek)"""
+
+    def __init__(self, name: str, client: AsyncOpenAI, model: str, input_cost: float, output_cost: float,
+                 scheduler: Optional[LLMScheduler] = None, owns_client: bool = False):
+        super().__init__(name, model, input_cost, output_cost)
+        self.client = client
+        self.scheduler = scheduler
+        self.owns_client = owns_client
+
+    async def stream(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float,
+                     json_mode: bool = False) -> AsyncIterator[str]:
+        params: Dict[str, Any] = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True
+        }
+        if json_mode:
+            params["response_format"] = {"type": "json_object"}
+
+        if self.scheduler is None:
+            async for delta in self._stream(params):
+                yield delta
+            return
+
+        async with self.scheduler.slot(estimate_request_tokens(params), track_latency=False):
+            async for delta in self._stream(params):
+                yield delta
+
+    async def _stream(self, params: Dict[str, Any]) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(**params)
+        chunks = stream.__aiter__()
+        try:
+            async for chunk in chunks:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await chunks.aclose()
+            await stream.response.aclose()
+
+    async def close(self):
+        if self.owns_client:
+            await self.client.close()
+
+
+class AnthropicProvider(LLMProvider):
+    """Claude via the text completions API of the pinned anthropic client"""
+
+    def __init__(self, name: str, client: AsyncAnthropic, model: str, input_cost: float, output_cost: float):
+        super().__init__(name, model, input_cost, output_cost)
+        self.client = client
+
+    @staticmethod
+    def build_prompt(messages: List[Dict[str, str]], json_mode: bool = False) -> str:
+        """Fold chat messages into Human/Assistant turns; system text leads the first human turn"""
+        system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+        turns = [[m["role"], m["content"]] for m in messages if m["role"] != "system"]
+        if not any(role == "user" for role, _ in turns):
+            turns.insert(0, ["user", ""])
+
+        users = [turn for turn in turns if turn[0] == "user"]
+        if system:
+            users[0][1] = f"{system}\n\n{users[0][1]}".strip()
+        if json_mode:
+            users[-1][1] += "\n\nRespond with only the JSON object."
+
+        prompt = "".join(f"{HUMAN_PROMPT if role == 'user' else AI_PROMPT} {content}" for role, content in turns)
+        return prompt + AI_PROMPT
+
+    async def stream(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float,
+                     json_mode: bool = False) -> AsyncIterator[str]:
+        stream = await self.client.completions.create(
+            model=self.model,
+            prompt=self.build_prompt(messages, json_mode),
+            max_tokens_to_sample=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+        events = stream.__aiter__()
+        try:
+            async for event in events:
+                if event.completion:
+                    yield event.completion
+        finally:
+            await events.aclose()
+            await stream.response.aclose()
+
+    async def close(self):
+        await self.client.close()
+
+
+class FakeProvider(LLMProvider):
+    """
+    Local provider with scripted output and timing (tests, load tests and offline development)
+
+    Yields text in chunk_size pieces after first_token_delay, with chunk_delay
+    between pieces; raises error (if given) instead of the first token.
+    """
+
+    def __init__(self, name: str = "fake", text: str = '{"title": "Fake", "content": "Fake content"}',
+                 model: str = "fake-model", first_token_delay: float = 0.0, chunk_delay: float = 0.0,
+                 chunk_size: int = 16, error: Optional[Exception] = None,
+                 input_cost: float = 0.0, output_cost: float = 0.0):
+        super().__init__(name, model, input_cost, output_cost)
+        self.text = text
+        self.first_token_delay = first_token_delay
+        self.chunk_delay = chunk_delay
+        self.chunk_size = chunk_size
+        self.error = error
+        self.calls = 0
+        self.closed_streams = 0
+
+    async def stream(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float,
+                     json_mode: bool = False) -> AsyncIterator[str]:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.first_token_delay)
+            if self.error is not None:
+                raise self.error
+            for start in range(0, len(self.text), self.chunk_size):
+                if start:
+                    await asyncio.sleep(self.chunk_delay)
+                yield self.text[start:start + self.chunk_size]
+        finally:
+            self.closed_streams += 1
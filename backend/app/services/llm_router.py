@@ -0,0 +1,330 @@
+"""
+Provider-agnostic LLM router with hedged requests, fallback and cost-aware routing
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from anthropic import AsyncAnthropic
+from openai import AsyncOpenAI
+
+from app.core.config import settings
+from app.services.llm_providers import (
+    AnthropicProvider, FakeProvider, LLMProvider, LLMResponse, OpenAICompatibleProvider
+)
+from app.services.llm_scheduler import llm_scheduler
+from app.services.openai_service import get_async_openai_client
+
+
+logger = logging.getLogger(__name__)
+
+# Price per 1K tokens (input, output) - update as needed
+MODEL_PRICING = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo-preview": (0.01, 0.03),
+    "gpt-3.5-turbo": (0.0015, 0.002),
+    "deepseek-chat": (0.00014, 0.00028),
+    "claude-2.1": (0.008, 0.024),
+    "claude-instant-1": (0.0008, 0.0024),
+}
+DEFAULT_PRICING = (0.01, 0.03)
+
+# Tasks whose short prompts go to the cheapest provider first
+CHEAP_TASKS = {"seo", "meta"}
+
+
+class LLMRouterError(Exception):
+    """Raised when no provider could serve a request"""
+    pass
+
+
+class ProviderStats:
+    """Recent first-token and total latencies plus outcome counters for one provider"""
+
+    def __init__(self, window: int = 200):
+        self.first_token: Deque[float] = deque(maxlen=window)
+        self.total: Deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.wins = 0
+        self.hedge_wins = 0
+
+    @staticmethod
+    def percentile(samples: Deque[float], q: float) -> Optional[float]:
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[int(round(q * (len(ordered) - 1)))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        def rounded(value):
+            return round(value, 4) if value is not None else None
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "wins": self.wins,
+            "hedge_wins": self.hedge_wins,
+            "first_token_p50": rounded(self.percentile(self.first_token, 0.5)),
+            "first_token_p95": rounded(self.percentile(self.first_token, 0.95)),
+            "total_p50": rounded(self.percentile(self.total, 0.5)),
+            "total_p95": rounded(self.percentile(self.total, 0.95))
+        }
+
+
+def _prompt_tokens(messages: List[Dict[str, str]]) -> int:
+    """Rough prompt size (about four characters per token)"""
+    return sum(len(message.get("content") or "") for message in messages) // 4
+
+
+class LLMRouter:
+    """
+    Route chat requests across providers
+
+    Providers are tried in the configured order, except that short prompts
+    for CHEAP_TASKS are ordered cheapest first. If the chosen provider has
+    not produced its first token within its recent p95 first-token latency
+    (hedge_delay_default until min_samples have been seen), the next
+    provider is started as a hedge and whichever produces a first token
+    first wins; the other is cancelled. A provider that fails before its
+    first token falls through to the next one; complete() also falls back
+    when a provider fails mid-response.
+    """
+
+    def __init__(self, providers: List[LLMProvider], hedge_enabled: bool = settings.LLM_HEDGE_ENABLED,
+                 hedge_percentile: float = settings.LLM_HEDGE_PERCENTILE,
+                 hedge_delay_default: float = settings.LLM_HEDGE_DEFAULT_DELAY_SECONDS,
+                 min_samples: int = settings.LLM_HEDGE_MIN_SAMPLES,
+                 cheap_prompt_max_tokens: int = settings.LLM_CHEAP_PROMPT_MAX_TOKENS):
+        if not providers:
+            raise LLMRouterError("No LLM providers configured")
+        self.providers = providers
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_delay_default = hedge_delay_default
+        self.min_samples = min_samples
+        self.cheap_prompt_max_tokens = cheap_prompt_max_tokens
+
+        self._stats = {provider.name: ProviderStats() for provider in providers}
+        self.hedges = 0
+        self.fallbacks = 0
+        self.cheap_routed = 0
+
+    def candidates(self, task: str, messages: List[Dict[str, str]]) -> List[LLMProvider]:
+        """Providers in the order they should be tried for this request"""
+        providers = list(self.providers)
+        if task in CHEAP_TASKS and _prompt_tokens(messages) <= self.cheap_prompt_max_tokens:
+            providers.sort(key=lambda provider: provider.input_cost + provider.output_cost)
+            self.cheap_routed += 1
+        return providers
+
+    def hedge_delay(self, provider: LLMProvider) -> float:
+        """Seconds to wait for a first token before starting a hedge"""
+        samples = self._stats[provider.name].first_token
+        if len(samples) < self.min_samples:
+            return self.hedge_delay_default
+        return ProviderStats.percentile(samples, self.hedge_percentile)
+
+    async def stream(self, messages: List[Dict[str, str]], task: str = "generation", max_tokens: int = 1000,
+                     temperature: float = 0.7, json_mode: bool = False) -> AsyncIterator[str]:
+        """Yield text deltas from whichever provider answers first"""
+        request = {"messages": messages, "max_tokens": max_tokens, "temperature": temperature, "json_mode": json_mode}
+        provider, first, deltas, started, _, _ = await self._first_token(self.candidates(task, messages), request)
+        try:
+            if first:
+                yield first
+            async for delta in deltas:
+                yield delta
+            self._stats[provider.name].total.append(time.monotonic() - started)
+        except Exception:
+            self._stats[provider.name].errors += 1
+            raise
+        finally:
+            await deltas.aclose()
+
+    async def complete(self, messages: List[Dict[str, str]], task: str = "generation", max_tokens: int = 1000,
+                       temperature: float = 0.7, json_mode: bool = False) -> LLMResponse:
+        """Full completion from the first provider to answer, falling back if it fails mid-response"""
+        request = {"messages": messages, "max_tokens": max_tokens, "temperature": temperature, "json_mode": json_mode}
+        candidates = self.candidates(task, messages)
+
+        while True:
+            provider, first, deltas, started, first_latency, hedged = await self._first_token(candidates, request)
+            try:
+                parts = [first] + [delta async for delta in deltas]
+            except Exception as e:
+                self._stats[provider.name].errors += 1
+                if not candidates:
+                    raise LLMRouterError(f"All LLM providers failed: {str(e)}")
+                self.fallbacks += 1
+                logger.warning(f"LLM provider {provider.name} failed mid-response, falling back: {str(e)}")
+                continue
+            finally:
+                await deltas.aclose()
+
+            total_latency = time.monotonic() - started
+            self._stats[provider.name].total.append(total_latency)
+            text = "".join(parts)
+            prompt_tokens = _prompt_tokens(messages)
+            completion_tokens = max(1, len(text) // 4)
+            return LLMResponse(
+                text=text,
+                provider=provider.name,
+                model=provider.model,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                estimated_cost=provider.estimate_cost(prompt_tokens, completion_tokens),
+                first_token_latency=first_latency,
+                total_latency=total_latency,
+                hedged=hedged
+            )
+
+    async def _first_token(self, candidates: List[LLMProvider], request: Dict[str, Any]
+                           ) -> Tuple[LLMProvider, str, AsyncIterator[str], float, float, bool]:
+        """
+        Start candidates (consuming them from the list) until one yields its first delta
+
+        Returns (provider, first delta, remaining deltas, start time,
+        first-token latency, whether a hedge was started).
+        """
+        if not candidates:
+            raise LLMRouterError("No LLM providers left to try")
+
+        pending: Dict[asyncio.Future, Tuple[LLMProvider, AsyncIterator[str], float]] = {}
+        hedged = False
+        last_error: Optional[Exception] = None
+
+        def launch() -> Tuple[LLMProvider, float]:
+            provider = candidates.pop(0)
+            deltas = provider.stream(**request).__aiter__()
+            started = time.monotonic()
+            pending[asyncio.ensure_future(deltas.__anext__())] = (provider, deltas, started)
+            self._stats[provider.name].requests += 1
+            return provider, started
+
+        primary, primary_started = launch()
+        try:
+            while pending:
+                timeout = None
+                if self.hedge_enabled and not hedged and candidates:
+                    timeout = max(0.0, self.hedge_delay(primary) - (time.monotonic() - primary_started))
+
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    self.hedges += 1
+                    hedge, _ = launch()
+                    logger.info(f"LLM provider {primary.name} slow to first token; hedging with {hedge.name}")
+                    continue
+
+                for task in done:
+                    provider, deltas, started = pending.pop(task)
+                    try:
+                        first = task.result()
+                    except StopAsyncIteration:
+                        first = ""
+                    except Exception as e:
+                        last_error = e
+                        self._stats[provider.name].errors += 1
+                        logger.warning(f"LLM provider {provider.name} failed: {str(e)}")
+                        await deltas.aclose()
+                        if not pending and candidates:
+                            self.fallbacks += 1
+                            primary, primary_started = launch()
+                        continue
+
+                    latency = time.monotonic() - started
+                    stats = self._stats[provider.name]
+                    stats.first_token.append(latency)
+                    stats.wins += 1
+                    if hedged:
+                        stats.hedge_wins += 1
+                    return provider, first, deltas, started, latency, hedged
+
+            raise LLMRouterError(f"All LLM providers failed: {str(last_error)}")
+        finally:
+            # Cancel the losers and close their upstream streams
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(list(pending))
+            for task, (provider, deltas, _) in pending.items():
+                if not task.cancelled():
+                    task.exception()
+                await deltas.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-provider latency percentiles and routing counters"""
+        return {
+            "providers": {
+                provider.name: {
+                    "model": provider.model,
+                    "hedge_delay_seconds": round(self.hedge_delay(provider), 4),
+                    **self._stats[provider.name].snapshot()
+                }
+                for provider in self.providers
+            },
+            "hedges": self.hedges,
+            "fallbacks": self.fallbacks,
+            "cheap_routed": self.cheap_routed
+        }
+
+    async def close(self):
+        for provider in self.providers:
+            await provider.close()
+
+
+def model_pricing(model: str) -> Tuple[float, float]:
+    return MODEL_PRICING.get(model, DEFAULT_PRICING)
+
+
+def build_provider(name: str) -> Optional[LLMProvider]:
+    """Provider for a LLM_PROVIDERS entry, or None if it is not configured"""
+    if name in ("openai", "openai_cheap"):
+        if not settings.openai_api_key:
+            return None
+        model = settings.OPENAI_MODEL if name == "openai" else settings.LLM_CHEAP_OPENAI_MODEL
+        return OpenAICompatibleProvider(name, get_async_openai_client(), model, *model_pricing(model),
+                                        scheduler=llm_scheduler)
+    if name == "deepseek":
+        if not settings.DEEPSEEK_API_KEY:
+            return None
+        client = AsyncOpenAI(api_key=settings.DEEPSEEK_API_KEY, base_url=settings.DEEPSEEK_BASE_URL)
+        return OpenAICompatibleProvider(name, client, settings.DEEPSEEK_MODEL, *model_pricing(settings.DEEPSEEK_MODEL),
+                                        owns_client=True)
+    if name == "anthropic":
+        if not settings.ANTHROPIC_API_KEY:
+            return None
+        return AnthropicProvider(name, AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY), settings.ANTHROPIC_MODEL,
+                                 *model_pricing(settings.ANTHROPIC_MODEL))
+    if name == "fake":
+        return FakeProvider()
+    logger.warning(f"Unknown LLM provider: {name}")
+    return None
+
+
+# Global router - initialized lazily
+llm_router = None
+
+def get_llm_router() -> LLMRouter:
+    """Get or create the global router from LLM_PROVIDERS, skipping providers without credentials"""
+    global llm_router
+    if llm_router is None:
+        providers = []
+        for name in [name.strip() for name in settings.LLM_PROVIDERS.split(",") if name.strip()]:
+            provider = build_provider(name)
+            if provider is None:
+                logger.warning(f"LLM provider {name} is not configured; skipping")
+            else:
+                providers.append(provider)
+        llm_router = LLMRouter(providers)
+    return llm_router
+
+async def close_llm_router():
+    """Close provider clients owned by the router (application shutdown)"""
+    global llm_router
+    if llm_router is not None:
+        await llm_router.close()
+        llm_router = None
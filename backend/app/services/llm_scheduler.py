@@ -0,0 +1,251 @@
+"""
+Client-side scheduler for upstream LLM calls: RPM/TPM budgets, adaptive concurrency and priority lanes
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import openai
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Completion budget assumed when a request does not set max_tokens
+DEFAULT_COMPLETION_TOKENS = 1000
+
+
+class Priority(IntEnum):
+    """Scheduling lanes; lower values are granted first"""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+def estimate_request_tokens(params: Dict[str, Any]) -> int:
+    """Tokens a chat request may consume: prompt (about four characters per token) plus max_tokens"""
+    prompt_characters = sum(len(str(message.get("content") or "")) for message in params.get("messages", []))
+    return prompt_characters // 4 + (params.get("max_tokens") or DEFAULT_COMPLETION_TOKENS)
+
+
+class TokenBucket:
+    """Budget that refills continuously at per_minute / 60 per second, holding at most one minute's worth"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.available = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available (0 if it is now); amounts above capacity wait for a full bucket"""
+        self._refill()
+        needed = min(amount, self.capacity) - self.available
+        return needed / self.rate if needed > 0 else 0.0
+
+    def level(self) -> float:
+        """Currently available budget"""
+        self._refill()
+        return self.available
+
+    def take(self, amount: float):
+        self._refill()
+        self.available -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        """Return unused budget (negative amounts record overspend as debt)"""
+        self._refill()
+        self.available = min(self.capacity, self.available + amount)
+
+
+class _Waiter:
+    __slots__ = ("tokens", "future")
+
+    def __init__(self, tokens: int, future: asyncio.Future):
+        self.tokens = tokens
+        self.future = future
+
+
+class LLMScheduler:
+    """
+    Gate upstream LLM calls on request/token budgets and an adaptive concurrency window
+
+    Callers queue by priority (then arrival) and are granted a slot when the
+    window has room and both the requests-per-minute and tokens-per-minute
+    buckets can cover the request. The window adapts AIMD-style: it grows by
+    about one slot per window of fast completions, halves on a 429 and
+    shrinks by 10% when latency exceeds the target. Only the first 429 from
+    requests started in the same window shrinks it, so one burst of 429s is
+    one decrease.
+    """
+
+    def __init__(self, requests_per_minute: int = settings.LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = settings.LLM_TOKENS_PER_MINUTE,
+                 min_concurrency: int = settings.LLM_MIN_CONCURRENCY,
+                 max_concurrency: int = settings.LLM_MAX_CONCURRENCY,
+                 initial_concurrency: int = settings.LLM_INITIAL_CONCURRENCY,
+                 latency_target: float = settings.LLM_LATENCY_TARGET_SECONDS):
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_target = latency_target
+        self.limit = float(min(max(initial_concurrency, min_concurrency), max_concurrency))
+
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._queue: List[Tuple[int, int, _Waiter]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Bumped on every decrease; slots remember the epoch they were granted in
+        self._epoch = 0
+
+        self.in_flight = 0
+        self.granted = 0
+        self.rate_limited = 0
+        self.increases = 0
+        self.decreases = 0
+        self.wait_seconds = 0.0
+
+    async def run(self, create: Callable[[], Awaitable[Any]], estimated_tokens: int,
+                  priority: Priority = Priority.INTERACTIVE) -> Any:
+        """Await create() inside a slot; unused token budget is refunded from the response's usage"""
+        async with self.slot(estimated_tokens, priority):
+            result = await create()
+
+        actual = getattr(getattr(result, "usage", None), "total_tokens", None)
+        if settings.LLM_SCHEDULER_ENABLED and isinstance(actual, int):
+            self._tokens.refund(estimated_tokens - actual)
+        return result
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int, priority: Priority = Priority.INTERACTIVE,
+                   track_latency: bool = True) -> AsyncIterator[None]:
+        """
+        Hold one concurrency slot for the duration of the block
+
+        RateLimitError raised inside the block shrinks the window. Use
+        track_latency=False for streams, whose duration is not a latency signal.
+        """
+        if not settings.LLM_SCHEDULER_ENABLED:
+            yield
+            return
+
+        epoch = await self._acquire(estimated_tokens, priority)
+        started = time.monotonic()
+        try:
+            yield
+        except openai.RateLimitError:
+            self._release(epoch, rate_limited=True)
+            raise
+        except BaseException:
+            self._release(epoch)
+            raise
+        self._release(epoch, latency=time.monotonic() - started if track_latency else None)
+
+    async def _acquire(self, tokens: int, priority: Priority) -> int:
+        waiter = _Waiter(tokens, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queue, (int(priority), next(self._sequence), waiter))
+        self._dispatch()
+
+        started = time.monotonic()
+        try:
+            epoch = await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as the caller was cancelled: hand the slot back
+                self._release(waiter.future.result())
+            raise
+        self.wait_seconds += time.monotonic() - started
+        return epoch
+
+    def _release(self, epoch: int, latency: Optional[float] = None, rate_limited: bool = False):
+        self.in_flight -= 1
+
+        if rate_limited:
+            self.rate_limited += 1
+            if epoch == self._epoch:
+                self._decrease(0.5)
+                logger.warning(f"LLM rate limited; concurrency window reduced to {self.limit:.1f}")
+        elif latency is not None and latency > self.latency_target:
+            if epoch == self._epoch:
+                self._decrease(0.9)
+        elif latency is not None and self.limit < self.max_concurrency:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self.increases += 1
+
+        self._dispatch()
+
+    def _decrease(self, factor: float):
+        self.limit = max(self.min_concurrency, self.limit * factor)
+        self.decreases += 1
+        self._epoch += 1
+
+    def _dispatch(self):
+        """Grant queued callers in priority order while the window and budgets allow"""
+        while self._queue:
+            _, _, waiter = self._queue[0]
+            if waiter.future.done():
+                # Cancelled while queued
+                heapq.heappop(self._queue)
+                continue
+            if self.in_flight >= int(self.limit):
+                return
+
+            wait = max(self._requests.wait_time(1), self._tokens.wait_time(waiter.tokens))
+            if wait > 0:
+                self._wake_after(wait)
+                return
+
+            heapq.heappop(self._queue)
+            self._requests.take(1)
+            self._tokens.take(waiter.tokens)
+            self.in_flight += 1
+            self.granted += 1
+            waiter.future.set_result(self._epoch)
+
+    def _wake_after(self, delay: float):
+        """Re-run dispatch once the budgets have refilled"""
+        loop = asyncio.get_running_loop()
+        if self._timer is not None and self._timer_loop is loop and not self._timer.cancelled():
+            if self._timer.when() <= loop.time() + delay:
+                return
+            self._timer.cancel()
+        self._timer = loop.call_later(delay, self._on_timer)
+        self._timer_loop = loop
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get window size, queue depth per lane, remaining budgets and counters"""
+        queued = {priority.name.lower(): 0 for priority in Priority}
+        for priority, _, waiter in self._queue:
+            if not waiter.future.done():
+                queued[Priority(priority).name.lower()] += 1
+        return {
+            "concurrency_limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": queued,
+            "requests_available": int(self._requests.level()),
+            "tokens_available": int(self._tokens.level()),
+            "granted": self.granted,
+            "rate_limited": self.rate_limited,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "avg_wait_seconds": round(self.wait_seconds / self.granted, 4) if self.granted else 0.0
+        }
+
+
+# Global scheduler shared by all upstream LLM calls in this process
+llm_scheduler = LLMScheduler()
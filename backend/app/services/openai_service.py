@@ -5,15 +5,20 @@ import asyncio
 import json
 import logging
 import time
-from typing import Dict, List, Optional, AsyncGenerator
-from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, AsyncGenerator
+from dataclasses import asdict, dataclass
 from enum import Enum
 
+import httpx
 import openai
 from openai import AsyncOpenAI
 from openai.types.chat import ChatCompletion
 
 from app.core.config import settings
+from app.services.completion_cache import completion_cache
+from app.services.llm_scheduler import Priority, estimate_request_tokens, llm_scheduler
+from app.services.single_flight import llm_single_flight
+from app.services.token_budget import prompt_budget
 
 
 logger = logging.getLogger(__name__)
@@ -73,6 +78,10 @@ class GeneratedContent:
     token_usage: TokenUsage
 
 
+# Expected size of a JSON array of SEO suggestions
+SEO_SUGGESTIONS_TOKENS = 400
+
+
 class OpenAIServiceError(Exception):
     """Custom exception for OpenAI service errors"""
     pass
@@ -81,11 +90,13 @@ class OpenAIServiceError(Exception):
 class OpenAIService:
     """OpenAI API service wrapper with advanced features"""
     
-    def __init__(self):
+    def __init__(self, router: Optional[Any] = None):
         if not settings.openai_api_key:
             raise OpenAIServiceError("OpenAI API key not configured")
         
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.client = AsyncOpenAI(api_key=settings.openai_api_key, base_url=settings.OPENAI_BASE_URL)
+        # Optional LLMRouter; when set, completions are routed across providers instead of self.client
+        self.router = router
         self.model = settings.openai_model
         self.max_tokens = settings.openai_max_tokens
         
@@ -179,19 +190,55 @@ Always respond with a JSON object containing:
         self,
         messages: List[Dict],
         max_retries: int = 3,
-        base_delay: float = 1.0
+        base_delay: float = 1.0,
+        use_cache: bool = True,
+        priority: Priority = Priority.INTERACTIVE,
+        task: str = "generation",
+        max_tokens: Optional[int] = None
     ) -> ChatCompletion:
-        """Make OpenAI request with exponential backoff retry logic"""
+        """Make OpenAI request with exponential backoff retry logic, reusing cached completions"""
+        params = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens or self.max_tokens,
+            "temperature": 0.7,
+            "response_format": {"type": "json_object"}
+        }
+        # Identical concurrent requests share one upstream call
+        key = completion_cache.make_key(params)
+        return await completion_cache.get_or_create(
+            params,
+            lambda: llm_single_flight.do(
+                key, lambda: self._complete(params, max_retries, base_delay, priority, task)
+            ),
+            use_cache=use_cache
+        )
+    
+    async def _complete(self, params: Dict[str, Any], max_retries: int, base_delay: float,
+                        priority: Priority, task: str) -> ChatCompletion:
+        """One completion from the router when configured, otherwise from self.client"""
+        if self.router is None:
+            return await self._create_with_retry(params, max_retries, base_delay, priority)
+        
+        response = await self.router.complete(
+            params["messages"],
+            task=task,
+            max_tokens=params["max_tokens"],
+            temperature=params["temperature"],
+            json_mode=True
+        )
+        return response.to_chat_completion()
+    
+    async def _create_with_retry(self, params: Dict[str, Any], max_retries: int, base_delay: float,
+                                 priority: Priority = Priority.INTERACTIVE) -> ChatCompletion:
+        """Call the API through the scheduler, retrying rate limits and API errors with exponential backoff"""
         last_exception = None
+        estimated_tokens = estimate_request_tokens(params)
         
         for attempt in range(max_retries):
             try:
-                response = await self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    max_tokens=self.max_tokens,
-                    temperature=0.7,
-                    response_format={"type": "json_object"}
+                response = await llm_scheduler.run(
+                    lambda: self.client.chat.completions.create(**params), estimated_tokens, priority
                 )
                 return response
                 
@@ -220,8 +267,9 @@ Always respond with a JSON object containing:
         
         raise OpenAIServiceError(f"Failed to complete request after {max_retries} attempts: {str(last_exception)}")
     
-    async def generate_content(self, request: ContentGenerationRequest) -> GeneratedContent:
-        """Generate blog content based on request parameters"""
+    async def generate_content(self, request: ContentGenerationRequest, use_cache: bool = True,
+                               priority: Priority = Priority.INTERACTIVE) -> GeneratedContent:
+        """Generate blog content based on request parameters (use_cache=False forces a fresh completion)"""
         try:
             system_prompt = self._get_system_prompt(
                 request.content_type,
@@ -238,7 +286,10 @@ Always respond with a JSON object containing:
             logger.info(f"Generating content for topic: {request.topic}")
             start_time = time.time()
             
-            response = await self._make_request_with_retry(messages)
+            response = await self._make_request_with_retry(
+                messages, use_cache=use_cache, priority=priority,
+                max_tokens=self._completion_budget(messages, target_words=request.target_length)
+            )
             
             generation_time = time.time() - start_time
             logger.info(f"Content generated in {generation_time:.2f}s")
@@ -255,14 +306,7 @@ Always respond with a JSON object containing:
                 estimated_cost=self._calculate_cost(usage.model_dump())
             )
             
-            return GeneratedContent(
-                title=content_data.get("title", ""),
-                content=content_data.get("content", ""),
-                meta_description=content_data.get("meta_description", ""),
-                keywords=content_data.get("keywords", []),
-                seo_suggestions=content_data.get("seo_suggestions", []),
-                token_usage=token_usage
-            )
+            return self._build_generated_content(content_data, token_usage)
             
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse OpenAI response: {str(e)}")
@@ -272,6 +316,29 @@ Always respond with a JSON object containing:
             logger.error(f"Content generation failed: {str(e)}")
             raise OpenAIServiceError(f"Content generation failed: {str(e)}")
     
+    def _completion_budget(self, messages: List[Dict], target_words: Optional[int] = None,
+                           expected_tokens: Optional[int] = None) -> int:
+        """max_tokens sized to the expected output instead of the fixed self.max_tokens"""
+        return prompt_budget.completion_tokens(
+            self.model,
+            prompt_budget.count_messages(messages, self.model),
+            self.max_tokens,
+            target_words=target_words,
+            expected_tokens=expected_tokens
+        )
+    
+    @staticmethod
+    def _build_generated_content(content_data: Dict[str, Any], token_usage: TokenUsage) -> GeneratedContent:
+        """Structured result from the model's JSON object"""
+        return GeneratedContent(
+            title=content_data.get("title", ""),
+            content=content_data.get("content", ""),
+            meta_description=content_data.get("meta_description", ""),
+            keywords=content_data.get("keywords", []),
+            seo_suggestions=content_data.get("seo_suggestions", []),
+            token_usage=token_usage
+        )
+    
     async def generate_content_stream(
         self,
         request: ContentGenerationRequest
@@ -292,36 +359,187 @@ Always respond with a JSON object containing:
             
             logger.info(f"Starting streaming content generation for: {request.topic}")
             
-            stream = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=self.max_tokens,
-                temperature=0.7,
-                stream=True
-            )
+            params = {
+                "model": self.model,
+                "messages": messages,
+                "max_tokens": self._completion_budget(messages, target_words=request.target_length),
+                "temperature": 0.7,
+                "response_format": {"type": "json_object"},
+                "stream": True
+            }
             
-            async for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
+            # Identical concurrent generations attach to one upstream stream
+            key = completion_cache.make_key(params)
+            deltas = llm_single_flight.subscribe(key, lambda: self._stream_deltas(params))
+            try:
+                async for delta in deltas:
+                    yield delta
+            finally:
+                # Leaving the stream early must release this subscription right away
+                await deltas.aclose()
                     
         except Exception as e:
             logger.error(f"Streaming content generation failed: {str(e)}")
             raise OpenAIServiceError(f"Streaming failed: {str(e)}")
     
+    async def _stream_deltas(self, params: Dict[str, Any]) -> AsyncGenerator[str, None]:
+        """Text deltas of one upstream streamed completion, holding a scheduler slot until it ends"""
+        if self.router is not None:
+            deltas = self.router.stream(
+                params["messages"],
+                max_tokens=params["max_tokens"],
+                temperature=params["temperature"],
+                json_mode=True
+            )
+            try:
+                async for delta in deltas:
+                    yield delta
+            finally:
+                await deltas.aclose()
+            return
+        
+        async with llm_scheduler.slot(estimate_request_tokens(params), track_latency=False):
+            stream = await self.client.chat.completions.create(**params)
+            
+            chunks = stream.__aiter__()
+            try:
+                async for chunk in chunks:
+                    if chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                # Also runs when every consumer stops early, aborting the upstream request
+                await self._close_stream(stream, chunks)
+    
+    @staticmethod
+    async def _close_stream(stream, chunks):
+        """Close an upstream completion stream's chunk iterator and HTTP response"""
+        if hasattr(chunks, "aclose"):
+            await chunks.aclose()
+        response = getattr(stream, "response", None)
+        if response is not None:
+            await response.aclose()
+    
+    async def generate_content_events(
+        self,
+        request: ContentGenerationRequest,
+        progress_interval: float = settings.GENERATION_STREAM_PROGRESS_SECONDS
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Stream generation as events: start, token, periodic progress, then result or error.
+        
+        Progress events are sent every progress_interval seconds, also while
+        the upstream is silent. Closing this generator aborts the upstream
+        request. Completion tokens are counted as one per streamed delta;
+        prompt tokens with the model's tokenizer.
+        """
+        started = time.monotonic()
+        parts: List[str] = []
+        prompt_tokens = prompt_budget.count_messages([
+            {"role": "system", "content": self._get_system_prompt(request.content_type, request.tone, request.industry)},
+            {"role": "user", "content": self._create_user_prompt(request)}
+        ], self.model)
+        
+        def progress() -> Dict[str, Any]:
+            elapsed = time.monotonic() - started
+            return {"event": "progress", "data": {
+                "completion_tokens": len(parts),
+                "characters": sum(len(part) for part in parts),
+                "elapsed_seconds": round(elapsed, 3),
+                "tokens_per_second": round(len(parts) / elapsed, 2) if elapsed > 0 else 0.0
+            }}
+        
+        yield {"event": "start", "data": {"model": self.model, "prompt_tokens": prompt_tokens}}
+        
+        deltas = self.generate_content_stream(request)
+        pending: Optional[asyncio.Future] = None
+        last_progress = time.monotonic()
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(deltas.__anext__())
+                # Wait on the same pending read, so a timeout never cancels the upstream
+                done, _ = await asyncio.wait({pending}, timeout=progress_interval)
+                if not done:
+                    last_progress = time.monotonic()
+                    yield progress()
+                    continue
+                
+                finished, pending = pending, None
+                try:
+                    delta = finished.result()
+                except StopAsyncIteration:
+                    break
+                
+                parts.append(delta)
+                yield {"event": "token", "data": {"delta": delta, "completion_tokens": len(parts)}}
+                if time.monotonic() - last_progress >= progress_interval:
+                    last_progress = time.monotonic()
+                    yield progress()
+        
+        except OpenAIServiceError as e:
+            yield {"event": "error", "data": {"detail": str(e)}}
+            return
+        
+        finally:
+            if pending is not None:
+                pending.cancel()
+                try:
+                    await pending
+                except (asyncio.CancelledError, StopAsyncIteration, OpenAIServiceError):
+                    pass
+            await deltas.aclose()
+        
+        yield progress()
+        
+        try:
+            content_data = json.loads("".join(parts))
+        except json.JSONDecodeError:
+            logger.error("Streamed generation did not return valid JSON")
+            yield {"event": "error", "data": {"detail": "Invalid response format from OpenAI"}}
+            return
+        
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(parts)}
+        token_usage = TokenUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=len(parts),
+            total_tokens=prompt_tokens + len(parts),
+            estimated_cost=self._calculate_cost(usage)
+        )
+        result = self._build_generated_content(content_data, token_usage)
+        logger.info(f"Streamed generation finished in {time.monotonic() - started:.2f}s")
+        yield {"event": "result", "data": asdict(result)}
+    
     async def regenerate_section(
         self,
         original_content: str,
         section_to_regenerate: str,
-        instructions: str
+        instructions: str,
+        use_cache: bool = True,
+        priority: Priority = Priority.INTERACTIVE
     ) -> str:
-        """Regenerate a specific section of content while maintaining coherence"""
+        """Regenerate a specific section of content while maintaining coherence
+        
+        With token budgeting enabled only the neighbouring sections are sent as
+        context, and max_tokens is sized from the section's length.
+        """
         try:
             system_prompt = """You are an expert content editor. Your task is to regenerate a specific section of a blog post while maintaining coherence with the rest of the content."""
             
-            user_prompt = f"""
+            if prompt_budget.enabled:
+                before, after = prompt_budget.section_context(original_content, section_to_regenerate, self.model)
+                context = f"""
+Content before the section:
+{before}
+
+Content after the section:
+{after}
+"""
+            else:
+                context = f"""
 Original content:
 {original_content}
-
+"""
+            
+            user_prompt = f"""{context}
 Section to regenerate:
 {section_to_regenerate}
 
@@ -336,21 +554,28 @@ Please provide only the regenerated section that will replace the specified sect
                 {"role": "user", "content": user_prompt}
             ]
             
-            response = await self._make_request_with_retry(messages)
+            # Room for the rewrite to grow to about twice the original section
+            max_tokens = self._completion_budget(
+                messages, expected_tokens=2 * prompt_budget.count(section_to_regenerate, self.model)
+            )
+            response = await self._make_request_with_retry(
+                messages, use_cache=use_cache, priority=priority, max_tokens=max_tokens
+            )
             return response.choices[0].message.content.strip()
             
         except Exception as e:
             logger.error(f"Section regeneration failed: {str(e)}")
             raise OpenAIServiceError(f"Section regeneration failed: {str(e)}")
     
-    async def get_seo_suggestions(self, content: str, target_keywords: List[str]) -> List[str]:
+    async def get_seo_suggestions(self, content: str, target_keywords: List[str], use_cache: bool = True,
+                                  priority: Priority = Priority.INTERACTIVE) -> List[str]:
         """Get SEO optimization suggestions for existing content"""
         try:
             system_prompt = """You are an SEO expert. Analyze the provided content and give specific, actionable SEO improvement suggestions."""
             
             user_prompt = f"""
 Content to analyze:
-{content}
+{prompt_budget.fit(content, self.model)}
 
 Target keywords: {', '.join(target_keywords)}
 
@@ -362,7 +587,10 @@ Provide specific SEO suggestions as a JSON array of strings.
                 {"role": "user", "content": user_prompt}
             ]
             
-            response = await self._make_request_with_retry(messages)
+            response = await self._make_request_with_retry(
+                messages, use_cache=use_cache, priority=priority, task="seo",
+                max_tokens=self._completion_budget(messages, expected_tokens=SEO_SUGGESTIONS_TOKENS)
+            )
             suggestions = json.loads(response.choices[0].message.content)
             
             return suggestions if isinstance(suggestions, list) else []
@@ -372,6 +600,37 @@ Provide specific SEO suggestions as a JSON array of strings.
             raise OpenAIServiceError(f"SEO analysis failed: {str(e)}")
 
 
+# Shared pooled client for services without their own (e.g. ContentGenerationService)
+_async_client: Optional[AsyncOpenAI] = None
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """Get or create the process-wide AsyncOpenAI client"""
+    global _async_client
+    if _async_client is None:
+        timeout = httpx.Timeout(settings.OPENAI_TIMEOUT_SECONDS, connect=10.0)
+        _async_client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            organization=settings.OPENAI_ORG_ID,
+            base_url=settings.OPENAI_BASE_URL,
+            timeout=timeout,
+            http_client=httpx.AsyncClient(
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS
+                )
+            )
+        )
+    return _async_client
+
+async def close_async_openai_client():
+    """Close the shared client's connection pool (application shutdown)"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+
 # Global service instance - initialized lazily
 openai_service = None
 
@@ -379,5 +638,9 @@ def get_openai_service() -> OpenAIService:
     """Get or create the global OpenAI service instance"""
     global openai_service
     if openai_service is None:
-        openai_service = OpenAIService()
+        router = None
+        if settings.LLM_ROUTER_ENABLED:
+            from app.services.llm_router import get_llm_router
+            router = get_llm_router()
+        openai_service = OpenAIService(router=router)
     return openai_service
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+Content-hash result cache for SEO analyses
+"""
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import redis
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Redis client for the shared cache tier
+redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+
+
+class SEOResultCache:
+    """Two-tier cache: in-process LRU bounded by bytes, optional shared Redis tier"""
+    
+    KEY_PREFIX = "seo_analysis"
+    
+    def __init__(self, max_bytes: int = settings.SEO_CACHE_MAX_BYTES,
+                 use_redis: bool = settings.SEO_CACHE_REDIS_ENABLED,
+                 ttl_seconds: int = settings.SEO_CACHE_TTL_SECONDS,
+                 client: Optional[redis.Redis] = None):
+        self.max_bytes = max_bytes
+        self.use_redis = use_redis
+        self.ttl_seconds = ttl_seconds
+        self.client = client or redis_client
+        
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @classmethod
+    def make_key(cls, version: str, content: str, title: str, meta_description: Optional[str],
+                 target_keywords: List[str]) -> str:
+        """Hash the analysis inputs; the scoring-rule version is part of the key"""
+        payload = json.dumps(
+            [content, title, meta_description, sorted(target_keywords)],
+            ensure_ascii=False,
+            separators=(",", ":")
+        )
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return f"{cls.KEY_PREFIX}:v{version}:{digest}"
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a result, falling back to Redis and promoting shared hits locally"""
+        with self._lock:
+            serialized = self._entries.get(key)
+            if serialized is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(serialized)
+        
+        if self.use_redis:
+            try:
+                serialized = self.client.get(key)
+            except redis.RedisError as e:
+                # Shared tier is best-effort; fall back to recomputing
+                logger.warning(f"SEO cache Redis lookup failed: {str(e)}")
+                serialized = None
+            
+            if serialized is not None:
+                self._store_local(key, serialized)
+                with self._lock:
+                    self.redis_hits += 1
+                return json.loads(serialized)
+        
+        with self._lock:
+            self.misses += 1
+        return None
+    
+    def set(self, key: str, result: Dict[str, Any]):
+        """Store a result in both tiers"""
+        serialized = json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+        self._store_local(key, serialized)
+        
+        if self.use_redis:
+            try:
+                self.client.setex(key, self.ttl_seconds, serialized)
+            except redis.RedisError as e:
+                logger.warning(f"SEO cache Redis write failed: {str(e)}")
+    
+    def _store_local(self, key: str, serialized: str):
+        """Insert into the LRU tier, evicting least recently used entries past the byte budget"""
+        size = len(serialized)
+        if size > self.max_bytes:
+            return
+        
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size_bytes -= len(previous)
+            
+            self._entries[key] = serialized
+            self._size_bytes += size
+            
+            while self._size_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size_bytes -= len(evicted)
+                self.evictions += 1
+    
+    def invalidate(self, version: Optional[str] = None):
+        """
+        Drop cached results
+        
+        Local entries are always cleared. With a version, shared Redis entries
+        for that scoring-rule version are removed too; other versions can never
+        be hit because the version is part of every key.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+        
+        if self.use_redis and version is not None:
+            try:
+                for key in self.client.scan_iter(match=f"{self.KEY_PREFIX}:v{version}:*"):
+                    self.client.delete(key)
+            except redis.RedisError as e:
+                logger.warning(f"SEO cache Redis invalidation failed: {str(e)}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss metrics"""
+        with self._lock:
+            lookups = self.hits + self.redis_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "redis_enabled": self.use_redis,
+                "hit_rate": round((self.hits + self.redis_hits) / lookups, 4) if lookups else 0.0
+            }
+
+
+# Global cache shared by all SEO analyses in this process
+seo_result_cache = SEOResultCache()
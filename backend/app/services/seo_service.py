@@ -3,14 +3,75 @@ SEO analysis service for content optimization
 """
 import re
 import json
-from typing import Dict, List, Any, Optional
-from collections import Counter
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from collections import Counter, OrderedDict
+from functools import lru_cache
 import math
 
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.analysis_executor import seo_analysis_executor
+from app.services.seo_cache import seo_result_cache
+from app.utils.keyword_matcher import TOKEN_PATTERN, KeywordMatcher, get_keyword_matcher, normalize_keyword
+from app.utils.syllables import syllable_counter
+
+
+# Paragraphs are separated by blank lines; per-paragraph results are memoized
+# so re-analyzing an edited post only recomputes the paragraphs that changed
+PARAGRAPH_SPLIT = re.compile(r'\n\s*\n')
+PARAGRAPH_CACHE_SIZE = 20000
+# Share of a document's paragraphs that must already be memoized in this process
+# before an incremental run skips the worker pool to reuse them
+PARAGRAPH_WARM_RATIO = 0.8
+# Tokens kept at each end of a paragraph to find keyword phrases spanning a paragraph break
+PARAGRAPH_EDGE_TOKENS = 16
+
+
+@dataclass(frozen=True)
+class ParagraphAnalysis:
+    """Partial analysis of one paragraph; sums to the analysis of the whole document"""
+    clean_text: str
+    lower_text: str
+    tokens: Tuple[str, ...]
+    token_counts: Counter
+    syllable_count: int
+    sentence_count: int
+    has_terminator: bool
+    starts_in_sentence: bool
+    ends_in_sentence: bool
+    unclosed_tag: bool
+    match_token_count: int
+    head_tokens: Tuple[str, ...]
+    tail_tokens: Tuple[str, ...]
+
+
+@dataclass
+class AnalyzedDocument:
+    """Tokenized view of a piece of content, shared by all SEO analyses"""
+    clean_text: str
+    lower_text: str
+    tokens: List[str]
+    token_counts: Counter
+    sentence_count: int
+    syllable_count: int
+    syllables_by_token: Dict[str, int] = field(default_factory=dict)
+    paragraphs: Optional[List[ParagraphAnalysis]] = None
+    
+    @property
+    def word_count(self) -> int:
+        return len(self.tokens)
+
 
 class SEOAnalysisService:
     """Service for analyzing and optimizing content for SEO"""
     
+    # Bump whenever scoring rules change so cached results are not reused
+    SCORING_VERSION = "2"
+    
     # Common stop words to exclude from keyword analysis
     STOP_WORDS = {
         'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he',
@@ -22,26 +83,136 @@ class SEOAnalysisService:
         'long', 'down', 'day', 'did', 'get', 'come', 'made', 'may', 'part'
     }
     
-    def analyze_keyword_density(self, content: str, target_keywords: List[str]) -> Dict[str, Any]:
-        """Analyze keyword density in content"""
-        # Clean and tokenize content
+    def analyze_document(self, content: str, count_syllables: bool = True,
+                         incremental: bool = False) -> AnalyzedDocument:
+        """Clean and tokenize content once for reuse across all analyses"""
+        if incremental:
+            document = self._analyze_document_incremental(content)
+            if document is not None:
+                return document
+        
         clean_content = self._clean_text(content)
-        words = clean_content.lower().split()
-        total_words = len(words)
+        lower_content = clean_content.lower()
+        tokens = lower_content.split()
+        token_counts = Counter(tokens)
+        
+        sentences = re.split(r'[.!?]+', clean_content)
+        sentence_count = sum(1 for s in sentences if s.strip())
+        
+        # Syllables only depend on the word, so count each distinct token once
+        syllables_by_token = {}
+        syllable_count = 0
+        if count_syllables:
+            syllables_by_token = {token: self._count_syllables(token) for token in token_counts}
+            syllable_count = sum(syllables_by_token[token] * count for token, count in token_counts.items())
+        
+        return AnalyzedDocument(
+            clean_text=clean_content,
+            lower_text=lower_content,
+            tokens=tokens,
+            token_counts=token_counts,
+            sentence_count=sentence_count,
+            syllable_count=syllable_count,
+            syllables_by_token=syllables_by_token
+        )
+    
+    def _analyze_document_incremental(self, content: str) -> Optional[AnalyzedDocument]:
+        """
+        Assemble a document from memoized per-paragraph partials
+        
+        Only paragraphs not seen before are cleaned, tokenized and syllable
+        counted. Returns None when paragraphs cannot be analyzed independently
+        (an HTML tag spanning a paragraph break), so the caller runs a full pass.
+        """
+        raw_paragraphs = PARAGRAPH_SPLIT.split(content)
+        paragraphs = [_analyze_paragraph(paragraph) for paragraph in raw_paragraphs]
+        _remember_paragraphs(raw_paragraphs)
+        if any(paragraph.unclosed_tag for paragraph in paragraphs[:-1]):
+            return None
+        
+        clean_content = " ".join(p.clean_text for p in paragraphs if p.clean_text)
+        tokens: List[str] = []
+        token_counts: Counter = Counter()
+        syllable_count = 0
+        sentence_count = 0
+        in_sentence = False
+        
+        for paragraph in paragraphs:
+            tokens.extend(paragraph.tokens)
+            token_counts.update(paragraph.token_counts)
+            syllable_count += paragraph.syllable_count
+            
+            # Text after the last terminator of one paragraph and before the
+            # first terminator of the next is a single sentence in the full text
+            sentence_count += paragraph.sentence_count
+            if in_sentence and paragraph.starts_in_sentence:
+                sentence_count -= 1
+            if paragraph.has_terminator:
+                in_sentence = paragraph.ends_in_sentence
+            else:
+                in_sentence = in_sentence or paragraph.starts_in_sentence
+        
+        return AnalyzedDocument(
+            clean_text=clean_content,
+            lower_text=clean_content.lower(),
+            tokens=tokens,
+            token_counts=token_counts,
+            sentence_count=sentence_count,
+            syllable_count=syllable_count,
+            paragraphs=paragraphs
+        )
+    
+    def _count_keyword_hits(self, document: AnalyzedDocument, target_keywords: List[str]) -> Dict[str, int]:
+        """Count every target keyword in the document, keyed by normalized keyword"""
+        matcher = get_keyword_matcher(target_keywords)
+        if document.paragraphs is None:
+            return matcher.scan(document.lower_text, with_positions=False).counts
+        
+        paragraphs = [p for p in document.paragraphs if p.match_token_count]
+        span = matcher.max_length - 1
+        
+        # Per-paragraph counts only add up when occurrences of a keyword never
+        # overlap and a phrase can only span one paragraph break
+        if (matcher.has_self_overlap or span > PARAGRAPH_EDGE_TOKENS
+                or any(p.match_token_count < span for p in paragraphs)):
+            return matcher.scan(document.lower_text, with_positions=False).counts
+        
+        counts = dict.fromkeys(matcher.keywords, 0)
+        for paragraph in paragraphs:
+            for keyword, count in _paragraph_keyword_counts(paragraph.lower_text, matcher).items():
+                counts[keyword] += count
+        
+        if span > 0:
+            for left, right in zip(paragraphs, paragraphs[1:]):
+                spanning = matcher.count_spanning(list(left.tail_tokens[-span:]), list(right.head_tokens[:span]))
+                for keyword, count in spanning.items():
+                    counts[keyword] += count
+        return counts
+    
+    def analyze_keyword_density(self, content: str, target_keywords: List[str],
+                                document: Optional[AnalyzedDocument] = None) -> Dict[str, Any]:
+        """Analyze keyword density in content"""
+        if document is None:
+            document = self.analyze_document(content)
+        
+        total_words = document.word_count
         
         if total_words == 0:
             return {"error": "No content to analyze"}
         
         keyword_analysis = {}
         
+        # Find every target keyword in a single scan of the document
+        keyword_hits = self._count_keyword_hits(document, target_keywords)
+        
         for keyword in target_keywords:
             keyword_lower = keyword.lower()
             
             # Count exact matches
-            exact_matches = clean_content.lower().count(keyword_lower)
+            exact_matches = keyword_hits.get(normalize_keyword(keyword), 0)
             
             # Count word matches (for single words)
-            word_matches = words.count(keyword_lower) if ' ' not in keyword_lower else exact_matches
+            word_matches = document.token_counts[keyword_lower] if ' ' not in keyword_lower else exact_matches
             
             # Calculate density
             density = (exact_matches / total_words) * 100
@@ -55,7 +226,10 @@ class SEOAnalysisService:
             }
         
         # Analyze overall keyword distribution
-        word_freq = Counter(word for word in words if word not in self.STOP_WORDS and len(word) > 2)
+        word_freq = Counter({
+            word: count for word, count in document.token_counts.items()
+            if word not in self.STOP_WORDS and len(word) > 2
+        })
         top_words = dict(word_freq.most_common(10))
         
         return {
@@ -65,27 +239,23 @@ class SEOAnalysisService:
             "recommendations": self._get_keyword_recommendations(keyword_analysis)
         }
     
-    def calculate_readability_score(self, content: str) -> Dict[str, Any]:
+    def calculate_readability_score(self, content: str,
+                                    document: Optional[AnalyzedDocument] = None) -> Dict[str, Any]:
         """Calculate Flesch-Kincaid readability scores"""
-        # Clean text
-        clean_content = self._clean_text(content)
+        if document is None:
+            document = self.analyze_document(content)
         
-        # Count sentences
-        sentences = re.split(r'[.!?]+', clean_content)
-        sentence_count = len([s for s in sentences if s.strip()])
+        sentence_count = document.sentence_count
         
         if sentence_count == 0:
             return {"error": "No sentences found in content"}
         
-        # Count words
-        words = clean_content.split()
-        word_count = len(words)
+        word_count = document.word_count
         
         if word_count == 0:
             return {"error": "No words found in content"}
         
-        # Count syllables
-        syllable_count = sum(self._count_syllables(word) for word in words)
+        syllable_count = document.syllable_count
         
         # Calculate Flesch Reading Ease
         if sentence_count > 0 and word_count > 0:
@@ -122,10 +292,11 @@ class SEOAnalysisService:
             }
         
         length = len(meta_description)
+        keyword_hits = get_keyword_matcher(target_keywords).scan(meta_description)
         keyword_presence = {}
         
         for keyword in target_keywords:
-            keyword_presence[keyword] = keyword.lower() in meta_description.lower()
+            keyword_presence[keyword] = keyword_hits.contains(keyword)
         
         recommendations = []
         
@@ -153,10 +324,11 @@ class SEOAnalysisService:
     def analyze_title_optimization(self, title: str, target_keywords: List[str]) -> Dict[str, Any]:
         """Analyze title for SEO optimization"""
         length = len(title)
+        keyword_hits = get_keyword_matcher(target_keywords).scan(title)
         keyword_presence = {}
         
         for keyword in target_keywords:
-            keyword_presence[keyword] = keyword.lower() in title.lower()
+            keyword_presence[keyword] = keyword_hits.contains(keyword)
         
         recommendations = []
         
@@ -173,12 +345,8 @@ class SEOAnalysisService:
             recommendations.append("Include at least one target keyword in the title.")
         
         # Position of first keyword
-        first_keyword_position = None
-        for keyword in target_keywords:
-            pos = title.lower().find(keyword.lower())
-            if pos != -1:
-                if first_keyword_position is None or pos < first_keyword_position:
-                    first_keyword_position = pos
+        positions = keyword_hits.first_positions.values()
+        first_keyword_position = min(positions) if positions else None
         
         if first_keyword_position is not None and first_keyword_position > 30:
             recommendations.append("Consider moving keywords closer to the beginning of the title.")
@@ -192,8 +360,56 @@ class SEOAnalysisService:
         }
     
     def generate_seo_score(self, content: str, title: str, meta_description: Optional[str], 
-                          target_keywords: List[str]) -> Dict[str, Any]:
+                          target_keywords: List[str], use_cache: bool = False,
+                          incremental: bool = False) -> Dict[str, Any]:
         """Generate comprehensive SEO score and recommendations"""
+        if not (use_cache and settings.SEO_CACHE_ENABLED):
+            return self._generate_seo_score(content, title, meta_description, target_keywords, incremental)
+        
+        cache_key = seo_result_cache.make_key(
+            self.SCORING_VERSION, content, title, meta_description, target_keywords
+        )
+        cached = seo_result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        analysis = self._generate_seo_score(content, title, meta_description, target_keywords, incremental)
+        seo_result_cache.set(cache_key, analysis)
+        return analysis
+    
+    async def generate_seo_score_async(self, content: str, title: str, meta_description: Optional[str],
+                                       target_keywords: List[str], use_cache: bool = False,
+                                       incremental: bool = False) -> Dict[str, Any]:
+        """
+        Generate an SEO score without blocking the event loop
+        
+        Cache lookups happen here (on the threadpool when the Redis tier is
+        on); large documents are scored on the analysis worker pool.
+        Incremental runs stay in this process only when most of their
+        paragraphs are already in its paragraph cache; cold documents still
+        go to the pool. Raises AnalysisQueueFullError when the pool is saturated.
+        """
+        cache_key = None
+        if use_cache and settings.SEO_CACHE_ENABLED:
+            cache_key = seo_result_cache.make_key(
+                self.SCORING_VERSION, content, title, meta_description, target_keywords
+            )
+            cached = await _call_result_cache(seo_result_cache.get, cache_key)
+            if cached is not None:
+                return cached
+        
+        analysis = await seo_analysis_executor.run(
+            _score_content, content, title, meta_description, target_keywords, incremental,
+            size=len(content), in_process=incremental and paragraph_cache_warm(content)
+        )
+        
+        if cache_key is not None:
+            await _call_result_cache(seo_result_cache.set, cache_key, analysis)
+        return analysis
+    
+    def _generate_seo_score(self, content: str, title: str, meta_description: Optional[str],
+                            target_keywords: List[str], incremental: bool = False) -> Dict[str, Any]:
+        """Run the full SEO analysis without caching"""
         score = 0
         max_score = 100
         recommendations = []
@@ -228,7 +444,9 @@ class SEOAnalysisService:
         recommendations.extend(meta_analysis["recommendations"])
         
         # Content analysis (30 points)
-        keyword_analysis = self.analyze_keyword_density(content, target_keywords)
+        # Tokenize once; density and readability both read from the same document
+        document = self.analyze_document(content, incremental=incremental)
+        keyword_analysis = self.analyze_keyword_density(content, target_keywords, document=document)
         content_score = 0
         
         if "keyword_analysis" in keyword_analysis:
@@ -247,7 +465,7 @@ class SEOAnalysisService:
         recommendations.extend(keyword_analysis.get("recommendations", []))
         
         # Readability analysis (25 points)
-        readability = self.calculate_readability_score(content)
+        readability = self.calculate_readability_score(content, document=document)
         readability_score = 0
         
         if "flesch_reading_ease" in readability:
@@ -285,6 +503,171 @@ class SEOAnalysisService:
             "meta_analysis": meta_analysis
         }
     
+    def generate_seo_scores_batch(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Score many posts at once
+        
+        Each post is a dict with content, title, meta_description and
+        target_keywords. Tokenization and keyword scans run once per post;
+        the scoring rules of generate_seo_score are then applied to the whole
+        batch as NumPy arrays. Scores and breakdowns match generate_seo_score.
+        """
+        if not posts:
+            return []
+        
+        post_count = len(posts)
+        
+        # Union of all keywords so hits form one (posts x keywords) matrix.
+        # A post may list the same keyword twice in different case; each
+        # distinct string counts separately, as in generate_seo_score.
+        columns: Dict[str, int] = {}
+        post_keywords = []
+        for post in posts:
+            keywords = list(dict.fromkeys(post.get("target_keywords") or []))
+            post_keywords.append(keywords)
+            for keyword in keywords:
+                columns.setdefault(normalize_keyword(keyword), len(columns))
+        
+        keyword_count = max(len(columns), 1)
+        matcher = get_keyword_matcher(columns.keys())
+        
+        keyword_weights = np.zeros((post_count, keyword_count), dtype=np.int64)
+        content_hits = np.zeros((post_count, keyword_count), dtype=np.int64)
+        title_hits = np.zeros((post_count, keyword_count), dtype=np.int64)
+        meta_hits = np.zeros((post_count, keyword_count), dtype=np.int64)
+        word_counts = np.zeros(post_count, dtype=np.int64)
+        sentence_counts = np.zeros(post_count, dtype=np.int64)
+        syllable_counts = np.zeros(post_count, dtype=np.int64)
+        title_lengths = np.zeros(post_count, dtype=np.int64)
+        meta_lengths = np.zeros(post_count, dtype=np.int64)
+        
+        # Batch-wide vocabulary: syllables are counted once per distinct word
+        # and summed per post with a single bincount
+        vocabulary: Dict[str, int] = {}
+        token_rows: List[int] = []
+        token_ids: List[int] = []
+        token_frequencies: List[int] = []
+        
+        for row, post in enumerate(posts):
+            document = self.analyze_document(post.get("content") or "", count_syllables=False)
+            word_counts[row] = document.word_count
+            sentence_counts[row] = document.sentence_count
+            
+            for token, frequency in document.token_counts.items():
+                token_ids.append(vocabulary.setdefault(token, len(vocabulary)))
+                token_frequencies.append(frequency)
+            token_rows.extend([row] * len(document.token_counts))
+            
+            title = post.get("title") or ""
+            meta_description = post.get("meta_description")
+            title_lengths[row] = len(title)
+            meta_lengths[row] = len(meta_description) if meta_description else 0
+            
+            if not post_keywords[row]:
+                continue
+            
+            for keyword in post_keywords[row]:
+                keyword_weights[row, columns[normalize_keyword(keyword)]] += 1
+            
+            for hits, text in ((content_hits, document.lower_text), (title_hits, title),
+                               (meta_hits, meta_description)):
+                if text:
+                    for keyword, count in matcher.scan(text, with_positions=False).counts.items():
+                        hits[row, columns[keyword]] = count
+        
+        if vocabulary:
+            syllable_table = np.fromiter(
+                (self._count_syllables(token) for token in vocabulary), dtype=np.int64, count=len(vocabulary)
+            )
+            weights = syllable_table[np.asarray(token_ids)] * np.asarray(token_frequencies, dtype=np.int64)
+            syllable_counts = np.rint(
+                np.bincount(np.asarray(token_rows), weights=weights, minlength=post_count)
+            ).astype(np.int64)
+        
+        applies = keyword_weights > 0
+        
+        # Title (25 points)
+        title_scores = np.where(
+            (title_lengths >= 30) & (title_lengths <= 60), 15,
+            np.where(title_lengths <= 70, 10, 0)
+        )
+        title_scores += np.where(((title_hits > 0) & applies).any(axis=1), 10, 0)
+        
+        # Meta description (20 points)
+        meta_present = meta_lengths > 0
+        meta_scores = np.where(
+            (meta_lengths >= 120) & (meta_lengths <= 160), 15,
+            np.where(meta_lengths <= 180, 10, 0)
+        )
+        meta_scores += np.where(((meta_hits > 0) & applies).any(axis=1), 5, 0)
+        meta_scores = np.where(meta_present, meta_scores, 0)
+        
+        # Content (30 points)
+        has_words = word_counts > 0
+        safe_words = np.where(has_words, word_counts, 1)[:, None]
+        densities = (content_hits / safe_words) * 100
+        optimal = (densities >= 1.0) & (densities <= 3.0)
+        optimal_keywords = np.where(optimal, keyword_weights, 0).sum(axis=1)
+        content_scores = np.where(has_words, np.minimum(20, optimal_keywords * 5), 0)
+        content_scores += np.where(word_counts >= 300, 10, np.where(word_counts >= 200, 5, 0))
+        
+        # Readability (25 points)
+        readable = has_words & (sentence_counts > 0)
+        safe_sentences = np.where(readable, sentence_counts, 1)
+        safe_word_counts = np.where(readable, word_counts, 1)
+        words_per_sentence = safe_word_counts / safe_sentences
+        flesch_ease = np.round(
+            206.835 - (1.015 * words_per_sentence) - (84.6 * (syllable_counts / safe_word_counts)), 2
+        )
+        avg_words = np.round(words_per_sentence, 2)
+        
+        ease_scores = np.select(
+            [(flesch_ease >= 60) & (flesch_ease <= 70),
+             (flesch_ease >= 50) & (flesch_ease <= 80),
+             flesch_ease >= 30],
+            [15, 10, 5],
+            default=0
+        )
+        sentence_scores = np.select(
+            [(avg_words >= 15) & (avg_words <= 20),
+             (avg_words >= 10) & (avg_words <= 25)],
+            [10, 5],
+            default=0
+        )
+        readability_scores = np.where(readable, ease_scores + sentence_scores, 0)
+        
+        totals = np.minimum(title_scores + meta_scores + content_scores + readability_scores, 100)
+        
+        return [
+            {
+                "seo_score": int(totals[row]),
+                "max_score": 100,
+                "breakdown": {
+                    "title": int(title_scores[row]),
+                    "meta_description": int(meta_scores[row]),
+                    "content": int(content_scores[row]),
+                    "readability": int(readability_scores[row])
+                },
+                "total_words": int(word_counts[row]),
+                "flesch_reading_ease": float(flesch_ease[row]) if readable[row] else None
+            }
+            for row in range(post_count)
+        ]
+    
+    async def generate_seo_scores_batch_async(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Score many posts on the analysis worker pool (see generate_seo_scores_batch)"""
+        size = sum(len(post.get("content") or "") for post in posts)
+        return await seo_analysis_executor.run(_score_batch, posts, size=size)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for the analysis caches"""
+        return {
+            "results": seo_result_cache.stats(),
+            "syllables": syllable_counter.stats(),
+            "paragraphs": _cache_info_stats(_analyze_paragraph.cache_info()),
+            "paragraph_keywords": _cache_info_stats(_paragraph_keyword_counts.cache_info())
+        }
+    
     def suggest_improvements(self, content: str, title: str, meta_description: Optional[str],
                            target_keywords: List[str]) -> List[str]:
         """Generate actionable SEO improvement suggestions"""
@@ -328,26 +711,8 @@ class SEOAnalysisService:
         return text.strip()
     
     def _count_syllables(self, word: str) -> int:
-        """Count syllables in a word (simplified algorithm)"""
-        word = word.lower()
-        if len(word) <= 3:
-            return 1
-        
-        # Remove common endings
-        word = re.sub(r'(es|ed|e)$', '', word)
-        
-        # Count vowel groups
-        vowels = 'aeiouy'
-        syllable_count = 0
-        prev_was_vowel = False
-        
-        for char in word:
-            is_vowel = char in vowels
-            if is_vowel and not prev_was_vowel:
-                syllable_count += 1
-            prev_was_vowel = is_vowel
-        
-        return max(1, syllable_count)
+        """Count syllables in a word (memoized, see app.utils.syllables)"""
+        return syllable_counter.count(word)
     
     def _get_density_status(self, density: float) -> str:
         """Get keyword density status"""
@@ -409,4 +774,99 @@ class SEOAnalysisService:
         if flesch_grade > 12:
             recommendations.append("Reading level is too high. Aim for 8th-10th grade level for better accessibility.")
         
-        return recommendations
\ No newline at end of file
+        return recommendations
+
+
+_paragraph_service = SEOAnalysisService()
+
+
+async def _call_result_cache(method: Callable[..., Any], *args: Any) -> Any:
+    """Call a result cache method, off the event loop when it may do blocking Redis I/O"""
+    if seo_result_cache.use_redis:
+        return await run_in_threadpool(method, *args)
+    return method(*args)
+
+
+def _score_content(content: str, title: str, meta_description: Optional[str],
+                   target_keywords: List[str], incremental: bool) -> Dict[str, Any]:
+    """Worker entry point for a single analysis (module-level so it pickles)"""
+    return SEOAnalysisService()._generate_seo_score(content, title, meta_description, target_keywords, incremental)
+
+
+def _score_batch(posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Worker entry point for batch scoring"""
+    return SEOAnalysisService().generate_seo_scores_batch(posts)
+
+
+# Hashes of the paragraphs _analyze_paragraph has memoized, in least recently used order,
+# so a document's cache warmth can be checked without analyzing it
+_paragraph_keys: "OrderedDict[int, None]" = OrderedDict()
+_paragraph_keys_lock = threading.Lock()
+
+
+def _remember_paragraphs(paragraphs: List[str]):
+    """Record paragraphs just looked up in the paragraph cache, mirroring its LRU eviction"""
+    with _paragraph_keys_lock:
+        for paragraph in paragraphs:
+            key = hash(paragraph)
+            _paragraph_keys[key] = None
+            _paragraph_keys.move_to_end(key)
+        while len(_paragraph_keys) > PARAGRAPH_CACHE_SIZE:
+            _paragraph_keys.popitem(last=False)
+
+
+def paragraph_cache_warm(content: str) -> bool:
+    """Whether at least PARAGRAPH_WARM_RATIO of the content's paragraphs are memoized here"""
+    paragraphs = PARAGRAPH_SPLIT.split(content)
+    with _paragraph_keys_lock:
+        cached = sum(1 for paragraph in paragraphs if hash(paragraph) in _paragraph_keys)
+    return cached >= PARAGRAPH_WARM_RATIO * len(paragraphs)
+
+
+@lru_cache(maxsize=PARAGRAPH_CACHE_SIZE)
+def _analyze_paragraph(paragraph: str) -> ParagraphAnalysis:
+    """Analyze one paragraph; memoized so unchanged paragraphs are never re-analyzed"""
+    clean_text = _paragraph_service._clean_text(paragraph)
+    lower_text = clean_text.lower()
+    tokens = tuple(lower_text.split())
+    token_counts = Counter(tokens)
+    syllable_count = sum(
+        _paragraph_service._count_syllables(token) * count for token, count in token_counts.items()
+    )
+    
+    segments = re.split(r'[.!?]+', clean_text)
+    match_tokens = TOKEN_PATTERN.findall(lower_text)
+    
+    return ParagraphAnalysis(
+        clean_text=clean_text,
+        lower_text=lower_text,
+        tokens=tokens,
+        token_counts=token_counts,
+        syllable_count=syllable_count,
+        sentence_count=sum(1 for s in segments if s.strip()),
+        has_terminator=len(segments) > 1,
+        starts_in_sentence=bool(segments[0].strip()),
+        ends_in_sentence=bool(segments[-1].strip()),
+        unclosed_tag=paragraph.rfind('<') > paragraph.rfind('>'),
+        match_token_count=len(match_tokens),
+        head_tokens=tuple(match_tokens[:PARAGRAPH_EDGE_TOKENS]),
+        tail_tokens=tuple(match_tokens[-PARAGRAPH_EDGE_TOKENS:])
+    )
+
+
+@lru_cache(maxsize=PARAGRAPH_CACHE_SIZE)
+def _paragraph_keyword_counts(lower_text: str, matcher: KeywordMatcher) -> Dict[str, int]:
+    """Keyword counts for one paragraph, memoized per compiled keyword set"""
+    return matcher.scan(lower_text, with_positions=False).counts
+
+
+def _cache_info_stats(info) -> Dict[str, Any]:
+    """Format functools cache_info counters like the other cache stats"""
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0
+    }
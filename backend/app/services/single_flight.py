@@ -0,0 +1,169 @@
+"""
+Single-flight coalescing for identical in-flight LLM requests
+"""
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """One shared upstream call and the callers awaiting it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class _Broadcast:
+    """One shared upstream stream; items are kept so late subscribers can replay from the start"""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.pump: Optional[asyncio.Task] = None
+        self._updated = asyncio.Event()
+
+    def publish(self, item: Any):
+        self.items.append(item)
+        self._wake()
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.done = True
+        self.error = error
+        self._wake()
+
+    async def wait(self):
+        """Wait for the next item or the end of the stream"""
+        await self._updated.wait()
+
+    def _wake(self):
+        # Swap in a fresh event so every current waiter wakes exactly once
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+
+class SingleFlight:
+    """
+    Collapse concurrent identical requests onto one upstream call
+
+    do() runs create() once per key while it is in flight; every concurrent
+    caller with the same key awaits the same result (or exception).
+    subscribe() does the same for streams: subscribers that join late first
+    replay what has already arrived, then follow along live. The upstream
+    call is cancelled only when every caller waiting on it has gone away.
+    Keys are only shared while in flight; completed results are not kept
+    (that is the completion cache's job).
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Flight] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+
+        self.calls = 0
+        self.collapsed_calls = 0
+        self.streams = 0
+        self.collapsed_streams = 0
+
+    async def do(self, key: str, create: Callable[[], Awaitable[Any]]) -> Any:
+        """Await create() for key, sharing the call with identical in-flight requests"""
+        if not settings.LLM_SINGLE_FLIGHT_ENABLED:
+            return await create()
+
+        flight = self._calls.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(create()))
+            self._calls[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(self._calls, key, flight))
+            self.calls += 1
+        else:
+            self.collapsed_calls += 1
+            logger.debug(f"Coalesced LLM request {key}")
+
+        flight.waiters += 1
+        try:
+            # shield: one caller being cancelled must not cancel the shared call
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    async def subscribe(self, key: str, open_stream: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Yield the items of open_stream(), sharing one upstream stream with identical subscribers"""
+        if not settings.LLM_SINGLE_FLIGHT_ENABLED:
+            async for item in open_stream():
+                yield item
+            return
+
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.pump = asyncio.ensure_future(self._pump(key, broadcast, open_stream))
+            self.streams += 1
+        else:
+            self.collapsed_streams += 1
+            logger.debug(f"Attached to in-progress LLM stream {key}")
+
+        broadcast.subscribers += 1
+        index = 0
+        try:
+            while True:
+                while index < len(broadcast.items):
+                    yield broadcast.items[index]
+                    index += 1
+                if broadcast.done:
+                    if broadcast.error is not None:
+                        raise broadcast.error
+                    return
+                await broadcast.wait()
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.pump.done():
+                # Last subscriber left: abort the upstream and wait for it to close
+                broadcast.pump.cancel()
+                await asyncio.wait([broadcast.pump])
+
+    async def _pump(self, key: str, broadcast: _Broadcast, open_stream: Callable[[], AsyncIterator[Any]]):
+        """Read the upstream stream into the broadcast"""
+        stream = open_stream()
+        try:
+            async for item in stream:
+                broadcast.publish(item)
+            broadcast.finish()
+        except asyncio.CancelledError:
+            broadcast.finish(asyncio.CancelledError())
+            raise
+        except Exception as e:
+            broadcast.finish(e)
+        finally:
+            self._forget(self._streams, key, broadcast)
+            if hasattr(stream, "aclose"):
+                await stream.aclose()
+
+    @staticmethod
+    def _forget(flights: Dict[str, Any], key: str, flight: Any):
+        if flights.get(key) is flight:
+            del flights[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Get coalescing counters"""
+        return {
+            "in_flight_calls": len(self._calls),
+            "in_flight_streams": len(self._streams),
+            "calls": self.calls,
+            "collapsed_calls": self.collapsed_calls,
+            "streams": self.streams,
+            "collapsed_streams": self.collapsed_streams
+        }
+
+
+# Global coalescer shared by all LLM callers in this process
+llm_single_flight = SingleFlight()
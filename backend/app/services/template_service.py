@@ -1,248 +1,33 @@
 """
 Template management service with analytics and seeding functionality
 """
-import re
+import json
 import logging
-from typing import List, Dict, Any, Optional, Tuple
-from datetime import datetime, timedelta
+from collections import Counter
+from typing import Iterator, List, Dict, Any, Optional, Tuple
+from datetime import date, datetime, time, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc, func
+from sqlalchemy import and_, or_, desc, asc, func, case, select, true, insert, update, delete, cast, Date, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
 
-from app.models.content import ContentTemplate, TemplateUsage, TemplateRating
+from app.models.content import ContentTemplate, TemplateUsage, TemplateRating, TemplateUsageDaily
 from app.models.user import User
-from app.schemas.template import TemplateSearchRequest
+from app.schemas.template import TemplateCreateRequest, TemplateSearchRequest
+from app.utils.pagination import keyset_page, paginate_keyset, total_count_cache
+from app.utils.template_compiler import PLACEHOLDER_PATTERN, CompiledTemplate, compile_template, compiled_template_cache
 
 
 logger = logging.getLogger(__name__)
 
+# Additive counters on TemplateUsageDaily
+ROLLUP_COUNTERS = ("usage_count", "unique_users", "rating_sum", "rating_count")
 
-class TemplateService:
-    """Service for template management and analytics"""
-    
-    def __init__(self, db: Session):
-        self.db = db
-    
-    def extract_placeholders(self, template_content: str) -> List[str]:
-        """Extract placeholder variables from template content"""
-        # Find placeholders in format {{variable_name}}
-        placeholders = re.findall(r'\{\{(\w+)\}\}', template_content)
-        return list(set(placeholders))  # Remove duplicates
-    
-    def replace_placeholders(self, template_content: str, variables: Dict[str, str]) -> Tuple[str, List[str], List[str]]:
-        """Replace placeholders in template content with provided variables"""
-        placeholders_found = self.extract_placeholders(template_content)
-        placeholders_replaced = []
-        
-        content = template_content
-        for placeholder in placeholders_found:
-            if placeholder in variables:
-                content = content.replace(f'{{{{{placeholder}}}}}', variables[placeholder])
-                placeholders_replaced.append(placeholder)
-        
-        return content, placeholders_found, placeholders_replaced
-    
-    def track_template_usage(self, template_id: str, user_id: str, variables_used: Dict[str, str], 
-                           industry_context: Optional[str] = None, usage_context: Optional[str] = None):
-        """Track template usage for analytics"""
-        try:
-            usage = TemplateUsage(
-                template_id=template_id,
-                user_id=user_id,
-                variables_used=variables_used,
-                industry_context=industry_context,
-                usage_context=usage_context
-            )
-            
-            self.db.add(usage)
-            
-            # Increment template usage count
-            template = self.db.query(ContentTemplate).filter(ContentTemplate.id == template_id).first()
-            if template:
-                template.usage_count += 1
-            
-            self.db.commit()
-            logger.info(f"Template usage tracked: {template_id} by user {user_id}")
-            
-        except Exception as e:
-            logger.error(f"Failed to track template usage: {str(e)}")
-            self.db.rollback()
-    
-    def get_template_analytics(self, template_id: str, user_id: str) -> Dict[str, Any]:
-        """Get comprehensive analytics for a template"""
-        try:
-            template = self.db.query(ContentTemplate).filter(
-                and_(
-                    ContentTemplate.id == template_id,
-                    ContentTemplate.created_by == user_id
-                )
-            ).first()
-            
-            if not template:
-                return None
-            
-            # Get usage statistics
-            now = datetime.utcnow()
-            month_ago = now - timedelta(days=30)
-            week_ago = now - timedelta(days=7)
-            
-            total_usage = self.db.query(TemplateUsage).filter(
-                TemplateUsage.template_id == template_id
-            ).count()
-            
-            usage_this_month = self.db.query(TemplateUsage).filter(
-                and_(
-                    TemplateUsage.template_id == template_id,
-                    TemplateUsage.created_at >= month_ago
-                )
-            ).count()
-            
-            usage_this_week = self.db.query(TemplateUsage).filter(
-                and_(
-                    TemplateUsage.template_id == template_id,
-                    TemplateUsage.created_at >= week_ago
-                )
-            ).count()
-            
-            # Get rating statistics
-            ratings = self.db.query(TemplateRating).filter(
-                TemplateRating.template_id == template_id
-            ).all()
-            
-            average_rating = None
-            total_ratings = len(ratings)
-            if ratings:
-                average_rating = sum(r.rating for r in ratings) / total_ratings
-            
-            # Get popular variables
-            usage_records = self.db.query(TemplateUsage).filter(
-                TemplateUsage.template_id == template_id
-            ).all()
-            
-            popular_variables = {}
-            usage_by_industry = {}
-            
-            for usage in usage_records:
-                if usage.variables_used:
-                    for var in usage.variables_used.keys():
-                        popular_variables[var] = popular_variables.get(var, 0) + 1
-                
-                if usage.industry_context:
-                    industry = usage.industry_context
-                    usage_by_industry[industry] = usage_by_industry.get(industry, 0) + 1
-            
-            # Get recent usage
-            recent_usage = self.db.query(TemplateUsage).filter(
-                TemplateUsage.template_id == template_id
-            ).order_by(desc(TemplateUsage.created_at)).limit(10).all()
-            
-            recent_usage_data = [
-                {
-                    "date": usage.created_at.isoformat(),
-                    "user_id": usage.user_id,
-                    "variables_used": list(usage.variables_used.keys()) if usage.variables_used else [],
-                    "industry_context": usage.industry_context
-                }
-                for usage in recent_usage
-            ]
-            
-            return {
-                "template_id": template_id,
-                "template_name": template.name,
-                "total_usage": total_usage,
-                "usage_this_month": usage_this_month,
-                "usage_this_week": usage_this_week,
-                "average_rating": average_rating,
-                "total_ratings": total_ratings,
-                "popular_variables": popular_variables,
-                "usage_by_industry": usage_by_industry,
-                "recent_usage": recent_usage_data
-            }
-            
-        except Exception as e:
-            logger.error(f"Failed to get template analytics: {str(e)}")
-            return None
-    
-    def get_popular_templates(self, limit: int = 10, category: Optional[str] = None) -> List[ContentTemplate]:
-        """Get most popular templates based on usage count"""
-        try:
-            query = self.db.query(ContentTemplate).filter(ContentTemplate.is_public == True)
-            
-            if category:
-                query = query.filter(ContentTemplate.category == category)
-            
-            templates = query.order_by(desc(ContentTemplate.usage_count)).limit(limit).all()
-            return templates
-            
-        except Exception as e:
-            logger.error(f"Failed to get popular templates: {str(e)}")
-            return []
-    
-    def get_template_stats(self) -> Dict[str, Any]:
-        """Get overall template statistics"""
-        try:
-            total_templates = self.db.query(ContentTemplate).count()
-            public_templates = self.db.query(ContentTemplate).filter(ContentTemplate.is_public == True).count()
-            private_templates = total_templates - public_templates
-            
-            total_usage = self.db.query(func.sum(ContentTemplate.usage_count)).scalar() or 0
-            
-            # Category statistics
-            category_stats = self.db.query(
-                ContentTemplate.category,
-                func.count(ContentTemplate.id).label('template_count'),
-                func.sum(ContentTemplate.usage_count).label('total_usage')
-            ).group_by(ContentTemplate.category).all()
-            
-            category_stats_data = []
-            for stat in category_stats:
-                popular_templates = self.db.query(ContentTemplate).filter(
-                    ContentTemplate.category == stat.category
-                ).order_by(desc(ContentTemplate.usage_count)).limit(3).all()
-                
-                category_stats_data.append({
-                    "category": stat.category,
-                    "template_count": stat.template_count,
-                    "total_usage": stat.total_usage or 0,
-                    "popular_templates": [
-                        {
-                            "id": str(t.id),
-                            "name": t.name,
-                            "usage_count": t.usage_count
-                        }
-                        for t in popular_templates
-                    ]
-                })
-            
-            # Most popular templates overall
-            most_popular = self.get_popular_templates(limit=5)
-            
-            # Recent templates
-            recent_templates = self.db.query(ContentTemplate).filter(
-                ContentTemplate.is_public == True
-            ).order_by(desc(ContentTemplate.created_at)).limit(5).all()
-            
-            return {
-                "total_templates": total_templates,
-                "public_templates": public_templates,
-                "private_templates": private_templates,
-                "total_usage": total_usage,
-                "category_stats": category_stats_data,
-                "most_popular_templates": most_popular,
-                "recent_templates": recent_templates
-            }
-            
-        except Exception as e:
-            logger.error(f"Failed to get template stats: {str(e)}")
-            return {}
-    
-    def seed_default_templates(self, user_id: str) -> int:
-        """Seed default templates for the system"""
-        try:
-            default_templates = [
-                {
-                    "name": "Business Blog Post",
-                    "description": "Professional business blog post template with company branding",
-                    "template_content": """# {{title}}
+# Templates created by seed_default_templates
+DEFAULT_TEMPLATES = [
+    {
+        "name": "Business Blog Post",
+        "description": "Professional business blog post template with company branding",
+        "template_content": """# {{title}}
 
 ## Introduction
 {{company_name}} is excited to share insights about {{topic}}. In today's competitive market, understanding {{main_focus}} is crucial for business success.
@@ -273,16 +58,16 @@ At {{company_name}}, we believe that {{closing_statement}}. Contact us to learn
 *About {{company_name}}: {{company_description}}*
 
 *For more information, visit {{website_url}} or contact us at {{contact_email}}.*""",
-                    "category": "business",
-                    "template_type": "article",
-                    "industry": "General",
-                    "is_public": True,
-                    "tags": ["business", "professional", "corporate", "marketing"]
-                },
-                {
-                    "name": "How-To Guide",
-                    "description": "Comprehensive step-by-step tutorial template",
-                    "template_content": """# How to {{action}}: A Complete Guide
+        "category": "business",
+        "template_type": "article",
+        "industry": "General",
+        "is_public": True,
+        "tags": ["business", "professional", "corporate", "marketing"]
+    },
+    {
+        "name": "How-To Guide",
+        "description": "Comprehensive step-by-step tutorial template",
+        "template_content": """# How to {{action}}: A Complete Guide
 
 ## Overview
 Learn how to {{action}} with this comprehensive guide. Whether you're a beginner or looking to improve your skills, this tutorial will help you {{expected_outcome}}.
@@ -335,16 +120,16 @@ Congratulations! You've successfully learned how to {{action}}. {{final_thoughts
 
 ---
 *Need help? {{support_information}}*""",
-                    "category": "education",
-                    "template_type": "how_to",
-                    "industry": "General",
-                    "is_public": True,
-                    "tags": ["tutorial", "guide", "how-to", "education", "step-by-step"]
-                },
-                {
-                    "name": "Product Review",
-                    "description": "Detailed product review template with pros and cons",
-                    "template_content": """# {{product_name}} Review: {{review_headline}}
+        "category": "education",
+        "template_type": "how_to",
+        "industry": "General",
+        "is_public": True,
+        "tags": ["tutorial", "guide", "how-to", "education", "step-by-step"]
+    },
+    {
+        "name": "Product Review",
+        "description": "Detailed product review template with pros and cons",
+        "template_content": """# {{product_name}} Review: {{review_headline}}
 
 ## Product Overview
 {{product_description}}
@@ -401,16 +186,16 @@ Congratulations! You've successfully learned how to {{action}}. {{final_thoughts
 
 ---
 *Disclaimer: {{disclaimer}}*""",
-                    "category": "lifestyle",
-                    "template_type": "review",
-                    "industry": "Consumer Goods",
-                    "is_public": True,
-                    "tags": ["review", "product", "analysis", "comparison"]
-                },
-                {
-                    "name": "Technology News Article",
-                    "description": "Tech news article template with industry insights",
-                    "template_content": """# {{headline}}
+        "category": "lifestyle",
+        "template_type": "review",
+        "industry": "Consumer Goods",
+        "is_public": True,
+        "tags": ["review", "product", "analysis", "comparison"]
+    },
+    {
+        "name": "Technology News Article",
+        "description": "Tech news article template with industry insights",
+        "template_content": """# {{headline}}
 
 ## Breaking News
 {{news_summary}}
@@ -449,16 +234,16 @@ Congratulations! You've successfully learned how to {{action}}. {{final_thoughts
 
 ---
 *Stay updated with the latest tech news at {{publication_name}}*""",
-                    "category": "technology",
-                    "template_type": "news",
-                    "industry": "Technology",
-                    "is_public": True,
-                    "tags": ["technology", "news", "industry", "analysis"]
-                },
-                {
-                    "name": "Listicle Template",
-                    "description": "Engaging listicle template for various topics",
-                    "template_content": """# {{number}} {{topic}} That Will {{benefit}}
+        "category": "technology",
+        "template_type": "news",
+        "industry": "Technology",
+        "is_public": True,
+        "tags": ["technology", "news", "industry", "analysis"]
+    },
+    {
+        "name": "Listicle Template",
+        "description": "Engaging listicle template for various topics",
+        "template_content": """# {{number}} {{topic}} That Will {{benefit}}
 
 ## Introduction
 {{introduction_text}}
@@ -504,16 +289,773 @@ Congratulations! You've successfully learned how to {{action}}. {{final_thoughts
 
 ---
 *What's your favorite from this list? Let us know in the comments!*""",
-                    "category": "general",
-                    "template_type": "listicle",
-                    "industry": "General",
-                    "is_public": True,
-                    "tags": ["listicle", "list", "tips", "recommendations"]
+        "category": "general",
+        "template_type": "listicle",
+        "industry": "General",
+        "is_public": True,
+        "tags": ["listicle", "list", "tips", "recommendations"]
+    }
+]
+
+
+class TemplateService:
+    """Service for template management and analytics"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    @staticmethod
+    def extract_placeholders(template_content: str) -> List[str]:
+        """Extract placeholder variables from template content"""
+        # Find placeholders in format {{variable_name}}
+        placeholders = PLACEHOLDER_PATTERN.findall(template_content)
+        return list(set(placeholders))  # Remove duplicates
+    
+    def replace_placeholders(self, template_content: str, variables: Dict[str, str]) -> Tuple[str, List[str], List[str]]:
+        """Replace placeholders in template content with provided variables"""
+        return compile_template(template_content).render(variables)
+    
+    def render_template(self, template: ContentTemplate, variables: Dict[str, str]) -> Tuple[str, List[str], List[str]]:
+        """Render a stored template, reusing its compiled form until the template is updated"""
+        return self.compiled_template(template).render(variables)
+    
+    @staticmethod
+    def compiled_template(template: ContentTemplate) -> CompiledTemplate:
+        """Compiled form of a stored template, cached until the template is updated"""
+        return compiled_template_cache.get(template.id, template.updated_at, template.template_content)
+    
+    @classmethod
+    def render_bulk_ndjson(cls, template: ContentTemplate, variable_sets: List[Dict[str, str]],
+                           chunk_size: int = 100) -> Iterator[str]:
+        """Render a template once per variable set as NDJSON lines, yielded in chunks.
+        
+        Each line is {"index", "generated_content", "placeholders_found",
+        "placeholders_replaced"} for the variable set at that index.
+        """
+        compiled = cls.compiled_template(template)
+        lines = []
+        for index, variables in enumerate(variable_sets):
+            content, placeholders_found, placeholders_replaced = compiled.render(variables)
+            lines.append(json.dumps({
+                "index": index,
+                "generated_content": content,
+                "placeholders_found": placeholders_found,
+                "placeholders_replaced": placeholders_replaced
+            }))
+            if len(lines) >= chunk_size:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+    
+    def track_template_usage(self, template_id: str, user_id: str, variables_used: Dict[str, str], 
+                           industry_context: Optional[str] = None, usage_context: Optional[str] = None):
+        """Track template usage for analytics"""
+        try:
+            today = datetime.utcnow().date()
+            # Checked before the new row is added so it only sees earlier usages
+            first_use_today = self.db.query(TemplateUsage.id).filter(
+                self._used_on_day_condition(template_id, user_id, today)
+            ).first() is None
+            
+            usage = TemplateUsage(
+                template_id=template_id,
+                user_id=user_id,
+                variables_used=variables_used,
+                industry_context=industry_context,
+                usage_context=usage_context
+            )
+            
+            self.db.add(usage)
+            
+            # Increment template usage count
+            template = self.db.query(ContentTemplate).filter(ContentTemplate.id == template_id).first()
+            if template:
+                template.usage_count += 1
+            
+            self._increment_rollup(template_id, today, usage_count=1, unique_users=int(first_use_today))
+            
+            self.db.commit()
+            logger.info(f"Template usage tracked: {template_id} by user {user_id}")
+            
+        except Exception as e:
+            logger.error(f"Failed to track template usage: {str(e)}")
+            self.db.rollback()
+    
+    def existing_template_ids(self, template_ids) -> set:
+        """The subset of template_ids that still exist; raises if the query fails"""
+        template_ids = set(template_ids)
+        if not template_ids:
+            return set()
+        return set(self.db.execute(
+            select(ContentTemplate.id).where(ContentTemplate.id.in_(template_ids))
+        ).scalars())
+
+    def record_usage_batch(self, usages: List[Dict[str, Any]]) -> bool:
+        """Write buffered usage events in one transaction.
+        
+        Usage rows are bulk-inserted, each template's usage_count gets one
+        summed increment (a single executemany UPDATE) and each (template, day)
+        rollup one upsert. Events are dicts of TemplateUsage column values
+        including created_at. Returns False, after rolling back, on failure.
+        """
+        if not usages:
+            return True
+        
+        try:
+            usage_by_day = Counter((usage["template_id"], usage["created_at"].date()) for usage in usages)
+            new_users = self._new_daily_users(usages)
+            
+            self.db.execute(insert(TemplateUsage), usages)
+            
+            # Core statement so the parameter list runs as one executemany UPDATE
+            self.db.connection().execute(
+                update(ContentTemplate.__table__)
+                .where(ContentTemplate.__table__.c.id == bindparam("template_key"))
+                .values(usage_count=ContentTemplate.__table__.c.usage_count + bindparam("increment")),
+                [
+                    {"template_key": template_id, "increment": count}
+                    for template_id, count in Counter(usage["template_id"] for usage in usages).items()
+                ]
+            )
+            
+            for (template_id, day), count in usage_by_day.items():
+                self._increment_rollup(
+                    template_id, day, usage_count=count, unique_users=len(new_users.get((template_id, day), ()))
+                )
+            
+            self.db.commit()
+            logger.info(f"Template usage batch recorded: {len(usages)} events for {len(usage_by_day)} template days")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to record template usage batch: {str(e)}")
+            self.db.rollback()
+            return False
+    
+    def _new_daily_users(self, usages: List[Dict[str, Any]]) -> Dict[Tuple[str, date], set]:
+        """Users in the batch with no earlier usage of the template that day, per (template, day)"""
+        batch_users: Dict[Tuple[str, date], set] = {}
+        for usage in usages:
+            batch_users.setdefault((usage["template_id"], usage["created_at"].date()), set()).add(usage["user_id"])
+        
+        for day in {day for _, day in batch_users}:
+            keys = [key for key in batch_users if key[1] == day]
+            day_start = datetime.combine(day, time.min)
+            seen = self.db.execute(
+                select(TemplateUsage.template_id, TemplateUsage.user_id).where(
+                    TemplateUsage.template_id.in_([template_id for template_id, _ in keys]),
+                    TemplateUsage.created_at >= day_start,
+                    TemplateUsage.created_at < day_start + timedelta(days=1),
+                    TemplateUsage.user_id.in_(set().union(*(batch_users[key] for key in keys)))
+                ).distinct()
+            ).all()
+            for template_id, user_id in seen:
+                batch_users.get((template_id, day), set()).discard(user_id)
+        
+        return batch_users
+    
+    @staticmethod
+    def _used_on_day_condition(template_id: str, user_id: str, day: date):
+        """Usages of a template by one user on a given (UTC) day"""
+        day_start = datetime.combine(day, time.min)
+        return and_(
+            TemplateUsage.template_id == template_id,
+            TemplateUsage.created_at >= day_start,
+            TemplateUsage.created_at < day_start + timedelta(days=1),
+            TemplateUsage.user_id == user_id
+        )
+    
+    def _increment_rollup(self, template_id: str, day: date, **increments: int):
+        """Add to a template's daily rollup row inside the caller's transaction"""
+        statement = self._rollup_upsert_statement(self.db.get_bind().dialect.name, template_id, day, increments)
+        if statement is not None:
+            self.db.execute(statement)
+            return
+        
+        if self.db.execute(self._rollup_update_statement(template_id, day, increments)).rowcount == 0:
+            self.db.execute(self._rollup_insert_statement(template_id, day, increments))
+    
+    @staticmethod
+    def _rollup_upsert_statement(dialect_name: str, template_id: str, day: date, increments: Dict[str, int]):
+        """INSERT ... ON CONFLICT DO UPDATE adding the increments, or None if the dialect has no upsert"""
+        if dialect_name == "postgresql":
+            dialect_insert = postgresql.insert
+        elif dialect_name == "sqlite":
+            dialect_insert = sqlite.insert
+        else:
+            return None
+        
+        statement = dialect_insert(TemplateUsageDaily).values(
+            template_id=template_id, day=day, **{name: increments.get(name, 0) for name in ROLLUP_COUNTERS}
+        )
+        increment_existing = {
+            name: getattr(TemplateUsageDaily, name) + getattr(statement.excluded, name) for name in ROLLUP_COUNTERS
+        }
+        return statement.on_conflict_do_update(
+            index_elements=[TemplateUsageDaily.template_id, TemplateUsageDaily.day],
+            set_={**increment_existing, "updated_at": func.now()}
+        )
+    
+    @staticmethod
+    def _rollup_update_statement(template_id: str, day: date, increments: Dict[str, int]):
+        """UPDATE adding the increments to an existing rollup row"""
+        return update(TemplateUsageDaily).where(
+            TemplateUsageDaily.template_id == template_id,
+            TemplateUsageDaily.day == day
+        ).values({
+            getattr(TemplateUsageDaily, name): getattr(TemplateUsageDaily, name) + value
+            for name, value in increments.items()
+        })
+    
+    @staticmethod
+    def _rollup_insert_statement(template_id: str, day: date, increments: Dict[str, int]):
+        """INSERT of a new rollup row holding the increments"""
+        return insert(TemplateUsageDaily).values(
+            template_id=template_id, day=day, **{name: increments.get(name, 0) for name in ROLLUP_COUNTERS}
+        )
+    
+    def get_accessible_template(self, template_id: str, user_id: str) -> Optional[ContentTemplate]:
+        """Get a template the user owns or that is public"""
+        return self.db.query(ContentTemplate).filter(
+            and_(
+                ContentTemplate.id == template_id,
+                or_(
+                    ContentTemplate.created_by == user_id,
+                    ContentTemplate.is_public == True
+                )
+            )
+        ).first()
+    
+    def get_owned_template(self, template_id: str, user_id: str) -> Optional[ContentTemplate]:
+        """Get a template created by the user"""
+        return self.db.query(ContentTemplate).filter(
+            and_(
+                ContentTemplate.id == template_id,
+                ContentTemplate.created_by == user_id
+            )
+        ).first()
+    
+    def create_template(self, template_data: TemplateCreateRequest, user_id: str) -> Optional[ContentTemplate]:
+        """Create a template; None if the user already has one with the same name"""
+        existing_template = self.db.query(ContentTemplate.id).filter(
+            and_(
+                ContentTemplate.name == template_data.name,
+                ContentTemplate.created_by == user_id
+            )
+        ).first()
+        if existing_template:
+            return None
+        
+        template = self._new_template(template_data, user_id)
+        self.db.add(template)
+        self.db.commit()
+        self.db.refresh(template)
+        return template
+    
+    @classmethod
+    def _new_template(cls, template_data: TemplateCreateRequest, user_id: str) -> ContentTemplate:
+        """Unsaved template built from a create request"""
+        return ContentTemplate(
+            name=template_data.name,
+            description=template_data.description,
+            template_content=template_data.template_content,
+            category=template_data.category,
+            template_type=template_data.template_type,
+            industry=template_data.industry,
+            is_public=template_data.is_public,
+            tags=template_data.tags or [],
+            placeholders=cls.extract_placeholders(template_data.template_content),
+            created_by=user_id,
+            usage_count=0
+        )
+    
+    def update_template(self, template_id: str, user_id: str, update_data: Dict[str, Any]) -> Optional[ContentTemplate]:
+        """Update fields of a template the user owns; None if it is not found"""
+        template = self.get_owned_template(template_id, user_id)
+        if not template:
+            return None
+        
+        self._apply_template_update(template, update_data)
+        self.db.commit()
+        self.db.refresh(template)
+        return template
+    
+    @classmethod
+    def _apply_template_update(cls, template: ContentTemplate, update_data: Dict[str, Any]):
+        """Set updated fields, re-extracting placeholders if the content changed"""
+        for field, value in update_data.items():
+            setattr(template, field, value)
+        
+        if 'template_content' in update_data:
+            template.placeholders = cls.extract_placeholders(template.template_content)
+        
+        template.updated_at = datetime.utcnow()
+    
+    def delete_template(self, template_id: str, user_id: str) -> bool:
+        """Delete a template the user owns; False if it is not found"""
+        template = self.get_owned_template(template_id, user_id)
+        if not template:
+            return False
+        
+        self.db.delete(template)
+        self.db.commit()
+        return True
+    
+    def search_templates(self, user_id: str, filters: Dict[str, Any], page: int, per_page: int,
+                         sort_by: Optional[str] = None, descending: bool = True) -> Tuple[List[ContentTemplate], int]:
+        """Get an offset page of accessible templates matching the filters, with the total"""
+        query = self.db.query(ContentTemplate).filter(*self._template_search_conditions(user_id, filters))
+        total = query.count()
+        
+        if sort_by:
+            query = query.order_by(self._template_order_by(sort_by, descending))
+        templates = query.offset((page - 1) * per_page).limit(per_page).all()
+        return templates, total
+    
+    def search_templates_keyset(self, user_id: str, filters: Dict[str, Any], sort_by: str, descending: bool,
+                                cursor: Optional[str], per_page: int,
+                                include_total: bool = False) -> Tuple[List[ContentTemplate], Optional[str], Optional[int]]:
+        """Get a page of accessible templates after a cursor (no OFFSET; COUNT only on request)"""
+        conditions = self._template_search_conditions(user_id, filters)
+        query = paginate_keyset(
+            self.db.query(ContentTemplate).filter(*conditions),
+            getattr(ContentTemplate, sort_by), ContentTemplate.id, sort_by, descending, cursor, per_page
+        )
+        templates, next_cursor = keyset_page(query.all(), sort_by, descending, per_page)
+        
+        total = None
+        if include_total:
+            total = total_count_cache.get_or_count(
+                self._template_total_cache_key(user_id, filters),
+                lambda: self.db.query(ContentTemplate).filter(*conditions).count()
+            )
+        
+        return templates, next_cursor, total
+    
+    @staticmethod
+    def _template_search_conditions(user_id: str, filters: Dict[str, Any]) -> List[Any]:
+        """WHERE conditions for templates the user can see, narrowed by search filters.
+        
+        Recognised filters are query, category, template_type, industry,
+        is_public and tags; missing or None values are ignored.
+        """
+        conditions = [
+            or_(
+                ContentTemplate.created_by == user_id,
+                ContentTemplate.is_public == True
+            )
+        ]
+        
+        if filters.get("query"):
+            search_term = f"%{filters['query']}%"
+            conditions.append(or_(
+                ContentTemplate.name.ilike(search_term),
+                ContentTemplate.description.ilike(search_term),
+                ContentTemplate.template_content.ilike(search_term)
+            ))
+        
+        if filters.get("category"):
+            conditions.append(ContentTemplate.category == filters["category"])
+        
+        if filters.get("template_type"):
+            conditions.append(ContentTemplate.template_type == filters["template_type"])
+        
+        if filters.get("industry"):
+            conditions.append(ContentTemplate.industry.ilike(f"%{filters['industry']}%"))
+        
+        if filters.get("is_public") is not None:
+            conditions.append(ContentTemplate.is_public == filters["is_public"])
+        
+        # Tags are stored as a JSON array
+        for tag in filters.get("tags") or []:
+            conditions.append(ContentTemplate.tags.contains([tag]))
+        
+        return conditions
+    
+    @staticmethod
+    def _template_order_by(sort_by: str, descending: bool):
+        """ORDER BY for an offset page of templates"""
+        sort_field = getattr(ContentTemplate, sort_by)
+        return desc(sort_field) if descending else asc(sort_field)
+    
+    @staticmethod
+    def _template_total_cache_key(user_id: str, filters: Dict[str, Any]) -> tuple:
+        """Key for caching the total of a template search"""
+        return ("templates", user_id) + tuple(
+            (name, tuple(value) if isinstance(value, list) else value)
+            for name, value in sorted(filters.items()) if value is not None
+        )
+    
+    def get_template_analytics(self, template_id: str, user_id: str) -> Dict[str, Any]:
+        """Get comprehensive analytics for a template"""
+        try:
+            template = self.db.query(ContentTemplate).filter(
+                and_(
+                    ContentTemplate.id == template_id,
+                    ContentTemplate.created_by == user_id
+                )
+            ).first()
+            
+            if not template:
+                return None
+            
+            # Usage counts and rating stats in one aggregate query
+            now = datetime.utcnow()
+            summary = self.db.execute(
+                self._usage_summary_statement(template_id, now - timedelta(days=30), now - timedelta(days=7))
+            ).one()
+            
+            usage_by_industry = dict(self.db.execute(self._industry_counts_statement(template_id)).all())
+            
+            # Variable popularity, aggregated in the database where JSON functions allow it
+            variables_statement = self._variable_counts_statement(template_id, self.db.get_bind().dialect.name)
+            if variables_statement is not None:
+                popular_variables = dict(self.db.execute(variables_statement).all())
+            else:
+                popular_variables = self._tally_variables(
+                    self.db.execute(
+                        select(TemplateUsage.variables_used)
+                        .where(TemplateUsage.template_id == template_id)
+                        .execution_options(yield_per=1000)
+                    ).scalars()
+                )
+            
+            recent_usage = self.db.execute(self._recent_usage_statement(template_id)).all()
+            
+            return self._analytics_response(template, summary, popular_variables, usage_by_industry, recent_usage)
+            
+        except Exception as e:
+            logger.error(f"Failed to get template analytics: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _usage_summary_statement(template_id: str, month_ago: datetime, week_ago: datetime):
+        """Total/month/week usage plus rating average and count as one row"""
+        rating_filter = TemplateRating.template_id == template_id
+        return select(
+            func.count(TemplateUsage.id).label("total_usage"),
+            func.count(case((TemplateUsage.created_at >= month_ago, 1))).label("usage_this_month"),
+            func.count(case((TemplateUsage.created_at >= week_ago, 1))).label("usage_this_week"),
+            select(func.avg(TemplateRating.rating)).where(rating_filter).scalar_subquery().label("average_rating"),
+            select(func.count(TemplateRating.id)).where(rating_filter).scalar_subquery().label("total_ratings")
+        ).where(TemplateUsage.template_id == template_id)
+    
+    @staticmethod
+    def _industry_counts_statement(template_id: str):
+        """Usage count per industry context"""
+        return select(
+            TemplateUsage.industry_context,
+            func.count()
+        ).where(
+            TemplateUsage.template_id == template_id,
+            TemplateUsage.industry_context.isnot(None),
+            TemplateUsage.industry_context != ""
+        ).group_by(TemplateUsage.industry_context)
+    
+    @staticmethod
+    def _variable_counts_statement(template_id: str, dialect_name: str):
+        """Number of usages that filled each variable, or None if the dialect has no JSON key functions"""
+        if dialect_name == "sqlite":
+            keys = func.json_each(TemplateUsage.variables_used).table_valued("key")
+            is_object = func.json_type(TemplateUsage.variables_used) == "object"
+        elif dialect_name == "postgresql":
+            keys = func.json_object_keys(TemplateUsage.variables_used).table_valued("key").render_derived()
+            is_object = func.json_typeof(TemplateUsage.variables_used) == "object"
+        else:
+            return None
+        
+        return select(
+            keys.c.key,
+            func.count()
+        ).select_from(TemplateUsage).join(keys, true()).where(
+            TemplateUsage.template_id == template_id,
+            is_object
+        ).group_by(keys.c.key)
+    
+    @staticmethod
+    def _tally_variables(variables_rows, popular_variables: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+        """Count variable names across usage rows (fallback for dialects without JSON key functions)"""
+        if popular_variables is None:
+            popular_variables = {}
+        for variables_used in variables_rows:
+            if variables_used:
+                for var in variables_used.keys():
+                    popular_variables[var] = popular_variables.get(var, 0) + 1
+        return popular_variables
+    
+    @staticmethod
+    def _recent_usage_statement(template_id: str):
+        """Ten most recent usages"""
+        return select(
+            TemplateUsage.created_at,
+            TemplateUsage.user_id,
+            TemplateUsage.variables_used,
+            TemplateUsage.industry_context
+        ).where(
+            TemplateUsage.template_id == template_id
+        ).order_by(desc(TemplateUsage.created_at)).limit(10)
+    
+    @staticmethod
+    def _analytics_response(template: ContentTemplate, summary, popular_variables: Dict[str, int],
+                            usage_by_industry: Dict[str, int], recent_usage) -> Dict[str, Any]:
+        """Assemble the analytics payload shared with AsyncTemplateService"""
+        average_rating = summary.average_rating
+        
+        return {
+            "template_id": template.id,
+            "template_name": template.name,
+            "total_usage": summary.total_usage,
+            "usage_this_month": summary.usage_this_month,
+            "usage_this_week": summary.usage_this_week,
+            "average_rating": float(average_rating) if average_rating is not None else None,
+            "total_ratings": summary.total_ratings,
+            "popular_variables": popular_variables,
+            "usage_by_industry": usage_by_industry,
+            "recent_usage": [
+                {
+                    "date": usage.created_at.isoformat(),
+                    "user_id": usage.user_id,
+                    "variables_used": list(usage.variables_used.keys()) if usage.variables_used else [],
+                    "industry_context": usage.industry_context
                 }
+                for usage in recent_usage
             ]
+        }
+    
+    def get_popular_templates(self, limit: int = 10, category: Optional[str] = None) -> List[ContentTemplate]:
+        """Get most popular templates based on rolled-up usage"""
+        try:
+            query = self.db.query(ContentTemplate).filter(ContentTemplate.is_public == True)
             
+            if category:
+                query = query.filter(ContentTemplate.category == category)
+            
+            templates = query.order_by(
+                desc(self._rollup_usage_total()), desc(ContentTemplate.created_at)
+            ).limit(limit).all()
+            return templates
+            
+        except Exception as e:
+            logger.error(f"Failed to get popular templates: {str(e)}")
+            return []
+    
+    def get_template_stats(self) -> Dict[str, Any]:
+        """Get overall template statistics from the usage rollups"""
+        try:
+            counts = self.db.execute(self._template_counts_statement()).one()
+            total_usage = self.db.execute(self._rollup_usage_sum_statement()).scalar()
+            category_stats = self.db.execute(self._category_usage_statement()).all()
+            category_top = self.db.execute(self._category_top_templates_statement(3)).all()
+            
+            # Most popular templates overall
+            most_popular = self.get_popular_templates(limit=5)
+            
+            # Recent templates
+            recent_templates = self.db.query(ContentTemplate).filter(
+                ContentTemplate.is_public == True
+            ).order_by(desc(ContentTemplate.created_at)).limit(5).all()
+            
+            return self._stats_response(
+                counts, total_usage, category_stats, category_top, most_popular, recent_templates
+            )
+            
+        except Exception as e:
+            logger.error(f"Failed to get template stats: {str(e)}")
+            return {}
+    
+    @staticmethod
+    def _rollup_usage_total():
+        """Correlated all-time usage of ContentTemplate from its rollup rows"""
+        return select(
+            func.coalesce(func.sum(TemplateUsageDaily.usage_count), 0)
+        ).where(
+            TemplateUsageDaily.template_id == ContentTemplate.id
+        ).correlate(ContentTemplate).scalar_subquery()
+    
+    @staticmethod
+    def _rollup_usage_by_template():
+        """All-time usage per template from the rollups"""
+        return select(
+            TemplateUsageDaily.template_id,
+            func.sum(TemplateUsageDaily.usage_count).label("usage_count")
+        ).group_by(TemplateUsageDaily.template_id).subquery()
+    
+    @staticmethod
+    def _template_counts_statement():
+        """Total and public template counts as one row"""
+        return select(
+            func.count(ContentTemplate.id).label("total_templates"),
+            func.count(case((ContentTemplate.is_public == True, 1))).label("public_templates")
+        )
+    
+    @staticmethod
+    def _rollup_usage_sum_statement():
+        """All-time usage across every template"""
+        return select(func.coalesce(func.sum(TemplateUsageDaily.usage_count), 0))
+    
+    @classmethod
+    def _category_usage_statement(cls):
+        """Template count and rolled-up usage per category"""
+        usage = cls._rollup_usage_by_template()
+        return select(
+            ContentTemplate.category,
+            func.count(ContentTemplate.id).label("template_count"),
+            func.coalesce(func.sum(usage.c.usage_count), 0).label("total_usage")
+        ).outerjoin(
+            usage, usage.c.template_id == ContentTemplate.id
+        ).group_by(ContentTemplate.category)
+    
+    @classmethod
+    def _category_top_templates_statement(cls, per_category: int):
+        """The most used templates of every category, ranked within the category"""
+        usage = cls._rollup_usage_by_template()
+        template_usage = func.coalesce(usage.c.usage_count, 0)
+        ranked = select(
+            ContentTemplate.id,
+            ContentTemplate.name,
+            ContentTemplate.category,
+            template_usage.label("usage_count"),
+            func.row_number().over(
+                partition_by=ContentTemplate.category,
+                order_by=(desc(template_usage), ContentTemplate.id)
+            ).label("category_rank")
+        ).outerjoin(
+            usage, usage.c.template_id == ContentTemplate.id
+        ).subquery()
+        return select(
+            ranked.c.id, ranked.c.name, ranked.c.category, ranked.c.usage_count
+        ).where(
+            ranked.c.category_rank <= per_category
+        ).order_by(ranked.c.category, ranked.c.category_rank)
+    
+    @staticmethod
+    def _stats_response(counts, total_usage, category_stats, category_top, most_popular,
+                        recent_templates) -> Dict[str, Any]:
+        """Assemble the stats payload shared with AsyncTemplateService"""
+        popular_by_category: Dict[Any, List[Dict[str, Any]]] = {}
+        for row in category_top:
+            popular_by_category.setdefault(row.category, []).append({
+                "id": str(row.id),
+                "name": row.name,
+                "usage_count": row.usage_count
+            })
+        
+        return {
+            "total_templates": counts.total_templates,
+            "public_templates": counts.public_templates,
+            "private_templates": counts.total_templates - counts.public_templates,
+            "total_usage": total_usage or 0,
+            "category_stats": [
+                {
+                    "category": stat.category,
+                    "template_count": stat.template_count,
+                    "total_usage": stat.total_usage or 0,
+                    "popular_templates": popular_by_category.get(stat.category, [])
+                }
+                for stat in category_stats
+            ],
+            "most_popular_templates": most_popular,
+            "recent_templates": recent_templates
+        }
+    
+    def refresh_usage_rollups(self, days: Optional[int] = 2) -> int:
+        """Recompute daily rollups from usage and rating rows.
+        
+        Only the last ``days`` days are rebuilt (everything when None, or when
+        the rollup table is still empty), which repairs any drift from the
+        incremental updates. Returns the number of rollup rows written.
+        """
+        try:
+            if days is not None and self.db.query(TemplateUsageDaily.template_id).first() is None:
+                days = None
+            since = None if days is None else datetime.utcnow().date() - timedelta(days=days - 1)
+            dialect_name = self.db.get_bind().dialect.name
+            
+            usage_rows = self.db.execute(self._usage_by_day_statement(dialect_name, since)).all()
+            rating_rows = self.db.execute(self._ratings_by_day_statement(dialect_name, since)).all()
+            rollups = self._merge_rollup_rows(usage_rows, rating_rows)
+            
+            self.db.execute(self._rollup_delete_statement(since))
+            if rollups:
+                self.db.execute(insert(TemplateUsageDaily), rollups)
+            self.db.commit()
+            
+            logger.info(f"Refreshed {len(rollups)} template usage rollups")
+            return len(rollups)
+            
+        except Exception as e:
+            logger.error(f"Failed to refresh template usage rollups: {str(e)}")
+            self.db.rollback()
+            return 0
+    
+    @staticmethod
+    def _day_expression(column, dialect_name: str):
+        """Calendar day of a timestamp column"""
+        if dialect_name == "sqlite":
+            return func.date(column)
+        if dialect_name == "postgresql":
+            # Bucket by UTC day, matching the incremental updates
+            return cast(func.timezone("UTC", column), Date)
+        return cast(column, Date)
+    
+    @classmethod
+    def _usage_by_day_statement(cls, dialect_name: str, since: Optional[date]):
+        """Usage and distinct users per template and day"""
+        day = cls._day_expression(TemplateUsage.created_at, dialect_name)
+        statement = select(
+            TemplateUsage.template_id,
+            day.label("day"),
+            func.count(TemplateUsage.id).label("usage_count"),
+            func.count(func.distinct(TemplateUsage.user_id)).label("unique_users")
+        ).group_by(TemplateUsage.template_id, day)
+        if since is not None:
+            statement = statement.where(TemplateUsage.created_at >= datetime.combine(since, time.min))
+        return statement
+    
+    @classmethod
+    def _ratings_by_day_statement(cls, dialect_name: str, since: Optional[date]):
+        """Current rating sum and count per template, bucketed by the day each rating was given"""
+        day = cls._day_expression(TemplateRating.created_at, dialect_name)
+        statement = select(
+            TemplateRating.template_id,
+            day.label("day"),
+            func.sum(TemplateRating.rating).label("rating_sum"),
+            func.count(TemplateRating.id).label("rating_count")
+        ).group_by(TemplateRating.template_id, day)
+        if since is not None:
+            statement = statement.where(TemplateRating.created_at >= datetime.combine(since, time.min))
+        return statement
+    
+    @staticmethod
+    def _rollup_delete_statement(since: Optional[date]):
+        """DELETE of the rollup rows being rebuilt"""
+        statement = delete(TemplateUsageDaily)
+        if since is not None:
+            statement = statement.where(TemplateUsageDaily.day >= since)
+        return statement
+    
+    @staticmethod
+    def _merge_rollup_rows(usage_rows, rating_rows) -> List[Dict[str, Any]]:
+        """Combine per-day usage and rating aggregates into rollup row values"""
+        rollups: Dict[Tuple[str, date], Dict[str, Any]] = {}
+        for row in list(usage_rows) + list(rating_rows):
+            day = row.day if isinstance(row.day, date) else date.fromisoformat(str(row.day))
+            # Drivers may return UUID-typed ids; key on the string form the models use
+            template_id = str(row.template_id)
+            values = rollups.setdefault((template_id, day), {
+                "template_id": template_id, "day": day, **{name: 0 for name in ROLLUP_COUNTERS}
+            })
+            for name in ROLLUP_COUNTERS:
+                if name in row._fields:
+                    values[name] = int(getattr(row, name) or 0)
+        return list(rollups.values())
+    
+    def seed_default_templates(self, user_id: str) -> int:
+        """Seed default templates for the system"""
+        try:
             created_count = 0
-            for template_data in default_templates:
+            for template_data in DEFAULT_TEMPLATES:
                 # Check if template already exists
                 existing = self.db.query(ContentTemplate).filter(
                     ContentTemplate.name == template_data["name"]
@@ -559,11 +1101,16 @@ Congratulations! You've successfully learned how to {{action}}. {{final_thoughts
                 )
             ).first()
             
+            now = datetime.utcnow()
             if existing_rating:
-                # Update existing rating
+                # Update existing rating; the rollup keeps it on the day it was first given
+                rating_delta = rating - (existing_rating.rating or 0)
+                rated_day = (existing_rating.created_at or now).date()
                 existing_rating.rating = rating
                 existing_rating.comment = comment
-                existing_rating.updated_at = datetime.utcnow()
+                existing_rating.updated_at = now
+                if rating_delta:
+                    self._increment_rollup(template_id, rated_day, rating_sum=rating_delta)
             else:
                 # Create new rating
                 new_rating = TemplateRating(
@@ -573,6 +1120,7 @@ Congratulations! You've successfully learned how to {{action}}. {{final_thoughts
                     comment=comment
                 )
                 self.db.add(new_rating)
+                self._increment_rollup(template_id, now.date(), rating_sum=rating, rating_count=1)
             
             self.db.commit()
             logger.info(f"Template rated: {template_id} by user {user_id} - {rating} stars")
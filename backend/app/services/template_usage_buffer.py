@@ -0,0 +1,217 @@
+"""
+In-process buffer that batches template usage tracking
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.template_service import TemplateService
+
+
+logger = logging.getLogger(__name__)
+
+
+def usage_event(template_id: str, user_id: str, variables_used: Optional[Dict[str, str]],
+                industry_context: Optional[str] = None, usage_context: Optional[str] = None,
+                created_at: Optional[datetime] = None) -> Dict[str, Any]:
+    """TemplateUsage column values for one usage, timestamped now unless given"""
+    return {
+        "template_id": template_id,
+        "user_id": user_id,
+        "variables_used": variables_used,
+        "industry_context": industry_context,
+        "usage_context": usage_context,
+        "created_at": created_at or datetime.utcnow()
+    }
+
+
+class TemplateUsageBuffer:
+    """
+    Collects template usage events and writes them in batches
+
+    A background thread flushes every flush_interval seconds, or as soon as
+    flush_size events are waiting. Each flush is one transaction via
+    TemplateService.record_usage_batch. Events for templates deleted since
+    they were queued are dropped first; if the batch still fails it is split
+    in halves until the failing events are isolated, so one bad row cannot
+    hold back the rest. Failed events are put back and retried on the next
+    flush, and discarded after max_attempts failures (on their own, or of
+    the template lookup for their batch). close() stops the thread and
+    writes whatever is left, so a graceful shutdown loses nothing.
+    """
+
+    def __init__(self, flush_size: int = settings.TEMPLATE_USAGE_FLUSH_SIZE,
+                 flush_interval: float = settings.TEMPLATE_USAGE_FLUSH_INTERVAL_SECONDS,
+                 max_pending: int = settings.TEMPLATE_USAGE_BUFFER_MAX,
+                 max_attempts: int = settings.TEMPLATE_USAGE_MAX_ATTEMPTS,
+                 session_factory: Optional[Callable[[], Session]] = None):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.session_factory = session_factory or SessionLocal
+
+        # Queued events paired with how many times they have failed on their own
+        self._events: List[Tuple[Dict[str, Any], int]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        self.recorded = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.failures = 0
+        self.dropped = 0
+        self.orphaned = 0
+        self.discarded = 0
+
+    def record(self, template_id: str, user_id: str, variables_used: Optional[Dict[str, str]],
+               industry_context: Optional[str] = None, usage_context: Optional[str] = None):
+        """Queue one usage event (timestamped now) without touching the database"""
+        self.record_many([usage_event(template_id, user_id, variables_used, industry_context, usage_context)])
+
+    def record_many(self, events: List[Dict[str, Any]]):
+        """Queue usage events built with usage_event; they are written together"""
+        with self._lock:
+            self._events.extend((event, 0) for event in events)
+            self.recorded += len(events)
+            overflow = len(self._events) - self.max_pending
+            if overflow > 0:
+                del self._events[:overflow]
+                self.dropped += overflow
+                logger.warning(f"Template usage buffer full; dropped {overflow} oldest events")
+            full = len(self._events) >= self.flush_size
+            closed = self._closed
+
+        if closed:
+            # After shutdown there is no flusher thread, so write straight away
+            self.flush()
+            return
+
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Write all queued events now; returns how many were written"""
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+            if not events:
+                return 0
+
+            db = self.session_factory()
+            try:
+                service = TemplateService(db)
+                orphaned = 0
+                try:
+                    existing = service.existing_template_ids(event["template_id"] for event, _ in events)
+                except Exception as e:
+                    # Every event is charged an attempt, so a lookup that keeps failing ends in discards
+                    logger.error(f"Template usage flush could not check templates: {str(e)}")
+                    db.rollback()
+                    written, failed = 0, events
+                else:
+                    live = [entry for entry in events if entry[0]["template_id"] in existing]
+                    orphaned = len(events) - len(live)
+                    if orphaned:
+                        logger.warning(f"Dropped {orphaned} usage events for deleted templates")
+                    written, failed = self._write(service, live)
+            finally:
+                db.close()
+
+            retry = [(event, attempts + 1) for event, attempts in failed if attempts + 1 < self.max_attempts]
+            discarded = len(failed) - len(retry)
+            if discarded:
+                logger.error(f"Discarded {discarded} usage events after {self.max_attempts} failed attempts")
+
+            with self._lock:
+                # Put failed events back ahead of newer ones for the next attempt
+                self._events[:0] = retry
+                self.orphaned += orphaned
+                self.discarded += discarded
+                if failed:
+                    self.failures += 1
+                if written:
+                    self.flushes += 1
+                    self.flushed += written
+            return written
+
+    @classmethod
+    def _write(cls, service: TemplateService, events: List[Tuple[Dict[str, Any], int]]):
+        """Record events, bisecting failed batches; returns (written count, failed entries)"""
+        if not events:
+            return 0, []
+        if service.record_usage_batch([event for event, _ in events]):
+            return len(events), []
+        if len(events) == 1:
+            return 0, events
+
+        middle = len(events) // 2
+        written_first, failed_first = cls._write(service, events[:middle])
+        written_second, failed_second = cls._write(service, events[middle:])
+        return written_first + written_second, failed_first + failed_second
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._events)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "pending": len(self._events),
+                "recorded": self.recorded,
+                "flushed": self.flushed,
+                "flushes": self.flushes,
+                "failures": self.failures,
+                "dropped": self.dropped,
+                "orphaned": self.orphaned,
+                "discarded": self.discarded
+            }
+
+    def _ensure_thread(self):
+        """Start the flusher thread on first use"""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None and not self._closed:
+                    self._stopping.clear()
+                    self._thread = threading.Thread(
+                        target=self._run, name="template-usage-flush", daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Template usage flush failed: {str(e)}")
+
+    def close(self):
+        """Stop the flusher thread and write everything still queued"""
+        with self._lock:
+            self._closed = True
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            thread.join()
+
+        self.flush()
+        remaining = self.pending()
+        if remaining:
+            logger.error(f"Template usage buffer closed with {remaining} unwritten events")
+
+
+# Shared by the template endpoints; closed on application shutdown
+template_usage_buffer = TemplateUsageBuffer()
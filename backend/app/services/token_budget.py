@@ -0,0 +1,237 @@
+"""
+Token counting and prompt budgeting for LLM calls: completion sizing and context trimming
+"""
+import logging
+import math
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+try:
+    import tiktoken
+except ImportError:  # optional; token counts fall back to character estimates
+    tiktoken = None
+
+
+logger = logging.getLogger(__name__)
+
+# Context window (prompt + completion) per model
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4": 8192,
+    "gpt-4-turbo": 128000,
+    "gpt-4-turbo-preview": 128000,
+    "gpt-3.5-turbo": 16385,
+    "deepseek-chat": 32768,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+FALLBACK_ENCODING = "cl100k_base"
+# Chat format overhead: per message, plus the reply primer
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_REPLY = 3
+# English prose, with headroom for markdown and the JSON wrapper fields
+TOKENS_PER_WORD = 1.35
+COMPLETION_HEADROOM = 1.25
+COMPLETION_OVERHEAD_TOKENS = 300
+MIN_COMPLETION_TOKENS = 256
+
+# Markdown headings start sections; without headings, paragraphs do
+_HEADING = re.compile(r"^#{1,6}\s", re.MULTILINE)
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+@lru_cache(maxsize=None)
+def get_encoder(model: str):
+    """tiktoken encoding for the model (cached; cl100k_base for unknown models), or None if unavailable"""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(FALLBACK_ENCODING)
+    except Exception as e:
+        # First use downloads the encoding; offline hosts use estimates instead
+        logger.warning(f"Token encoder unavailable for {model}, estimating from characters: {str(e)}")
+        return None
+
+
+def context_window(model: str) -> int:
+    return MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+
+
+def section_spans(content: str) -> List[Tuple[int, int]]:
+    """(start, end) offsets of the markdown sections of content, or of its paragraphs if it has no headings"""
+    starts = [match.start() for match in _HEADING.finditer(content)]
+    if starts:
+        if starts[0] > 0:
+            starts.insert(0, 0)
+        return list(zip(starts, starts[1:] + [len(content)]))
+
+    spans = []
+    start = 0
+    for match in _PARAGRAPH_BREAK.finditer(content):
+        spans.append((start, match.start()))
+        start = match.end()
+    spans.append((start, len(content)))
+    return spans
+
+
+class PromptBudget:
+    """
+    Token-aware sizing for LLM requests
+
+    Counts tokens with the model's tiktoken encoding (about four characters
+    per token when tiktoken or its encoding files are unavailable), sizes
+    max_tokens from the requested length instead of a fixed ceiling, and
+    trims content embedded in prompts to a token budget. Counts the prompt
+    tokens trimmed and how far max_tokens was lowered below the ceiling
+    (completion budget no longer reserved against the context window and
+    the scheduler's tokens-per-minute budget).
+    """
+
+    def __init__(self, enabled: bool = settings.LLM_TOKEN_BUDGET_ENABLED,
+                 max_context_tokens: int = settings.LLM_MAX_CONTEXT_TOKENS,
+                 section_context_tokens: int = settings.LLM_SECTION_CONTEXT_TOKENS,
+                 metadata_context_tokens: int = settings.LLM_METADATA_CONTEXT_TOKENS):
+        self.enabled = enabled
+        self.max_context_tokens = max_context_tokens
+        self.section_context_tokens = section_context_tokens
+        self.metadata_context_tokens = metadata_context_tokens
+
+        self._lock = threading.Lock()
+        self.trimmed_prompts = 0
+        self.prompt_tokens_before = 0
+        self.prompt_tokens_after = 0
+        self.sized_completions = 0
+        self.max_tokens_saved = 0
+
+    def count(self, text: str, model: str) -> int:
+        """Tokens in text for the model"""
+        if not text:
+            return 0
+        encoder = get_encoder(model)
+        if encoder is None:
+            return math.ceil(len(text) / 4)
+        return len(encoder.encode(text, disallowed_special=()))
+
+    def count_messages(self, messages: List[Dict[str, Any]], model: str) -> int:
+        """Prompt tokens of a chat request, including the per-message format overhead"""
+        return TOKENS_PER_REPLY + sum(
+            TOKENS_PER_MESSAGE + self.count(str(message.get("content") or ""), model) for message in messages
+        )
+
+    def truncate(self, text: str, max_tokens: int, model: str, keep_end: bool = False) -> str:
+        """First (or with keep_end, last) max_tokens tokens of text"""
+        if max_tokens <= 0:
+            return ""
+        encoder = get_encoder(model)
+        if encoder is None:
+            limit = max_tokens * 4
+            if len(text) <= limit:
+                return text
+            return text[-limit:] if keep_end else text[:limit]
+
+        tokens = encoder.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return encoder.decode(tokens[-max_tokens:] if keep_end else tokens[:max_tokens])
+
+    def fit(self, text: str, model: str, max_tokens: Optional[int] = None) -> str:
+        """Content trimmed to max_tokens (default max_context_tokens) for embedding in a prompt"""
+        if not self.enabled:
+            return text
+        max_tokens = self.max_context_tokens if max_tokens is None else max_tokens
+        original = self.count(text, model)
+        if original <= max_tokens:
+            return text
+        fitted = self.truncate(text, max_tokens, model)
+        self._record_trim(original, self.count(fitted, model))
+        return fitted
+
+    def section_context(self, content: str, section: str, model: str,
+                        max_tokens: Optional[int] = None) -> Tuple[str, str]:
+        """
+        Text before and after section in content, limited to the neighbouring section on each side
+
+        Each side is then trimmed (keeping the text closest to the section) to
+        share max_tokens (default section_context_tokens). If section is not
+        found in content, the start of the content is returned as context.
+        """
+        max_tokens = self.section_context_tokens if max_tokens is None else max_tokens
+        original = self.count(content, model)
+        section = section.strip()
+        position = content.find(section) if section else -1
+
+        if position < 0:
+            before, after = self.truncate(content, max_tokens, model), ""
+        else:
+            end = position + len(section)
+            spans = section_spans(content)
+            first = next(i for i, (start, stop) in enumerate(spans) if stop > position)
+            last = next(i for i, (start, stop) in enumerate(spans) if stop >= end)
+            # The neighbours plus whatever part of the section's own sections is not being replaced
+            before_start = spans[first - 1][0] if first > 0 else 0
+            after_end = spans[last + 1][1] if last + 1 < len(spans) else len(content)
+            before = content[before_start:position].strip()
+            after = content[end:after_end].strip()
+
+            before_budget = max_tokens // 2
+            if self.count(after, model) < max_tokens - before_budget:
+                before_budget = max_tokens - self.count(after, model)
+            before = self.truncate(before, before_budget, model, keep_end=True)
+            after = self.truncate(after, max_tokens - self.count(before, model), model)
+
+        self._record_trim(original, self.count(before, model) + self.count(after, model))
+        return before, after
+
+    def completion_tokens(self, model: str, prompt_tokens: int, ceiling: int,
+                          target_words: Optional[int] = None, expected_tokens: Optional[int] = None) -> int:
+        """
+        max_tokens for a request expected to produce target_words of prose (or expected_tokens tokens)
+
+        Never above ceiling (the configured fixed max_tokens) or the room left in
+        the model's context window; ceiling is returned as is when disabled.
+        """
+        if not self.enabled:
+            return ceiling
+        if target_words is not None:
+            expected_tokens = int(target_words * TOKENS_PER_WORD)
+        sized = ceiling
+        if expected_tokens is not None:
+            sized = max(MIN_COMPLETION_TOKENS, int(expected_tokens * COMPLETION_HEADROOM) + COMPLETION_OVERHEAD_TOKENS)
+        sized = max(1, min(sized, ceiling, context_window(model) - prompt_tokens))
+
+        with self._lock:
+            self.sized_completions += 1
+            self.max_tokens_saved += max(0, ceiling - sized)
+        return sized
+
+    def _record_trim(self, before: int, after: int):
+        with self._lock:
+            self.trimmed_prompts += 1
+            self.prompt_tokens_before += before
+            self.prompt_tokens_after += after
+
+    def stats(self) -> Dict[str, Any]:
+        """Get prompt tokens trimmed and max_tokens reserved below the fixed ceiling"""
+        with self._lock:
+            saved = self.prompt_tokens_before - self.prompt_tokens_after
+            return {
+                "enabled": self.enabled,
+                "tokenizer": "tiktoken" if tiktoken is not None else "estimate",
+                "trimmed_prompts": self.trimmed_prompts,
+                "prompt_tokens_before": self.prompt_tokens_before,
+                "prompt_tokens_after": self.prompt_tokens_after,
+                "prompt_tokens_saved": saved,
+                "prompt_savings_rate": round(saved / self.prompt_tokens_before, 4) if self.prompt_tokens_before else 0.0,
+                "sized_completions": self.sized_completions,
+                "max_tokens_saved": self.max_tokens_saved
+            }
+
+
+# Global budget shared by the generation services
+prompt_budget = PromptBudget()
@@ -0,0 +1,22 @@
+"""
+Periodic template maintenance tasks
+"""
+import logging
+from typing import Optional
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.template_service import TemplateService
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="app.tasks.refresh_template_rollups")
+def refresh_template_rollups(days: Optional[int] = settings.TEMPLATE_ROLLUP_REFRESH_DAYS) -> int:
+    """Recompute recent daily template usage rollups (all history when days is None)"""
+    db = SessionLocal()
+    try:
+        return TemplateService(db).refresh_usage_rollups(days)
+    finally:
+        db.close()
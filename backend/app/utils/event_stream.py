@@ -0,0 +1,44 @@
+"""
+Encode event dicts ({"event": name, "data": {...}}) as SSE or NDJSON response bodies
+"""
+import json
+import logging
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+STREAM_FORMATS = {
+    "sse": "text/event-stream",
+    "ndjson": "application/x-ndjson",
+}
+
+# Stop proxies (e.g. nginx) from buffering the stream
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """One server-sent event: named event line plus a JSON data line"""
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def format_ndjson(event: Dict[str, Any]) -> str:
+    """One JSON object per line"""
+    return json.dumps(event) + "\n"
+
+
+async def encode_events(events: AsyncGenerator[Dict[str, Any], None], stream_format: str,
+                        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None) -> AsyncIterator[str]:
+    """Format events for the response body, stopping (and closing events) when the client goes away.
+
+    The disconnect check runs on progress events, which arrive periodically
+    even while the producer is waiting on its upstream.
+    """
+    formatter = format_sse if stream_format == "sse" else format_ndjson
+    try:
+        async for event in events:
+            if event["event"] == "progress" and is_disconnected is not None and await is_disconnected():
+                logger.info("Client disconnected; cancelling event stream")
+                break
+            yield formatter(event)
+    finally:
+        await events.aclose()
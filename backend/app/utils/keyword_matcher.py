@@ -0,0 +1,193 @@
+"""
+Multi-keyword matcher (Aho-Corasick) for SEO keyword analysis
+"""
+import re
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+
+# Word runs and single punctuation marks; keywords only match whole tokens,
+# so "seo" never matches inside "seos" and "blog posts" never spans "blog. posts"
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def normalize_keyword(keyword: str) -> str:
+    """Normalize a keyword for matching (case and whitespace insensitive)"""
+    return " ".join(keyword.lower().split())
+
+
+@dataclass
+class KeywordScanResult:
+    """Per-keyword results of a single scan, keyed by normalized keyword"""
+    counts: Dict[str, int] = field(default_factory=dict)
+    first_positions: Dict[str, int] = field(default_factory=dict)
+
+    def count(self, keyword: str) -> int:
+        return self.counts.get(normalize_keyword(keyword), 0)
+
+    def contains(self, keyword: str) -> bool:
+        return self.count(keyword) > 0
+
+    def first_position(self, keyword: str):
+        return self.first_positions.get(normalize_keyword(keyword))
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over word tokens that finds all keywords in one scan"""
+
+    def __init__(self, keywords: Iterable[str]):
+        normalized = (normalize_keyword(keyword) for keyword in keywords)
+        self.keywords: Tuple[str, ...] = tuple(dict.fromkeys(k for k in normalized if k))
+
+        # Trie nodes: transitions, failure link, and keyword indices ending here
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        self._lengths: List[int] = []
+
+        for index, keyword in enumerate(self.keywords):
+            tokens = TOKEN_PATTERN.findall(keyword)
+            self._lengths.append(len(tokens))
+            self._add_pattern(tokens, index)
+
+        self._build_failure_links()
+        self._single_token_only = all(length == 1 for length in self._lengths)
+        self.max_length = max(self._lengths, default=0)
+        self.has_self_overlap = any(
+            self._self_overlaps(TOKEN_PATTERN.findall(keyword)) for keyword in self.keywords
+        )
+
+    @staticmethod
+    def _self_overlaps(tokens: List[str]) -> bool:
+        """Whether two occurrences of this token sequence can overlap (e.g. "go go")"""
+        return any(tokens[:size] == tokens[-size:] for size in range(1, len(tokens)))
+
+    def _add_pattern(self, tokens: List[str], index: int):
+        """Insert a tokenized keyword into the trie"""
+        node = 0
+        for token in tokens:
+            next_node = self._goto[node].get(token)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][token] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append(index)
+
+    def _build_failure_links(self):
+        """Compute failure links breadth-first and merge outputs along them"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def scan(self, text: str, with_positions: bool = True) -> KeywordScanResult:
+        """Count non-overlapping whole-token occurrences of every keyword in one pass"""
+        result = KeywordScanResult(counts={keyword: 0 for keyword in self.keywords})
+        if not self.keywords or not text:
+            return result
+
+        goto, fail, output, lengths = self._goto, self._fail, self._output, self._lengths
+        root = goto[0]
+        counts = result.counts
+        next_free = [0] * len(self.keywords)
+        first_token_index: Dict[str, int] = {}
+        node = 0
+
+        lowered = text.lower()
+        tokens = TOKEN_PATTERN.findall(lowered)
+
+        if self._single_token_only:
+            # Every keyword is one token: occurrences never overlap, so a frequency table suffices
+            frequencies = Counter(tokens)
+            for keyword in self.keywords:
+                counts[keyword] = frequencies.get(keyword, 0)
+                if with_positions and counts[keyword]:
+                    first_token_index[keyword] = tokens.index(keyword)
+            if first_token_index:
+                result.first_positions = self._token_offsets(lowered, first_token_index)
+            return result
+
+        for position, token in enumerate(tokens):
+            if node == 0:
+                # Fast path: most tokens in running text start no keyword at all
+                node = root.get(token, 0)
+                if node == 0:
+                    continue
+            else:
+                while node and token not in goto[node]:
+                    node = fail[node]
+                node = goto[node].get(token, 0)
+
+            for index in output[node]:
+                start = position - lengths[index] + 1
+                if start < next_free[index]:
+                    continue  # Overlaps the previous match of this keyword
+                next_free[index] = position + 1
+                keyword = self.keywords[index]
+                counts[keyword] += 1
+                first_token_index.setdefault(keyword, start)
+
+        if with_positions and first_token_index:
+            result.first_positions = self._token_offsets(lowered, first_token_index)
+        return result
+
+    def count_spanning(self, left: List[str], right: List[str]) -> Dict[str, int]:
+        """
+        Count keyword occurrences that start in left and end in right
+
+        Used to stitch per-paragraph counts together; left and right are
+        already-tokenized (lowercase) token lists either side of a boundary.
+        """
+        counts: Dict[str, int] = {}
+        boundary = len(left)
+        goto, fail, output, lengths = self._goto, self._fail, self._output, self._lengths
+        node = 0
+
+        for position, token in enumerate(left + right):
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+
+            if position < boundary:
+                continue
+            for index in output[node]:
+                if position - lengths[index] + 1 < boundary:
+                    keyword = self.keywords[index]
+                    counts[keyword] = counts.get(keyword, 0) + 1
+        return counts
+
+    @staticmethod
+    def _token_offsets(text: str, token_indices: Dict[str, int]) -> Dict[str, int]:
+        """Map token indices to character offsets, stopping at the last one needed"""
+        wanted = set(token_indices.values())
+        last = max(wanted)
+        offsets = {}
+        for position, match in enumerate(TOKEN_PATTERN.finditer(text)):
+            if position in wanted:
+                offsets[position] = match.start()
+            if position >= last:
+                break
+        return {keyword: offsets[index] for keyword, index in token_indices.items()}
+
+
+@lru_cache(maxsize=256)
+def _compile_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
+
+
+def get_keyword_matcher(keywords: Iterable[str]) -> KeywordMatcher:
+    """Get a compiled matcher for a keyword set, cached independently of keyword order"""
+    normalized = sorted({normalize_keyword(keyword) for keyword in keywords} - {""})
+    return _compile_matcher(tuple(normalized))
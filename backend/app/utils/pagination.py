@@ -0,0 +1,139 @@
+"""
+Keyset (cursor) pagination helpers shared by post and template listings
+"""
+import base64
+import binascii
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Hashable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import asc, desc, func, literal, select, tuple_
+
+
+class InvalidCursorError(ValueError):
+    """Cursor is malformed or does not belong to the requested sort order"""
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """Position after the last row of a page: its sort value and ID"""
+    sort_by: str
+    descending: bool
+    value: Any
+    last_id: str
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    """Serialize a cursor to an opaque URL-safe token"""
+    value = cursor.value
+    if isinstance(value, datetime):
+        value = {"dt": value.isoformat()}
+    payload = {"s": cursor.sort_by, "d": cursor.descending, "v": value, "id": cursor.last_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Cursor:
+    """Parse a token produced by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        value = payload["v"]
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["dt"])
+        return Cursor(str(payload["s"]), bool(payload["d"]), value, str(payload["id"]))
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
+
+
+def keyset_order_by(sort_column, id_column, descending: bool) -> List[Any]:
+    """ORDER BY (sort column, id) in one direction so (value, id) is a total order"""
+    direction = desc if descending else asc
+    return [direction(sort_column), direction(id_column)]
+
+
+def keyset_condition(sort_column, id_column, cursor: Cursor):
+    """Rows strictly after the cursor in (sort column, id) order.
+
+    The cursor row's sort value is read back from the table rather than
+    re-bound from the token, so values compare exactly as stored (e.g.
+    SQLite timestamps without microseconds); the token's value is only
+    used if that row has since been deleted. The comparison is a row value,
+    so an index ending in (sort column, id) serves it as one range seek.
+    """
+    stored_value = func.coalesce(
+        select(sort_column).where(id_column == cursor.last_id).scalar_subquery(),
+        literal(cursor.value, type_=sort_column.type)
+    )
+    position = tuple_(stored_value, literal(cursor.last_id, type_=id_column.type))
+    if cursor.descending:
+        return tuple_(sort_column, id_column) < position
+    return tuple_(sort_column, id_column) > position
+
+
+def paginate_keyset(statement, sort_column, id_column, sort_by: str, descending: bool,
+                    cursor: Optional[str], limit: int):
+    """Apply keyset ordering, the cursor position and limit + 1 (to detect a next page)"""
+    if cursor:
+        position = decode_cursor(cursor)
+        if position.sort_by != sort_by or position.descending != descending:
+            raise InvalidCursorError("Cursor was issued for a different sort order")
+        statement = statement.where(keyset_condition(sort_column, id_column, position))
+    return statement.order_by(*keyset_order_by(sort_column, id_column, descending)).limit(limit + 1)
+
+
+def keyset_page(rows: Sequence[Any], sort_by: str, descending: bool, limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Split the limit + 1 fetched rows into the page and the cursor for the next one"""
+    page = list(rows[:limit])
+    if len(rows) <= limit or not page:
+        return page, None
+    last = page[-1]
+    return page, encode_cursor(Cursor(sort_by, descending, getattr(last, sort_by), str(last.id)))
+
+
+class TotalCountCache:
+    """Short-lived cache of listing totals so COUNT(*) is not paid on every page"""
+
+    def __init__(self, ttl_seconds: float = 30.0, maxsize: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, int]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, total = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return total
+
+    def set(self, key: Hashable, total: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, total)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_count(self, key: Hashable, count: Callable[[], int]) -> int:
+        total = self.get(key)
+        if total is None:
+            total = count()
+            self.set(key, total)
+        return total
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Totals for cursor-paginated listings (may lag writes by up to ttl_seconds)
+total_count_cache = TotalCountCache()
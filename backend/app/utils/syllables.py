@@ -0,0 +1,113 @@
+"""
+Memoized syllable counting for readability scoring
+"""
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(__file__), "data", "syllable_lexicon.txt")
+DEFAULT_CACHE_SIZE = 50000
+
+_ENDING_PATTERN = re.compile(r'(es|ed|e)$')
+_VOWELS = frozenset('aeiouy')
+
+
+def estimate_syllables(word: str) -> int:
+    """Count syllables in a word (simplified vowel-group algorithm)"""
+    word = word.lower()
+    if len(word) <= 3:
+        return 1
+
+    # Remove common endings
+    word = _ENDING_PATTERN.sub('', word)
+
+    # Count vowel groups
+    syllable_count = 0
+    prev_was_vowel = False
+
+    for char in word:
+        is_vowel = char in _VOWELS
+        if is_vowel and not prev_was_vowel:
+            syllable_count += 1
+        prev_was_vowel = is_vowel
+
+    return max(1, syllable_count)
+
+
+def load_lexicon(path: str) -> Dict[str, int]:
+    """
+    Load a compact syllable table
+
+    Each non-comment line is "<syllables>: word word word ...".
+    """
+    lexicon: Dict[str, int] = {}
+    with open(path, encoding="utf-8") as lexicon_file:
+        for line in lexicon_file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            count, _, words = line.partition(":")
+            syllables = int(count)
+            for word in words.split():
+                lexicon[word] = syllables
+    return lexicon
+
+
+class SyllableCounter:
+    """Bounded LRU syllable counter seeded from a lazily loaded lexicon"""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, lexicon_path: Optional[str] = DEFAULT_LEXICON_PATH):
+        self.maxsize = maxsize
+        self.lexicon_path = lexicon_path
+        self.lexicon_hits = 0
+        self._lexicon: Optional[Dict[str, int]] = None
+        self._lexicon_lock = threading.Lock()
+        self._estimate = lru_cache(maxsize=maxsize)(estimate_syllables)
+
+    @property
+    def lexicon(self) -> Dict[str, int]:
+        """Bundled word table, read from disk on first use"""
+        if self._lexicon is None:
+            with self._lexicon_lock:
+                if self._lexicon is None:
+                    if self.lexicon_path and os.path.exists(self.lexicon_path):
+                        self._lexicon = load_lexicon(self.lexicon_path)
+                    else:
+                        self._lexicon = {}
+        return self._lexicon
+
+    def count(self, word: str) -> int:
+        """Count syllables, preferring the lexicon and then the memoized estimate"""
+        word = word.lower()
+        syllables = self.lexicon.get(word)
+        if syllables is not None:
+            self.lexicon_hits += 1
+            return syllables
+        return self._estimate(word)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters and hit rate"""
+        info = self._estimate.cache_info()
+        lookups = self.lexicon_hits + info.hits + info.misses
+        hits = self.lexicon_hits + info.hits
+        return {
+            "lexicon_size": len(self._lexicon) if self._lexicon is not None else 0,
+            "lexicon_hits": self.lexicon_hits,
+            "cache_hits": info.hits,
+            "cache_misses": info.misses,
+            "cache_size": info.currsize,
+            "cache_maxsize": info.maxsize,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+        }
+
+    def clear(self):
+        """Reset the memoized estimates and counters (the lexicon is kept)"""
+        self._estimate.cache_clear()
+        self.lexicon_hits = 0
+
+
+# Global counter shared by all SEO analyses in this process
+syllable_counter = SyllableCounter()
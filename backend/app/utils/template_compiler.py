@@ -0,0 +1,97 @@
+"""
+Compile {{placeholder}} templates once and render them with a single join
+"""
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Tuple
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+
+
+class CompiledTemplate:
+    """
+    Template content split into literal chunks and variable slots
+
+    Slots keep their original "{{name}}" text, so rendering copies the
+    segment list, fills the slots that have a value and joins once;
+    placeholders without a value are left as written.
+    """
+
+    __slots__ = ("segments", "slots", "placeholders")
+
+    def __init__(self, segments: List[str], slots: List[Tuple[int, str]]):
+        self.segments = segments
+        self.slots = slots
+        # Unique placeholder names in order of first appearance
+        self.placeholders = list(dict.fromkeys(name for _, name in slots))
+
+    def render(self, variables: Dict[str, str]) -> Tuple[str, List[str], List[str]]:
+        """Return (content, placeholders found, placeholders replaced)"""
+        parts = self.segments.copy()
+        for index, name in self.slots:
+            if name in variables:
+                parts[index] = variables[name]
+        replaced = [name for name in self.placeholders if name in variables]
+        return "".join(parts), self.placeholders, replaced
+
+
+def compile_template(template_content: str) -> CompiledTemplate:
+    """Parse template content into a CompiledTemplate"""
+    segments: List[str] = []
+    slots: List[Tuple[int, str]] = []
+    position = 0
+    for match in PLACEHOLDER_PATTERN.finditer(template_content):
+        if match.start() > position:
+            segments.append(template_content[position:match.start()])
+        slots.append((len(segments), match.group(1)))
+        segments.append(match.group(0))
+        position = match.end()
+    if position < len(template_content):
+        segments.append(template_content[position:])
+    return CompiledTemplate(segments, slots)
+
+
+class CompiledTemplateCache:
+    """LRU of compiled templates keyed by template ID, valid for one updated_at"""
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Any, CompiledTemplate]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, template_id: Hashable, updated_at: Any, template_content: str) -> CompiledTemplate:
+        """Compiled template for this version, compiling (and replacing older versions) on a miss"""
+        with self._lock:
+            entry = self._entries.get(template_id)
+            if entry is not None and entry[0] == updated_at:
+                self._entries.move_to_end(template_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        compiled = compile_template(template_content)
+        with self._lock:
+            self._entries[template_id] = (updated_at, compiled)
+            self._entries.move_to_end(template_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def invalidate(self, template_id: Hashable):
+        with self._lock:
+            self._entries.pop(template_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Compiled templates shared by the template endpoints
+compiled_template_cache = CompiledTemplateCache()
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Deterministic stand-in for the OpenAI chat completions API
+
+Serves POST /v1/chat/completions (plain and streamed, including
+response_format json_object) with a configurable time-to-first-token
+distribution, token streaming rate and injected 429/500 responses, so the
+generation paths can be load-tested without spending tokens. Point the
+app at it with OPENAI_BASE_URL=http://127.0.0.1:8900/v1.
+
+The completion text is derived from a hash of the model, messages and
+response format, so the same prompt always gets the same answer.
+Latencies and injected errors come from one RNG seeded with --seed.
+Tokens are counted as four characters, as in the app's own estimates.
+
+Usage:
+    python benchmarks/fake_llm_server.py [--port 8900] [--latency lognormal:0.5,0.4]
+        [--tokens-per-second 50] [--completion-tokens 400]
+        [--rate-limit-rate 0.02] [--error-rate 0.01] [--seed 0]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+VOCABULARY = (
+    "search engine optimization content strategy blog post keyword ranking "
+    "readability audience traffic conversion marketing analytics headline "
+    "guide tips examples growth organic links structure intent quality "
+    "the a and of to in is for that with on as it be this by are you your"
+).split()
+
+# Arguments expected by each latency distribution
+LATENCY_KINDS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Sampler for a latency spec in seconds
+
+    fixed:SECONDS, uniform:LOW,HIGH, normal:MEAN,STDDEV or
+    lognormal:MEDIAN,SIGMA. Negative samples are clamped to 0.
+    """
+    kind, _, arguments = spec.partition(":")
+    try:
+        values = [float(value) for value in arguments.split(",")] if arguments else []
+    except ValueError:
+        raise ValueError(f"Invalid latency spec: {spec}")
+    if LATENCY_KINDS.get(kind) != len(values):
+        raise ValueError(f"Invalid latency spec: {spec} (expected one of {', '.join(LATENCY_KINDS)})")
+
+    if kind == "fixed":
+        return lambda rng: max(0.0, values[0])
+    if kind == "uniform":
+        return lambda rng: max(0.0, rng.uniform(*values))
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(*values))
+    median, sigma = values
+    if median <= 0:
+        return lambda rng: 0.0
+    return lambda rng: rng.lognormvariate(math.log(median), sigma)
+
+
+@dataclass
+class FakeLLMConfig:
+    """Behaviour of the fake server"""
+    latency: str = "fixed:0.2"  # time to first token
+    tokens_per_second: float = 50.0  # streaming rate after the first token; 0 streams without pacing
+    completion_tokens: int = 400  # capped by the request's max_tokens
+    rate_limit_rate: float = 0.0  # fraction of requests answered with 429
+    error_rate: float = 0.0  # fraction of requests answered with 500
+    retry_after: float = 1.0  # Retry-After header on 429s
+    seed: int = 0
+
+
+def count_tokens(text: str) -> int:
+    """About four characters per token"""
+    return max(1, math.ceil(len(text) / 4))
+
+
+def _wants_json(body: Dict[str, Any]) -> bool:
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        return True
+    messages = body.get("messages") or []
+    return bool(messages) and "json" in str(messages[-1].get("content") or "").lower()
+
+
+def build_completion(body: Dict[str, Any], tokens: int) -> str:
+    """Completion text of about `tokens` tokens, the same for the same model, messages and format"""
+    key = json.dumps([body.get("model"), body.get("messages"), body.get("response_format")], sort_keys=True)
+    rng = random.Random(hashlib.sha256(key.encode()).hexdigest())
+
+    sentences = []
+    length = 0
+    while length < tokens * 4:
+        sentence = " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(8, 20))).capitalize() + "."
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    text = " ".join(sentences)
+
+    if not _wants_json(body):
+        return text
+
+    title = sentences[0][:60].rstrip(" .").title()
+    keywords = sorted({word for word in text.split()[:40] if len(word) > 4})[:5]
+    return json.dumps({
+        "title": title,
+        "content": text,
+        "meta_description": text[:155],
+        "keywords": keywords,
+        "seo_suggestions": [f"Use '{keyword}' in a subheading" for keyword in keywords[:3]],
+        "slug": "-".join(title.lower().split())[:50],
+        "og_title": title,
+        "og_description": text[:155]
+    })
+
+
+class FakeLLMStats:
+    """Request counters for the fake server"""
+
+    def __init__(self):
+        self.requests = 0
+        self.streamed = 0
+        self.rate_limited = 0
+        self.server_errors = 0
+        self.completion_tokens = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+
+def _error(status: int, message: str, error_type: str, headers: Dict[str, str] = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"message": message, "type": error_type, "param": None, "code": error_type}},
+        headers=headers
+    )
+
+
+def create_app(config: FakeLLMConfig = None) -> FastAPI:
+    """Fake OpenAI-compatible API for the given config"""
+    config = config or FakeLLMConfig()
+    sample_latency = parse_latency(config.latency)
+    rng = random.Random(config.seed)
+    stats = FakeLLMStats()
+
+    app = FastAPI(title="Fake LLM server")
+    app.state.config = config
+    app.state.stats = stats
+
+    def chunk(completion_id: str, model: str, delta: Dict[str, str], finish_reason: str = None) -> str:
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    async def stream_completion(completion_id: str, model: str, text: str,
+                                first_token_delay: float) -> AsyncIterator[str]:
+        await asyncio.sleep(first_token_delay)
+        yield chunk(completion_id, model, {"role": "assistant", "content": ""})
+
+        pieces: List[str] = [text[start:start + 4] for start in range(0, len(text), 4)]
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        sent = 0
+        while sent < len(pieces):
+            if config.tokens_per_second > 0:
+                delay = started + sent / config.tokens_per_second - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # Catch up in one chunk when the event loop fell behind the schedule
+                due = int((loop.time() - started) * config.tokens_per_second) + 1
+                count = max(1, due - sent)
+            else:
+                count = 1
+            yield chunk(completion_id, model, {"content": "".join(pieces[sent:sent + count])})
+            sent += count
+
+        yield chunk(completion_id, model, {}, finish_reason="stop")
+        yield "data: [DONE]\n\n"
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats.requests += 1
+        if not body.get("messages"):
+            return _error(400, "'messages' is required", "invalid_request_error")
+
+        roll = rng.random()
+        if roll < config.rate_limit_rate:
+            stats.rate_limited += 1
+            return _error(429, "Rate limit reached (injected)", "rate_limit_exceeded",
+                          headers={"retry-after": str(config.retry_after)})
+        if roll < config.rate_limit_rate + config.error_rate:
+            stats.server_errors += 1
+            return _error(500, "The server had an error (injected)", "server_error")
+
+        model = body.get("model") or "fake-model"
+        tokens = min(config.completion_tokens, body.get("max_tokens") or config.completion_tokens)
+        text = build_completion(body, tokens)
+        completion_tokens = count_tokens(text)
+        stats.completion_tokens += completion_tokens
+        completion_id = f"chatcmpl-fake-{uuid.uuid4().hex[:12]}"
+        first_token_delay = sample_latency(rng)
+
+        if body.get("stream"):
+            stats.streamed += 1
+            return StreamingResponse(
+                stream_completion(completion_id, model, text, first_token_delay),
+                media_type="text/event-stream"
+            )
+
+        generation_time = completion_tokens / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+        await asyncio.sleep(first_token_delay + generation_time)
+        prompt_tokens = count_tokens("".join(str(message.get("content") or "") for message in body["messages"]))
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "fake-model", "object": "model", "owned_by": "fake"}]}
+
+    @app.get("/stats")
+    async def get_stats():
+        return {"config": asdict(config), **stats.snapshot()}
+
+    return app
+
+
+class BackgroundServer:
+    """Run the fake server with uvicorn on a daemon thread (load tests and local development)"""
+
+    def __init__(self, config: FakeLLMConfig = None, host: str = "127.0.0.1", port: int = 8900):
+        self.app = create_app(config)
+        self.base_url = f"http://{host}:{port}/v1"
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def start(self, timeout: float = 10.0) -> "BackgroundServer":
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError(f"Fake LLM server did not start at {self.base_url}")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join()
+
+    def stats(self) -> Dict[str, int]:
+        return self.app.state.stats.snapshot()
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    """Command-line options for FakeLLMConfig (shared with the load-test harness)"""
+    defaults = FakeLLMConfig()
+    parser.add_argument("--latency", default=defaults.latency,
+                        help="Time to first token: fixed:S, uniform:LO,HI, normal:MEAN,SD or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second)
+    parser.add_argument("--completion-tokens", type=int, default=defaults.completion_tokens)
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate,
+                        help="Fraction of requests answered with 429")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate,
+                        help="Fraction of requests answered with 500")
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def config_from_arguments(args: argparse.Namespace) -> FakeLLMConfig:
+    config = FakeLLMConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        rate_limit_rate=args.rate_limit_rate,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+    parse_latency(config.latency)
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        config = config_from_arguments(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"🤖 Fake LLM server on http://{args.host}:{args.port}/v1")
+    print(f"   Point the app at it with OPENAI_BASE_URL=http://{args.host}:{args.port}/v1")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
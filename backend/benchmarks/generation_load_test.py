@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Load test for the content generation paths against the fake LLM server
+
+Starts benchmarks/fake_llm_server.py on a background thread and drives
+each generation endpoint in turn with concurrent workers. For each one it
+reports throughput and p50/p95/p99 latency, plus time to the first token
+event for the streaming endpoint.
+
+By default the services behind the endpoints are called in-process, so no
+database, Redis or login is needed. With --app-url the running API is
+called over HTTP instead. Start the API with OPENAI_BASE_URL set to the
+fake server URL printed at startup, and pass a bearer token with --token.
+
+Prompts cycle through --distinct-prompts variants (default: all distinct),
+so lowering it measures the completion cache and request coalescing.
+
+Usage:
+    python benchmarks/generation_load_test.py [--requests 100] [--concurrency 20]
+        [--endpoints generate,stream,seo-metadata,suggestions] [--distinct-prompts N]
+        [--app-url http://localhost:8000 --token TOKEN] [--fake-port 8900] [--no-fake-llm]
+        [--latency lognormal:0.5,0.4] [--tokens-per-second 50] [--rate-limit-rate 0.02] ...
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_llm_server import BackgroundServer, add_config_arguments, config_from_arguments
+
+
+TOPICS = [
+    "How to improve website SEO",
+    "Content strategy for small businesses",
+    "Writing headlines that rank",
+    "Keyword research for beginners",
+    "Measuring blog post conversion",
+]
+
+ENDPOINT_PATHS = {
+    "generate": "/api/v1/content/generate",
+    "stream": "/api/v1/content/generate/stream",
+    "seo-metadata": "/api/v1/content/seo-metadata",
+    "suggestions": "/api/v1/content/suggestions",
+}
+
+
+@dataclass
+class EndpointResult:
+    """Latencies and errors for one endpoint's run"""
+    latencies: List[float] = field(default_factory=list)
+    first_token: List[float] = field(default_factory=list)
+    errors: int = 0
+    wall_seconds: float = 0.0
+
+
+# One call: returns seconds to the first token event (streams) or None; raises on failure
+Call = Callable[[int], Awaitable[Optional[float]]]
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def prompt(variant: int) -> Dict[str, str]:
+    """Request fields for one prompt variant"""
+    topic = f"{TOPICS[variant % len(TOPICS)]} (variant {variant})"
+    content = f"{topic}. Search engines reward clear structure, relevant keywords and useful answers. " * 4
+    return {"topic": topic, "title": topic, "content": content}
+
+
+def in_process_calls(endpoints: List[str]) -> Dict[str, Call]:
+    """Calls to the services behind each endpoint, made in this process"""
+    from app.services.content_generation_service import get_content_generation_service
+    from app.services.openai_service import ContentGenerationRequest, ContentTone, ContentType, get_openai_service
+
+    async def generate(variant: int) -> Optional[float]:
+        fields = prompt(variant)
+        result = await get_content_generation_service().generate_content(title=fields["title"],
+                                                                          content=fields["content"])
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+        return None
+
+    async def stream(variant: int) -> Optional[float]:
+        started = time.monotonic()
+        first_token = None
+        events = get_openai_service().generate_content_events(ContentGenerationRequest(
+            topic=prompt(variant)["topic"], content_type=ContentType.ARTICLE, tone=ContentTone.PROFESSIONAL
+        ))
+        try:
+            async for event in events:
+                if event["event"] == "token" and first_token is None:
+                    first_token = time.monotonic() - started
+                elif event["event"] == "error":
+                    raise RuntimeError(event["data"]["detail"])
+        finally:
+            await events.aclose()
+        return first_token
+
+    async def seo_metadata(variant: int) -> Optional[float]:
+        fields = prompt(variant)
+        metadata = await get_content_generation_service().generate_seo_metadata(fields["content"], fields["title"])
+        if "error" in metadata:
+            raise RuntimeError(metadata["error"])
+        return None
+
+    async def suggestions(variant: int) -> Optional[float]:
+        result = await get_content_generation_service().suggest_improvements(prompt(variant)["content"])
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+        return None
+
+    calls = {"generate": generate, "stream": stream, "seo-metadata": seo_metadata, "suggestions": suggestions}
+    return {name: calls[name] for name in endpoints}
+
+
+def http_calls(client: httpx.AsyncClient, endpoints: List[str]) -> Dict[str, Call]:
+    """Calls to the running API's generation endpoints"""
+
+    async def post(name: str, body: Dict) -> Optional[float]:
+        response = await client.post(ENDPOINT_PATHS[name], json=body)
+        response.raise_for_status()
+        return None
+
+    async def stream(variant: int) -> Optional[float]:
+        started = time.monotonic()
+        first_token = None
+        event = None
+        async with client.stream("POST", ENDPOINT_PATHS["stream"], json={"topic": prompt(variant)["topic"]}) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                    if event == "token" and first_token is None:
+                        first_token = time.monotonic() - started
+                elif line.startswith("data: ") and event == "error":
+                    raise RuntimeError(json.loads(line[len("data: "):]).get("detail"))
+        return first_token
+
+    calls = {
+        "generate": lambda variant: post("generate", {k: prompt(variant)[k] for k in ("title", "content")}),
+        "stream": stream,
+        "seo-metadata": lambda variant: post("seo-metadata", {k: prompt(variant)[k] for k in ("title", "content")}),
+        "suggestions": lambda variant: post("suggestions", {"content": prompt(variant)["content"]}),
+    }
+    return {name: calls[name] for name in endpoints}
+
+
+async def run_endpoint(call: Call, requests: int, concurrency: int, distinct_prompts: int,
+                       offset: int) -> EndpointResult:
+    """Issue `requests` calls from `concurrency` workers"""
+    result = EndpointResult()
+    next_request = iter(range(requests))
+
+    async def worker():
+        for index in next_request:
+            started = time.monotonic()
+            try:
+                first_token = await call(offset + index % distinct_prompts)
+            except Exception:
+                result.errors += 1
+                continue
+            result.latencies.append(time.monotonic() - started)
+            if first_token is not None:
+                result.first_token.append(first_token)
+
+    started = time.monotonic()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    result.wall_seconds = time.monotonic() - started
+    return result
+
+
+def report(name: str, result: EndpointResult):
+    def ms(values: List[float], q: float) -> str:
+        return f"{percentile(values, q) * 1000:8.0f}"
+
+    throughput = len(result.latencies) / result.wall_seconds if result.wall_seconds else 0.0
+    line = (f"   {name:<14} {len(result.latencies):5d} {result.errors:5d} {throughput:8.1f}"
+            f" {ms(result.latencies, 0.5)} {ms(result.latencies, 0.95)} {ms(result.latencies, 0.99)}")
+    if result.first_token:
+        line += f"   first token p50/p95 {ms(result.first_token, 0.5).strip()}/{ms(result.first_token, 0.95).strip()} ms"
+    print(line)
+
+
+async def run(args: argparse.Namespace, endpoints: List[str]):
+    client = None
+    if args.app_url:
+        headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+        client = httpx.AsyncClient(base_url=args.app_url, headers=headers, timeout=300.0,
+                                   limits=httpx.Limits(max_connections=args.concurrency))
+        calls = http_calls(client, endpoints)
+    else:
+        calls = in_process_calls(endpoints)
+
+    print(f"   {'Endpoint':<14} {'ok':>5} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    try:
+        for offset, name in enumerate(endpoints):
+            # Offset the variants so endpoints never share prompts
+            result = await run_endpoint(calls[name], args.requests, args.concurrency, args.distinct_prompts,
+                                        offset * args.requests)
+            report(name, result)
+    finally:
+        if client is not None:
+            await client.aclose()
+        else:
+            from app.services.llm_scheduler import llm_scheduler
+            from app.services.openai_service import close_async_openai_client
+            scheduler = llm_scheduler.stats()
+            print(f"   Scheduler: {scheduler['avg_wait_seconds']:.3f}s average wait for a slot, "
+                  f"concurrency window {scheduler['concurrency_limit']}, {scheduler['rate_limited']} rate limited")
+            await close_async_openai_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the content generation endpoints")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINT_PATHS),
+                        help=f"Comma-separated subset of: {', '.join(ENDPOINT_PATHS)}")
+    parser.add_argument("--distinct-prompts", type=int, default=None,
+                        help="Prompt variants per endpoint (default: one per request)")
+    parser.add_argument("--app-url", default=None, help="Call a running API instead of the services in-process")
+    parser.add_argument("--token", default=None, help="Bearer token for --app-url")
+    parser.add_argument("--fake-port", type=int, default=8900)
+    parser.add_argument("--no-fake-llm", action="store_true",
+                        help="Do not start the fake server; use the configured OPENAI_BASE_URL as is")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    endpoints = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+    unknown = [name for name in endpoints if name not in ENDPOINT_PATHS]
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(unknown)}")
+    args.distinct_prompts = max(1, args.distinct_prompts or args.requests)
+    try:
+        config = config_from_arguments(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    server = None
+    if not args.no_fake_llm:
+        server = BackgroundServer(config, port=args.fake_port).start()
+        # Read by app.core.config when the services are imported in-process
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "fake-key")
+        if args.app_url:
+            print(f"ℹ️  Start the API with OPENAI_BASE_URL={server.base_url} for it to use the fake server")
+
+    target = args.app_url or "in-process services"
+    print(f"📈 Generation load test: {target}, {args.requests} requests per endpoint, "
+          f"concurrency {args.concurrency}, {args.distinct_prompts} distinct prompts")
+    if server is not None:
+        print(f"   Fake LLM: first token {config.latency}, {config.tokens_per_second:g} tokens/s, "
+              f"{config.completion_tokens} tokens, 429 rate {config.rate_limit_rate:g}, "
+              f"500 rate {config.error_rate:g}")
+
+    try:
+        asyncio.run(run(args, endpoints))
+    finally:
+        if server is not None:
+            stats = server.stats()
+            server.stop()
+            print(f"   Upstream: {stats['requests']} requests ({stats['streamed']} streamed), "
+                  f"{stats['rate_limited']} rate limited, {stats['server_errors']} server errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark for SEO analysis on long blog posts
+
+Compares the shared single-pass document analysis used by
+SEOAnalysisService.generate_seo_score against the previous approach where
+keyword density and readability each cleaned, split and rescanned the text.
+
+Also times re-analysis after editing one paragraph with incremental=True
+against a full pass, and compares scoring a library of posts with generate_seo_scores_batch
+against a Python loop over generate_seo_score.
+
+Usage:
+    python benchmarks/seo_benchmark.py [--words 5000] [--runs 20] [--batch 1000]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.seo_service import SEOAnalysisService
+
+
+VOCABULARY = (
+    "search engine optimization content strategy blog post keyword ranking "
+    "readability audience traffic conversion marketing analytics headline "
+    "the a and of to in is for that with on as it be this by are you your"
+).split()
+
+KEYWORDS = [
+    "SEO", "content strategy", "blog post", "keyword", "ranking",
+    "readability", "audience", "traffic", "conversion", "marketing"
+]
+
+
+def build_post(word_count: int, seed: int = 42) -> str:
+    """Build a synthetic long-form post with sentences and paragraphs"""
+    rng = random.Random(seed)
+    paragraphs = []
+    words_left = word_count
+    while words_left > 0:
+        sentences = []
+        for _ in range(rng.randint(3, 7)):
+            length = min(words_left, rng.randint(8, 24))
+            if length <= 0:
+                break
+            words = [rng.choice(VOCABULARY) for _ in range(length)]
+            sentences.append(" ".join(words).capitalize() + rng.choice([".", ".", "!", "?"]))
+            words_left -= length
+        paragraphs.append("<p>" + " ".join(sentences) + "</p>")
+    return "\n\n".join(paragraphs)
+
+
+def legacy_content_analysis(service: SEOAnalysisService, content: str, keywords):
+    """Previous density + readability path: two cleanings, per-keyword rescans, per-word syllables"""
+    clean_content = service._clean_text(content)
+    words = clean_content.lower().split()
+    for keyword in keywords:
+        keyword_lower = keyword.lower()
+        clean_content.lower().count(keyword_lower)
+        if ' ' not in keyword_lower:
+            words.count(keyword_lower)
+
+    clean_content = service._clean_text(content)
+    sentences = re.split(r'[.!?]+', clean_content)
+    len([s for s in sentences if s.strip()])
+    sum(service._count_syllables(word) for word in clean_content.split())
+
+
+def single_pass_content_analysis(service: SEOAnalysisService, content: str, keywords):
+    """Current path: one document shared by density and readability"""
+    document = service.analyze_document(content)
+    service.analyze_keyword_density(content, keywords, document=document)
+    service.calculate_readability_score(content, document=document)
+
+
+def time_call(func, runs: int) -> float:
+    """Return the best wall time in milliseconds over the given runs"""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SEO analysis on long posts")
+    parser.add_argument("--words", type=int, default=5000, help="Words per synthetic post")
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per variant")
+    parser.add_argument("--batch", type=int, default=1000, help="Posts in the batch scoring comparison")
+    args = parser.parse_args()
+
+    service = SEOAnalysisService()
+    content = build_post(args.words)
+
+    print(f"📊 SEO analysis benchmark ({args.words} words, {len(KEYWORDS)} keywords, best of {args.runs})")
+
+    legacy_ms = time_call(lambda: legacy_content_analysis(service, content, KEYWORDS), args.runs)
+    single_ms = time_call(lambda: single_pass_content_analysis(service, content, KEYWORDS), args.runs)
+    full_ms = time_call(
+        lambda: service.generate_seo_score(content, "SEO content strategy for every blog post", None, KEYWORDS),
+        args.runs
+    )
+
+    print(f"   Legacy separate passes:    {legacy_ms:8.2f} ms")
+    print(f"   Single-pass document:      {single_ms:8.2f} ms")
+    print(f"   Full generate_seo_score:   {full_ms:8.2f} ms")
+    print(f"   Speedup:                   {legacy_ms / single_ms:8.2f}x")
+
+    paragraphs = content.split("\n\n")
+    edits = iter(range(10 ** 9))
+
+    def edit_one_paragraph():
+        paragraphs[len(paragraphs) // 2] = f"<p>Edited paragraph {next(edits)} about SEO and blog post ranking.</p>"
+        return "\n\n".join(paragraphs)
+
+    service.analyze_document(content, incremental=True)
+    edit_full_ms = time_call(lambda: service.analyze_document(edit_one_paragraph()), args.runs)
+    edit_incremental_ms = time_call(
+        lambda: service.analyze_document(edit_one_paragraph(), incremental=True), args.runs
+    )
+
+    print(f"✏️  Re-analysis after editing one of {len(paragraphs)} paragraphs")
+    print(f"   Full pass:                 {edit_full_ms:8.2f} ms")
+    print(f"   Incremental:               {edit_incremental_ms:8.2f} ms")
+
+    posts = [
+        {
+            "content": build_post(800, seed=index),
+            "title": "SEO content strategy for every blog post",
+            "meta_description": None,
+            "target_keywords": KEYWORDS
+        }
+        for index in range(args.batch)
+    ]
+    batch_runs = max(1, args.runs // 10)
+    loop_ms = time_call(
+        lambda: [
+            service.generate_seo_score(p["content"], p["title"], p["meta_description"], p["target_keywords"])
+            for p in posts
+        ],
+        batch_runs
+    )
+    batch_ms = time_call(lambda: service.generate_seo_scores_batch(posts), batch_runs)
+
+    print(f"📚 Batch scoring ({args.batch} posts of 800 words)")
+    print(f"   Python loop:               {loop_ms:8.2f} ms ({args.batch / loop_ms * 1000:8.0f} posts/s)")
+    print(f"   Batch (NumPy):             {batch_ms:8.2f} ms ({args.batch / batch_ms * 1000:8.0f} posts/s)")
+
+
+if __name__ == "__main__":
+    main()
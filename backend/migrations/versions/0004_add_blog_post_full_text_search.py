@@ -0,0 +1,40 @@
+"""Add full-text search index to blog posts
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Weighted search document: title (A), meta description (B), content (C)
+    op.add_column('blog_posts',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(meta_description, '')), 'B') || "
+                "setweight(to_tsvector('english', coalesce(content, '')), 'C')",
+                persisted=True
+            ),
+            nullable=True
+        )
+    )
+
+    op.create_index('ix_blog_posts_search_vector', 'blog_posts', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_blog_posts_search_vector', table_name='blog_posts')
+    op.drop_column('blog_posts', 'search_vector')
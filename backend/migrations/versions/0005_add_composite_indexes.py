@@ -0,0 +1,46 @@
+"""Add composite indexes for post listing, versioning and template analytics
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns), matching the __table_args__ on the models
+INDEXES = [
+    ('ix_blog_posts_user_id_created_at_id', 'blog_posts', ['user_id', 'created_at', 'id']),
+    ('ix_blog_posts_user_id_status_created_at_id', 'blog_posts', ['user_id', 'status', 'created_at', 'id']),
+    ('ix_blog_posts_user_id_post_type_created_at_id', 'blog_posts', ['user_id', 'post_type', 'created_at', 'id']),
+    ('ix_blog_posts_user_id_template_category_created_at_id', 'blog_posts', ['user_id', 'template_category', 'created_at', 'id']),
+    ('ix_post_versions_post_id_version_number', 'post_versions', ['post_id', 'version_number']),
+    ('ix_template_usage_template_id_created_at', 'template_usage', ['template_id', 'created_at']),
+    ('ix_template_ratings_template_id_user_id', 'template_ratings', ['template_id', 'user_id']),
+]
+
+
+def _existing_tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    # template_usage / template_ratings are created by create_tables() and are
+    # not in earlier revisions, so only index the tables that exist
+    tables = _existing_tables()
+    for name, table, columns in INDEXES:
+        if table in tables:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    tables = _existing_tables()
+    for name, table, _ in reversed(INDEXES):
+        if table in tables:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,36 @@
+"""Add daily template usage and rating rollups
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Rows are backfilled by the refresh_template_rollups task, which rebuilds
+    # all history the first time it finds the table empty
+    op.create_table('template_usage_daily',
+        sa.Column('template_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('usage_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('unique_users', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rating_sum', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rating_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['template_id'], ['content_templates.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('template_id', 'day')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('template_usage_daily')
@@ -0,0 +1,143 @@
+"""
+Unit tests for the CPU-bound analysis executor
+"""
+import asyncio
+import threading
+
+import pytest
+from app.services.analysis_executor import AnalysisExecutor, AnalysisQueueFullError
+from app.services.seo_service import SEOAnalysisService, _analyze_paragraph, paragraph_cache_warm
+
+
+def _thread_name() -> str:
+    return threading.current_thread().name
+
+
+class TestAnalysisExecutor:
+    """Test inline execution, pool dispatch and backpressure"""
+
+    @pytest.mark.asyncio
+    async def test_small_jobs_run_inline(self):
+        """Test inputs below the threshold run on the calling thread"""
+        executor = AnalysisExecutor(mode="thread", max_workers=1, max_pending=4, inline_threshold=100)
+
+        name = await executor.run(_thread_name, size=10)
+
+        assert name == threading.current_thread().name
+        assert executor.stats()["inline_runs"] == 1
+        assert executor.stats()["pool_runs"] == 0
+
+    @pytest.mark.asyncio
+    async def test_large_jobs_run_on_pool(self):
+        """Test inputs at or above the threshold are dispatched to the pool"""
+        executor = AnalysisExecutor(mode="thread", max_workers=1, max_pending=4, inline_threshold=100)
+
+        name = await executor.run(_thread_name, size=100)
+
+        assert name.startswith("analysis")
+        stats = executor.stats()
+        assert stats["pool_runs"] == 1
+        assert stats["pending"] == 0
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_saturated(self):
+        """Test jobs beyond max_pending are rejected instead of queued"""
+        executor = AnalysisExecutor(mode="thread", max_workers=1, max_pending=1, inline_threshold=0)
+        release = threading.Event()
+
+        blocked = asyncio.ensure_future(executor.run(release.wait, 5, size=1))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(AnalysisQueueFullError):
+            await executor.run(_thread_name, size=1)
+
+        release.set()
+        assert await blocked is True
+        stats = executor.stats()
+        assert stats["rejected"] == 1
+        assert stats["max_pending_seen"] == 1
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_failures_are_counted(self):
+        """Test exceptions propagate and are recorded"""
+        executor = AnalysisExecutor(mode="thread", max_workers=1, max_pending=4, inline_threshold=0)
+
+        with pytest.raises(ZeroDivisionError):
+            await executor.run(divmod, 1, 0, size=1)
+
+        assert executor.stats()["failures"] == 1
+        assert executor.stats()["pending"] == 0
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_in_process_jobs_use_threads(self):
+        """Test in-process jobs run on a thread even in process mode"""
+        executor = AnalysisExecutor(mode="process", max_workers=1, max_pending=4, inline_threshold=0)
+
+        name = await executor.run(_thread_name, size=1, in_process=True)
+
+        assert name.startswith("analysis")
+        assert executor._pool is None
+        stats = executor.stats()
+        assert stats["in_process_runs"] == 1
+        assert stats["pool_runs"] == 1
+        executor.shutdown()
+
+    def test_rejects_unknown_mode(self):
+        """Test configuration validation"""
+        with pytest.raises(ValueError):
+            AnalysisExecutor(mode="gpu")
+
+    @pytest.mark.asyncio
+    async def test_async_seo_score_matches_sync(self):
+        """Test the async SEO entry point returns the same analysis"""
+        service = SEOAnalysisService()
+        content = "SEO content strategy helps blog posts rank. " * 50
+        keywords = ["SEO", "blog posts"]
+
+        analysis = await service.generate_seo_score_async(content, "SEO guide", None, keywords)
+
+        assert analysis == service.generate_seo_score(content, "SEO guide", None, keywords)
+
+    @pytest.mark.asyncio
+    async def test_incremental_reanalysis_shares_paragraph_cache(self, monkeypatch):
+        """Test incremental runs with a warm paragraph cache stay in this process"""
+        executor = AnalysisExecutor(mode="process", max_workers=1, max_pending=4, inline_threshold=0)
+        monkeypatch.setattr("app.services.seo_service.seo_analysis_executor", executor)
+        service = SEOAnalysisService()
+        paragraphs = [f"Paragraph {index} explains how SEO helps blog posts rank." for index in range(20)]
+        keywords = ["SEO", "blog posts"]
+
+        # Warm this process's paragraph cache, as a previous inline or in-process run would
+        service.generate_seo_score("\n\n".join(paragraphs), "SEO guide", None, keywords, incremental=True)
+        hits = _analyze_paragraph.cache_info().hits
+        paragraphs[3] = "An edited paragraph about SEO."
+        await service.generate_seo_score_async("\n\n".join(paragraphs), "SEO guide", None, keywords, incremental=True)
+
+        assert _analyze_paragraph.cache_info().hits - hits >= 19
+        assert executor.stats()["in_process_runs"] == 1
+        assert executor._pool is None
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_cold_incremental_document_uses_pool(self, monkeypatch):
+        """Test a large document with no cached paragraphs is still offloaded to the worker pool"""
+        executor = AnalysisExecutor(mode="thread", max_workers=1, max_pending=4, inline_threshold=100)
+        monkeypatch.setattr("app.services.seo_service.seo_analysis_executor", executor)
+        service = SEOAnalysisService()
+        content = "\n\n".join(
+            f"Cold paragraph {index} covers keyword research for blog posts." for index in range(50)
+        )
+
+        assert not paragraph_cache_warm(content)
+        await service.generate_seo_score_async(content, "SEO guide", None, ["SEO"], incremental=True)
+
+        stats = executor.stats()
+        assert stats["pool_runs"] == 1
+        assert stats["in_process_runs"] == 0
+        executor.shutdown()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
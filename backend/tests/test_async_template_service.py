@@ -0,0 +1,164 @@
+"""
+Unit tests for the async database layer and AsyncTemplateService
+"""
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.database import Base, get_async_database_url
+from app.models.content import ContentTemplate
+from app.models.user import User
+from app.schemas.template import TemplateCreateRequest
+from app.services.async_template_service import AsyncTemplateService
+from app.services.template_service import DEFAULT_TEMPLATES
+
+
+@pytest_asyncio.fixture
+async def async_db():
+    """In-memory aiosqlite session with all tables created"""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        session.add(User(id="user123", email="test@example.com", password_hash="hash"))
+        await session.commit()
+        yield session
+
+    await engine.dispose()
+
+
+class TestAsyncDatabaseUrl:
+    """Test async driver selection"""
+
+    def test_sqlite_uses_aiosqlite(self):
+        """Test SQLite URLs map to aiosqlite"""
+        assert get_async_database_url("sqlite:///./blog.db") == "sqlite+aiosqlite:///./blog.db"
+
+    def test_postgres_uses_asyncpg(self):
+        """Test Postgres URLs (with or without a sync driver) map to asyncpg"""
+        assert get_async_database_url("postgresql://u:p@db/blog") == "postgresql+asyncpg://u:p@db/blog"
+        assert get_async_database_url("postgresql+psycopg2://u:p@db/blog") == "postgresql+asyncpg://u:p@db/blog"
+
+    def test_unsupported_backend(self):
+        """Test backends without an async driver are rejected"""
+        with pytest.raises(ValueError):
+            get_async_database_url("oracle://u:p@db/blog")
+
+
+class TestAsyncTemplateService:
+    """Test AsyncTemplateService against a real async session"""
+
+    @pytest.mark.asyncio
+    async def test_seed_default_templates(self, async_db):
+        """Test seeding creates each default template once"""
+        service = AsyncTemplateService(async_db)
+
+        assert await service.seed_default_templates("user123") == len(DEFAULT_TEMPLATES)
+        assert await service.seed_default_templates("user123") == 0
+
+        popular = await service.get_popular_templates(limit=10)
+        assert {t.name for t in popular} == {t["name"] for t in DEFAULT_TEMPLATES}
+        assert all(t.placeholders for t in popular)
+
+    @pytest.mark.asyncio
+    async def test_usage_rating_and_analytics(self, async_db):
+        """Test usage tracking and ratings feed template analytics"""
+        service = AsyncTemplateService(async_db)
+        template = ContentTemplate(
+            name="Launch Post",
+            template_content="{{product}} launches today",
+            category="business",
+            template_type="article",
+            is_public=False,
+            created_by="user123",
+            usage_count=0
+        )
+        async_db.add(template)
+        await async_db.commit()
+
+        await service.track_template_usage(template.id, "user123", {"product": "Widget"}, "Retail")
+        await service.track_template_usage(template.id, "user123", {"product": "Gadget"}, "Retail")
+        assert await service.rate_template(template.id, "user123", 4, "Useful")
+        assert await service.rate_template(template.id, "user123", 5)
+
+        analytics = await service.get_template_analytics(template.id, "user123")
+
+        assert analytics["total_usage"] == 2
+        assert analytics["usage_this_week"] == 2
+        assert analytics["popular_variables"] == {"product": 2}
+        assert analytics["usage_by_industry"] == {"Retail": 2}
+        assert analytics["total_ratings"] == 1
+        assert analytics["average_rating"] == 5
+
+        await async_db.refresh(template)
+        assert template.usage_count == 2
+
+        assert await service.get_template_analytics(template.id, "someone-else") is None
+        assert await service.get_accessible_template(template.id, "someone-else") is None
+        assert (await service.get_accessible_template(template.id, "user123")).id == template.id
+
+    @pytest.mark.asyncio
+    async def test_template_stats(self, async_db):
+        """Test overall statistics"""
+        service = AsyncTemplateService(async_db)
+        await service.seed_default_templates("user123")
+
+        stats = await service.get_template_stats()
+
+        assert stats["total_templates"] == len(DEFAULT_TEMPLATES)
+        assert stats["public_templates"] == len(DEFAULT_TEMPLATES)
+        assert stats["private_templates"] == 0
+        assert len(stats["category_stats"]) == len({t["category"] for t in DEFAULT_TEMPLATES})
+
+    @pytest.mark.asyncio
+    async def test_template_crud(self, async_db):
+        """Test create, update and delete of an owned template"""
+        service = AsyncTemplateService(async_db)
+        request = TemplateCreateRequest(
+            name="Launch Post",
+            template_content="{{product}} launches today, with a full feature tour below.",
+            category="business",
+            template_type="article"
+        )
+
+        template = await service.create_template(request, "user123")
+        assert template.placeholders == ["product"]
+        assert await service.create_template(request, "user123") is None
+
+        updated = await service.update_template(
+            template.id, "user123", {"template_content": "{{product}} ships on {{date}}, with a full feature tour below."}
+        )
+        assert sorted(updated.placeholders) == ["date", "product"]
+        assert await service.update_template(template.id, "other-user", {"name": "Taken"}) is None
+
+        assert not await service.delete_template(template.id, "other-user")
+        assert await service.delete_template(template.id, "user123")
+        assert await service.get_owned_template(template.id, "user123") is None
+
+    @pytest.mark.asyncio
+    async def test_search_templates(self, async_db):
+        """Test offset and keyset search over accessible templates"""
+        service = AsyncTemplateService(async_db)
+        await service.seed_default_templates("user123")
+
+        templates, total = await service.search_templates(
+            "someone-else", {"category": "business"}, 1, 10, "name", False
+        )
+        assert total == 1
+        assert [t.name for t in templates] == ["Business Blog Post"]
+
+        first_page, next_cursor, total = await service.search_templates_keyset(
+            "user123", {}, "name", False, None, 3, include_total=True
+        )
+        second_page, last_cursor, _ = await service.search_templates_keyset(
+            "user123", {}, "name", False, next_cursor, 3
+        )
+        assert total == len(DEFAULT_TEMPLATES)
+        assert last_cursor is None
+        assert [t.name for t in first_page + second_page] == sorted(t["name"] for t in DEFAULT_TEMPLATES)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
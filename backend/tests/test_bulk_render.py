@@ -0,0 +1,107 @@
+"""
+Unit tests for bulk template rendering
+"""
+import json
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.template import MAX_BULK_RENDER_ITEMS, TemplateBulkRenderRequest
+from app.services.template_service import TemplateService
+from app.services.template_usage_buffer import TemplateUsageBuffer, usage_event
+from app.utils.template_compiler import compiled_template_cache
+
+
+@pytest.fixture
+def template():
+    """Stored template stand-in"""
+    template = Mock(id="bulk-test", updated_at=datetime(2026, 1, 1),
+                    template_content="{{product}} now in {{city}}!")
+    yield template
+    compiled_template_cache.invalidate("bulk-test")
+
+
+def read_lines(chunks):
+    """Parse streamed NDJSON chunks into objects"""
+    return [json.loads(line) for line in "".join(chunks).splitlines()]
+
+
+class TestBulkRenderRequest:
+    """Test request parsing and limits"""
+
+    def test_from_ndjson(self):
+        """Test one variable map per line, skipping blank lines"""
+        body = b'{"product": "Tea", "city": "Oslo"}\n\n{"product": "Coffee"}\n'
+
+        request = TemplateBulkRenderRequest.from_ndjson(body, "Retail")
+
+        assert request.variable_sets == [{"product": "Tea", "city": "Oslo"}, {"product": "Coffee"}]
+        assert request.industry_context == "Retail"
+
+    def test_ndjson_line_error(self):
+        """Test a malformed line is reported by number"""
+        with pytest.raises(ValueError, match="Line 2"):
+            TemplateBulkRenderRequest.from_ndjson(b'{"product": "Tea"}\n{oops\n')
+
+    @pytest.mark.parametrize("variable_sets", [[], [{}] * (MAX_BULK_RENDER_ITEMS + 1), [{"product": 1}]])
+    def test_rejected(self, variable_sets):
+        """Test empty, oversized and non-string variable sets are rejected"""
+        with pytest.raises(ValidationError):
+            TemplateBulkRenderRequest(variable_sets=variable_sets)
+
+
+class TestRenderBulk:
+    """Test streaming NDJSON rendering"""
+
+    def test_lines_per_variable_set(self, template):
+        """Test each set renders in order with its own replaced placeholders"""
+        service = TemplateService(Mock())
+
+        lines = read_lines(service.render_bulk_ndjson(template, [
+            {"product": "Tea", "city": "Oslo"},
+            {"product": "Coffee"},
+        ]))
+
+        assert lines == [
+            {"index": 0, "generated_content": "Tea now in Oslo!",
+             "placeholders_found": ["product", "city"], "placeholders_replaced": ["product", "city"]},
+            {"index": 1, "generated_content": "Coffee now in {{city}}!",
+             "placeholders_found": ["product", "city"], "placeholders_replaced": ["product"]},
+        ]
+
+    def test_chunking(self, template):
+        """Test lines are yielded in chunks and the template is compiled once"""
+        service = TemplateService(Mock())
+        misses = compiled_template_cache.stats()["misses"]
+
+        chunks = list(service.render_bulk_ndjson(template, [{"product": str(i)} for i in range(250)], chunk_size=100))
+
+        assert [chunk.count("\n") for chunk in chunks] == [100, 100, 50]
+        assert [line["index"] for line in read_lines(chunks)] == list(range(250))
+        assert compiled_template_cache.stats()["misses"] == misses + 1
+
+
+class TestBulkUsage:
+    """Test usage for a bulk render is queued as one batch"""
+
+    def test_record_many(self, monkeypatch):
+        """Test all events are queued together and written by one flush"""
+        written = []
+        monkeypatch.setattr(TemplateService, "record_usage_batch", lambda self, usages: written.append(usages) or True)
+        monkeypatch.setattr(TemplateService, "existing_template_ids", lambda self, template_ids: set(template_ids))
+        buffer = TemplateUsageBuffer(flush_size=1000, flush_interval=60, session_factory=Mock())
+        created_at = datetime(2026, 1, 1)
+        events = [usage_event("tpl1", "user123", {"product": p}, None, "bulk_render", created_at)
+                  for p in ("Tea", "Coffee", "Juice")]
+
+        buffer.record_many(events)
+        buffer.close()
+
+        assert written == [events]
+        assert buffer.stats()["flushes"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
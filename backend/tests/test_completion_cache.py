@@ -0,0 +1,199 @@
+"""
+Unit tests for the LLM completion cache
+"""
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import redis
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.completion_usage import CompletionUsage
+
+from app.services import openai_service as openai_module
+from app.services.completion_cache import CompletionCache
+from app.services.openai_service import ContentGenerationRequest, ContentTone, ContentType, OpenAIService
+
+PARAMS = {
+    "model": "gpt-4",
+    "messages": [{"role": "user", "content": "Write about SEO"}],
+    "temperature": 0.7,
+    "response_format": {"type": "json_object"}
+}
+
+
+def make_completion(content="{}"):
+    """Real ChatCompletion so it round-trips through the cache"""
+    return ChatCompletion(
+        id="chatcmpl-test",
+        choices=[Choice(index=0, finish_reason="stop",
+                        message=ChatCompletionMessage(role="assistant", content=content))],
+        created=1700000000,
+        model="gpt-4",
+        object="chat.completion",
+        usage=CompletionUsage(prompt_tokens=10, completion_tokens=20, total_tokens=30)
+    )
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the async Redis client"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+
+class TestCacheKey:
+    """Test request normalization"""
+
+    def test_whitespace_is_normalized(self):
+        """Test prompts differing only in whitespace share a key"""
+        reformatted = {**PARAMS, "messages": [{"role": "user", "content": "  Write about\n    SEO  "}]}
+
+        assert CompletionCache.make_key(reformatted) == CompletionCache.make_key(PARAMS)
+
+    @pytest.mark.parametrize("change", [
+        {"model": "gpt-3.5-turbo"},
+        {"temperature": 0.2},
+        {"response_format": None},
+        {"messages": [{"role": "system", "content": "Write about SEO"}]},
+    ])
+    def test_parameters_change_key(self, change):
+        """Test model, temperature, response format and roles are part of the key"""
+        assert CompletionCache.make_key({**PARAMS, **change}) != CompletionCache.make_key(PARAMS)
+
+
+class TestGetOrCreate:
+    """Test lookups, opt-out and metrics"""
+
+    @pytest.mark.asyncio
+    async def test_repeat_prompt_is_served_from_cache(self):
+        """Test the second identical request skips the API and records savings"""
+        cache = CompletionCache(use_redis=False)
+
+        async def create():
+            await asyncio.sleep(0.05)
+            return make_completion('{"title": "SEO"}')
+
+        create_mock = AsyncMock(side_effect=create)
+        first = await cache.get_or_create(PARAMS, create_mock)
+        second = await cache.get_or_create(PARAMS, create_mock)
+
+        assert create_mock.await_count == 1
+        assert second == first
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["tokens_saved"]) == (1, 1, 30)
+        assert stats["latency_saved_seconds"] >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_opt_out(self):
+        """Test use_cache=False always calls the API and stores nothing"""
+        cache = CompletionCache(use_redis=False)
+        create = AsyncMock(return_value=make_completion())
+
+        await cache.get_or_create(PARAMS, create, use_cache=False)
+        await cache.get_or_create(PARAMS, create, use_cache=False)
+
+        assert create.await_count == 2
+        assert cache.stats()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self):
+        """Test expired entries are treated as misses"""
+        cache = CompletionCache(ttl_seconds=0, use_redis=False)
+        create = AsyncMock(return_value=make_completion())
+
+        await cache.get_or_create(PARAMS, create)
+        await cache.get_or_create(PARAMS, create)
+
+        assert create.await_count == 2
+        assert cache.stats()["expirations"] == 1
+
+    @pytest.mark.asyncio
+    async def test_size_bound(self):
+        """Test the least recently used completion is evicted"""
+        cache = CompletionCache(max_entries=2, use_redis=False)
+        keys = [CompletionCache.make_key({**PARAMS, "temperature": t}) for t in (0.1, 0.2, 0.3)]
+        for key in keys:
+            await cache.set(key, make_completion(), 0.1)
+
+        assert await cache.get(keys[0]) is None
+        assert await cache.get(keys[2]) is not None
+        assert cache.stats()["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_non_completion_not_cached(self):
+        """Test results that are not ChatCompletions are passed through uncached"""
+        cache = CompletionCache(use_redis=False)
+
+        result = await cache.get_or_create(PARAMS, AsyncMock(return_value="raw"))
+
+        assert result == "raw"
+        assert cache.stats()["entries"] == 0
+
+
+class TestRedisTier:
+    """Test the shared Redis tier"""
+
+    @pytest.mark.asyncio
+    async def test_shared_hit(self):
+        """Test a completion cached by one worker is served to another and promoted locally"""
+        shared = FakeRedis()
+        writer = CompletionCache(use_redis=True, client=shared)
+        reader = CompletionCache(use_redis=True, client=shared)
+        key = CompletionCache.make_key(PARAMS)
+
+        await writer.set(key, make_completion('{"title": "SEO"}'), 1.5)
+        completion = await reader.get(key)
+
+        assert json.loads(completion.choices[0].message.content) == {"title": "SEO"}
+        assert reader.stats()["redis_hits"] == 1
+        assert reader.stats()["latency_saved_seconds"] == 1.5
+        assert reader.stats()["entries"] == 1
+
+    @pytest.mark.asyncio
+    async def test_redis_failure_falls_back(self):
+        """Test Redis errors are treated as misses"""
+        broken = FakeRedis()
+        broken.get = AsyncMock(side_effect=redis.ConnectionError("down"))
+        cache = CompletionCache(use_redis=True, client=broken)
+
+        assert await cache.get(CompletionCache.make_key(PARAMS)) is None
+        assert cache.stats()["misses"] == 1
+
+
+class TestOpenAIServiceCaching:
+    """Test OpenAIService calls go through the cache"""
+
+    @pytest.mark.asyncio
+    async def test_generate_content_reuses_completion(self, monkeypatch):
+        """Test an identical generation request is answered without a second API call"""
+        monkeypatch.setattr(openai_module, "completion_cache", CompletionCache(use_redis=False))
+        with patch.object(openai_module, "settings") as mock_settings:
+            mock_settings.openai_api_key = "test-api-key"
+            mock_settings.OPENAI_BASE_URL = None
+            mock_settings.openai_model = "gpt-4"
+            mock_settings.openai_max_tokens = 2000
+            service = OpenAIService()
+        request = ContentGenerationRequest(topic="SEO", content_type=ContentType.ARTICLE,
+                                           tone=ContentTone.PROFESSIONAL)
+        content = json.dumps({"title": "SEO", "content": "Body"})
+        create = AsyncMock(return_value=make_completion(content))
+
+        with patch.object(service.client.chat.completions, "create", create):
+            first = await service.generate_content(request)
+            second = await service.generate_content(request)
+            await service.generate_content(request, use_cache=False)
+
+        assert first == second
+        assert create.await_count == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
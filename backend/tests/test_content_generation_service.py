@@ -0,0 +1,105 @@
+"""
+Unit tests for the async legacy content generation service
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from app.services import openai_service as openai_module
+from app.services.content_generation_service import ContentGenerationService
+
+
+def completion(text):
+    """Chat completion stand-in with a single message"""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+def fake_client(create):
+    """AsyncOpenAI stand-in whose completions.create is the given coroutine function"""
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+class TestSharedClient:
+    """Test every service instance reuses one AsyncOpenAI client"""
+
+    def test_client_is_shared(self, monkeypatch):
+        """Test the pooled client is built once and reused"""
+        monkeypatch.setattr(openai_module, "_async_client", None)
+        with patch.object(openai_module, "AsyncOpenAI") as mock_client:
+            first = ContentGenerationService()
+            second = ContentGenerationService()
+
+        assert first.client is second.client
+        mock_client.assert_called_once()
+        assert mock_client.call_args.kwargs["http_client"] is not None
+
+    @pytest.mark.asyncio
+    async def test_close(self, monkeypatch):
+        """Test closing releases the pool and a later call builds a new client"""
+        client = Mock(close=AsyncMock())
+        monkeypatch.setattr(openai_module, "_async_client", client)
+
+        await openai_module.close_async_openai_client()
+
+        client.close.assert_awaited_once()
+        assert openai_module._async_client is None
+
+
+class TestAsyncGeneration:
+    """Test the legacy generation methods await the async client"""
+
+    @pytest.mark.asyncio
+    async def test_generate_content(self):
+        """Test the completion is post-processed into the legacy response"""
+        create = AsyncMock(return_value=completion("Shipped a new feature\n\n\n\nTry it"))
+        service = ContentGenerationService(client=fake_client(create))
+
+        result = await service.generate_content(title="Launch", content="notes")
+
+        assert result["success"] is True
+        assert result["content"] == "🚀 Shipped a new feature\n\nTry it"
+        assert result["metadata"]["format"] == "linkedin"
+        create.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_seo_metadata_fallback(self):
+        """Test non-JSON metadata falls back to values derived from the title"""
+        service = ContentGenerationService(client=fake_client(AsyncMock(return_value=completion("not json"))))
+
+        metadata = await service.generate_seo_metadata("Body", "My Post Title")
+
+        assert metadata["slug"] == "my-post-title"
+        assert metadata["og_title"] == "My Post Title"
+
+    @pytest.mark.asyncio
+    async def test_error_is_reported(self):
+        """Test an upstream failure is returned as an unsuccessful result"""
+        service = ContentGenerationService(client=fake_client(AsyncMock(side_effect=RuntimeError("timeout"))))
+
+        result = await service.suggest_improvements("Some content.")
+
+        assert result == {"success": False, "error": "timeout"}
+
+    @pytest.mark.asyncio
+    async def test_generations_run_concurrently(self):
+        """Test slow completions overlap instead of blocking the event loop"""
+        async def slow_create(**kwargs):
+            await asyncio.sleep(0.2)
+            return completion("Done")
+
+        service = ContentGenerationService(client=fake_client(slow_create))
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*[
+            service.generate_content(title=f"Post {i}", content="notes") for i in range(10)
+        ])
+
+        assert all(result["success"] for result in results)
+        assert time.perf_counter() - started < 1.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
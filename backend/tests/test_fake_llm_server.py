@@ -0,0 +1,95 @@
+"""
+Unit tests for the fake OpenAI-compatible load-test server
+"""
+import json
+import random
+
+import httpx
+import openai
+import pytest
+from openai import AsyncOpenAI
+
+from benchmarks.fake_llm_server import FakeLLMConfig, create_app, parse_latency
+
+MESSAGES = [{"role": "system", "content": "You are an SEO expert."}, {"role": "user", "content": "Write about SEO"}]
+
+
+def fake_client(**config):
+    """OpenAI client wired to an in-process fake server"""
+    app = create_app(FakeLLMConfig(**{"latency": "fixed:0", "tokens_per_second": 0, **config}))
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fake")
+    return AsyncOpenAI(api_key="fake-key", base_url="http://fake/v1", http_client=http_client, max_retries=0), app
+
+
+class TestCompletions:
+    """Test plain, streamed and JSON-mode completions"""
+
+    @pytest.mark.asyncio
+    async def test_json_mode_is_deterministic(self):
+        """Test JSON mode returns the fields the services parse, identically for the same prompt"""
+        client, _ = fake_client(completion_tokens=100)
+        params = {"model": "gpt-4", "messages": MESSAGES, "response_format": {"type": "json_object"}}
+
+        first = await client.chat.completions.create(**params)
+        second = await client.chat.completions.create(**params)
+
+        content = json.loads(first.choices[0].message.content)
+        assert {"title", "content", "meta_description", "keywords", "seo_suggestions"} <= set(content)
+        assert first.choices[0].message.content == second.choices[0].message.content
+        assert first.usage.completion_tokens >= 100
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_stream_matches_completion(self):
+        """Test streamed deltas add up to the non-streamed text and max_tokens caps the length"""
+        client, app = fake_client(completion_tokens=400)
+
+        completion = await client.chat.completions.create(model="gpt-4", messages=MESSAGES, max_tokens=50)
+        stream = await client.chat.completions.create(model="gpt-4", messages=MESSAGES, max_tokens=50, stream=True)
+        deltas = [chunk.choices[0].delta.content async for chunk in stream if chunk.choices[0].delta.content]
+
+        assert "".join(deltas) == completion.choices[0].message.content
+        assert len(deltas) > 1
+        assert completion.usage.completion_tokens < 100
+        assert app.state.stats.streamed == 1
+        await client.close()
+
+
+class TestFaultInjection:
+    """Test injected errors and latency distributions"""
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_injection(self):
+        """Test a 429 with Retry-After surfaces as the client's RateLimitError"""
+        client, app = fake_client(rate_limit_rate=1.0, retry_after=2)
+
+        with pytest.raises(openai.RateLimitError) as error:
+            await client.chat.completions.create(model="gpt-4", messages=MESSAGES)
+
+        assert error.value.response.headers["retry-after"] == "2"
+        assert app.state.stats.rate_limited == 1
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_server_error_injection(self):
+        """Test 500s are injected at the configured rate"""
+        client, _ = fake_client(error_rate=1.0)
+
+        with pytest.raises(openai.InternalServerError):
+            await client.chat.completions.create(model="gpt-4", messages=MESSAGES)
+        await client.close()
+
+    def test_latency_specs(self):
+        """Test each distribution parses and samples non-negative seconds"""
+        rng = random.Random(0)
+
+        assert parse_latency("fixed:0.25")(rng) == 0.25
+        assert 0.1 <= parse_latency("uniform:0.1,0.2")(rng) <= 0.2
+        assert parse_latency("normal:0,1")(rng) >= 0
+        assert parse_latency("lognormal:0.5,0.4")(rng) > 0
+        with pytest.raises(ValueError):
+            parse_latency("uniform:0.1")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,223 @@
+"""
+Unit tests for the blog post full-text search index
+"""
+import pytest
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.fulltext import (
+    FTS_IDS_TABLE, FTS_TABLE, SQLITE_DROP_SEARCH_DDL, ensure_search_index, fts5_query, post_search_clauses
+)
+from app.models.content import BlogPost
+from app.models.user import User
+
+
+@pytest.fixture
+def engine():
+    """In-memory SQLite engine with all tables (and the FTS5 index) created"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(engine):
+    """Session with a user and a few posts"""
+    session = sessionmaker(bind=engine)()
+    session.add(User(id="user123", email="test@example.com", password_hash="hash"))
+    session.add_all([
+        BlogPost(id="body", user_id="user123", title="Weekly notes",
+                 content="Some thoughts on gardening and composting this week."),
+        BlogPost(id="title", user_id="user123", title="Gardening for beginners",
+                 content="Start small and water often."),
+        BlogPost(id="other", user_id="user123", title="Quarterly report",
+                 content="Revenue grew in every region."),
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def search(session, query):
+    """Run a ranked search and return matching post IDs"""
+    condition, relevance = post_search_clauses("sqlite", query, BlogPost.id)
+    return session.execute(
+        select(BlogPost.id).where(condition).order_by(relevance)
+    ).scalars().all()
+
+
+class TestFts5Query:
+    """Test free text to FTS5 query conversion"""
+
+    def test_terms_are_quoted_prefixes(self):
+        """Test each word becomes a quoted prefix term"""
+        assert fts5_query("garden tips") == '"garden"* "tips"*'
+
+    def test_operators_are_neutralised(self):
+        """Test FTS5 syntax in user input cannot break the query"""
+        assert fts5_query('NEAR("a" OR b*) -c') == '"NEAR"* "a"* "OR"* "b"* "c"*'
+
+    def test_no_terms(self):
+        """Test punctuation-only input has no query"""
+        assert fts5_query("?!") is None
+        assert post_search_clauses("sqlite", "?!", BlogPost.id) is None
+
+
+class TestSqliteSearch:
+    """Test FTS5 search over blog posts"""
+
+    def test_ranked_by_relevance(self, db_session):
+        """Test title matches outrank body matches and stemming applies"""
+        assert search(db_session, "gardening") == ["title", "body"]
+        assert search(db_session, "garden") == ["title", "body"]
+
+    def test_all_terms_required(self, db_session):
+        """Test every query word has to match"""
+        assert search(db_session, "gardening compost") == ["body"]
+        assert search(db_session, "gardening revenue") == []
+
+    def test_index_follows_updates_and_deletes(self, db_session):
+        """Test triggers keep the index in sync with the table"""
+        post = db_session.get(BlogPost, "other")
+        post.content = "How the garden budget grew."
+        db_session.commit()
+
+        assert "other" in search(db_session, "garden")
+        assert search(db_session, "revenue") == []
+
+        db_session.delete(db_session.get(BlogPost, "title"))
+        db_session.commit()
+
+        assert search(db_session, "beginners") == []
+
+    def test_ensure_backfills_existing_database(self, engine, db_session):
+        """Test a database created before the index gets it built from existing posts"""
+        with engine.begin() as connection:
+            for statement in SQLITE_DROP_SEARCH_DDL:
+                connection.execute(text(statement))
+
+            assert ensure_search_index(connection) is True
+            assert ensure_search_index(connection) is False
+
+        assert search(db_session, "quarterly") == ["other"]
+
+    def test_index_survives_vacuum(self, tmp_path):
+        """Test matches stay attached to the right posts when VACUUM renumbers rowids"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        session.add(User(id="user123", email="test@example.com", password_hash="hash"))
+        session.add_all([
+            BlogPost(id=f"post-{index}", user_id="user123", title=f"Filler {index}", content="Nothing here.")
+            for index in range(5)
+        ] + [BlogPost(id="garden", user_id="user123", title="Gardening for beginners", content="Water often.")])
+        session.commit()
+        session.query(BlogPost).filter(BlogPost.id.in_(["post-0", "post-1", "post-2"])).delete()
+        session.commit()
+
+        with engine.connect() as connection:
+            connection.execution_options(isolation_level="AUTOCOMMIT").exec_driver_sql("VACUUM")
+
+        assert search(session, "gardening") == ["garden"]
+        assert sorted(search(session, "filler")) == ["post-3", "post-4"]
+        session.close()
+        engine.dispose()
+
+    @pytest.mark.parametrize("columns", [
+        "title, content, meta_description, content='blog_posts', content_rowid='rowid'",
+        "post_id UNINDEXED, title, content, meta_description",
+    ])
+    def test_ensure_replaces_earlier_index(self, engine, db_session, columns):
+        """Test an index from before the id mapping is rebuilt on startup"""
+        with engine.begin() as connection:
+            for statement in SQLITE_DROP_SEARCH_DDL:
+                connection.execute(text(statement))
+            connection.execute(text(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({columns})"))
+
+            assert ensure_search_index(connection) is True
+            assert ensure_search_index(connection) is False
+
+        assert search(db_session, "quarterly") == ["other"]
+
+
+class TestSqliteSearchComplexity:
+    """Test ranking and trigger maintenance stay linear as the index grows"""
+
+    @staticmethod
+    def vm_steps(session, operation):
+        """Run operation and count SQLite VM instructions, in hundreds"""
+        raw = session.connection().connection.driver_connection
+        steps = [0]
+
+        def progress():
+            steps[0] += 1
+
+        raw.set_progress_handler(progress, 100)
+        try:
+            operation()
+        finally:
+            raw.set_progress_handler(None, 100)
+        return steps[0]
+
+    @staticmethod
+    def add_posts(session, start, count):
+        session.execute(insert(BlogPost), [
+            {"id": f"post-{index}", "user_id": "user123", "title": f"Garden diary {index}",
+             "content": "Notes on compost and watering. " * 5}
+            for index in range(start, start + count)
+        ])
+        session.commit()
+
+    def test_ranked_search_is_linear(self, db_session):
+        """Test bm25 is computed in one scan rather than once per matching post"""
+        self.add_posts(db_session, 0, 1500)
+        small = self.vm_steps(db_session, lambda: search(db_session, "garden"))
+        self.add_posts(db_session, 1500, 1500)
+        results = []
+        large = self.vm_steps(db_session, lambda: results.extend(search(db_session, "garden")))
+
+        assert len(results) == 3002
+        # Every filler post matches in its title, so the body-only match ranks last
+        assert results[-1] == "body"
+        # Doubling the matches should roughly double the work, not quadruple it
+        assert large < 3 * small, (small, large)
+
+    def test_triggers_seek_by_rowid(self, db_session):
+        """Test deleting or updating one post does not scan the whole index"""
+        self.add_posts(db_session, 0, 3000)
+
+        def update_and_delete():
+            db_session.get(BlogPost, "post-10").title = "Renamed diary"
+            db_session.delete(db_session.get(BlogPost, "post-1500"))
+            db_session.commit()
+
+        assert self.vm_steps(db_session, update_and_delete) < 20
+        assert search(db_session, "renamed") == ["post-10"]
+        assert "post-1500" not in search(db_session, "diary")
+        with db_session.get_bind().connect() as connection:
+            assert connection.execute(text(f"SELECT count(*) FROM {FTS_IDS_TABLE}")).scalar() == 3002
+
+class TestPostgresSearch:
+    """Test the tsvector query compiles to an index-backed match"""
+
+    def test_query_uses_search_vector(self):
+        """Test the condition matches the GIN-indexed column and ranks with ts_rank_cd"""
+        condition, relevance = post_search_clauses("postgresql", "garden tips", BlogPost.id)
+        statement = select(BlogPost.id).where(condition).order_by(relevance)
+
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+
+        assert "blog_posts.search_vector @@ websearch_to_tsquery" in sql
+        assert "ORDER BY ts_rank_cd(blog_posts.search_vector" in sql
+        assert "DESC" in sql
+
+    def test_unsupported_dialect(self):
+        """Test dialects without a full-text index fall back to the caller"""
+        assert post_search_clauses("mysql", "garden", BlogPost.id) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,183 @@
+"""
+Unit tests for streamed AI generation events
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from app.services.openai_service import ContentGenerationRequest, ContentTone, ContentType, OpenAIService
+from app.utils.event_stream import encode_events, format_ndjson, format_sse
+
+RESULT = {
+    "title": "SEO Guide",
+    "content": "# SEO Guide",
+    "meta_description": "Improve your SEO",
+    "keywords": ["SEO"],
+    "seo_suggestions": ["Use headings"]
+}
+
+
+class FakeStream:
+    """Upstream completion stream yielding the given deltas, with a closable response"""
+
+    def __init__(self, deltas, delay=0.0, error=None):
+        self.deltas = deltas
+        self.delay = delay
+        self.error = error
+        self.response = Mock(aclose=AsyncMock())
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for delta in self.deltas:
+            await asyncio.sleep(self.delay)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+        if self.error:
+            raise self.error
+
+
+def split(text, size=7):
+    """Split text into deltas of a few characters"""
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.fixture
+def openai_service():
+    """OpenAI service with test settings"""
+    with patch('app.services.openai_service.settings') as mock_settings:
+        mock_settings.openai_api_key = "test-api-key"
+        mock_settings.OPENAI_BASE_URL = None
+        mock_settings.openai_model = "gpt-4"
+        mock_settings.openai_max_tokens = 2000
+        return OpenAIService()
+
+
+@pytest.fixture
+def sample_request():
+    """Sample generation request"""
+    return ContentGenerationRequest(
+        topic="How to improve website SEO",
+        content_type=ContentType.HOW_TO,
+        tone=ContentTone.PROFESSIONAL
+    )
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+class TestGenerationEvents:
+    """Test OpenAIService.generate_content_events"""
+
+    @pytest.mark.asyncio
+    async def test_tokens_then_result(self, openai_service, sample_request):
+        """Test deltas stream as token events and the JSON is assembled into a result"""
+        stream = FakeStream(split(json.dumps(RESULT)))
+        with patch.object(openai_service.client.chat.completions, 'create', AsyncMock(return_value=stream)):
+            events = await collect(openai_service.generate_content_events(sample_request, progress_interval=60))
+
+        names = [event["event"] for event in events]
+        tokens = [event for event in events if event["event"] == "token"]
+        result = events[-1]["data"]
+        assert names[0] == "start" and names[-2:] == ["progress", "result"]
+        assert "".join(token["data"]["delta"] for token in tokens) == json.dumps(RESULT)
+        assert tokens[-1]["data"]["completion_tokens"] == len(tokens)
+        assert {key: result[key] for key in RESULT} == RESULT
+        assert result["token_usage"]["completion_tokens"] == len(tokens)
+        assert result["token_usage"]["total_tokens"] == events[0]["data"]["prompt_tokens"] + len(tokens)
+        stream.response.aclose.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_progress_while_upstream_is_silent(self, openai_service, sample_request):
+        """Test progress events keep coming before the first token without cancelling the read"""
+        stream = FakeStream(split(json.dumps(RESULT), size=1000), delay=0.3)
+        with patch.object(openai_service.client.chat.completions, 'create', AsyncMock(return_value=stream)):
+            events = await collect(openai_service.generate_content_events(sample_request, progress_interval=0.05))
+
+        names = [event["event"] for event in events]
+        assert names.index("token") >= 3
+        assert set(names[1:names.index("token")]) == {"progress"}
+        assert names[-1] == "result"
+
+    @pytest.mark.asyncio
+    async def test_invalid_json(self, openai_service, sample_request):
+        """Test a completion that is not JSON ends with an error event"""
+        stream = FakeStream(["not ", "json"])
+        with patch.object(openai_service.client.chat.completions, 'create', AsyncMock(return_value=stream)):
+            events = await collect(openai_service.generate_content_events(sample_request, progress_interval=60))
+
+        assert events[-1] == {"event": "error", "data": {"detail": "Invalid response format from OpenAI"}}
+
+    @pytest.mark.asyncio
+    async def test_upstream_error(self, openai_service, sample_request):
+        """Test an upstream failure mid-stream ends with an error event"""
+        stream = FakeStream(["{"], error=RuntimeError("connection reset"))
+        with patch.object(openai_service.client.chat.completions, 'create', AsyncMock(return_value=stream)):
+            events = await collect(openai_service.generate_content_events(sample_request, progress_interval=60))
+
+        assert events[-1]["event"] == "error"
+        assert "connection reset" in events[-1]["data"]["detail"]
+        stream.response.aclose.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_cancellation_closes_upstream(self, openai_service, sample_request):
+        """Test closing the event stream early aborts the upstream request"""
+        stream = FakeStream(split(json.dumps(RESULT)), delay=0.01)
+        with patch.object(openai_service.client.chat.completions, 'create', AsyncMock(return_value=stream)):
+            events = openai_service.generate_content_events(sample_request, progress_interval=60)
+            async for event in events:
+                if event["event"] == "token":
+                    break
+            await events.aclose()
+
+        stream.response.aclose.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_cancellation_while_waiting(self, openai_service, sample_request):
+        """Test closing during a progress event cancels the pending upstream read"""
+        stream = FakeStream(["{}"], delay=5)
+        with patch.object(openai_service.client.chat.completions, 'create', AsyncMock(return_value=stream)):
+            events = openai_service.generate_content_events(sample_request, progress_interval=0.01)
+            async for event in events:
+                if event["event"] == "progress":
+                    break
+            await asyncio.wait_for(events.aclose(), timeout=1)
+
+        stream.response.aclose.assert_awaited_once()
+
+
+class TestEventEncoding:
+    """Test SSE / NDJSON encoding and client disconnects"""
+
+    def test_formats(self):
+        """Test each event becomes one SSE block or one NDJSON line"""
+        event = {"event": "token", "data": {"delta": "Hi\n"}}
+
+        assert format_sse(event) == 'event: token\ndata: {"delta": "Hi\\n"}\n\n'
+        assert json.loads(format_ndjson(event)) == event
+
+    @pytest.mark.asyncio
+    async def test_disconnect_stops_and_closes(self):
+        """Test a disconnected client stops the stream at the next progress event"""
+        closed = []
+
+        async def events():
+            try:
+                yield {"event": "token", "data": {"delta": "a"}}
+                yield {"event": "progress", "data": {}}
+                yield {"event": "token", "data": {"delta": "b"}}
+            finally:
+                closed.append(True)
+
+        body = [chunk async for chunk in encode_events(events(), "ndjson", AsyncMock(return_value=True))]
+
+        assert [json.loads(line)["data"] for line in body] == [{"delta": "a"}]
+        assert closed == [True]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,85 @@
+"""
+Unit tests for the Aho-Corasick keyword matcher
+"""
+import pytest
+from app.utils.keyword_matcher import KeywordMatcher, get_keyword_matcher, normalize_keyword
+
+
+class TestKeywordMatcher:
+    """Test multi-keyword matching"""
+
+    def test_counts_all_keywords_in_one_scan(self):
+        """Test counts for several single-word and phrase keywords"""
+        matcher = KeywordMatcher(["SEO", "blog posts", "optimization"])
+        result = matcher.scan("SEO tips for blog posts. Blog posts need SEO optimization!")
+
+        assert result.count("SEO") == 2
+        assert result.count("blog posts") == 2
+        assert result.count("optimization") == 1
+
+    def test_matches_on_word_boundaries(self):
+        """Test keywords never match inside longer words or across punctuation"""
+        matcher = KeywordMatcher(["seo", "blog posts"])
+        result = matcher.scan("SEOs and seo-friendly blog. Posts about blogposts")
+
+        assert result.count("seo") == 1
+        assert result.count("blog posts") == 0
+
+    def test_overlapping_patterns(self):
+        """Test keywords sharing prefixes and suffixes are all reported"""
+        matcher = KeywordMatcher(["content", "content marketing", "marketing strategy"])
+        result = matcher.scan("A content marketing strategy beats content alone")
+
+        assert result.count("content") == 2
+        assert result.count("content marketing") == 1
+        assert result.count("marketing strategy") == 1
+
+    def test_repeated_phrase_is_not_double_counted(self):
+        """Test self-overlapping occurrences count like str.count"""
+        result = KeywordMatcher(["go go"]).scan("go go go go go")
+
+        assert result.count("go go") == 2
+
+    def test_case_and_whitespace_insensitive(self):
+        """Test keyword normalization"""
+        result = KeywordMatcher(["Blog   Posts"]).scan("BLOG POSTS")
+
+        assert result.count("blog posts") == 1
+        assert result.contains("Blog Posts")
+        assert normalize_keyword("  Blog \t Posts ") == "blog posts"
+
+    def test_first_positions(self):
+        """Test character offset of the first occurrence"""
+        result = KeywordMatcher(["guide", "seo"]).scan("The SEO Guide to SEO")
+
+        assert result.first_position("seo") == 4
+        assert result.first_position("guide") == 8
+        assert result.first_position("missing") is None
+
+    def test_empty_inputs(self):
+        """Test empty keyword lists and text"""
+        assert KeywordMatcher([]).scan("some text").counts == {}
+        assert KeywordMatcher(["seo"]).scan("").count("seo") == 0
+        assert KeywordMatcher(["", "   "]).keywords == ()
+
+    def test_count_spanning(self):
+        """Test only occurrences crossing the boundary are counted"""
+        matcher = KeywordMatcher(["blog posts", "seo"])
+        counts = matcher.count_spanning(["great", "blog"], ["posts", "seo", "blog", "posts"])
+
+        assert counts == {"blog posts": 1}
+        assert matcher.max_length == 2
+        assert not matcher.has_self_overlap
+        assert KeywordMatcher(["go go"]).has_self_overlap
+
+    def test_matcher_cached_per_keyword_set(self):
+        """Test compiled matchers are reused regardless of keyword order or case"""
+        first = get_keyword_matcher(["SEO", "blog posts"])
+        second = get_keyword_matcher(["blog posts", "seo"])
+
+        assert first is second
+        assert get_keyword_matcher(["seo"]) is not first
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
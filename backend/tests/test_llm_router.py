@@ -0,0 +1,196 @@
+"""
+Unit tests for the LLM router using local fake providers
+"""
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+from anthropic import AI_PROMPT, HUMAN_PROMPT
+
+from app.services import openai_service as openai_module
+from app.services.completion_cache import CompletionCache
+from app.services.llm_providers import AnthropicProvider, FakeProvider
+from app.services.llm_router import LLMRouter, LLMRouterError
+from app.services.openai_service import ContentGenerationRequest, ContentTone, ContentType, OpenAIService
+
+MESSAGES = [{"role": "system", "content": "You are an SEO expert."}, {"role": "user", "content": "Meta for SEO"}]
+
+
+class BrokenMidStream(FakeProvider):
+    """Fake provider that fails after its first chunk"""
+
+    async def stream(self, messages, max_tokens, temperature, json_mode=False):
+        self.calls += 1
+        yield self.text[:4]
+        raise RuntimeError("connection reset")
+
+
+def router(*providers, **options):
+    """Router with a short default hedge delay"""
+    return LLMRouter(list(providers), **{"hedge_delay_default": 0.05, "min_samples": 20, **options})
+
+
+class TestHedging:
+    """Test hedged requests"""
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_is_not_hedged(self):
+        """Test the primary answers alone when it is quick"""
+        primary, secondary = FakeProvider("primary", text="from primary"), FakeProvider("secondary")
+        llm = router(primary, secondary)
+
+        response = await llm.complete(MESSAGES)
+
+        assert (response.provider, response.text, response.hedged) == ("primary", "from primary", False)
+        assert secondary.calls == 0
+        assert llm.stats()["hedges"] == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged(self):
+        """Test a slow first token starts the secondary and the first to answer wins"""
+        primary = FakeProvider("primary", text="slow", first_token_delay=1.0)
+        secondary = FakeProvider("secondary", text="fast")
+        llm = router(primary, secondary)
+
+        response = await llm.complete(MESSAGES)
+
+        assert (response.provider, response.text, response.hedged) == ("secondary", "fast", True)
+        assert primary.closed_streams == 1
+        stats = llm.stats()
+        assert stats["hedges"] == 1
+        assert stats["providers"]["secondary"]["hedge_wins"] == 1
+
+    @pytest.mark.asyncio
+    async def test_hedge_delay_follows_p95(self):
+        """Test the hedge delay is the provider's p95 first-token latency once enough samples exist"""
+        primary = FakeProvider("primary")
+        llm = router(primary, min_samples=5)
+
+        assert llm.hedge_delay(primary) == 0.05
+        for _ in range(20):
+            await llm.complete(MESSAGES)
+
+        p95 = llm.stats()["providers"]["primary"]["first_token_p95"]
+        assert llm.hedge_delay(primary) == pytest.approx(p95, abs=1e-4)
+        assert llm.hedge_delay(primary) < 0.05
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_winner(self):
+        """Test streaming delivers every delta of the winning provider"""
+        text = json.dumps({"title": "SEO", "content": "x" * 100})
+        llm = router(FakeProvider("primary", text=text, chunk_size=7, chunk_delay=0.001))
+
+        deltas = [delta async for delta in llm.stream(MESSAGES)]
+
+        assert len(deltas) > 1
+        assert "".join(deltas) == text
+
+
+class TestFallback:
+    """Test provider failures fall through"""
+
+    @pytest.mark.asyncio
+    async def test_failed_primary_falls_back(self):
+        """Test an error before the first token moves on to the next provider"""
+        llm = router(FakeProvider("primary", error=RuntimeError("503")), FakeProvider("secondary", text="ok"),
+                     hedge_enabled=False)
+
+        response = await llm.complete(MESSAGES)
+
+        assert (response.provider, response.text) == ("secondary", "ok")
+        stats = llm.stats()
+        assert stats["fallbacks"] == 1
+        assert stats["providers"]["primary"]["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_mid_response_failure_falls_back(self):
+        """Test complete() restarts on the next provider when the first fails mid-response"""
+        llm = router(BrokenMidStream("primary", text="partial"), FakeProvider("secondary", text="whole"),
+                     hedge_enabled=False)
+
+        response = await llm.complete(MESSAGES)
+
+        assert (response.provider, response.text) == ("secondary", "whole")
+
+    @pytest.mark.asyncio
+    async def test_all_providers_fail(self):
+        """Test the last error is reported when nothing can answer"""
+        llm = router(FakeProvider("a", error=RuntimeError("down")), FakeProvider("b", error=RuntimeError("down")))
+
+        with pytest.raises(LLMRouterError, match="down"):
+            await llm.complete(MESSAGES)
+
+
+class TestCostAwareRouting:
+    """Test short SEO/meta prompts go to cheaper models"""
+
+    def test_short_meta_prompt_prefers_cheapest(self):
+        """Test cheap tasks reorder by price, other tasks keep the configured order"""
+        premium = FakeProvider("premium", input_cost=0.01, output_cost=0.03)
+        cheap = FakeProvider("cheap", input_cost=0.0005, output_cost=0.0015)
+        llm = router(premium, cheap, cheap_prompt_max_tokens=100)
+
+        assert [p.name for p in llm.candidates("meta", MESSAGES)] == ["cheap", "premium"]
+        assert [p.name for p in llm.candidates("generation", MESSAGES)] == ["premium", "cheap"]
+        long_prompt = [{"role": "user", "content": "x" * 4000}]
+        assert [p.name for p in llm.candidates("seo", long_prompt)] == ["premium", "cheap"]
+
+    @pytest.mark.asyncio
+    async def test_response_cost(self):
+        """Test the answering provider's prices are used for the estimate"""
+        llm = router(FakeProvider("cheap", text="x" * 4000, input_cost=0.001, output_cost=0.002))
+
+        response = await llm.complete(MESSAGES, task="meta")
+
+        assert response.completion_tokens == 1000
+        assert response.estimated_cost == pytest.approx(response.prompt_tokens / 1000 * 0.001 + 0.002)
+
+
+class TestProviders:
+    """Test provider adapters"""
+
+    def test_anthropic_prompt(self):
+        """Test system text leads the first human turn and the prompt ends on the assistant turn"""
+        prompt = AnthropicProvider.build_prompt(MESSAGES, json_mode=True)
+
+        assert prompt == (f"{HUMAN_PROMPT} You are an SEO expert.\n\nMeta for SEO\n\n"
+                          f"Respond with only the JSON object.{AI_PROMPT}")
+
+    def test_chat_completion_shape(self):
+        """Test routed responses convert to the OpenAI shape the services parse"""
+        llm = router(FakeProvider("primary", text="hello"))
+        response = asyncio.run(llm.complete(MESSAGES))
+
+        completion = response.to_chat_completion()
+
+        assert completion.choices[0].message.content == "hello"
+        assert completion.usage.total_tokens == response.prompt_tokens + response.completion_tokens
+
+
+class TestOpenAIServiceRouting:
+    """Test OpenAIService uses a configured router"""
+
+    @pytest.mark.asyncio
+    async def test_generate_content_through_router(self, monkeypatch):
+        """Test generation is served by the router instead of the OpenAI client"""
+        monkeypatch.setattr(openai_module, "completion_cache", CompletionCache(use_redis=False))
+        content = json.dumps({"title": "Routed", "content": "Body", "keywords": ["SEO"]})
+        llm = router(FakeProvider("fake", text=content))
+        with patch.object(openai_module, "settings") as mock_settings:
+            mock_settings.openai_api_key = "test-api-key"
+            mock_settings.OPENAI_BASE_URL = None
+            mock_settings.openai_model = "gpt-4"
+            mock_settings.openai_max_tokens = 2000
+            service = OpenAIService(router=llm)
+        request = ContentGenerationRequest(topic="SEO", content_type=ContentType.ARTICLE,
+                                           tone=ContentTone.PROFESSIONAL)
+
+        result = await service.generate_content(request)
+
+        assert (result.title, result.keywords) == ("Routed", ["SEO"])
+        assert llm.stats()["providers"]["fake"]["wins"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,173 @@
+"""
+Unit tests for the upstream LLM scheduler
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from app.services.llm_scheduler import LLMScheduler, Priority, TokenBucket, estimate_request_tokens
+
+
+def rate_limit_error():
+    """429 from the OpenAI client"""
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return openai.RateLimitError("Rate limit exceeded", response=httpx.Response(429, request=request), body=None)
+
+
+def scheduler(**overrides):
+    """Scheduler with generous budgets unless overridden"""
+    options = dict(requests_per_minute=60000, tokens_per_minute=10000000, min_concurrency=1,
+                   max_concurrency=16, initial_concurrency=4, latency_target=1.0)
+    options.update(overrides)
+    return LLMScheduler(**options)
+
+
+class TestBudgets:
+    """Test token estimates and buckets"""
+
+    def test_estimate_request_tokens(self):
+        """Test prompt characters / 4 plus max_tokens"""
+        params = {"messages": [{"role": "user", "content": "x" * 400}], "max_tokens": 500}
+
+        assert estimate_request_tokens(params) == 600
+
+    def test_bucket_wait_and_refund(self):
+        """Test a drained bucket reports its refill time and refunds restore budget"""
+        bucket = TokenBucket(per_minute=600)
+        bucket.take(600)
+
+        assert bucket.wait_time(100) == pytest.approx(10, rel=0.01)
+        bucket.refund(100)
+        assert bucket.wait_time(100) == 0
+
+    @pytest.mark.asyncio
+    async def test_token_budget_delays_grant(self):
+        """Test a request waits for the tokens-per-minute bucket to refill"""
+        llm = scheduler(tokens_per_minute=60000)
+        llm._tokens.available = 0
+
+        started = time.monotonic()
+        await llm.run(lambda: asyncio.sleep(0), estimated_tokens=50)
+
+        assert time.monotonic() - started >= 0.04
+
+    @pytest.mark.asyncio
+    async def test_usage_refund(self):
+        """Test the unused part of the estimate is returned from the response's usage"""
+        llm = scheduler(tokens_per_minute=600)
+
+        async def create():
+            return SimpleNamespace(usage=SimpleNamespace(total_tokens=100))
+
+        await llm.run(create, estimated_tokens=500)
+
+        assert llm.stats()["tokens_available"] == pytest.approx(500, abs=1)
+
+
+class TestConcurrencyWindow:
+    """Test the adaptive window"""
+
+    @pytest.mark.asyncio
+    async def test_window_bounds_in_flight_calls(self):
+        """Test no more than the window's calls run at once"""
+        llm = scheduler(initial_concurrency=2, max_concurrency=2)
+        running, peak = [0], [0]
+
+        async def create():
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await asyncio.sleep(0.02)
+            running[0] -= 1
+
+        await asyncio.gather(*[llm.run(create, 10) for _ in range(6)])
+
+        assert peak[0] == 2
+        assert llm.stats()["granted"] == 6
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_burst_halves_once(self):
+        """Test 429s from requests granted in the same window shrink it only once"""
+        llm = scheduler(initial_concurrency=8)
+
+        async def create():
+            await asyncio.sleep(0.01)
+            raise rate_limit_error()
+
+        results = await asyncio.gather(*[llm.run(create, 10) for _ in range(4)], return_exceptions=True)
+
+        assert all(isinstance(result, openai.RateLimitError) for result in results)
+        assert llm.limit == 4
+        assert llm.stats()["rate_limited"] == 4
+        assert llm.stats()["decreases"] == 1
+
+    @pytest.mark.asyncio
+    async def test_fast_completions_grow_window(self):
+        """Test additive increase while latency stays under the target"""
+        llm = scheduler(initial_concurrency=2)
+
+        for _ in range(4):
+            await llm.run(lambda: asyncio.sleep(0), 10)
+
+        assert llm.limit > 3
+
+    @pytest.mark.asyncio
+    async def test_slow_completion_shrinks_window(self):
+        """Test latency above the target is treated as congestion"""
+        llm = scheduler(initial_concurrency=10, latency_target=0.01)
+
+        await llm.run(lambda: asyncio.sleep(0.03), 10)
+
+        assert llm.limit == 9
+
+
+class TestPriorityLanes:
+    """Test interactive requests are granted before background ones"""
+
+    @pytest.mark.asyncio
+    async def test_interactive_first(self):
+        """Test a queued interactive call overtakes earlier queued background calls"""
+        llm = scheduler(initial_concurrency=1, max_concurrency=1)
+        order = []
+
+        async def call(name, priority, delay=0.0):
+            async def create():
+                order.append(name)
+                await asyncio.sleep(delay)
+            await llm.run(create, 10, priority)
+
+        blocker = asyncio.ensure_future(call("blocker", Priority.BACKGROUND, delay=0.05))
+        await asyncio.sleep(0.01)
+        queued = [
+            asyncio.ensure_future(call("background", Priority.BACKGROUND)),
+            asyncio.ensure_future(call("interactive", Priority.INTERACTIVE)),
+        ]
+        await asyncio.sleep(0.01)
+        assert llm.stats()["queued"] == {"interactive": 1, "background": 1}
+
+        await asyncio.gather(blocker, *queued)
+
+        assert order == ["blocker", "interactive", "background"]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_is_skipped(self):
+        """Test a caller cancelled while queued never takes a slot"""
+        llm = scheduler(initial_concurrency=1, max_concurrency=1)
+        blocker = asyncio.ensure_future(llm.run(lambda: asyncio.sleep(0.03), 10))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(llm.run(lambda: asyncio.sleep(0), 10))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        await blocker
+
+        assert waiter.cancelled()
+        assert llm.stats()["in_flight"] == 0
+        assert llm.stats()["granted"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -24,6 +24,7 @@ def openai_service():
     """Create OpenAI service instance for testing"""
     with patch('app.services.openai_service.settings') as mock_settings:
         mock_settings.openai_api_key = "test-api-key"
+        mock_settings.OPENAI_BASE_URL = None
         mock_settings.openai_model = "gpt-4"
         mock_settings.openai_max_tokens = 2000
         service = OpenAIService()
@@ -94,6 +95,7 @@ class TestOpenAIService:
         """Test service initialization fails without API key"""
         with patch('app.services.openai_service.settings') as mock_settings:
             mock_settings.openai_api_key = ""
+            mock_settings.OPENAI_BASE_URL = None
             
             with pytest.raises(OpenAIServiceError, match="OpenAI API key not configured"):
                 OpenAIService()
@@ -281,6 +283,7 @@ async def test_service_integration():
     """Integration test with actual service instance"""
     with patch('app.services.openai_service.settings') as mock_settings:
         mock_settings.openai_api_key = "test-key"
+        mock_settings.OPENAI_BASE_URL = None
         mock_settings.openai_model = "gpt-4"
         mock_settings.openai_max_tokens = 2000
         
@@ -0,0 +1,171 @@
+"""
+Unit tests for keyset (cursor) pagination
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.content import BlogPost, ContentTemplate
+from app.models.user import User
+from app.utils.pagination import (
+    Cursor, InvalidCursorError, TotalCountCache, decode_cursor, encode_cursor, keyset_page, paginate_keyset
+)
+
+
+@pytest.fixture
+def db_session():
+    """In-memory SQLite session with a user and 10 posts sharing one server-default timestamp"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(id="user123", email="test@example.com", password_hash="hash"))
+    session.add_all([
+        BlogPost(id=f"post-{i:02d}", user_id="user123", title=f"Post {i % 4}", content="Body")
+        for i in range(10)
+    ])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def walk(session, model, sort_by, descending, per_page):
+    """Follow next_cursor through every page and return the IDs in order"""
+    ids, cursor, pages = [], None, 0
+    while True:
+        statement = paginate_keyset(
+            select(model), getattr(model, sort_by), model.id, sort_by, descending, cursor, per_page
+        )
+        rows, cursor = keyset_page(session.execute(statement).scalars().all(), sort_by, descending, per_page)
+        ids.extend(row.id for row in rows)
+        pages += 1
+        assert pages <= 20, "cursor did not advance"
+        if cursor is None:
+            return ids, pages
+
+
+class TestCursorEncoding:
+    """Test opaque cursor tokens"""
+
+    def test_round_trip(self):
+        """Test strings, numbers and datetimes survive encoding"""
+        for value in ("Post 1", 42, datetime(2025, 1, 28, 10, 30, 0, 123)):
+            cursor = Cursor("created_at", True, value, "post-01")
+            assert decode_cursor(encode_cursor(cursor)) == cursor
+
+    def test_token_is_url_safe(self):
+        """Test tokens need no escaping in a query string"""
+        token = encode_cursor(Cursor("title", False, "a/b+c?", "x"))
+        assert all(c.isalnum() or c in "-_" for c in token)
+
+    @pytest.mark.parametrize("token", ["not-a-cursor", "e30", ""])
+    def test_invalid_token(self, token):
+        """Test malformed tokens are rejected"""
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(token)
+
+    def test_cursor_for_other_sort_order(self):
+        """Test a cursor cannot be replayed against a different ordering"""
+        token = encode_cursor(Cursor("created_at", True, datetime(2025, 1, 1), "post-01"))
+        with pytest.raises(InvalidCursorError):
+            paginate_keyset(select(BlogPost), BlogPost.created_at, BlogPost.id, "created_at", False, token, 3)
+
+
+class TestKeysetPagination:
+    """Test walking pages against a real database"""
+
+    @pytest.mark.parametrize("sort_by,descending", [
+        ("created_at", True),
+        ("created_at", False),
+        ("title", False),
+        ("title", True),
+    ])
+    def test_pages_cover_every_row_once(self, db_session, sort_by, descending):
+        """Test pages are disjoint, complete and in (sort value, id) order, even with tied sort values"""
+        ids, pages = walk(db_session, BlogPost, sort_by, descending, per_page=3)
+
+        expected = sorted(
+            db_session.execute(select(BlogPost)).scalars().all(),
+            key=lambda post: (getattr(post, sort_by), post.id),
+            reverse=descending
+        )
+        assert ids == [post.id for post in expected]
+        assert pages == 4
+
+    def test_exact_final_page(self, db_session):
+        """Test no empty trailing page when rows divide evenly"""
+        ids, pages = walk(db_session, BlogPost, "created_at", True, per_page=5)
+        assert len(ids) == 10
+        assert pages == 2
+
+    def test_deleted_cursor_row(self, db_session):
+        """Test the next page still resolves after the cursor's row is deleted"""
+        db_session.query(BlogPost).update({BlogPost.created_at: datetime(2025, 1, 1)})
+        db_session.commit()
+
+        statement = paginate_keyset(select(BlogPost), BlogPost.title, BlogPost.id, "title", False, None, 4)
+        first, cursor = keyset_page(db_session.execute(statement).scalars().all(), "title", False, 4)
+        db_session.delete(first[-1])
+        db_session.commit()
+
+        statement = paginate_keyset(select(BlogPost), BlogPost.title, BlogPost.id, "title", False, cursor, 10)
+        rest, _ = keyset_page(db_session.execute(statement).scalars().all(), "title", False, 10)
+
+        assert len(first) + len(rest) == 10
+        assert not {post.id for post in first} & {post.id for post in rest}
+
+    def test_templates(self, db_session):
+        """Test template listings page the same way"""
+        base = datetime(2025, 1, 1)
+        db_session.add_all([
+            ContentTemplate(id=f"tpl-{i}", name=f"Template {i}", template_content="{{x}}",
+                            created_by="user123", usage_count=i % 3, created_at=base + timedelta(days=i % 2))
+            for i in range(7)
+        ])
+        db_session.commit()
+
+        ids, _ = walk(db_session, ContentTemplate, "usage_count", True, per_page=2)
+
+        assert len(ids) == len(set(ids)) == 7
+
+
+class TestTotalCountCache:
+    """Test cached listing totals"""
+
+    def test_counts_once_within_ttl(self):
+        """Test the count callback runs only on a miss"""
+        cache = TotalCountCache(ttl_seconds=60)
+        calls = []
+
+        def count():
+            calls.append(1)
+            return 42
+
+        assert cache.get_or_count(("posts", "user123"), count) == 42
+        assert cache.get_or_count(("posts", "user123"), count) == 42
+        assert len(calls) == 1
+
+    def test_expiry(self):
+        """Test expired totals are recounted"""
+        cache = TotalCountCache(ttl_seconds=-1)
+        cache.set("key", 1)
+        assert cache.get("key") is None
+
+    def test_size_bound(self):
+        """Test the least recently used total is evicted"""
+        cache = TotalCountCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,157 @@
+"""
+Unit tests for connection pool sizing and telemetry
+"""
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.core.database import get_engine_options
+from app.core.pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, PoolMetrics, pool_status
+
+
+@pytest.fixture
+def pooled_engine(tmp_path):
+    """File SQLite engine with one pooled connection and no overflow"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05
+    )
+    yield engine
+    engine.dispose()
+
+
+class TestPoolMetrics:
+    """Test PoolMetrics counters"""
+
+    def test_snapshot_percentiles(self):
+        """Test wait percentiles are computed over recorded checkouts"""
+        metrics = PoolMetrics()
+        for wait_ms in range(1, 101):
+            metrics.record_checkout(wait_ms / 1000, in_use=wait_ms % 7, overflowed=wait_ms > 95)
+
+        snapshot = metrics.snapshot()
+
+        assert snapshot["checkouts"] == 100
+        assert snapshot["overflow_checkouts"] == 5
+        assert snapshot["max_in_use"] == 6
+        assert snapshot["p50_wait_ms"] == 51.0
+        assert snapshot["p95_wait_ms"] == 96.0
+        assert snapshot["max_wait_ms"] == 100.0
+
+    def test_empty_snapshot(self):
+        """Test a pool with no checkouts reports zero waits"""
+        snapshot = PoolMetrics().snapshot()
+
+        assert snapshot["checkouts"] == 0
+        assert snapshot["avg_wait_ms"] == 0.0
+        assert snapshot["p99_wait_ms"] == 0.0
+
+
+class TestInstrumentedPool:
+    """Test checkout instrumentation on a real pool"""
+
+    def test_checkouts_and_occupancy(self, pooled_engine):
+        """Test checkouts are counted and occupancy is reported"""
+        with pooled_engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            status = pool_status(pooled_engine.pool)
+            assert status["in_use"] == 1
+            assert status["pool_size"] == 1
+
+        status = pool_status(pooled_engine.pool)
+
+        assert status["pool_class"] == "InstrumentedQueuePool"
+        assert status["in_use"] == 0
+        assert status["checkouts"] == 1
+        assert status["max_in_use"] == 1
+        assert status["timeouts"] == 0
+
+    def test_timeout_is_recorded(self, pooled_engine):
+        """Test an exhausted pool records a checkout timeout"""
+        with pooled_engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                pooled_engine.connect()
+
+        status = pool_status(pooled_engine.pool)
+
+        assert status["timeouts"] == 1
+        assert status["max_wait_ms"] >= 40
+
+    def test_overflow_is_recorded(self, tmp_path):
+        """Test checkouts beyond pool_size count as overflow"""
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'overflow.db'}",
+            poolclass=InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=2
+        )
+        with engine.connect(), engine.connect(), engine.connect():
+            assert pool_status(engine.pool)["overflow"] == 2
+
+        status = pool_status(engine.pool)
+        engine.dispose()
+
+        assert status["overflow_checkouts"] == 2
+        assert status["max_in_use"] == 3
+
+    def test_metrics_survive_dispose(self, pooled_engine):
+        """Test engine.dispose() keeps the metrics of the replaced pool"""
+        with pooled_engine.connect():
+            pass
+        pooled_engine.dispose()
+
+        assert pool_status(pooled_engine.pool)["checkouts"] == 1
+
+
+class TestEngineOptions:
+    """Test settings-driven engine options"""
+
+    def test_file_sqlite_uses_instrumented_pool(self):
+        """Test file databases get a sized, instrumented pool"""
+        options = get_engine_options("sqlite:///./blog.db")
+
+        assert options["poolclass"] is InstrumentedQueuePool
+        assert options["connect_args"] == {"check_same_thread": False}
+        assert "pool_size" in options
+
+    def test_memory_sqlite_keeps_default_pool(self):
+        """Test in-memory SQLite is not given a queue pool"""
+        options = get_engine_options("sqlite://")
+
+        assert "poolclass" not in options
+        assert "pool_size" not in options
+
+    def test_async_postgres_statement_timeout(self, monkeypatch):
+        """Test statement timeout is passed in each driver's own format"""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "DATABASE_STATEMENT_TIMEOUT_MS", 5000)
+
+        async_options = get_engine_options("postgresql+asyncpg://u:p@db/blog", is_async=True)
+        sync_options = get_engine_options("postgresql://u:p@db/blog")
+
+        assert async_options["poolclass"] is InstrumentedAsyncQueuePool
+        assert async_options["connect_args"] == {"server_settings": {"statement_timeout": "5000"}}
+        assert sync_options["connect_args"] == {"options": "-c statement_timeout=5000"}
+
+
+class TestDatabaseMetricsEndpoint:
+    """Test the pool metrics endpoint"""
+
+    def test_requires_authentication(self, client):
+        """Test pool data is not exposed to anonymous callers"""
+        response = client.get("/api/v1/metrics/database")
+
+        assert response.status_code in (401, 403)
+
+    def test_returns_pool_stats(self, authenticated_client):
+        """Test authenticated callers get the pool snapshot"""
+        response = authenticated_client.get("/api/v1/metrics/database")
+
+        assert response.status_code == 200
+        assert "pools" in response.json()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
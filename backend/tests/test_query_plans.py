@@ -0,0 +1,150 @@
+"""
+Query-plan tests: hot queries must be served by an index, not a full table scan
+"""
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import and_, create_engine, desc, event, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.content import BlogPost, ContentTemplate, PostVersion
+from app.models.user import User
+from app.services.template_service import TemplateService
+from app.utils.pagination import Cursor, encode_cursor, paginate_keyset
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+@pytest.fixture
+def engine():
+    """In-memory SQLite engine with all tables and indexes created"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(engine):
+    """Session with a user and a template"""
+    session = sessionmaker(bind=engine)()
+    session.add(User(id="user123", email="test@example.com", password_hash="hash"))
+    session.add(ContentTemplate(id="tpl1", name="Guide", template_content="{{topic}}", created_by="user123"))
+    session.commit()
+    yield session
+    session.close()
+
+
+def query_plan(connection, statement, parameters=()):
+    """EXPLAIN QUERY PLAN detail lines for a SQL statement"""
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def assert_indexed(engine, statement, sorted_by_index=False):
+    """Fail if the statement's plan scans a whole table (or sorts, when ordered by an index)"""
+    compiled = statement.compile(engine)
+    parameters = tuple(compiled.params[name] for name in compiled.positiontup)
+    with engine.connect() as connection:
+        plan = query_plan(connection, str(compiled), parameters)
+
+    assert not [line for line in plan if FULL_SCAN.match(line)], plan
+    if sorted_by_index:
+        assert not [line for line in plan if "TEMP B-TREE" in line], plan
+    return plan
+
+
+class TestBlogPostQueryPlans:
+    """Test ContentService query shapes use the blog post indexes"""
+
+    def test_get_blog_post(self, engine):
+        """Test lookup by (id, user_id) uses the primary key"""
+        plan = assert_indexed(engine, select(BlogPost).where(
+            and_(BlogPost.id == "post1", BlogPost.user_id == "user123")
+        ))
+        assert any("(id=?)" in line for line in plan), plan
+
+    def test_list_posts(self, engine):
+        """Test a user's posts, newest first, are read in index order"""
+        assert_indexed(engine, select(BlogPost).where(
+            BlogPost.user_id == "user123"
+        ).order_by(desc(BlogPost.created_at)).limit(10), sorted_by_index=True)
+
+    @pytest.mark.parametrize("column,value", [
+        ("status", "published"),
+        ("post_type", "how-to"),
+        ("template_category", "business"),
+    ])
+    def test_filtered_posts(self, engine, column, value):
+        """Test filtered post listings use the matching composite index"""
+        plan = assert_indexed(engine, select(BlogPost).where(
+            BlogPost.user_id == "user123",
+            getattr(BlogPost, column) == value
+        ).order_by(desc(BlogPost.created_at)).limit(10), sorted_by_index=True)
+        assert any(f"ix_blog_posts_user_id_{column}_created_at" in line for line in plan), plan
+
+    def test_cursor_page(self, engine):
+        """Test a cursor page is one range seek on (user_id, created_at, id), in index order"""
+        cursor = encode_cursor(Cursor("created_at", True, datetime(2025, 1, 1), "post1"))
+        statement = paginate_keyset(
+            select(BlogPost).where(BlogPost.user_id == "user123"),
+            BlogPost.created_at, BlogPost.id, "created_at", True, cursor, 10
+        )
+        plan = assert_indexed(engine, statement, sorted_by_index=True)
+        assert any(
+            "ix_blog_posts_user_id_created_at_id (user_id=? AND (created_at,id)<(?,?))" in line for line in plan
+        ), plan
+
+    def test_latest_version(self, engine):
+        """Test the next-version lookup reads one index entry"""
+        assert_indexed(engine, select(PostVersion).where(
+            PostVersion.post_id == "post1"
+        ).order_by(desc(PostVersion.version_number)).limit(1), sorted_by_index=True)
+
+
+class TestTemplateQueryPlans:
+    """Test every query TemplateService issues for analytics and ratings"""
+
+    def capture(self, engine, operation):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            operation()
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        return statements
+
+    def assert_statements_indexed(self, engine, statements):
+        assert statements
+        with engine.connect() as connection:
+            for statement, parameters in statements:
+                plan = query_plan(connection, statement, parameters)
+                assert not [line for line in plan if FULL_SCAN.match(line)], (statement, plan)
+
+    def test_template_analytics(self, engine, db_session):
+        """Test analytics queries filter template_usage through its index"""
+        service = TemplateService(db_session)
+        service.track_template_usage("tpl1", "user123", {"topic": "SEO"})
+
+        statements = self.capture(engine, lambda: service.get_template_analytics("tpl1", "user123"))
+
+        self.assert_statements_indexed(engine, statements)
+
+    def test_rate_template(self, engine, db_session):
+        """Test the existing-rating lookup uses the (template_id, user_id) index"""
+        service = TemplateService(db_session)
+
+        statements = self.capture(engine, lambda: service.rate_template("tpl1", "user123", 5))
+
+        self.assert_statements_indexed(engine, statements)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
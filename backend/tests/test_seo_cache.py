@@ -0,0 +1,155 @@
+"""
+Unit tests for the SEO analysis result cache
+"""
+import json
+import pytest
+import redis
+from unittest.mock import MagicMock, patch
+
+from app.services.seo_cache import SEOResultCache
+from app.services.seo_service import SEOAnalysisService
+
+
+@pytest.fixture
+def mock_redis():
+    """Mock Redis client for the shared tier"""
+    client = MagicMock()
+    client.get.return_value = None
+    return client
+
+
+class TestSEOResultCache:
+    """Test cases for SEOResultCache"""
+    
+    def test_key_ignores_keyword_order(self):
+        """Test keys are stable for reordered keywords"""
+        first = SEOResultCache.make_key("1", "content", "title", None, ["seo", "blog"])
+        second = SEOResultCache.make_key("1", "content", "title", None, ["blog", "seo"])
+        
+        assert first == second
+        assert first.startswith("seo_analysis:v1:")
+    
+    def test_key_changes_with_inputs_and_version(self):
+        """Test any input change or rule version bump yields a new key"""
+        base = SEOResultCache.make_key("1", "content", "title", "meta", ["seo"])
+        
+        assert base != SEOResultCache.make_key("2", "content", "title", "meta", ["seo"])
+        assert base != SEOResultCache.make_key("1", "content!", "title", "meta", ["seo"])
+        assert base != SEOResultCache.make_key("1", "content", "title", None, ["seo"])
+    
+    def test_local_hit_and_miss_metrics(self):
+        """Test in-process tier counts hits and misses"""
+        cache = SEOResultCache(use_redis=False)
+        
+        assert cache.get("key") is None
+        cache.set("key", {"seo_score": 70})
+        assert cache.get("key") == {"seo_score": 70}
+        
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+    
+    def test_returned_results_are_copies(self):
+        """Test callers cannot mutate cached entries"""
+        cache = SEOResultCache(use_redis=False)
+        cache.set("key", {"recommendations": []})
+        
+        cache.get("key")["recommendations"].append("mutated")
+        
+        assert cache.get("key") == {"recommendations": []}
+    
+    def test_size_based_eviction(self):
+        """Test least recently used entries are evicted past the byte budget"""
+        entry = {"payload": "x" * 80}
+        entry_size = len(json.dumps(entry, separators=(",", ":")))
+        cache = SEOResultCache(max_bytes=entry_size * 2, use_redis=False)
+        
+        cache.set("a", entry)
+        cache.set("b", entry)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", entry)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == entry
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["size_bytes"] <= entry_size * 2
+    
+    def test_redis_tier_shared_hit(self, mock_redis):
+        """Test results found in Redis are returned and promoted locally"""
+        mock_redis.get.return_value = json.dumps({"seo_score": 42})
+        cache = SEOResultCache(use_redis=True, client=mock_redis)
+        
+        assert cache.get("key") == {"seo_score": 42}
+        assert cache.get("key") == {"seo_score": 42}
+        
+        mock_redis.get.assert_called_once_with("key")
+        assert cache.stats()["redis_hits"] == 1
+        assert cache.stats()["hits"] == 1
+    
+    def test_redis_tier_write_with_ttl(self, mock_redis):
+        """Test results are written to Redis with the configured TTL"""
+        cache = SEOResultCache(use_redis=True, ttl_seconds=60, client=mock_redis)
+        
+        cache.set("key", {"seo_score": 42})
+        
+        mock_redis.setex.assert_called_once_with("key", 60, json.dumps({"seo_score": 42}, separators=(",", ":")))
+    
+    def test_redis_errors_fail_open(self, mock_redis):
+        """Test Redis outages degrade to local caching"""
+        mock_redis.get.side_effect = redis.RedisError("down")
+        mock_redis.setex.side_effect = redis.RedisError("down")
+        cache = SEOResultCache(use_redis=True, client=mock_redis)
+        
+        assert cache.get("key") is None
+        cache.set("key", {"seo_score": 1})
+        assert cache.get("key") == {"seo_score": 1}
+    
+    def test_invalidate(self, mock_redis):
+        """Test invalidation clears local entries and versioned Redis keys"""
+        mock_redis.scan_iter.return_value = ["seo_analysis:v1:abc"]
+        cache = SEOResultCache(use_redis=True, client=mock_redis)
+        cache.set("seo_analysis:v1:abc", {"seo_score": 1})
+        
+        cache.invalidate(version="1")
+        
+        assert cache.stats()["entries"] == 0
+        mock_redis.scan_iter.assert_called_once_with(match="seo_analysis:v1:*")
+        mock_redis.delete.assert_called_once_with("seo_analysis:v1:abc")
+
+
+class TestCachedSEOScore:
+    """Test generate_seo_score with caching enabled"""
+    
+    def test_cached_score_matches_uncached(self):
+        """Test cached analysis returns the same result and skips recomputation"""
+        cache = SEOResultCache(use_redis=False)
+        service = SEOAnalysisService()
+        args = ("SEO matters. Write good content for readers.", "SEO guide", None, ["SEO"])
+        
+        with patch('app.services.seo_service.seo_result_cache', cache):
+            first = service.generate_seo_score(*args, use_cache=True)
+            with patch.object(service, '_generate_seo_score') as mock_generate:
+                second = service.generate_seo_score(*args, use_cache=True)
+                mock_generate.assert_not_called()
+        
+        assert first == second == service.generate_seo_score(*args)
+        assert cache.stats()["hits"] == 1
+    
+    def test_rule_version_change_invalidates(self):
+        """Test bumping SCORING_VERSION stops serving old results"""
+        cache = SEOResultCache(use_redis=False)
+        service = SEOAnalysisService()
+        args = ("SEO matters. Write good content for readers.", "SEO guide", None, ["SEO"])
+        
+        with patch('app.services.seo_service.seo_result_cache', cache):
+            service.generate_seo_score(*args, use_cache=True)
+            with patch.object(SEOAnalysisService, 'SCORING_VERSION', 'next'):
+                service.generate_seo_score(*args, use_cache=True)
+        
+        assert cache.stats()["misses"] == 2
+        assert cache.stats()["hits"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -357,5 +357,120 @@ class TestSEOAnalysisService:
         assert result["keyword_analysis"]["total_words"] > 1000
         assert result["readability"]["words"] > 1000
 
+    def test_analyze_document(self):
+        """Test single-pass document tokenization"""
+        document = self.seo_service.analyze_document("<p>Hello World. Hello again!</p>")
+
+        assert document.clean_text == "Hello World. Hello again!"
+        assert document.lower_text == "hello world. hello again!"
+        assert document.word_count == 4
+        assert document.token_counts["hello"] == 2
+        assert document.sentence_count == 2
+        assert document.syllable_count == sum(
+            self.seo_service._count_syllables(word) for word in document.tokens
+        )
+
+    def test_shared_document_matches_standalone_analysis(self):
+        """Test analyses give identical results with and without a shared document"""
+        document = self.seo_service.analyze_document(self.sample_content)
+
+        assert self.seo_service.analyze_keyword_density(
+            self.sample_content, self.target_keywords, document=document
+        ) == self.seo_service.analyze_keyword_density(self.sample_content, self.target_keywords)
+
+        assert self.seo_service.calculate_readability_score(
+            self.sample_content, document=document
+        ) == self.seo_service.calculate_readability_score(self.sample_content)
+
+    def test_batch_scores_match_single_post_scores(self):
+        """Test batch scoring reproduces generate_seo_score for every post"""
+        posts = [
+            {
+                "content": self.sample_content,
+                "title": self.sample_title,
+                "meta_description": self.sample_meta,
+                "target_keywords": self.target_keywords
+            },
+            {
+                "content": self.sample_content * 20,
+                "title": "SEO",
+                "meta_description": None,
+                "target_keywords": ["SEO", "seo", "readability"]
+            },
+            {
+                "content": "",
+                "title": "An empty draft about blog posts",
+                "meta_description": "Short meta",
+                "target_keywords": ["blog posts"]
+            },
+            {
+                "content": "No keywords here. Just a couple of sentences!",
+                "title": "Untitled",
+                "meta_description": None,
+                "target_keywords": []
+            }
+        ]
+
+        batch_results = self.seo_service.generate_seo_scores_batch(posts)
+
+        assert len(batch_results) == len(posts)
+        for post, batch_result in zip(posts, batch_results):
+            expected = self.seo_service.generate_seo_score(
+                post["content"], post["title"], post["meta_description"], post["target_keywords"]
+            )
+            assert batch_result["seo_score"] == expected["seo_score"]
+            assert batch_result["breakdown"] == expected["breakdown"]
+            assert batch_result["total_words"] == expected["keyword_analysis"].get("total_words", 0)
+
+    def test_batch_scoring_empty(self):
+        """Test batch scoring with no posts"""
+        assert self.seo_service.generate_seo_scores_batch([]) == []
+
+    def test_incremental_analysis_matches_full_analysis(self):
+        """Test scores assembled from paragraph partials equal a full pass"""
+        content = (
+            "SEO basics for blog\n\n"
+            "posts that rank. A heading without a stop\n\n"
+            "continues here! Content strategy matters.\n\n\n"
+            "<p>Short <b>tagged</b> paragraph about SEO</p>"
+        )
+        keywords = ["SEO", "blog posts", "content strategy"]
+
+        full = self.seo_service.generate_seo_score(content, self.sample_title, self.sample_meta, keywords)
+        incremental = self.seo_service.generate_seo_score(
+            content, self.sample_title, self.sample_meta, keywords, incremental=True
+        )
+
+        assert incremental == full
+        # "blog posts" spans a paragraph break and still counts once
+        assert incremental["keyword_analysis"]["keyword_analysis"]["blog posts"]["exact_matches"] == 1
+        # Text without a terminator runs on into the next paragraph as one sentence
+        assert incremental["readability"]["sentences"] == 4
+
+    def test_incremental_analysis_after_edit(self):
+        """Test editing one paragraph only re-analyzes that paragraph"""
+        paragraphs = [f"Paragraph {index} talks about SEO and readability." for index in range(10)]
+        self.seo_service.analyze_document("\n\n".join(paragraphs), incremental=True)
+
+        paragraphs[3] = "An edited paragraph about blog posts."
+        edited = "\n\n".join(paragraphs)
+        before = self.seo_service.get_cache_stats()["paragraphs"]
+        document = self.seo_service.analyze_document(edited, incremental=True)
+        after = self.seo_service.get_cache_stats()["paragraphs"]
+
+        assert after["misses"] - before["misses"] == 1
+        assert after["hits"] - before["hits"] == 9
+        assert document.sentence_count == self.seo_service.analyze_document(edited).sentence_count
+        assert document.syllable_count == self.seo_service.analyze_document(edited).syllable_count
+
+    def test_incremental_analysis_falls_back_for_tags_across_paragraphs(self):
+        """Test a tag spanning a paragraph break is handled by a full pass"""
+        content = "Intro about SEO <img alt='a\n\nb'> and more SEO."
+
+        document = self.seo_service.analyze_document(content, incremental=True)
+
+        assert document.paragraphs is None
+        assert document.tokens == self.seo_service.analyze_document(content).tokens
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
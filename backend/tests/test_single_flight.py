@@ -0,0 +1,230 @@
+"""
+Unit tests for single-flight coalescing of LLM requests
+"""
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.completion_usage import CompletionUsage
+
+from app.services import openai_service as openai_module
+from app.services.openai_service import ContentGenerationRequest, ContentTone, ContentType, OpenAIService
+from app.services.single_flight import SingleFlight
+
+
+def make_completion(content):
+    """ChatCompletion with one assistant message"""
+    return ChatCompletion(
+        id="chatcmpl-test",
+        choices=[Choice(index=0, finish_reason="stop",
+                        message=ChatCompletionMessage(role="assistant", content=content))],
+        created=1700000000,
+        model="gpt-4",
+        object="chat.completion",
+        usage=CompletionUsage(prompt_tokens=10, completion_tokens=20, total_tokens=30)
+    )
+
+
+def counting_call(result="done", delay=0.05, error=None):
+    """Coroutine function that counts its calls"""
+    calls = []
+
+    async def create():
+        calls.append(True)
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return result
+
+    return create, calls
+
+
+def counting_stream(items, delay=0.02, error=None):
+    """Async generator function that counts opens and records when it is closed"""
+    opened, closed = [], []
+
+    async def open_stream():
+        opened.append(True)
+        try:
+            for item in items:
+                await asyncio.sleep(delay)
+                yield item
+            if error:
+                raise error
+        finally:
+            closed.append(True)
+
+    return open_stream, opened, closed
+
+
+async def collect(stream):
+    return [item async for item in stream]
+
+
+class TestCallCoalescing:
+    """Test SingleFlight.do"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_upstream(self):
+        """Test identical concurrent calls run create once and all get its result"""
+        flights = SingleFlight()
+        create, calls = counting_call()
+
+        results = await asyncio.gather(*[flights.do("key", create) for _ in range(5)])
+
+        assert results == ["done"] * 5
+        assert len(calls) == 1
+        assert flights.stats()["collapsed_calls"] == 4
+        assert flights.stats()["in_flight_calls"] == 0
+
+    @pytest.mark.asyncio
+    async def test_sequential_calls_are_not_shared(self):
+        """Test a finished call is not reused (only in-flight requests coalesce)"""
+        flights = SingleFlight()
+        create, calls = counting_call()
+
+        await flights.do("key", create)
+        await flights.do("key", create)
+
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_error_reaches_every_caller(self):
+        """Test an upstream failure is raised to all waiting callers"""
+        flights = SingleFlight()
+        create, calls = counting_call(error=RuntimeError("rate limited"))
+
+        results = await asyncio.gather(*[flights.do("key", create) for _ in range(3)], return_exceptions=True)
+
+        assert len(calls) == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """Test one caller giving up leaves the shared call running for the rest"""
+        flights = SingleFlight()
+        create, calls = counting_call(delay=0.1)
+
+        leaver = asyncio.ensure_future(flights.do("key", create))
+        stayer = asyncio.ensure_future(flights.do("key", create))
+        await asyncio.sleep(0.01)
+        leaver.cancel()
+
+        assert await stayer == "done"
+        assert leaver.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_all_callers_cancelled_cancels_upstream(self):
+        """Test the shared call is cancelled once nobody is waiting for it"""
+        flights = SingleFlight()
+        create, calls = counting_call(delay=10)
+
+        callers = [asyncio.ensure_future(flights.do("key", create)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert flights.stats()["in_flight_calls"] == 0
+
+    @pytest.mark.asyncio
+    async def test_disabled(self, monkeypatch):
+        """Test LLM_SINGLE_FLIGHT_ENABLED=False runs every call"""
+        monkeypatch.setattr("app.services.single_flight.settings.LLM_SINGLE_FLIGHT_ENABLED", False)
+        flights = SingleFlight()
+        create, calls = counting_call()
+
+        await asyncio.gather(*[flights.do("key", create) for _ in range(3)])
+
+        assert len(calls) == 3
+
+
+class TestStreamCoalescing:
+    """Test SingleFlight.subscribe"""
+
+    @pytest.mark.asyncio
+    async def test_late_subscriber_replays_and_follows(self):
+        """Test a subscriber joining mid-stream gets every item from one upstream"""
+        flights = SingleFlight()
+        open_stream, opened, closed = counting_stream(["a", "b", "c", "d"])
+
+        first = asyncio.ensure_future(collect(flights.subscribe("key", open_stream)))
+        await asyncio.sleep(0.05)
+        second = await collect(flights.subscribe("key", open_stream))
+
+        assert await first == ["a", "b", "c", "d"]
+        assert second == ["a", "b", "c", "d"]
+        assert len(opened) == 1 and closed == [True]
+        assert flights.stats()["collapsed_streams"] == 1
+
+    @pytest.mark.asyncio
+    async def test_upstream_closed_when_last_subscriber_leaves(self):
+        """Test the upstream keeps going for remaining subscribers and closes after the last"""
+        flights = SingleFlight()
+        open_stream, opened, closed = counting_stream(["a", "b", "c"], delay=0.05)
+        first = flights.subscribe("key", open_stream)
+        second = flights.subscribe("key", open_stream)
+
+        assert await first.__anext__() == "a"
+        assert await second.__anext__() == "a"
+        await first.aclose()
+        assert closed == []
+
+        await second.aclose()
+        assert closed == [True]
+        assert flights.stats()["in_flight_streams"] == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_error_reaches_every_subscriber(self):
+        """Test an upstream failure mid-stream is raised to all subscribers"""
+        flights = SingleFlight()
+        open_stream, opened, closed = counting_stream(["a"], error=RuntimeError("connection reset"))
+
+        results = await asyncio.gather(
+            collect(flights.subscribe("key", open_stream)),
+            collect(flights.subscribe("key", open_stream)),
+            return_exceptions=True
+        )
+
+        assert [str(result) for result in results] == ["connection reset"] * 2
+        assert len(opened) == 1
+
+
+class TestOpenAIServiceCoalescing:
+    """Test OpenAIService requests are coalesced"""
+
+    @pytest.mark.asyncio
+    async def test_double_click_generates_once(self, monkeypatch):
+        """Test identical concurrent generations (cache bypassed) make one API call"""
+        monkeypatch.setattr(openai_module, "llm_single_flight", SingleFlight())
+        with patch.object(openai_module, "settings") as mock_settings:
+            mock_settings.openai_api_key = "test-api-key"
+            mock_settings.OPENAI_BASE_URL = None
+            mock_settings.openai_model = "gpt-4"
+            mock_settings.openai_max_tokens = 2000
+            service = OpenAIService()
+        request = ContentGenerationRequest(topic="SEO", content_type=ContentType.ARTICLE,
+                                           tone=ContentTone.PROFESSIONAL)
+
+        async def slow_create(**params):
+            await asyncio.sleep(0.05)
+            return make_completion(json.dumps({"title": "SEO", "content": "Body"}))
+
+        create = AsyncMock(side_effect=slow_create)
+        with patch.object(service.client.chat.completions, "create", create):
+            first, second = await asyncio.gather(
+                service.generate_content(request, use_cache=False),
+                service.generate_content(request, use_cache=False)
+            )
+
+        assert first == second
+        assert create.await_count == 1
+        assert openai_module.llm_single_flight.stats()["collapsed_calls"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,76 @@
+"""
+Unit tests for memoized syllable counting
+"""
+import pytest
+from app.utils.syllables import (
+    SyllableCounter,
+    DEFAULT_LEXICON_PATH,
+    estimate_syllables,
+    load_lexicon
+)
+
+
+class TestSyllableCounter:
+    """Test the LRU-memoized syllable engine"""
+
+    def test_estimate_matches_known_words(self):
+        """Test the vowel-group estimator"""
+        assert estimate_syllables("the") == 1
+        assert estimate_syllables("hello") == 2
+        assert estimate_syllables("beautiful") == 3
+        assert estimate_syllables("Optimization") == 5
+        assert estimate_syllables("") == 1
+
+    def test_bundled_lexicon_agrees_with_estimator(self):
+        """Test seeded counts never change readability scores"""
+        lexicon = load_lexicon(DEFAULT_LEXICON_PATH)
+
+        assert len(lexicon) > 100
+        for word, syllables in lexicon.items():
+            assert syllables == estimate_syllables(word), word
+
+    def test_lexicon_loaded_lazily(self):
+        """Test the lexicon is only read on first lookup"""
+        counter = SyllableCounter()
+        assert counter.stats()["lexicon_size"] == 0
+
+        assert counter.count("content") == estimate_syllables("content")
+        assert counter.stats()["lexicon_size"] > 0
+        assert counter.stats()["lexicon_hits"] == 1
+
+    def test_memoization_counters(self):
+        """Test repeated words are served from the cache"""
+        counter = SyllableCounter(lexicon_path=None)
+
+        for _ in range(3):
+            counter.count("readability")
+        counter.count("Readability")
+
+        stats = counter.stats()
+        assert stats["cache_misses"] == 1
+        assert stats["cache_hits"] == 3
+        assert stats["hit_rate"] == 0.75
+
+    def test_cache_is_bounded(self):
+        """Test the cache never grows past maxsize"""
+        counter = SyllableCounter(maxsize=10, lexicon_path=None)
+
+        for index in range(50):
+            counter.count(f"word{index}")
+
+        assert counter.stats()["cache_size"] == 10
+
+    def test_clear(self):
+        """Test clearing resets the counters"""
+        counter = SyllableCounter(lexicon_path=None)
+        counter.count("analysis")
+        counter.clear()
+
+        stats = counter.stats()
+        assert stats["cache_hits"] == 0
+        assert stats["cache_misses"] == 0
+        assert stats["hit_rate"] == 0.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
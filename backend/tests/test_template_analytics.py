@@ -0,0 +1,137 @@
+"""
+Unit tests for aggregate template analytics against a real database
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.content import ContentTemplate, TemplateRating, TemplateUsage
+from app.models.user import User
+from app.services.template_service import TemplateService
+
+
+@pytest.fixture
+def engine():
+    """In-memory SQLite engine with all tables created"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(engine):
+    """Session with two users and a template"""
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        User(id="user123", email="test@example.com", password_hash="hash"),
+        User(id="user456", email="other@example.com", password_hash="hash"),
+        ContentTemplate(id="tpl1", name="Guide", template_content="{{topic}}", created_by="user123"),
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def add_usages(session, count, now=None):
+    """Add usages spread over the last 60 days with varied variables and industries"""
+    now = now or datetime.utcnow()
+    variants = [
+        ({"topic": "SEO", "audience": "marketers"}, "Retail"),
+        ({"topic": "AI"}, "Technology"),
+        (None, None),
+        ({}, ""),
+    ]
+    for i in range(count):
+        variables_used, industry = variants[i % len(variants)]
+        session.add(TemplateUsage(
+            template_id="tpl1", user_id="user123", variables_used=variables_used,
+            industry_context=industry, created_at=now - timedelta(days=i % 60, hours=1)
+        ))
+    session.commit()
+
+
+def count_statements(engine, operation):
+    """Run operation and return (result, number of statements sent to the database)"""
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        return operation(), len(statements)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+
+class TestTemplateAnalyticsAggregates:
+    """Test get_template_analytics computes everything in SQL"""
+
+    def test_aggregates_match_usage(self, db_session):
+        """Test windowed counts, rating stats, variables and industries"""
+        add_usages(db_session, 120)
+        db_session.add_all([
+            TemplateRating(template_id="tpl1", user_id="user123", rating=4),
+            TemplateRating(template_id="tpl1", user_id="user456", rating=5),
+        ])
+        db_session.commit()
+
+        analytics = TemplateService(db_session).get_template_analytics("tpl1", "user123")
+
+        usages = db_session.query(TemplateUsage).all()
+        now = datetime.utcnow()
+        assert analytics["total_usage"] == 120
+        assert analytics["usage_this_month"] == sum(u.created_at >= now - timedelta(days=30) for u in usages)
+        assert analytics["usage_this_week"] == sum(u.created_at >= now - timedelta(days=7) for u in usages)
+        assert analytics["average_rating"] == 4.5
+        assert analytics["total_ratings"] == 2
+        assert analytics["popular_variables"] == {"topic": 60, "audience": 30}
+        assert analytics["usage_by_industry"] == {"Retail": 30, "Technology": 30}
+        assert len(analytics["recent_usage"]) == 10
+
+    def test_unused_template(self, db_session):
+        """Test a template with no usage or ratings"""
+        analytics = TemplateService(db_session).get_template_analytics("tpl1", "user123")
+
+        assert analytics["total_usage"] == 0
+        assert analytics["average_rating"] is None
+        assert analytics["total_ratings"] == 0
+        assert analytics["popular_variables"] == {}
+        assert analytics["recent_usage"] == []
+
+    def test_round_trips_do_not_grow_with_usage(self, engine, db_session):
+        """Test the number of queries is the same for 4 and 400 usages"""
+        service = TemplateService(db_session)
+
+        add_usages(db_session, 4)
+        _, small = count_statements(engine, lambda: service.get_template_analytics("tpl1", "user123"))
+        add_usages(db_session, 396)
+        analytics, large = count_statements(engine, lambda: service.get_template_analytics("tpl1", "user123"))
+
+        assert analytics["total_usage"] == 400
+        assert small == large == 5
+
+    def test_fallback_tally(self, db_session):
+        """Test dialects without JSON key functions stream and tally variables"""
+        add_usages(db_session, 8)
+
+        assert TemplateService._variable_counts_statement("tpl1", "mysql") is None
+        assert TemplateService._tally_variables(
+            db_session.execute(select(TemplateUsage.variables_used)).scalars()
+        ) == {"topic": 4, "audience": 2}
+
+    def test_postgres_variable_keys(self):
+        """Test Postgres aggregates keys with json_object_keys"""
+        statement = TemplateService._variable_counts_statement("tpl1", "postgresql")
+
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+
+        assert "JOIN json_object_keys(template_usage.variables_used) AS anon_1(key) ON true" in sql
+        assert "json_typeof(template_usage.variables_used)" in sql
+        assert "GROUP BY anon_1.key" in sql
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
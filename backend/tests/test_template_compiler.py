@@ -0,0 +1,120 @@
+"""
+Unit tests for compiled template rendering
+"""
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import pytest
+
+from app.utils.template_compiler import CompiledTemplateCache, compile_template
+
+
+def replace_each(template_content, variables):
+    """Reference behaviour: one str.replace per placeholder"""
+    for name, value in variables.items():
+        template_content = template_content.replace(f"{{{{{name}}}}}", value)
+    return template_content
+
+
+class TestCompileTemplate:
+    """Test parsing into segments and rendering with one join"""
+
+    @pytest.mark.parametrize("content", [
+        "Hello {{name}}, welcome to {{company}}!",
+        "{{name}}{{name}} at {{company}}",
+        "{{name}}",
+        "No placeholders here.",
+        "",
+        "Braces { {{name}} }} and {{ spaced }} and {{bad-name}}",
+    ])
+    def test_matches_replace(self, content):
+        """Test output matches per-placeholder str.replace"""
+        variables = {"name": "John", "company": "Acme"}
+
+        rendered, _, _ = compile_template(content).render(variables)
+
+        assert rendered == replace_each(content, variables)
+
+    def test_found_and_replaced(self):
+        """Test placeholders are reported once each, in order of appearance"""
+        compiled = compile_template("{{role}}: {{name}} and {{name}} at {{company}}")
+
+        rendered, found, replaced = compiled.render({"name": "John", "company": "Acme"})
+
+        assert rendered == "{{role}}: John and John at Acme"
+        assert found == ["role", "name", "company"]
+        assert replaced == ["name", "company"]
+
+    def test_values_are_not_rescanned(self):
+        """Test a value containing placeholder syntax is inserted literally"""
+        rendered, _, _ = compile_template("{{a}} {{b}}").render({"a": "{{b}}", "b": "x"})
+
+        assert rendered == "{{b}} x"
+
+    def test_compiled_template_is_reusable(self):
+        """Test rendering does not modify the compiled segments"""
+        compiled = compile_template("Hi {{name}}")
+
+        assert compiled.render({"name": "A"})[0] == "Hi A"
+        assert compiled.render({})[0] == "Hi {{name}}"
+
+
+class TestCompiledTemplateCache:
+    """Test caching by template ID and updated_at"""
+
+    def test_hit_and_version_change(self):
+        """Test the same version is compiled once and an update recompiles"""
+        cache = CompiledTemplateCache()
+        version = datetime(2026, 1, 1)
+
+        first = cache.get("tpl1", version, "Hi {{name}}")
+        assert cache.get("tpl1", version, "Hi {{name}}") is first
+
+        updated = cache.get("tpl1", version + timedelta(seconds=1), "Bye {{name}}")
+        assert updated.render({"name": "A"})[0] == "Bye A"
+        assert cache.stats() == {"size": 1, "hits": 1, "misses": 2}
+
+    def test_invalidate(self):
+        """Test an invalidated template is recompiled"""
+        cache = CompiledTemplateCache()
+        first = cache.get("tpl1", None, "Hi {{name}}")
+
+        cache.invalidate("tpl1")
+
+        assert cache.get("tpl1", None, "Hi {{name}}") is not first
+
+    def test_size_bound(self):
+        """Test the least recently used template is evicted"""
+        cache = CompiledTemplateCache(maxsize=2)
+        a = cache.get("a", None, "{{x}}")
+        cache.get("b", None, "{{x}}")
+        cache.get("a", None, "{{x}}")
+        cache.get("c", None, "{{x}}")
+
+        assert cache.get("a", None, "{{x}}") is a
+        assert cache.stats()["size"] == 2
+        assert cache.stats()["misses"] == 3
+
+
+class TestRenderTemplate:
+    """Test TemplateService.render_template uses the shared cache"""
+
+    def test_render_stored_template(self):
+        """Test a stored template renders and reports placeholders"""
+        from app.services.template_service import TemplateService
+        from app.utils.template_compiler import compiled_template_cache
+
+        template = Mock(id="render-test", updated_at=datetime(2026, 1, 1),
+                        template_content="Hello {{name}} from {{company}}")
+        service = TemplateService(Mock())
+
+        content, found, replaced = service.render_template(template, {"name": "John"})
+
+        assert content == "Hello John from {{company}}"
+        assert found == ["name", "company"]
+        assert replaced == ["name"]
+        compiled_template_cache.invalidate("render-test")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -111,7 +111,7 @@ class TestTemplateEndpoints:
         mock_get_user.return_value = mock_user
         mock_rate_limit.return_value = None
         
-        with patch('app.api.v1.endpoints.template.get_db') as mock_get_db:
+        with patch('app.api.deps.get_db') as mock_get_db:
             mock_db = MagicMock()
             mock_get_db.return_value = mock_db
             
@@ -168,7 +168,7 @@ class TestTemplateEndpoints:
         """Test template creation with duplicate name"""
         mock_get_user.return_value = mock_user
         
-        with patch('app.api.v1.endpoints.template.get_db') as mock_get_db:
+        with patch('app.api.deps.get_db') as mock_get_db:
             mock_db = MagicMock()
             mock_get_db.return_value = mock_db
             
@@ -212,7 +212,7 @@ class TestTemplateEndpoints:
         """Test successful template listing"""
         mock_get_user.return_value = mock_user
         
-        with patch('app.api.v1.endpoints.template.get_db') as mock_get_db:
+        with patch('app.api.deps.get_db') as mock_get_db:
             mock_db = MagicMock()
             mock_get_db.return_value = mock_db
             
@@ -243,7 +243,7 @@ class TestTemplateEndpoints:
         """Test successful template retrieval"""
         mock_get_user.return_value = mock_user
         
-        with patch('app.api.v1.endpoints.template.get_db') as mock_get_db:
+        with patch('app.api.deps.get_db') as mock_get_db:
             mock_db = MagicMock()
             mock_get_db.return_value = mock_db
             
@@ -268,7 +268,7 @@ class TestTemplateEndpoints:
         """Test template retrieval when template not found"""
         mock_get_user.return_value = mock_user
         
-        with patch('app.api.v1.endpoints.template.get_db') as mock_get_db:
+        with patch('app.api.deps.get_db') as mock_get_db:
             mock_db = MagicMock()
             mock_get_db.return_value = mock_db
             
@@ -293,7 +293,7 @@ class TestTemplateEndpoints:
         mock_get_user.return_value = mock_user
         mock_rate_limit.return_value = None
         
-        with patch('app.api.v1.endpoints.template.get_db') as mock_get_db:
+        with patch('app.api.deps.get_db') as mock_get_db:
             mock_db = MagicMock()
             mock_get_db.return_value = mock_db
             
@@ -323,7 +323,7 @@ class TestTemplateEndpoints:
         """Test successful template deletion"""
         mock_get_user.return_value = mock_user
         
-        with patch('app.api.v1.endpoints.template.get_db') as mock_get_db:
+        with patch('app.api.deps.get_db') as mock_get_db:
             mock_db = MagicMock()
             mock_get_db.return_value = mock_db
             
@@ -352,7 +352,7 @@ class TestTemplateEndpoints:
         mock_get_user.return_value = mock_user
         mock_rate_limit.return_value = None
         
-        with patch('app.api.v1.endpoints.template.get_db') as mock_get_db:
+        with patch('app.api.deps.get_db') as mock_get_db:
             mock_db = MagicMock()
             mock_get_db.return_value = mock_db
             
@@ -387,16 +387,13 @@ class TestTemplateEndpoints:
         """Test successful template search"""
         mock_get_user.return_value = mock_user
         
-        with patch('app.api.v1.endpoints.template.get_db') as mock_get_db:
+        with patch('app.api.deps.get_db') as mock_get_db:
             mock_db = MagicMock()
             mock_get_db.return_value = mock_db
             
-            # Mock search query building and results
-            with patch('app.api.v1.endpoints.template._build_search_query') as mock_build_query:
-                mock_query = MagicMock()
-                mock_build_query.return_value = mock_query
-                mock_query.count.return_value = 1
-                mock_query.offset.return_value.limit.return_value.all.return_value = [mock_template]
+            # Mock the service search results
+            with patch('app.services.template_service.TemplateService.search_templates') as mock_search:
+                mock_search.return_value = ([mock_template], 1)
                 
                 search_data = {
                     "query": "test",
@@ -438,7 +435,7 @@ class TestTemplateEndpoints:
         """Test successful template analytics retrieval"""
         mock_get_user.return_value = mock_user
         
-        with patch('app.api.v1.endpoints.template.get_db') as mock_get_db:
+        with patch('app.api.deps.get_db') as mock_get_db:
             mock_db = MagicMock()
             mock_get_db.return_value = mock_db
             
@@ -466,7 +463,7 @@ class TestTemplateEndpoints:
         """Test successful default template seeding"""
         mock_get_user.return_value = mock_user
         
-        with patch('app.api.v1.endpoints.template.get_db') as mock_get_db:
+        with patch('app.api.deps.get_db') as mock_get_db:
             mock_db = MagicMock()
             mock_get_db.return_value = mock_db
             
@@ -0,0 +1,284 @@
+"""
+Unit tests for daily template usage rollups against a real database
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.deps import ThreadedService, get_template_service
+from app.core.database import Base
+from app.main import app
+from app.models.content import ContentTemplate, TemplateRating, TemplateUsage, TemplateUsageDaily
+from app.models.user import User
+from app.services.async_template_service import AsyncTemplateService
+from app.services.template_service import TemplateService
+
+
+def seed(session):
+    """Two users and three public templates in two categories"""
+    session.add_all([
+        User(id="user123", email="test@example.com", password_hash="hash"),
+        User(id="user456", email="other@example.com", password_hash="hash"),
+        ContentTemplate(id="tpl1", name="Guide", template_content="{{topic}}", category="business",
+                        is_public=True, created_by="user123"),
+        ContentTemplate(id="tpl2", name="Review", template_content="{{topic}}", category="business",
+                        is_public=True, created_by="user123"),
+        ContentTemplate(id="tpl3", name="Tutorial", template_content="{{topic}}", category="technology",
+                        is_public=True, created_by="user123"),
+    ])
+
+
+@pytest.fixture
+def db_session():
+    """In-memory SQLite session with users and templates"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    seed(session)
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def async_db():
+    """In-memory aiosqlite session with users and templates"""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        seed(session)
+        await session.commit()
+        yield session
+
+    await engine.dispose()
+
+
+def rollups(session):
+    """Rollup rows as {(template_id, day): (usage, unique users, rating sum, rating count)}"""
+    return {
+        (row.template_id, row.day): (row.usage_count, row.unique_users, row.rating_sum, row.rating_count)
+        for row in session.execute(select(TemplateUsageDaily)).scalars()
+    }
+
+
+class TestIncrementalRollups:
+    """Test track_template_usage and rate_template maintain the rollups"""
+
+    def test_usage_and_unique_users(self, db_session):
+        """Test repeat usage by one user counts once towards unique users"""
+        service = TemplateService(db_session)
+        service.track_template_usage("tpl1", "user123", {"topic": "SEO"})
+        service.track_template_usage("tpl1", "user123", {"topic": "AI"})
+        service.track_template_usage("tpl1", "user456", {})
+
+        assert rollups(db_session) == {("tpl1", datetime.utcnow().date()): (3, 2, 0, 0)}
+
+    def test_ratings(self, db_session):
+        """Test new ratings add to the sum and count and re-rating applies the difference"""
+        service = TemplateService(db_session)
+        service.rate_template("tpl1", "user123", 4)
+        service.rate_template("tpl1", "user456", 5)
+        service.rate_template("tpl1", "user123", 2)
+
+        assert rollups(db_session) == {("tpl1", datetime.utcnow().date()): (0, 0, 7, 2)}
+
+    def test_rerating_updates_original_day(self, db_session):
+        """Test changing an old rating adjusts the day it was first given"""
+        rated_on = datetime.utcnow() - timedelta(days=10)
+        db_session.add(TemplateRating(template_id="tpl1", user_id="user123", rating=3, created_at=rated_on))
+        db_session.commit()
+        service = TemplateService(db_session)
+        service.refresh_usage_rollups(days=None)
+
+        service.rate_template("tpl1", "user123", 5)
+
+        assert rollups(db_session) == {("tpl1", rated_on.date()): (0, 0, 5, 1)}
+
+    def test_fallback_without_upsert(self, db_session):
+        """Test dialects without ON CONFLICT update or insert the row"""
+        assert TemplateService._rollup_upsert_statement("mssql", "tpl1", date.today(), {}) is None
+
+        today = date.today()
+        for _ in range(2):
+            statement = TemplateService._rollup_update_statement("tpl1", today, {"usage_count": 1})
+            if db_session.execute(statement).rowcount == 0:
+                db_session.execute(TemplateService._rollup_insert_statement("tpl1", today, {"usage_count": 1}))
+
+        assert rollups(db_session) == {("tpl1", today): (2, 0, 0, 0)}
+
+    def test_postgres_upsert(self):
+        """Test Postgres adds the increments with ON CONFLICT DO UPDATE"""
+        statement = TemplateService._rollup_upsert_statement(
+            "postgresql", "tpl1", date(2026, 1, 1), {"usage_count": 1, "unique_users": 1}
+        )
+
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+
+        assert "ON CONFLICT (template_id, day) DO UPDATE" in sql
+        assert "usage_count = (template_usage_daily.usage_count + excluded.usage_count)" in sql
+
+
+class TestRefreshRollups:
+    """Test the periodic rebuild from usage and rating rows"""
+
+    def add_history(self, session, now):
+        session.add_all([
+            TemplateUsage(template_id="tpl1", user_id="user123", created_at=now - timedelta(days=5)),
+            TemplateUsage(template_id="tpl1", user_id="user456", created_at=now - timedelta(days=5)),
+            TemplateUsage(template_id="tpl1", user_id="user123", created_at=now - timedelta(days=5, hours=1)),
+            TemplateUsage(template_id="tpl2", user_id="user123", created_at=now),
+            TemplateRating(template_id="tpl2", user_id="user456", rating=4, created_at=now),
+        ])
+        session.commit()
+
+    def test_first_run_rebuilds_history(self, db_session):
+        """Test an empty rollup table is filled from all history"""
+        now = datetime.utcnow().replace(hour=12)
+        self.add_history(db_session, now)
+
+        assert TemplateService(db_session).refresh_usage_rollups() == 2
+
+        assert rollups(db_session) == {
+            ("tpl1", (now - timedelta(days=5)).date()): (3, 2, 0, 0),
+            ("tpl2", now.date()): (1, 1, 4, 1),
+        }
+
+    def test_refresh_repairs_recent_days_only(self, db_session):
+        """Test a windowed refresh fixes drifted recent rows and keeps older ones"""
+        now = datetime.utcnow().replace(hour=12)
+        self.add_history(db_session, now)
+        service = TemplateService(db_session)
+        service.refresh_usage_rollups(days=None)
+        db_session.query(TemplateUsageDaily).update({TemplateUsageDaily.usage_count: 99})
+        db_session.commit()
+
+        service.refresh_usage_rollups(days=2)
+
+        assert rollups(db_session) == {
+            ("tpl1", (now - timedelta(days=5)).date()): (99, 2, 0, 0),
+            ("tpl2", now.date()): (1, 1, 4, 1),
+        }
+
+    def test_matches_incremental(self, db_session):
+        """Test a rebuild reproduces the incrementally maintained rows"""
+        service = TemplateService(db_session)
+        for template_id, user_id in [("tpl1", "user123"), ("tpl1", "user456"), ("tpl1", "user123"), ("tpl3", "user456")]:
+            service.track_template_usage(template_id, user_id, {})
+        service.rate_template("tpl1", "user456", 3)
+        incremental = rollups(db_session)
+
+        service.refresh_usage_rollups(days=1)
+
+        assert rollups(db_session) == incremental
+
+    def test_celery_task(self):
+        """Test the refresh task is registered and on the beat schedule"""
+        from app.celery_app import celery_app
+        from app.tasks.template_tasks import refresh_template_rollups
+
+        assert refresh_template_rollups.name in celery_app.tasks
+        assert refresh_template_rollups.name in {
+            entry["task"] for entry in celery_app.conf.beat_schedule.values()
+        }
+
+
+class TestRollupReads:
+    """Test popularity and stats come from the rollups"""
+
+    def test_popular_and_stats(self, db_session):
+        """Test ranking and category totals use rolled-up usage, not the template counter"""
+        service = TemplateService(db_session)
+        for template_id in ["tpl2", "tpl2", "tpl3"]:
+            service.track_template_usage(template_id, "user123", {})
+        # A stale per-template counter must not affect the results
+        db_session.query(ContentTemplate).filter(ContentTemplate.id == "tpl1").update({"usage_count": 1000})
+        db_session.commit()
+
+        popular = service.get_popular_templates(limit=2)
+        stats = service.get_template_stats()
+
+        assert [t.id for t in popular] == ["tpl2", "tpl3"]
+        assert [t.id for t in service.get_popular_templates(category="business")] == ["tpl2", "tpl1"]
+        assert stats["total_templates"] == 3
+        assert stats["public_templates"] == 3
+        assert stats["total_usage"] == 3
+        by_category = {stat["category"]: stat for stat in stats["category_stats"]}
+        assert by_category["business"]["total_usage"] == 2
+        assert [t["id"] for t in by_category["business"]["popular_templates"]] == ["tpl2", "tpl1"]
+        assert by_category["technology"]["popular_templates"] == [{"id": "tpl3", "name": "Tutorial", "usage_count": 1}]
+
+    @pytest.mark.asyncio
+    async def test_async_matches_sync_shape(self, async_db):
+        """Test AsyncTemplateService maintains and reads the same rollups"""
+        service = AsyncTemplateService(async_db)
+        await service.track_template_usage("tpl3", "user123", {})
+        await service.track_template_usage("tpl3", "user123", {})
+        await service.rate_template("tpl3", "user456", 5)
+        await service.rate_template("tpl3", "user456", 4)
+
+        rows = (await async_db.execute(select(TemplateUsageDaily))).scalars().all()
+        stats = await service.get_template_stats()
+        popular = await service.get_popular_templates(limit=1)
+
+        assert [(r.usage_count, r.unique_users, r.rating_sum, r.rating_count) for r in rows] == [(2, 1, 4, 1)]
+        assert stats["total_usage"] == 2
+        assert [t.id for t in popular] == ["tpl3"]
+
+
+
+class TestRollupEndpoints:
+    """Test the rollup-backed routes through the real router"""
+
+    @pytest.fixture
+    def api_client(self, authenticated_client):
+        """Authenticated client whose template service uses a seeded SQLite database"""
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        seed(session)
+        session.commit()
+        session.query(ContentTemplate).update({"tags": []})
+        session.commit()
+        service = TemplateService(session)
+        for template_id in ["tpl2", "tpl2", "tpl3"]:
+            service.track_template_usage(template_id, "user123", {})
+
+        async def override_template_service():
+            yield ThreadedService(TemplateService(session))
+
+        app.dependency_overrides[get_template_service] = override_template_service
+        yield authenticated_client
+        session.close()
+        engine.dispose()
+
+    def test_stats_route(self, api_client):
+        """Test /stats is not captured by /{template_id}"""
+        response = api_client.get("/api/v1/templates/stats")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_templates"] == 3
+        assert data["total_usage"] == 3
+
+    def test_popular_route(self, api_client):
+        """Test /popular is not captured by /{template_id}"""
+        response = api_client.get("/api/v1/templates/popular", params={"limit": 2})
+
+        assert response.status_code == 200
+        assert [t["id"] for t in response.json()["templates"]] == ["tpl2", "tpl3"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -147,37 +147,21 @@ class TestTemplateService:
         
         # Mock template query
         self.mock_db.query.return_value.filter.return_value.first.return_value = self.mock_template
-        
-        # Mock usage queries
-        self.mock_db.query.return_value.filter.return_value.count.return_value = 10
-        
-        # Mock rating queries
-        mock_ratings = [Mock(rating=4), Mock(rating=5), Mock(rating=3)]
-        self.mock_db.query.return_value.filter.return_value.all.return_value = mock_ratings
-        
-        # Mock usage records for variable analysis
-        mock_usage_records = [
-            Mock(variables_used={"name": "John", "company": "Acme"}, industry_context="tech"),
-            Mock(variables_used={"name": "Jane", "role": "Manager"}, industry_context="business"),
+        self.mock_db.get_bind.return_value.dialect.name = "sqlite"
+        
+        # Mock aggregate queries: usage/rating summary, industries, variables, recent usage
+        summary = Mock(total_usage=10, usage_this_month=6, usage_this_week=2,
+                       average_rating=4.0, total_ratings=3)  # (4+5+3)/3
+        recent_usage = [
+            Mock(created_at=datetime.utcnow(), user_id=user_id,
+                 variables_used={"name": "John", "company": "Acme"}, industry_context="tech")
         ]
-        
-        # Configure mock to return different results for different queries
-        def mock_query_side_effect(*args):
-            mock_query = Mock()
-            if args[0] == ContentTemplate:
-                mock_query.filter.return_value.first.return_value = self.mock_template
-            elif args[0] == TemplateUsage:
-                if hasattr(mock_query.filter.return_value, 'count'):
-                    mock_query.filter.return_value.count.return_value = 10
-                if hasattr(mock_query.filter.return_value, 'all'):
-                    mock_query.filter.return_value.all.return_value = mock_usage_records
-                if hasattr(mock_query.filter.return_value, 'order_by'):
-                    mock_query.filter.return_value.order_by.return_value.limit.return_value.all.return_value = mock_usage_records[:1]
-            elif args[0] == TemplateRating:
-                mock_query.filter.return_value.all.return_value = mock_ratings
-            return mock_query
-        
-        self.mock_db.query.side_effect = mock_query_side_effect
+        results = [Mock(), Mock(), Mock(), Mock()]
+        results[0].one.return_value = summary
+        results[1].all.return_value = [("tech", 1), ("business", 1)]
+        results[2].all.return_value = [("name", 2), ("company", 1), ("role", 1)]
+        results[3].all.return_value = recent_usage
+        self.mock_db.execute.side_effect = results
         
         result = self.template_service.get_template_analytics(template_id, user_id)
         
@@ -187,9 +171,10 @@ class TestTemplateService:
         assert result["total_usage"] == 10
         assert result["average_rating"] == 4.0  # (4+5+3)/3
         assert result["total_ratings"] == 3
-        assert "popular_variables" in result
-        assert "usage_by_industry" in result
-        assert "recent_usage" in result
+        assert result["popular_variables"] == {"name": 2, "company": 1, "role": 1}
+        assert result["usage_by_industry"] == {"tech": 1, "business": 1}
+        assert result["recent_usage"][0]["variables_used"] == ["name", "company"]
+        assert self.mock_db.execute.call_count == 4
     
     def test_get_template_analytics_not_found(self):
         """Test template analytics when template not found"""
@@ -344,43 +329,25 @@ class TestTemplateService:
     
     def test_get_template_stats_success(self):
         """Test successful template statistics retrieval"""
-        # Mock various queries for statistics
-        self.mock_db.query.return_value.count.return_value = 100  # total templates
-        
-        # Mock filter chain for public templates
-        mock_filter_query = Mock()
-        mock_filter_query.count.return_value = 75  # public templates
-        self.mock_db.query.return_value.filter.return_value = mock_filter_query
-        
-        # Mock sum query for total usage
-        self.mock_db.query.return_value.scalar.return_value = 500
-        
-        # Mock category stats
-        mock_category_stats = [
+        # Mock rollup aggregate queries: counts, total usage, per-category usage, top templates
+        counts_result = Mock()
+        counts_result.one.return_value = Mock(total_templates=100, public_templates=75)
+        total_usage_result = Mock()
+        total_usage_result.scalar.return_value = 500
+        category_result = Mock()
+        category_result.all.return_value = [
             Mock(category="business", template_count=30, total_usage=200),
             Mock(category="technology", template_count=25, total_usage=150),
         ]
-        self.mock_db.query.return_value.group_by.return_value.all.return_value = mock_category_stats
+        top_result = Mock()
+        top_result.all.return_value = [
+            Mock(id="template123", category="business", usage_count=120),
+        ]
+        self.mock_db.execute.side_effect = [counts_result, total_usage_result, category_result, top_result]
         
         # Mock popular and recent templates
         mock_templates = [self.mock_template]
-        
-        def mock_query_side_effect(*args):
-            mock_query = Mock()
-            if hasattr(mock_query, 'count'):
-                mock_query.count.return_value = 100
-            if hasattr(mock_query, 'scalar'):
-                mock_query.scalar.return_value = 500
-            if hasattr(mock_query, 'filter'):
-                mock_filter = Mock()
-                mock_filter.count.return_value = 75
-                mock_filter.order_by.return_value.limit.return_value.all.return_value = mock_templates
-                mock_query.filter.return_value = mock_filter
-            if hasattr(mock_query, 'group_by'):
-                mock_query.group_by.return_value.all.return_value = mock_category_stats
-            return mock_query
-        
-        self.mock_db.query.side_effect = mock_query_side_effect
+        self.mock_db.query.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = mock_templates
         
         result = self.template_service.get_template_stats()
         
@@ -391,6 +358,10 @@ class TestTemplateService:
         assert "category_stats" in result
         assert "most_popular_templates" in result
         assert "recent_templates" in result
+        assert result["private_templates"] == 25
+        assert result["total_usage"] == 500
+        assert result["category_stats"][0]["popular_templates"][0]["usage_count"] == 120
+        assert result["category_stats"][1]["popular_templates"] == []
     
     def test_get_template_stats_database_error(self):
         """Test template statistics with database error"""
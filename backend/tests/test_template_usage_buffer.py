@@ -0,0 +1,251 @@
+"""
+Unit tests for batched template usage ingestion
+"""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models.content import ContentTemplate, TemplateUsage, TemplateUsageDaily
+from app.models.user import User
+from app.services.template_service import TemplateService
+from app.services.template_usage_buffer import TemplateUsageBuffer
+
+
+@pytest.fixture
+def engine():
+    """In-memory SQLite engine shared across threads, with users and two templates"""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        User(id="user123", email="test@example.com", password_hash="hash"),
+        User(id="user456", email="other@example.com", password_hash="hash"),
+        ContentTemplate(id="tpl1", name="Guide", template_content="{{topic}}", created_by="user123", usage_count=5),
+        ContentTemplate(id="tpl2", name="Review", template_content="{{topic}}", created_by="user123"),
+    ])
+    session.commit()
+    session.close()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    """Session factory handed to the buffer"""
+    return sessionmaker(bind=engine)
+
+
+def usage_counts(session_factory):
+    with session_factory() as session:
+        return dict(session.execute(select(ContentTemplate.id, ContentTemplate.usage_count)).all())
+
+
+def stored_usages(session_factory):
+    with session_factory() as session:
+        return session.execute(select(func.count(TemplateUsage.id))).scalar()
+
+
+def wait_for(condition, timeout=3.0):
+    """Poll until condition() is true or the timeout passes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestRecordUsageBatch:
+    """Test TemplateService.record_usage_batch"""
+
+    def test_batch_write(self, engine, session_factory):
+        """Test rows, summed counters and rollups are written in one transaction"""
+        now = datetime.utcnow()
+        with session_factory() as session:
+            session.add(TemplateUsage(template_id="tpl1", user_id="user123", created_at=now - timedelta(seconds=1)))
+            session.commit()
+
+        usages = [
+            {"template_id": "tpl1", "user_id": "user123", "variables_used": {"topic": "SEO"}, "created_at": now},
+            {"template_id": "tpl1", "user_id": "user456", "variables_used": None, "created_at": now},
+            {"template_id": "tpl1", "user_id": "user456", "variables_used": {}, "created_at": now},
+            {"template_id": "tpl2", "user_id": "user123", "variables_used": {"topic": "AI"}, "created_at": now},
+        ]
+        updates = []
+        listener = lambda conn, cursor, statement, parameters, context, executemany: (
+            updates.append((statement, executemany)) if statement.startswith("UPDATE content_templates") else None
+        )
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            with session_factory() as session:
+                assert TemplateService(session).record_usage_batch(usages)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert usage_counts(session_factory) == {"tpl1": 8, "tpl2": 1}
+        assert stored_usages(session_factory) == 5
+        assert len(updates) == 1 and updates[0][1]
+        with session_factory() as session:
+            rollups = {
+                row.template_id: (row.usage_count, row.unique_users)
+                for row in session.execute(select(TemplateUsageDaily)).scalars()
+            }
+        # user123 had already used tpl1 today, so only user456 is new
+        assert rollups == {"tpl1": (3, 1), "tpl2": (1, 1)}
+
+    def test_empty_batch(self, session_factory):
+        """Test an empty batch is a no-op"""
+        with session_factory() as session:
+            assert TemplateService(session).record_usage_batch([])
+
+
+class TestTemplateUsageBuffer:
+    """Test buffering, flush triggers and shutdown"""
+
+    def test_flush_on_size(self, session_factory):
+        """Test reaching flush_size wakes the flusher before the interval"""
+        buffer = TemplateUsageBuffer(flush_size=3, flush_interval=60, session_factory=session_factory)
+        try:
+            for _ in range(3):
+                buffer.record("tpl2", "user123", {"topic": "SEO"})
+
+            assert wait_for(lambda: buffer.stats()["flushed"] == 3)
+            assert usage_counts(session_factory)["tpl2"] == 3
+            assert buffer.stats()["flushes"] == 1
+        finally:
+            buffer.close()
+
+    def test_flush_on_interval(self, session_factory):
+        """Test a partial batch is written after flush_interval"""
+        buffer = TemplateUsageBuffer(flush_size=100, flush_interval=0.05, session_factory=session_factory)
+        try:
+            buffer.record("tpl2", "user123", None)
+
+            assert wait_for(lambda: usage_counts(session_factory)["tpl2"] == 1)
+        finally:
+            buffer.close()
+
+    def test_close_writes_pending(self, session_factory):
+        """Test graceful shutdown loses no queued events"""
+        buffer = TemplateUsageBuffer(flush_size=1000, flush_interval=60, session_factory=session_factory)
+        for _ in range(50):
+            buffer.record("tpl1", "user456", None)
+
+        buffer.close()
+
+        assert buffer.pending() == 0
+        assert usage_counts(session_factory)["tpl1"] == 55
+        assert stored_usages(session_factory) == 50
+
+    def test_record_after_close(self, session_factory):
+        """Test events recorded after shutdown are written immediately"""
+        buffer = TemplateUsageBuffer(flush_size=1000, flush_interval=60, session_factory=session_factory)
+        buffer.close()
+
+        buffer.record("tpl2", "user123", None)
+
+        assert usage_counts(session_factory)["tpl2"] == 1
+
+    def test_failed_flush_is_retried(self, session_factory, monkeypatch):
+        """Test a failed batch is kept and written by the next flush"""
+        buffer = TemplateUsageBuffer(flush_size=1000, flush_interval=60, session_factory=session_factory)
+        buffer.record("tpl2", "user123", None)
+        monkeypatch.setattr(TemplateService, "record_usage_batch", lambda self, usages: False)
+
+        assert buffer.flush() == 0
+        assert buffer.pending() == 1
+        assert buffer.stats()["failures"] == 1
+
+        monkeypatch.undo()
+        buffer.close()
+        assert usage_counts(session_factory)["tpl2"] == 1
+
+    def test_bounded_while_failing(self, session_factory):
+        """Test the oldest events are dropped beyond max_pending"""
+        buffer = TemplateUsageBuffer(flush_size=1000, flush_interval=60, max_pending=2,
+                                     session_factory=session_factory)
+        for user_id in ["user123", "user456", "user456"]:
+            buffer.record("tpl2", user_id, None)
+
+        assert buffer.pending() == 2
+        assert buffer.stats()["dropped"] == 1
+        buffer.close()
+
+    def test_deleted_template_events_dropped(self, engine, session_factory):
+        """Test events for a template deleted while buffered do not block the rest"""
+        with engine.connect() as connection:
+            # StaticPool shares this connection, so the FK is enforced for the flush too
+            connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+        buffer = TemplateUsageBuffer(flush_size=1000, flush_interval=60, session_factory=session_factory)
+        buffer.record("tpl1", "user123", None)
+        buffer.record("tpl2", "user123", None)
+        buffer.record("tpl1", "user456", None)
+        with session_factory() as session:
+            session.delete(session.get(ContentTemplate, "tpl1"))
+            session.commit()
+
+        assert buffer.flush() == 1
+        assert buffer.pending() == 0
+        assert usage_counts(session_factory) == {"tpl2": 1}
+        stats = buffer.stats()
+        assert stats["orphaned"] == 2
+        assert stats["failures"] == 0
+        buffer.close()
+
+    def test_failing_event_isolated(self, session_factory, monkeypatch):
+        """Test a batch with one bad event is bisected and the bad event discarded after max_attempts"""
+        buffer = TemplateUsageBuffer(flush_size=1000, flush_interval=60, max_attempts=2,
+                                     session_factory=session_factory)
+        for user_id in ["user123", "user456", "bad-user", "user123", "user456"]:
+            buffer.record("tpl2", user_id, None)
+        record_usage_batch = TemplateService.record_usage_batch
+        monkeypatch.setattr(
+            TemplateService, "record_usage_batch",
+            lambda self, usages: (
+                not any(usage["user_id"] == "bad-user" for usage in usages) and record_usage_batch(self, usages)
+            )
+        )
+
+        assert buffer.flush() == 4
+        assert buffer.pending() == 1
+        assert usage_counts(session_factory)["tpl2"] == 4
+
+        assert buffer.flush() == 0
+        assert buffer.pending() == 0
+        stats = buffer.stats()
+        assert stats["discarded"] == 1
+        assert stats["failures"] == 2
+        assert stats["flushed"] == 4
+        buffer.close()
+
+
+    def test_failing_template_lookup(self, session_factory, monkeypatch):
+        """Test a batch whose template lookup keeps failing is retried, then discarded and counted"""
+        buffer = TemplateUsageBuffer(flush_size=1000, flush_interval=60, max_attempts=2,
+                                     session_factory=session_factory)
+        buffer.record("tpl2", "user123", None)
+
+        def unreachable(self, template_ids):
+            raise RuntimeError("database unavailable")
+
+        monkeypatch.setattr(TemplateService, "existing_template_ids", unreachable)
+
+        assert buffer.flush() == 0
+        assert buffer.pending() == 1
+        assert buffer.flush() == 0
+        assert buffer.pending() == 0
+        stats = buffer.stats()
+        assert stats["discarded"] == 1
+        assert stats["failures"] == 2
+        buffer.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
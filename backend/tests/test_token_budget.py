@@ -0,0 +1,178 @@
+"""
+Unit tests for token counting and prompt budgeting
+"""
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.completion_usage import CompletionUsage
+
+from app.services import openai_service as openai_module
+from app.services.completion_cache import CompletionCache
+from app.services.openai_service import ContentGenerationRequest, ContentTone, ContentType, OpenAIService
+from app.services.token_budget import PromptBudget, section_spans
+
+MODEL = "gpt-4"
+
+
+def make_completion(content="{}"):
+    """ChatCompletion as returned by the API"""
+    return ChatCompletion(
+        id="chatcmpl-test",
+        choices=[Choice(index=0, finish_reason="stop",
+                        message=ChatCompletionMessage(role="assistant", content=content))],
+        created=1700000000,
+        model=MODEL,
+        object="chat.completion",
+        usage=CompletionUsage(prompt_tokens=10, completion_tokens=20, total_tokens=30)
+    )
+
+
+def post(sections=5, words=60):
+    """Markdown post with numbered sections"""
+    return "\n\n".join(
+        f"## Section {n}\n\n" + " ".join(f"s{n}w{i}" for i in range(words)) for n in range(1, sections + 1)
+    )
+
+
+def section(content, number):
+    """Body paragraph of one section"""
+    return content.split(f"## Section {number}\n\n")[1].split("\n\n")[0]
+
+
+class TestCounting:
+    """Test token counts and completion sizing"""
+
+    def test_message_overhead(self):
+        """Test chat requests add the per-message and reply overhead"""
+        budget = PromptBudget()
+        messages = [{"role": "system", "content": "You are an SEO expert."}, {"role": "user", "content": "Hi"}]
+
+        assert budget.count_messages(messages, MODEL) == (
+            3 + 8 + budget.count("You are an SEO expert.", MODEL) + budget.count("Hi", MODEL)
+        )
+        assert budget.count("", MODEL) == 0
+
+    def test_completion_sized_from_target_length(self):
+        """Test max_tokens follows the target word count and never exceeds the ceiling or context window"""
+        budget = PromptBudget()
+
+        short = budget.completion_tokens(MODEL, 500, 4096, target_words=500)
+        long = budget.completion_tokens(MODEL, 500, 4096, target_words=5000)
+        crowded = budget.completion_tokens(MODEL, 8000, 4096, target_words=500)
+
+        assert 500 < short < 4096
+        assert long == 4096
+        assert crowded == 192
+        assert budget.stats()["max_tokens_saved"] == (4096 - short) + (4096 - crowded)
+
+    def test_disabled_keeps_ceiling(self):
+        """Test a disabled budget sends the fixed max_tokens and untrimmed content"""
+        budget = PromptBudget(enabled=False, max_context_tokens=10)
+
+        assert budget.completion_tokens(MODEL, 100, 4096, target_words=300) == 4096
+        assert budget.fit("word " * 500, MODEL) == "word " * 500
+
+
+class TestTrimming:
+    """Test context trimming"""
+
+    def test_fit_trims_and_reports_savings(self):
+        """Test long content is cut to the budget and the saved prompt tokens are counted"""
+        budget = PromptBudget(max_context_tokens=50)
+        content = "keyword " * 1000
+
+        fitted = budget.fit(content, MODEL)
+
+        assert content.startswith(fitted)
+        assert budget.count(fitted, MODEL) <= 50
+        stats = budget.stats()
+        assert stats["trimmed_prompts"] == 1
+        assert stats["prompt_tokens_saved"] == budget.count(content, MODEL) - budget.count(fitted, MODEL)
+
+    def test_section_spans(self):
+        """Test headings split sections, paragraphs split posts without headings"""
+        assert len(section_spans(post(sections=4))) == 4
+        assert section_spans("one\n\ntwo\n\n\nthree") == [(0, 3), (5, 8), (11, 16)]
+
+    def test_neighbouring_sections_only(self):
+        """Test section regeneration context is the previous and next sections"""
+        budget = PromptBudget()
+        content = post()
+
+        before, after = budget.section_context(content, section(content, 3), MODEL, max_tokens=10000)
+
+        assert "## Section 2" in before and "## Section 3" in before
+        assert "Section 1" not in before and "s3w0" not in before
+        assert "## Section 4" in after and "Section 5" not in after
+        assert budget.stats()["prompt_tokens_saved"] > 0
+
+    def test_neighbours_trimmed_to_budget(self):
+        """Test long neighbours keep the text nearest the section"""
+        budget = PromptBudget()
+        content = post(words=400)
+
+        before, after = budget.section_context(content, section(content, 3), MODEL, max_tokens=100)
+
+        assert budget.count(before, MODEL) + budget.count(after, MODEL) <= 100
+        assert before.endswith("## Section 3")
+        assert after.startswith("## Section 4")
+
+    def test_missing_section_uses_start_of_content(self):
+        """Test the start of the post is used when the section text is not found"""
+        budget = PromptBudget()
+        content = post()
+
+        before, after = budget.section_context(content, "not in the post", MODEL, max_tokens=20)
+
+        assert content.startswith(before) and after == ""
+
+
+class TestOpenAIServiceBudgets:
+    """Test OpenAIService requests are sized and trimmed"""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        """Service with a fresh cache and budget"""
+        monkeypatch.setattr(openai_module, "completion_cache", CompletionCache(use_redis=False))
+        monkeypatch.setattr(openai_module, "prompt_budget", PromptBudget())
+        with patch.object(openai_module, "settings") as mock_settings:
+            mock_settings.openai_api_key = "test-api-key"
+            mock_settings.OPENAI_BASE_URL = None
+            mock_settings.openai_model = MODEL
+            mock_settings.openai_max_tokens = 4096
+            return OpenAIService()
+
+    @pytest.mark.asyncio
+    async def test_generation_max_tokens_follows_target_length(self, service):
+        """Test a short target length requests fewer tokens than the configured maximum"""
+        create = AsyncMock(return_value=make_completion(json.dumps({"title": "SEO", "content": "Body"})))
+        request = ContentGenerationRequest(topic="SEO", content_type=ContentType.ARTICLE,
+                                           tone=ContentTone.PROFESSIONAL, target_length=400)
+
+        with patch.object(service.client.chat.completions, "create", create):
+            await service.generate_content(request)
+
+        assert create.await_args.kwargs["max_tokens"] < 4096
+
+    @pytest.mark.asyncio
+    async def test_regenerate_section_sends_neighbours(self, service):
+        """Test only the neighbouring sections of a long post are sent"""
+        content = post(sections=8)
+        create = AsyncMock(return_value=make_completion("Rewritten"))
+
+        with patch.object(service.client.chat.completions, "create", create):
+            result = await service.regenerate_section(content, section(content, 4), "Make it shorter")
+
+        prompt = create.await_args.kwargs["messages"][1]["content"]
+        assert result == "Rewritten"
+        assert "## Section 3" in prompt and "## Section 5" in prompt
+        assert "Section 1" not in prompt and "Section 8" not in prompt
+        assert create.await_args.kwargs["max_tokens"] < 4096
+        assert openai_module.prompt_budget.stats()["prompt_tokens_saved"] > 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])